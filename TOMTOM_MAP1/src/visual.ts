@@ -102,13 +102,18 @@ export class Visual implements IVisual {
       return Number(String(v).trim().replace(",", "."));
     };
 
-    // Build GeoJSON from table rows (guard rows)
+    // Build GeoJSON from table rows (guard rows); track the extent as we go
     const rows = table.rows ?? [];
     const feats: GeoJSON.Feature[] = [];
+    let minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
     for (const r of rows) {
       const lat = safeNum(r[iLat]);
       const lon = safeNum(r[iLon]);
       if (Number.isFinite(lat) && Number.isFinite(lon)) {
+        if (lon < minX) minX = lon;
+        if (lon > maxX) maxX = lon;
+        if (lat < minY) minY = lat;
+        if (lat > maxY) maxY = lat;
         feats.push({
           type: "Feature",
           properties: { label: iLegend >= 0 ? String(r[iLegend] ?? "") : "" },
@@ -140,15 +145,10 @@ export class Visual implements IVisual {
     }
 
     // Fit to data
-    const coords = feats.map(f => (f.geometry as any).coordinates) as [number, number][];
-    const b = coords.reduce(
-      (acc, c) => acc.extend(c as any),
-      new maplibregl.LngLatBounds(coords[0], coords[0])
-    );
     try {
-      this.map.fitBounds(b, { padding: 36, maxZoom: 12, duration: 0 });
+      this.map.fitBounds([[minX, minY], [maxX, maxY]], { padding: 36, maxZoom: 12, duration: 0 });
     } catch {
-      this.map.jumpTo({ center: coords[0], zoom: 8 });
+      this.map.jumpTo({ center: [minX, minY], zoom: 8 });
     }
   }
 }
\ No newline at end of file
@@ -23,18 +23,27 @@ type BubbleSettings = {
   strokeColor?: string;
   strokeWidth?: number;
 };
+type LoadingSettings = {
+  segmented: boolean;   // keep calling fetchMoreData until every row has arrived
+  maxRows: number;      // stop requesting windows past this many rows (0 = no cap)
+};
 type MapSettings = {
   zoom: number; centerLat: number; centerLon: number; baseStyle: BaseStyle;
   labelsOn: boolean; roadsOn: boolean; buildingsOn: boolean; bordersNatOn: boolean; bordersSubOn: boolean;
+  themeSwap: boolean;   // switch base styles by swapping paint from cached style docs
   bubble?: BubbleSettings;
+  loading?: LoadingSettings;
 };
 
 const TOMTOM_KEY = "x10wLdMTZk1FrwDa2ab439Ghi4ZVTrj1";
-const ttStyle = (theme: "main" | "night") =>
+type Theme = "main" | "night";
+const ttStyle = (theme: Theme) =>
   `https://api.tomtom.com/style/2/style/standard.json?key=${TOMTOM_KEY}&theme=${theme}`;
+const themeOf = (b: BaseStyle): Theme => (b === "dark" || b === "darkgray") ? "night" : "main";
 
 export class Visual implements powerbi.extensibility.visual.IVisual {
   private root: HTMLElement;
+  private host: powerbi.extensibility.visual.IVisualHost;
   private mapDiv: HTMLDivElement;
   private map?: maplibregl.Map;
   private ro?: ResizeObserver;
@@ -42,9 +51,21 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
   private lastPointsFC?: GeoJSON.FeatureCollection;
   private lastSettings?: MapSettings;
   private cachedLayerIds: string[] = [];
+  // segmented loading: points accumulate across fetchMoreData windows
+  private loadedFeats: GeoJSON.Feature[] = [];
+  private loadedRows = 0;
+  private pendingData?: GeoJSON.FeatureCollection;
+  private flushFrame = 0;
+  // theme switching: both TomTom style documents, fetched once per session
+  private styleDocs: Partial<Record<Theme, any>> = {};
+  private styleFetches: Partial<Record<Theme, Promise<any>>> = {};
+  private activeTheme?: Theme;            // theme whose style the map shows
+  private activeBase?: BaseStyle;         // base style last applied
+  private grayTouched = new Set<string>(); // "layer\0prop" recolored by applyVectorGray
 
   constructor(opts: powerbi.extensibility.visual.VisualConstructorOptions) {
     this.root = opts.element;
+    this.host = opts.host;
     this.root.classList.add("pbi-maplibre-root");
 
     this.mapDiv = document.createElement("div");
@@ -65,12 +86,15 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
     const dflt: MapSettings = {
       zoom: 11, centerLat: 35.2271, centerLon: -80.8431, baseStyle: "streets",
       labelsOn: true, roadsOn: true, buildingsOn: true, bordersNatOn: true, bordersSubOn: true,
-      bubble: undefined
+      themeSwap: true,
+      bubble: undefined,
+      loading: { segmented: true, maxRows: 0 }
     };
     try {
       const objs = (dv?.metadata as any)?.objects || {};
       const map = objs.map || {};
       const bubble = objs.bubble || {};
+      const loading = objs.loading || {};
 
       const s: MapSettings = {
         zoom: this.num(map.zoom) ?? dflt.zoom,
@@ -85,6 +109,7 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
         buildingsOn:  !!(map.buildingsOn ?? dflt.buildingsOn),
         bordersNatOn: !!(map.bordersNatOn ?? dflt.bordersNatOn),
         bordersSubOn: !!(map.bordersSubOn ?? dflt.bordersSubOn),
+        themeSwap:    !!(map.themeSwap ?? dflt.themeSwap),
         bubble: {
           scaleBySize: !!(bubble.scaleBySize ?? false),
           radiusFixed: this.num(bubble.radiusFixed),
@@ -94,6 +119,10 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
           opacity:     this.num(bubble.opacity),
           strokeColor: this.color(bubble.strokeColor),
           strokeWidth: this.num(bubble.strokeWidth)
+        },
+        loading: {
+          segmented: !!(loading.segmented ?? dflt.loading.segmented),
+          maxRows:   this.num(loading.maxRows) ?? dflt.loading.maxRows
         }
       };
       return s;
@@ -106,7 +135,9 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
   private buildMapIfNeeded(s: MapSettings) {
     if (this.map) return;
 
-    const theme = (s.baseStyle === "dark" || s.baseStyle === "darkgray") ? "night" : "main";
+    const theme = themeOf(s.baseStyle);
+    this.activeTheme = theme;
+    this.activeBase = s.baseStyle;
     this.map = new maplibregl.Map({
       container: this.mapDiv,
       style: ttStyle(theme),
@@ -124,15 +155,24 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
       this.map.addControl(new maplibregl.NavigationControl({ showCompass: true, showZoom: true }));
     } catch {}
 
-    // After every style load, re-cache and apply toggles/theme
+    // After every style load, re-cache and apply toggles/theme (current settings,
+    // not the ones the map was built with)
     const apply = () => {
+      const cur = this.lastSettings ?? s;
       this.cacheLayerIds();
-      this.applyToggles(s);
-      if (s.baseStyle === "gray" || s.baseStyle === "darkgray") this.applyVectorGray(s.baseStyle);
+      this.applyToggles(cur);
+      if (cur.baseStyle === "gray" || cur.baseStyle === "darkgray") this.applyVectorGray(cur.baseStyle);
       // re-apply points (style change drops sources/layers)
-      if (this.lastPointsFC) this.paintPoints(this.lastPointsFC, s);
+      if (this.lastPointsFC) this.paintPoints(this.lastPointsFC, cur);
     };
     this.map.on("load", apply);
+    // warm both theme documents once the first style is up, so a later
+    // base-style change is a paint swap instead of a style reload
+    this.map.once("load", () => {
+      // best effort: a failed warm-up is retried when a swap needs the doc
+      this.fetchStyleDoc("main").catch(() => {});
+      this.fetchStyleDoc("night").catch(() => {});
+    });
     this.map.on("styledata", () => { if (this.map?.isStyleLoaded()) apply(); });
 
     // keep gestures inside map
@@ -192,32 +232,110 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
     const fill = light ? "#e6e6e6" : "#303030";
     const water= light ? "#dcdcdc" : "#2a2a2a";
     const bg   = light ? "#f2f2f2" : "#1e1e1e";
+    // remember what we recolor so a later swap back to a colored base can restore it
+    const set = (id: string, prop: string, v: any) => {
+      this.map!.setPaintProperty(id, prop, v);
+      this.grayTouched.add(`${id}\0${prop}`);
+    };
 
     for (const layer of layers) {
       const id = layer.id; const type = layer.type;
       try {
-        if (type === "background") { this.map!.setPaintProperty(id, "background-color", bg); continue; }
-        if (type === "line")       { this.map!.setPaintProperty(id, "line-color", line); }
+        if (type === "background") { set(id, "background-color", bg); continue; }
+        if (type === "line")       { set(id, "line-color", line); }
         if (type === "fill") {
           const isWater = /water|ocean|river|hydro/i.test(id);
-          this.map!.setPaintProperty(id, "fill-color", isWater ? water : fill);
-          try { this.map!.setPaintProperty(id, "fill-outline-color", line); } catch {}
+          set(id, "fill-color", isWater ? water : fill);
+          try { set(id, "fill-outline-color", line); } catch {}
         }
         if (type === "symbol") {
-          try { this.map!.setPaintProperty(id, "text-color",  text); } catch {}
-          try { this.map!.setPaintProperty(id, "icon-color",  text); } catch {}
-          try { this.map!.setPaintProperty(id, "text-halo-color", light ? "#fff" : "#000"); } catch {}
+          try { set(id, "text-color",  text); } catch {}
+          try { set(id, "icon-color",  text); } catch {}
+          try { set(id, "text-halo-color", light ? "#fff" : "#000"); } catch {}
         }
         if (type === "fill-extrusion") {
-          this.map!.setPaintProperty(id, "fill-extrusion-color", fill);
+          set(id, "fill-extrusion-color", fill);
         }
         if (type === "hillshade") {
-          this.map!.setPaintProperty(id, "hillshade-shadow-color", light ? "#bbb" : "#222");
+          set(id, "hillshade-shadow-color", light ? "#bbb" : "#222");
         }
       } catch { /* ignore layer-specific failures */ }
     }
   }
 
+  // ---- Theme switching (paint swap) -----------------------------------
+  // Fetch a TomTom style document once; later calls share the same promise.
+  private fetchStyleDoc(theme: Theme): Promise<any> {
+    if (this.styleDocs[theme]) return Promise.resolve(this.styleDocs[theme]);
+    if (!this.styleFetches[theme]) {
+      this.styleFetches[theme] = fetch(ttStyle(theme))
+        .then(r => { if (!r.ok) throw new Error(`style ${theme}: HTTP ${r.status}`); return r.json(); })
+        .then(doc => { this.styleDocs[theme] = doc; return doc; })
+        .catch(err => { delete this.styleFetches[theme]; throw err; });
+    }
+    return this.styleFetches[theme]!;
+  }
+
+  // Put back the paint values applyVectorGray overwrote, taken from `doc`
+  // (undefined resets a property to the MapLibre default, as in the doc).
+  private restoreGray(doc: any) {
+    if (!doc) return;
+    const byId = new Map<string, any>((doc?.layers || []).map((l:any) => [l.id, l]));
+    for (const key of this.grayTouched) {
+      const [id, prop] = key.split("\0");
+      try { this.map!.setPaintProperty(id, prop, byId.get(id)?.paint?.[prop]); } catch {}
+    }
+    this.grayTouched.clear();
+  }
+
+  // Two TomTom themes can be swapped in place when they draw the same layers
+  // from the same sources; only paint (and the sprite) differ between them.
+  private sameSkeleton(a: any, b: any): boolean {
+    const ids = (d: any) => (d?.layers || []).map((l:any) => `${l.id}:${l.type}:${l.source ?? ""}:${l["source-layer"] ?? ""}`).join("|");
+    const srcs = (d: any) => JSON.stringify(d?.sources ?? {});
+    return ids(a) === ids(b) && srcs(a) === srcs(b);
+  }
+
+  // Switch base style without setStyle(url): paint properties are copied from
+  // the cached target document onto the live layers, so tile sources and the
+  // user-points source/layer stay put and nothing is re-downloaded or re-tiled.
+  private swapTheme(s: MapSettings): boolean {
+    const map = this.map as any;
+    const to = themeOf(s.baseStyle), from = this.activeTheme;
+    if (!map || !from) return false;
+    if (to === from) {
+      // gray paint can only be undone from the cached doc; without it the
+      // caller reloads the style instead
+      if (this.grayTouched.size && !this.styleDocs[to]) return false;
+      this.restoreGray(this.styleDocs[to]);
+      this.applyToggles(s);
+      if (s.baseStyle === "gray" || s.baseStyle === "darkgray") this.applyVectorGray(s.baseStyle);
+      return true;
+    }
+    const next = this.styleDocs[to], prev = this.styleDocs[from];
+    if (!next || !prev || !this.sameSkeleton(prev, next)) return false;
+
+    this.grayTouched.clear();  // every paint property is rewritten below
+    for (const layer of next.layers) {
+      if (!map.getLayer(layer.id)) continue;
+      const old = (prev.layers.find((l:any) => l.id === layer.id)?.paint) || {};
+      const paint = layer.paint || {};
+      for (const prop of Object.keys(old)) {
+        if (!(prop in paint)) { try { map.setPaintProperty(layer.id, prop, undefined); } catch {} }
+      }
+      for (const prop of Object.keys(paint)) {
+        try { map.setPaintProperty(layer.id, prop, paint[prop]); } catch {}
+      }
+    }
+    if (next.sprite && next.sprite !== prev.sprite && typeof map.setSprite === "function") {
+      try { map.setSprite(next.sprite); } catch {}
+    }
+    this.activeTheme = to;
+    this.applyToggles(s);
+    if (s.baseStyle === "gray" || s.baseStyle === "darkgray") this.applyVectorGray(s.baseStyle);
+    return true;
+  }
+
   // ---- Data → points ---------------------------------------------------
   private buildPointsFromTable(dv: DataView): GeoJSON.Feature[] {
     const t = dv.table; if (!t) return [];
@@ -266,13 +384,14 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
     return feats;
   }
 
-  private paintPoints(fc: GeoJSON.FeatureCollection, s: MapSettings) {
+  // changed=false repaints only (settings, style reload); the data of an
+  // existing source is then left as it is
+  private paintPoints(fc: GeoJSON.FeatureCollection, s: MapSettings, changed = false) {
     if (!this.map) return;
     const map = this.map as any;
     const srcId = "user-points", layerId = "user-points-circle";
 
-    if (map.getSource(srcId)) { try { (map.getSource(srcId) as any).setData(fc); } catch {} }
-    else { try { map.addSource(srcId, { type: "geojson", data: fc }); } catch {} }
+    this.setSourceData(srcId, fc, changed);
 
     // typed bubble settings with safe numeric extraction (preserves zeros)
     const b: BubbleSettings = s.bubble ?? {};
@@ -306,6 +425,34 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
     }
   }
 
+  // A new source gets its data right away; an existing one whose features
+  // changed is updated on the next animation frame, with whatever the latest
+  // segment left in loadedFeats (one setData per frame, not per window).
+  private setSourceData(src: string, fc: GeoJSON.FeatureCollection, changed: boolean) {
+    const map = this.map as any;
+    if (!map.getSource(src)) {
+      try { map.addSource(src, { type: "geojson", data: fc }); } catch {}
+      return;
+    }
+    if (!changed) return;
+    this.pendingData = fc;
+    if (this.flushFrame) return;
+    this.flushFrame = requestAnimationFrame(() => {
+      this.flushFrame = 0;
+      const data = this.pendingData;
+      this.pendingData = undefined;
+      try { if (data) (this.map?.getSource(src) as any)?.setData(data); } catch {}
+    });
+  }
+
+  // Ask Power BI for the next window of rows; true while a segment is pending.
+  private requestNextSegment(dv: DataView, s: MapSettings): boolean {
+    const l = s.loading;
+    if (!dv?.metadata?.segment || !l?.segmented) return false;
+    if (l.maxRows > 0 && this.loadedRows >= l.maxRows) return false;
+    try { return this.host.fetchMoreData(false); } catch { return false; }
+  }
+
   private autofit(feats: GeoJSON.Feature[]) {
     if (!this.map || this.userInteracted || !feats.length) return;
     try {
@@ -334,29 +481,54 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
     }
 
     // If baseStyle (light/dark/gray) changed, swap the vector theme
-    const theme = (s.baseStyle === "dark" || s.baseStyle === "darkgray") ? "night" : "main";
-    // If style URL differs, replace style and re-apply in styledata handler
+    const theme = themeOf(s.baseStyle);
+    // Theme swap mode repaints the live layers from the cached style docs;
+    // otherwise (or if the docs aren't in yet) replace the style and re-apply
+    // in the styledata handler
     try {
-      const current = (this.map as any).getStyle?.().sprite || "";
-      if (!current || current.indexOf(`/style/2/`) === -1 || (theme === "night" && current.indexOf("night") === -1) || (theme === "main" && current.indexOf("night") !== -1)) {
-        this.map.setStyle(ttStyle(theme));
+      const baseChanged = s.baseStyle !== this.activeBase;
+      if (baseChanged && s.themeSwap && this.map.isStyleLoaded() && this.swapTheme(s)) {
+        this.activeBase = s.baseStyle;
+      } else if (theme !== this.activeTheme || (baseChanged && this.grayTouched.size && !this.styleDocs[theme])) {
+        this.grayTouched.clear();
+        this.activeTheme = theme;
+        this.activeBase = s.baseStyle;
+        this.map.setStyle(this.styleDocs[theme] ?? ttStyle(theme));
       } else {
+        if (baseChanged) this.restoreGray(this.styleDocs[theme]);
+        this.activeBase = s.baseStyle;
         // just re-apply toggles/theme on each update (cheap)
         this.applyToggles(s);
         if (s.baseStyle === "gray" || s.baseStyle === "darkgray") this.applyVectorGray(s.baseStyle);
       }
     } catch {}
 
-    // points
-    let feats: GeoJSON.Feature[] = [];
-    if (dv?.table) feats = this.buildPointsFromTable(dv);
-    if (!feats.length && dv) feats = this.buildPointsFromCategorical(dv);
+    // points — a Segment update carries only the next window of rows (we ask
+    // for them with aggregateSegments=false), any other Data update starts
+    // over; Resize / ViewMode / Style updates keep what is loaded and parse
+    // nothing (their dataView repeats the last window)
+    const isData = (o.type & powerbi.VisualUpdateType.Data) !== 0;
+    if (isData && o.operationKind !== powerbi.VisualDataChangeOperationKind.Segment) {
+      this.loadedFeats = [];
+      this.loadedRows = 0;
+    }
+    let seg: GeoJSON.Feature[] = [];
+    if (isData && dv?.table) seg = this.buildPointsFromTable(dv);
+    if (isData && !seg.length && dv) seg = this.buildPointsFromCategorical(dv);
+    if (isData) {
+      this.loadedRows += dv?.table?.rows?.length ?? (dv as any)?.categorical?.categories?.[0]?.values?.length ?? 0;
+    }
+    for (const f of seg) this.loadedFeats.push(f);
 
+    const feats = this.loadedFeats;
+    const more = isData && dv ? this.requestNextSegment(dv, s) : false;
     if (feats.length) {
-      const fc: GeoJSON.FeatureCollection = { type:"FeatureCollection", features: feats };
-      this.lastPointsFC = fc;
-      this.paintPoints(fc, s);
-      this.autofit(feats);
+      // the collection shares loadedFeats, so a queued setData sends the latest
+      if (this.lastPointsFC?.features !== feats) {
+        this.lastPointsFC = { type:"FeatureCollection", features: feats };
+      }
+      this.paintPoints(this.lastPointsFC, s, seg.length > 0);
+      if (isData && !more) this.autofit(feats);
     }
 
     this.map.resize();
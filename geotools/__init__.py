@@ -0,0 +1,38 @@
+"""
+geotools — Python helpers around the asset GeoJSON files and the map visuals.
+
+Modules are imported on demand; nothing heavy is loaded by importing the
+package itself.
+
+  geotools.io         read/normalize the checked-in FeatureCollections
+  geotools.geometry   vectorized per-feature bbox / centroid / area / label anchor
+  geotools.export     GeoJSON -> Power BI table (CSV) or enriched GeoJSON
+  geotools.minify     streaming compact GeoJSON / GeoJSONSeq rewrite with coordinate precision
+  geotools.mercator   Web Mercator projection, integer tile coordinates at a base zoom
+  geotools.wkb        GeoJSON geometry <-> WKB
+  geotools.geoparquet GeoParquet export and row-group-pruned reads (pyarrow)
+  geotools.flatgeobuf FlatGeobuf export, Hilbert R-tree bbox queries over files/HTTP ranges
+  geotools.serve      precompressed (.gz/.br) variants and an asyncio static server (ETag, Range)
+  geotools.tileproxy  disk LRU caching proxy for TomTom / MapLibre styles and tiles (asyncio, offline mode)
+  geotools.stylebundle offline style bundle (style, used sprite icons, glyph ranges) for a visual's src/
+  geotools.store      content-addressed feature/geometry chunks, versioned manifests, checkout by version or time
+  geotools.dissolve   per-LegendID union (parallel cascaded) for the low-zoom layer (shapely)
+  geotools.coverage   region overlap pairs and coverage gaps (sweep-and-prune + GEOS, shapely)
+  geotools.nearest    nearest facility / within-radius per location (batched sphere KD-tree)
+  geotools.propindex  per-property inverted / sorted indexes and boolean filter expressions
+  geotools.geofence   streaming enter/exit events for positions vs the regions (asyncio, grid index)
+  geotools.trajectory ServiceVehicle tracks: SED / Douglas-Peucker, delta-varint columnar .trk, LineStrings
+  geotools.density    hexagon / geohash density tables per LegendID at several resolutions
+  geotools.shard      row-capped shards by LegendID / boundary / quadtree with a manifest
+  geotools.synth      seeded synthetic datasets shaped like the asset files
+  geotools.hilbert    Hilbert-curve ordering, in memory or external merge sort
+  geotools.rtree      static packed Hilbert R-tree over feature bboxes
+  geotools.bench      scaling benchmarks with baseline regression checks
+  geotools.watch      watch a visual project; npm ci / tsc+eslint / pbiviz package / re-zip by what changed
+  geotools.pbiviz     reproducible .pbiviz assembly from .tmp/drop (parallel deflate, segment reuse, verify)
+  geotools.visual     PY<N> bumps, guarded packaging and toolchain checks for the visual projects
+  geotools.scaffold   new TomTom / table visual projects, reset a broken one to a minimal visual
+  geotools.cli        the `geotools` command: every CLI above as a lazily imported subcommand
+"""
+
+__version__ = "0.1.0"
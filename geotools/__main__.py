@@ -0,0 +1,4 @@
+"""python3 -m geotools <command> — same as the `geotools` entry point (geotools.cli)."""
+from .cli import main
+
+main()
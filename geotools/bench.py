@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+bench.py — scaling benchmarks for the geotools pipeline steps.
+
+Runs every step in STEPS over the checked-in asset files and over synthetic
+datasets (geotools.synth) at multiples of Asset_Locations_Regions_Polygons.geojson,
+10x/100x/1000x by default. Each dataset runs in fresh child processes: one
+for wall time and peak RSS (reset via Linux clear_refs before each step),
+one under tracemalloc, so tracing never skews the timings.
+
+Per (dataset, step) it records:
+  wall_s         best of --repeat runs
+  peak_rss_mb    process high-water mark during the step
+  alloc_peak_mb  tracemalloc peak during one extra traced run
+
+Results go to benchmarks/results/<commit>.json together with a per-step
+scaling exponent (log-log slope of time vs. feature count over the synthetic
+datasets). With a stored baseline (benchmarks/baseline.json, written by
+--update-baseline) the run exits 1 when any step is slower or larger than the
+baseline by more than --threshold.
+
+Usage:
+  python3 -m geotools.bench
+  python3 -m geotools.bench --scales 10,100 --repeat 3
+  python3 -m geotools.bench --steps parse,convert,index --no-files
+  python3 -m geotools.bench --update-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BENCH_DIR = REPO_ROOT / "benchmarks"
+DATA_DIR = BENCH_DIR / ".data"
+RESULTS_DIR = BENCH_DIR / "results"
+BASELINE = BENCH_DIR / "baseline.json"
+BASE_FILE = REPO_ROOT / "Asset_Locations_Regions_Polygons.geojson"
+
+SIMPLIFY_TOLERANCE = 0.01   # degrees
+INDEX_QUERIES = 1000
+
+
+# ---- steps ---------------------------------------------------------------
+# Each step takes the shared state dict of one dataset; later steps reuse
+# what earlier ones left in it. Steps must be safe to repeat.
+
+def step_parse(st):
+    from .io import load_collection
+    st["features"] = load_collection(st["path"])["features"]
+
+
+def step_convert(st):
+    from . import geometry
+    st["packed"] = geometry.pack(st["features"])
+
+
+def step_summarize(st):
+    from . import geometry
+    p = st["packed"]
+    st["bounds"] = geometry.bounds(p)
+    geometry.centroids(p)
+    geometry.areas_km2(p)
+
+
+def step_simplify(st):
+    from . import geometry
+    geometry.simplify_packed(st["packed"], SIMPLIFY_TOLERANCE)
+
+
+def step_index(st):
+    import numpy as np
+    from .rtree import PackedRTree
+    b = st["bounds"]
+    tree = PackedRTree(b)
+    ok = np.isfinite(b[:, 0])
+    if not ok.any():
+        return
+    rng = np.random.default_rng(0)
+    lo, hi = b[ok, :2].min(axis=0), b[ok, 2:].max(axis=0)
+    size = (hi - lo) * 0.05
+    for q in rng.uniform(lo, hi, (INDEX_QUERIES, 2)):
+        tree.search(q[0], q[1], q[0] + size[0], q[1] + size[1])
+
+
+def step_sort(st):
+    from . import hilbert
+    hilbert.sort_order(st["features"])
+
+
+def step_export(st):
+    from . import export
+    feats = st["features"]
+    cols = export.summary_columns(feats, labels=False)
+    with tempfile.TemporaryDirectory() as tmp:
+        export.write_csv(Path(tmp) / "out.csv", export.table_rows(feats, cols))
+
+
+STEPS = {
+    "parse": step_parse,
+    "convert": step_convert,
+    "summarize": step_summarize,
+    "simplify": step_simplify,
+    "index": step_index,
+    "sort": step_sort,
+    "export": step_export,
+}
+# steps whose output a step reads; run untimed when not selected themselves
+REQUIRES = {
+    "convert": ("parse",),
+    "summarize": ("convert",),
+    "simplify": ("convert",),
+    "index": ("summarize",),
+    "sort": ("parse",),
+    "export": ("parse",),
+}
+
+
+# ---- measurement ---------------------------------------------------------
+
+def _reset_peak_rss() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return kb / (1024 * 1024) if sys.platform == "darwin" else kb / 1024
+
+
+def run_worker(path: str, steps, repeat: int, traced: bool = False) -> dict:
+    # import everything up front so no step pays for module loading
+    from . import export, geometry, hilbert, io, rtree  # noqa: F401
+    st = {"path": path}
+    out = {}
+    done = set()
+
+    def prepare(name):
+        for dep in REQUIRES.get(name, ()):
+            if dep not in done:
+                prepare(dep)
+                STEPS[dep](st)
+                done.add(dep)
+
+    for name in steps:
+        prepare(name)
+        done.add(name)
+        fn = STEPS[name]
+        if traced:
+            tracemalloc.start()
+            fn(st)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            out[name] = {"alloc_peak_mb": round(peak / 2 ** 20, 2)}
+            continue
+        _reset_peak_rss()
+        best = float("inf")
+        for _ in range(max(1, repeat)):
+            t0 = time.perf_counter()
+            fn(st)
+            best = min(best, time.perf_counter() - t0)
+        out[name] = {"wall_s": round(best, 6), "peak_rss_mb": round(_peak_rss_mb(), 1)}
+    feats = st.get("features") or []
+    packed = st.get("packed")
+    return {"features": len(feats), "vertices": int(len(packed.coords)) if packed is not None else None,
+            "steps": out}
+
+
+# ---- datasets ------------------------------------------------------------
+
+def datasets(scales, seed: int, include_files: bool):
+    """[(name, path, kind)] — checked-in files first, then synthetic ones."""
+    out = []
+    if include_files:
+        for p in sorted(REPO_ROOT.glob("*Asset_Locations_Regions_Polygons*.geojson")):
+            out.append((p.name, p, "file"))
+    if scales:
+        from . import synth
+        from .io import load_collection
+        base = len(load_collection(BASE_FILE)["features"])
+        prof = None
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        for s in scales:
+            n = int(round(base * s))
+            path = DATA_DIR / f"synth_{n}_seed{seed}.geojson"
+            if not path.exists():
+                prof = prof or synth.learn(synth.DEFAULT_SOURCES)
+                print(f"  generating {path.name} …", file=sys.stderr)
+                synth.write_geojson(path, synth.generate_batches(prof, n, seed))
+            out.append((f"synth_x{s:g}", path, "synth"))
+    return out
+
+
+def _run(name, cmd) -> dict:
+    proc = subprocess.run(cmd, cwd=REPO_ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(f"ERROR: {name} failed:\n{proc.stderr}", file=sys.stderr)
+        sys.exit(2)
+    return json.loads(proc.stdout)
+
+
+def _commit() -> str:
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                      text=True, stderr=subprocess.DEVNULL).strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD", "--", "geotools"], cwd=REPO_ROOT).returncode
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def scaling_exponents(results) -> dict:
+    """log-log slope of wall time vs feature count per step (synthetic datasets)."""
+    import numpy as np
+    rows = [r for r in results if r["kind"] == "synth" and r["features"]]
+    out = {}
+    if len(rows) < 2:
+        return out
+    for step in rows[0]["steps"]:
+        x = np.log([r["features"] for r in rows])
+        y = np.log([max(r["steps"][step]["wall_s"], 1e-9) for r in rows])
+        out[step] = round(float(np.polyfit(x, y, 1)[0]), 3)
+    return out
+
+
+def compare(results, baseline, threshold: float, min_wall: float, min_rss: float):
+    """Yield human-readable regressions against a baseline result file."""
+    base = {(r["dataset"], s): m for r in baseline.get("results", []) for s, m in r["steps"].items()}
+    for r in results:
+        for step, m in r["steps"].items():
+            b = base.get((r["dataset"], step))
+            if not b:
+                continue
+            if m["wall_s"] > b["wall_s"] * (1 + threshold) and m["wall_s"] - b["wall_s"] > min_wall:
+                yield f"{r['dataset']}/{step}: wall {b['wall_s']:.4f}s -> {m['wall_s']:.4f}s"
+            if m["peak_rss_mb"] > b["peak_rss_mb"] * (1 + threshold) and m["peak_rss_mb"] - b["peak_rss_mb"] > min_rss:
+                yield f"{r['dataset']}/{step}: peak RSS {b['peak_rss_mb']:.0f}MB -> {m['peak_rss_mb']:.0f}MB"
+            ba, ma = b.get("alloc_peak_mb"), m.get("alloc_peak_mb")
+            if ba is not None and ma is not None and ma > ba * (1 + threshold) and ma - ba > min_rss:
+                yield f"{r['dataset']}/{step}: alloc peak {ba:.1f}MB -> {ma:.1f}MB"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark geotools steps across dataset sizes.")
+    ap.add_argument("--scales", default="10,100,1000",
+                    help="synthetic dataset sizes as multiples of the base asset file ('' for none)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--no-files", action="store_true", help="skip the checked-in asset files")
+    ap.add_argument("--steps", default=",".join(STEPS), help=f"comma list from: {', '.join(STEPS)}")
+    ap.add_argument("--repeat", type=int, default=1, help="timed runs per step (best is kept)")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed relative regression (default 0.25)")
+    ap.add_argument("--min-wall", type=float, default=0.005, help="ignore wall regressions below this many seconds")
+    ap.add_argument("--min-rss", type=float, default=5.0, help="ignore RSS/alloc regressions below this many MB")
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--update-baseline", action="store_true", help="store this run as the baseline")
+    ap.add_argument("--no-check", action="store_true", help="do not compare against the baseline")
+    ap.add_argument("--no-alloc", action="store_true", help="skip the tracemalloc pass")
+    ap.add_argument("--worker", help=argparse.SUPPRESS)
+    ap.add_argument("--traced", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    steps = [s.strip() for s in args.steps.split(",") if s.strip()]
+    unknown = [s for s in steps if s not in STEPS]
+    if unknown:
+        print(f"ERROR: unknown step(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(2)
+
+    if args.worker:
+        json.dump(run_worker(args.worker, steps, args.repeat, args.traced), sys.stdout)
+        return
+
+    scales = [float(s) for s in args.scales.split(",") if s.strip()]
+    results = []
+    for name, path, kind in datasets(scales, args.seed, not args.no_files):
+        cmd = [sys.executable, "-m", "geotools.bench", "--worker", str(path),
+               "--steps", ",".join(steps), "--repeat", str(args.repeat)]
+        r = _run(name, cmd)
+        if not args.no_alloc:
+            for step, m in _run(name, cmd + ["--traced"])["steps"].items():
+                r["steps"][step].update(m)
+        r.update(dataset=name, kind=kind)
+        results.append(r)
+        cells = "  ".join(f"{s}={m['wall_s']:.3f}s/{m['peak_rss_mb']:.0f}MB" for s, m in r["steps"].items())
+        print(f"{name:<50} {r['features']:>8} feats  {cells}")
+
+    report = {
+        "commit": _commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} cpu)",
+        "repeat": args.repeat,
+        "results": results,
+        "scaling": scaling_exponents(results),
+    }
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = RESULTS_DIR / f"{report['commit']}.json"
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nScaling exponents (time ~ n^k): {report['scaling']}")
+    print(f"Results -> {out}")
+
+    baseline = Path(args.baseline)
+    if args.update_baseline:
+        baseline.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Baseline updated -> {baseline}")
+        return
+    if args.no_check or not baseline.exists():
+        return
+    regressions = list(compare(results, json.loads(baseline.read_text(encoding="utf-8")),
+                               args.threshold, args.min_wall, args.min_rss))
+    if regressions:
+        print(f"\nREGRESSIONS vs {baseline.name} (threshold {args.threshold:.0%}):", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+    print(f"No regressions vs {baseline.name}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+cli.py — the `geotools` command: every module's CLI as one subcommand.
+
+  geotools bump TomTom_RB --set 8 --sync-version-to-n
+  geotools package pbi-maplibre-minimal --guard
+  geotools new MyMap --template tomtom
+  geotools minify assets/Regions.geojson -o out.geojson
+
+The command table below is static: `geotools --help` imports nothing from
+the package, and a subcommand imports only its own module (NumPy, shapely,
+pyarrow, zipfile or asyncio come in with the modules that use them, never
+with the packaging commands). The per-project scripts (tom.py,
+bump_label_and_package.py, safe_package.py, setup_and_package.py,
+fix_and_package.py, testEnvironment4Pbiviz.py) are thin shims onto these
+subcommands.
+
+`geotools startup` checks the import-time budget: each probe is run in a
+fresh interpreter, the best of --repeat wall times is compared with
+--budget, and a run with -X importtime lists the slowest imports and any
+module that should never load on those paths. It exits 1 when a probe is over budget or a default probe
+pulls one in.
+
+Usage:
+  pip install -e .            # installs the `geotools` entry point
+  geotools --help
+  python3 -m geotools bump TomTom_RB --no-package
+  geotools startup --budget 60
+  geotools startup --budget 150 -- minify --help
+"""
+import sys
+
+# name -> (module, leading argv, help); kept import-free so --help stays cheap
+COMMANDS = {
+    "bump": ("visual", ["bump"], "new PY<N>, version and guid in pbiviz.json, then package"),
+    "package": ("visual", ["package"], "install dependencies and run pbiviz package (--guard)"),
+    "doctor": ("visual", ["doctor"], "check the Node / pbiviz toolchain (--fix, --package)"),
+    "new": ("scaffold", ["new"], "scaffold a visual project (--template tomtom|table)"),
+    "fix": ("scaffold", ["fix"], "reset src/ and configs of a visual to a minimal one"),
+    "watch": ("watch", [], "rebuild only the stage a change in a visual project affects"),
+    "pbiviz": ("pbiviz", [], "reproducible .pbiviz assembly from .tmp/drop, verify"),
+    "export": ("export", [], "GeoJSON -> Power BI table (CSV) or enriched GeoJSON"),
+    "minify": ("minify", [], "compact GeoJSON / GeoJSONSeq with coordinate precision"),
+    "mercator": ("mercator", [], "Web Mercator projection and tile coordinates"),
+    "geoparquet": ("geoparquet", [], "GeoParquet export and pruned reads"),
+    "flatgeobuf": ("flatgeobuf", [], "FlatGeobuf export and bbox queries"),
+    "serve": ("serve", [], "precompressed variants and a static server"),
+    "tileproxy": ("tileproxy", [], "caching proxy for styles and tiles"),
+    "stylebundle": ("stylebundle", [], "offline style bundle for a visual"),
+    "store": ("store", [], "versioned content-addressed store for the asset collections"),
+    "dissolve": ("dissolve", [], "per-LegendID union"),
+    "coverage": ("coverage", [], "region overlaps and coverage gaps"),
+    "nearest": ("nearest", [], "nearest facility / within radius"),
+    "propindex": ("propindex", [], "property indexes and filter expressions"),
+    "geofence": ("geofence", [], "enter/exit events for positions vs regions"),
+    "trajectory": ("trajectory", [], "track compression, .trk storage, LineStrings"),
+    "density": ("density", [], "hexagon / geohash density tables"),
+    "shard": ("shard", [], "row-capped dataset shards with a manifest"),
+    "synth": ("synth", [], "seeded synthetic datasets"),
+    "hilbert": ("hilbert", [], "Hilbert-curve ordering"),
+    "bench": ("bench", [], "scaling benchmarks with baseline checks"),
+}
+
+# probes for `geotools startup` and modules none of them may import
+PROBES = (["--help"], ["bump", "--help"], ["package", "--help"], ["new", "--help"])
+HEAVY = ("numpy", "shapely", "pyarrow", "zipfile", "asyncio", "ssl", "http.client",
+         "concurrent.futures", "sqlite3", "uuid", "subprocess")
+DEFAULT_BUDGET = 100        # ms, wall time including interpreter start
+
+
+def usage() -> str:
+    width = max(map(len, COMMANDS))
+    lines = ["usage: geotools [--version] <command> [args...]", "",
+             "Geo data and Power BI visual tooling. `geotools <command> --help` for options.", "",
+             "commands:"]
+    lines += [f"  {name:<{width}}  {text}" for name, (_, _, text) in COMMANDS.items()]
+    lines.append(f"  {'startup':<{width}}  import-time budget check of the commands above")
+    return "\n".join(lines)
+
+
+def startup(argv):
+    import argparse
+    import os
+    import subprocess
+    import time
+
+    ap = argparse.ArgumentParser(prog="geotools startup",
+                                 description="Check `geotools` start-up time against a budget.")
+    ap.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="ms per probe (default %(default)s)")
+    ap.add_argument("--repeat", type=int, default=5, help="runs per probe; the best counts")
+    ap.add_argument("--top", type=int, default=5, help="slowest imports to list per probe")
+    ap.add_argument("probe", nargs="*", help="one command line to time instead of the defaults")
+    args = ap.parse_args(argv)
+
+    probes = [args.probe] if args.probe else [list(p) for p in PROBES]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))] +
+        [p for p in os.environ.get("PYTHONPATH", "").split(os.pathsep) if p]))
+    failed = False
+    for probe in probes:
+        cmd = [sys.executable, "-m", "geotools.cli"] + probe
+        best = float("inf")
+        for _ in range(max(1, args.repeat)):
+            t0 = time.perf_counter()
+            subprocess.run(cmd, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+            best = min(best, (time.perf_counter() - t0) * 1000)
+        # -X importtime slows the run down, so it only supplies the module list
+        log = subprocess.run(cmd[:1] + ["-X", "importtime"] + cmd[1:], env=env, stdin=subprocess.DEVNULL,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True).stderr
+        # "import time: self [us] | cumulative | imported package"
+        imports = []
+        for line in log.splitlines():
+            parts = line.split("|")
+            if line.startswith("import time:") and len(parts) == 3 and parts[1].strip().isdigit():
+                imports.append((int(parts[1]), parts[2].strip()))
+        names = {name for _, name in imports}
+        heavy = [m for m in HEAVY if m in names]
+        bad = best > args.budget or (bool(heavy) and not args.probe)
+        failed |= bad
+        print(f"{'FAIL' if bad else 'ok  '} {best:6.1f} ms  geotools {' '.join(probe)}"
+              f"  ({len(imports)} modules)")
+        if heavy:
+            print(f"       imports {', '.join(heavy)}")
+        for us, name in sorted((i for i in imports if "." not in i[1]), reverse=True)[:args.top]:
+            print(f"       {us / 1000:6.1f} ms  {name}")
+    print(f"\nbudget {args.budget:g} ms: " + ("over" if failed else "ok"))
+    sys.exit(1 if failed else 0)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help", "help"):
+        print(usage())
+        return
+    if argv[0] == "--version":
+        from . import __version__
+        print(f"geotools {__version__}")
+        return
+    cmd, rest = argv[0], argv[1:]
+    if cmd == "startup":
+        return startup(rest)
+    if cmd not in COMMANDS:
+        print(f"ERROR: unknown command {cmd!r}; `geotools --help` lists them", file=sys.stderr)
+        sys.exit(2)
+    import importlib
+
+    module, prefix, _ = COMMANDS[cmd]
+    mod = importlib.import_module(f"geotools.{module}")
+    sys.argv[0] = f"geotools {cmd}"
+    if prefix:
+        sys.argv[0] = "geotools"
+    return mod.main(prefix + rest)
+
+
+if __name__ == "__main__":
+    main()
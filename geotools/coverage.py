@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+coverage.py — which regions overlap, and what the regions leave uncovered.
+
+Overlaps: candidate pairs come from a sweep-and-prune over the feature
+bboxes (sorted by min longitude; each box is paired only with the boxes
+whose min longitude falls inside its x-span, then y-span checked), all in
+NumPy. Only pairs whose boxes touch reach the exact GEOS intersection, which
+runs in chunks across a process pool. Pairs are within one LegendID unless
+--across-legends is given.
+
+Duplicates: two features with the same UniqueID, or with identical geometry
+(equal after normalization), are copies rather than overlapping regions.
+They are left out of the overlap report and listed on their own
+(--duplicates-out).
+
+Gaps: per LegendID, boundary minus the cascaded union of its regions
+(geotools.dissolve), reported as polygons with their area.
+
+Areas are spherical km² (geometry.areas_km2), not square degrees.
+
+Needs shapely >= 2 (pip install shapely).
+
+Usage:
+  python3 -m geotools.coverage Asset_Locations_Regions_Polygons.geojson -o overlaps.csv
+  python3 -m geotools.coverage in.geojson --legend TechnicianDieboldNixdorf --workers 8 -o overlaps.csv
+  python3 -m geotools.coverage in.geojson --boundary us.geojson --gaps-out gaps.geojson
+  python3 -m geotools.coverage in.geojson -o overlaps.csv --duplicates-out duplicates.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import geometry
+from .dissolve import _shapely, cascaded_union, to_shapes
+from .io import load_collection, write_collection
+
+PAIR_CHUNK = 2048          # candidate pairs per pool task
+SWEEP_BLOCK = 4096         # boxes swept per vectorized step (bounds memory)
+REPORT_COLUMNS = ("LegendID", "UniqueID_A", "UniqueID_B", "OverlapKm2", "ShareA", "ShareB")
+DUPLICATE_COLUMNS = ("LegendID", "UniqueID_A", "UniqueID_B", "Reason")
+
+
+def candidate_pairs(bounds: np.ndarray, groups: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    (P, 2) index pairs i < j whose bboxes intersect (and share a group, if
+    given), by sweep-and-prune along x.
+    """
+    bounds = np.asarray(bounds, dtype=np.float64)
+    ok = np.flatnonzero(np.isfinite(bounds).all(axis=1))
+    order = ok[np.argsort(bounds[ok, 0], kind="stable")]
+    b = bounds[order]
+    minx = b[:, 0]
+    # last position whose minx is <= this box's maxx
+    stop = np.searchsorted(minx, b[:, 2], side="right")
+    out = []
+    for a in range(0, len(b), SWEEP_BLOCK):
+        s = np.arange(a, min(a + SWEEP_BLOCK, len(b)))
+        counts = np.maximum(stop[s] - s - 1, 0)
+        if not counts.any():
+            continue
+        i = np.repeat(s, counts)
+        j = i + 1 + (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+        keep = (b[j, 1] <= b[i, 3]) & (b[j, 3] >= b[i, 1])
+        i, j = order[i[keep]], order[j[keep]]
+        if groups is not None:
+            same = groups[i] == groups[j]
+            i, j = i[same], j[same]
+        out.append(np.column_stack((np.minimum(i, j), np.maximum(i, j))))
+    if not out:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = np.concatenate(out)
+    return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+
+def shape_areas_km2(geoms: Sequence) -> np.ndarray:
+    """
+    Spherical area of shapely geometries (geometry.areas_km2's formula), taken
+    straight from the GEOS coordinate arrays; non-polygonal parts count 0.
+    """
+    shapely = _shapely()
+    geoms = np.asarray(geoms, dtype=object)
+    out = np.zeros(len(geoms))
+    parts, part_geom = shapely.get_parts(geoms, return_index=True)
+    poly = shapely.get_type_id(parts) == 3
+    parts, part_geom = parts[poly], part_geom[poly]
+    if not len(parts):
+        return out
+    rings, ring_part = shapely.get_rings(parts, return_index=True)
+    exterior = np.r_[True, ring_part[1:] != ring_part[:-1]]
+    xy, vert_ring = shapely.get_coordinates(rings, return_index=True)
+    lon = np.radians(xy[:, 0])
+    slat = np.sin(np.radians(xy[:, 1]))
+    # rings are closed, so consecutive vertices of one ring are its edges
+    edge = vert_ring[1:] == vert_ring[:-1]
+    term = (lon[1:] - lon[:-1]) * (2 + slat[1:] + slat[:-1])
+    ring_sum = np.bincount(vert_ring[1:][edge], weights=term[edge], minlength=len(rings))
+    ring_km2 = np.abs(ring_sum) * geometry.EARTH_RADIUS_M ** 2 / 2 / 1e6
+    signed = np.where(exterior, ring_km2, -ring_km2)
+    np.add.at(out, part_geom[ring_part], signed)
+    return np.maximum(out, 0.0)
+
+
+_WORKER_SHAPES = None
+
+
+def _init_worker(blobs):
+    global _WORKER_SHAPES
+    _WORKER_SHAPES = _shapely().from_wkb(blobs)
+
+
+def _overlap_chunk(pairs: np.ndarray) -> np.ndarray:
+    shapely = _shapely()
+    a, b = _WORKER_SHAPES[pairs[:, 0]], _WORKER_SHAPES[pairs[:, 1]]
+    # shared edges come back as lines, which pack() gives no area
+    return shape_areas_km2(shapely.intersection(a, b))
+
+
+def _legends(features) -> np.ndarray:
+    return np.array([str((f.get("properties") or {}).get("LegendID") or "") for f in features], dtype=object)
+
+
+def duplicate_pairs(features, shapes, groups: Optional[np.ndarray] = None) -> Dict[Tuple[int, int], str]:
+    """
+    (i, j) -> reason ("UniqueID", "geometry" or both) for i < j that are
+    copies of each other (and share a group, if given).
+    """
+    shapely = _shapely()
+    wkb = [None] * len(features)
+    present = np.flatnonzero([s is not None for s in shapes])
+    if len(present):
+        for i, b in zip(present.tolist(), shapely.to_wkb(shapely.normalize(shapes[present]))):
+            wkb[i] = b
+    by_id, by_geom = {}, {}
+    for i, f in enumerate(features):
+        g = "" if groups is None else groups[i]
+        uid = (f.get("properties") or {}).get("UniqueID")
+        if uid not in (None, ""):
+            by_id.setdefault((g, str(uid)), []).append(i)
+        if wkb[i] is not None:
+            by_geom.setdefault((g, wkb[i]), []).append(i)
+    out = {}
+    for why, index in (("UniqueID", by_id), ("geometry", by_geom)):
+        for members in index.values():
+            for a, i in enumerate(members):
+                for j in members[a + 1:]:
+                    out[i, j] = f"{out[i, j]}+{why}" if (i, j) in out else why
+    return out
+
+
+def duplicates(features, shapes=None, across_legends: bool = False) -> List[dict]:
+    """Report rows (DUPLICATE_COLUMNS) for every pair of regions that are copies."""
+    features = list(features)
+    shapes = to_shapes(features) if shapes is None else shapes
+    legends = _legends(features)
+    ids = [(f.get("properties") or {}).get("UniqueID", i) for i, f in enumerate(features)]
+    rows = []
+    for (i, j), why in sorted(duplicate_pairs(features, shapes, None if across_legends else legends).items()):
+        la, lb = legends[i], legends[j]
+        rows.append({"LegendID": la if la == lb else f"{la}|{lb}",
+                     "UniqueID_A": ids[i], "UniqueID_B": ids[j], "Reason": why})
+    return rows
+
+
+def overlaps(features, shapes=None, across_legends: bool = False, workers: int = 1,
+             min_area: float = 0.0) -> List[dict]:
+    """
+    Report rows (REPORT_COLUMNS) for every pair of regions that overlap;
+    pairs of copies (see duplicates()) are left out.
+    """
+    shapely = _shapely()
+    features = list(features)
+    shapes = to_shapes(features) if shapes is None else shapes
+    present = np.array([s is not None for s in shapes], dtype=bool)
+    bounds = np.full((len(features), 4), np.nan)
+    if present.any():
+        bounds[present] = shapely.bounds(shapes[present].tolist())
+    legends = _legends(features)
+    pairs = candidate_pairs(bounds, None if across_legends else legends)
+    copies = duplicate_pairs(features, shapes, None if across_legends else legends)
+    if copies and len(pairs):
+        pairs = pairs[np.array([tuple(p) not in copies for p in pairs.tolist()], dtype=bool)]
+    if not len(pairs):
+        return []
+
+    chunks = [pairs[i:i + PAIR_CHUNK] for i in range(0, len(pairs), PAIR_CHUNK)]
+    blobs = [None if s is None else shapely.to_wkb(s) for s in shapes]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(blobs,)) as pool:
+            areas = np.concatenate(list(pool.map(_overlap_chunk, chunks)))
+    else:
+        _init_worker(blobs)
+        areas = np.concatenate([_overlap_chunk(c) for c in chunks])
+
+    own = shape_areas_km2(shapes)
+    ids = [(f.get("properties") or {}).get("UniqueID", i) for i, f in enumerate(features)]
+    rows = []
+    for (i, j), area in zip(pairs.tolist(), areas.tolist()):
+        if area <= min_area:
+            continue
+        la, lb = legends[i], legends[j]
+        rows.append({
+            "LegendID": la if la == lb else f"{la}|{lb}",
+            "UniqueID_A": ids[i], "UniqueID_B": ids[j],
+            "OverlapKm2": round(area, 3),
+            "ShareA": round(area / own[i], 4) if own[i] else "",
+            "ShareB": round(area / own[j], 4) if own[j] else "",
+        })
+    return rows
+
+
+def gaps(features, boundary: Sequence[dict], shapes=None, workers: int = 1,
+         legends: Optional[Sequence[str]] = None) -> List[dict]:
+    """Per LegendID, the parts of `boundary` no region of that legend covers."""
+    shapely = _shapely()
+    features = list(features)
+    shapes = to_shapes(features) if shapes is None else shapes
+    area = [g for g in to_shapes(list(boundary)) if g is not None]
+    if not area:
+        raise ValueError("boundary has no polygons")
+    area = shapely.union_all(area)
+    by_legend = {}
+    for i, f in enumerate(features):
+        lg = str((f.get("properties") or {}).get("LegendID") or "")
+        if shapes[i] is not None and (not legends or lg in legends):
+            by_legend.setdefault(lg, []).append(i)
+
+    out = []
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        for lg in sorted(by_legend):
+            covered = cascaded_union(shapes[by_legend[lg]], pool)
+            gap = shapely.difference(area, covered)
+            if shapely.is_empty(gap):
+                continue
+            parts = shapely.get_parts(gap)
+            parts = [p for p in parts if shapely.get_type_id(p) == 3]
+            km2 = shape_areas_km2(parts)
+            for p, a in sorted(zip(parts, km2.tolist()), key=lambda t: -t[1]):
+                out.append({"type": "Feature",
+                            "properties": {"LegendID": lg, "GapKm2": round(a, 3)},
+                            "geometry": json.loads(shapely.to_geojson(p))})
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return out
+
+
+def summarize(rows: List[dict]) -> dict:
+    """LegendID -> (overlapping pairs, total overlap km²)."""
+    out = {}
+    for r in rows:
+        n, a = out.get(r["LegendID"], (0, 0.0))
+        out[r["LegendID"]] = (n + 1, a + r["OverlapKm2"])
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Region overlap and coverage-gap report.")
+    ap.add_argument("input", help="regions FeatureCollection")
+    ap.add_argument("-o", "--output", help="overlap pairs CSV")
+    ap.add_argument("--legend", action="append", help="only these LegendIDs (repeatable)")
+    ap.add_argument("--across-legends", action="store_true", help="also pair regions of different LegendIDs")
+    ap.add_argument("--min-area", type=float, default=0.0, help="ignore overlaps up to this many km²")
+    ap.add_argument("--boundary", help="FeatureCollection of the area that should be covered")
+    ap.add_argument("--gaps-out", help="uncovered areas as GeoJSON (needs --boundary)")
+    ap.add_argument("--duplicates-out", help="CSV of region pairs that are copies (same UniqueID or geometry)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="process pool size")
+    args = ap.parse_args(argv)
+    if args.gaps_out and not args.boundary:
+        ap.error("--gaps-out needs --boundary")
+
+    try:
+        feats = load_collection(args.input)["features"]
+        if args.legend:
+            feats = [f for f in feats if f["properties"].get("LegendID") in args.legend]
+        shapes = to_shapes(feats)
+        rows = overlaps(feats, shapes, args.across_legends, args.workers, args.min_area)
+        dups = duplicates(feats, shapes, args.across_legends)
+        gap_feats = None
+        if args.boundary:
+            gap_feats = gaps(feats, load_collection(args.boundary)["features"], shapes, args.workers)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    for lg, (n, a) in sorted(summarize(rows).items()):
+        print(f"{lg:40s} {n:6d} overlapping pairs  {a:14.1f} km²")
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as fh:
+            w = csv.DictWriter(fh, fieldnames=REPORT_COLUMNS)
+            w.writeheader()
+            w.writerows(rows)
+        print(f"Wrote {len(rows)} overlap rows -> {args.output}")
+    if dups:
+        print(f"{len(dups)} duplicate pairs (same UniqueID or geometry) left out of the overlaps")
+    if args.duplicates_out:
+        with open(args.duplicates_out, "w", newline="", encoding="utf-8") as fh:
+            w = csv.DictWriter(fh, fieldnames=DUPLICATE_COLUMNS)
+            w.writeheader()
+            w.writerows(dups)
+        print(f"Wrote {len(dups)} duplicate rows -> {args.duplicates_out}")
+    if gap_feats is not None:
+        for lg in sorted({f["properties"]["LegendID"] for f in gap_feats}):
+            total = sum(f["properties"]["GapKm2"] for f in gap_feats if f["properties"]["LegendID"] == lg)
+            print(f"{lg:40s} uncovered {total:14.1f} km²")
+        if args.gaps_out:
+            write_collection(args.gaps_out, gap_feats)
+            print(f"Wrote {len(gap_feats)} gap polygons -> {args.gaps_out}")
+
+
+if __name__ == "__main__":
+    main()
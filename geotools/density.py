@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+density.py — bin asset locations into hexagon or geohash cells per LegendID.
+
+A density layer drawn from a few thousand cells replaces millions of points.
+Each resolution gets its own table with one row per (cell, LegendID):
+
+  Resolution CellID LegendID Count Sum<measure> CenterLon CenterLat PolygonCoordinates
+
+PolygonCoordinates uses the "lon,lat;…" form of the export table, so the
+cells load into jMapv6 through the same PolyId / PolygonCoordinates roles.
+
+Grids:
+  hex      H3-sized hexagons (average H3 edge length per resolution) on the
+           Lambert cylindrical equal-area projection, so every cell of a
+           resolution covers the same ground area and counts compare
+           directly across latitudes
+  geohash  standard geohash rectangles (precision = resolution)
+
+Cell indexing is vectorized: points are projected and cube-rounded to axial
+hex coordinates, or quantized and bit-interleaved for geohash, then grouped
+with np.unique + bincount. Points come from LocationID; features without one
+fall back to their geometry centroid.
+
+Usage:
+  python3 -m geotools.density Asset_Locations_Regions_Polygons.geojson -o density
+  python3 -m geotools.density in.geojson -o density --grid geohash --resolutions 3,4,5
+  python3 -m geotools.density in.geojson -o density.geojson --resolutions 4 --measure AreaKm2
+"""
+import argparse
+import csv
+import math
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from . import geometry
+from .export import ring_string
+from .io import load_collection, write_collection
+from .nearest import parse_locations
+
+EARTH_RADIUS_KM = 6371.0072          # authalic radius: cell areas come out in true km²
+# average H3 hexagon edge length (km) by resolution
+H3_EDGE_KM = (1281.256, 483.057, 182.513, 68.979, 26.072, 9.854, 3.725, 1.406, 0.531, 0.201, 0.076)
+GEOHASH_ALPHABET = np.frombuffer(b"0123456789bcdefghjkmnpqrstuvwxyz", dtype="S1")
+DEFAULT_RESOLUTIONS = {"hex": (3, 4, 5), "geohash": (3, 4, 5)}
+SQRT3 = math.sqrt(3.0)
+
+
+# ---- hexagons ------------------------------------------------------------
+
+def _project(lon, lat):
+    return EARTH_RADIUS_KM * np.radians(lon), EARTH_RADIUS_KM * np.sin(np.radians(lat))
+
+
+def _unproject(x, y):
+    return np.degrees(x / EARTH_RADIUS_KM), np.degrees(np.arcsin(np.clip(y / EARTH_RADIUS_KM, -1, 1)))
+
+
+def hex_cells(lon, lat, res: int) -> np.ndarray:
+    """(N, 2) axial (q, r) of the pointy-top hexagon containing each point."""
+    size = H3_EDGE_KM[res]
+    x, y = _project(lon, lat)
+    qf = (SQRT3 / 3 * x - y / 3) / size
+    rf = (2 / 3 * y) / size
+    sf = -qf - rf
+    q, r, s = np.round(qf), np.round(rf), np.round(sf)
+    dq, dr, ds = np.abs(q - qf), np.abs(r - rf), np.abs(s - sf)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    q = np.where(fix_q, -r - s, q)
+    r = np.where(fix_r, -q - s, r)
+    return np.column_stack((q, r)).astype(np.int64)
+
+
+def hex_polygons(cells: np.ndarray, res: int):
+    """Centers (C, 2) and closed rings (C, 7, 2) in lon/lat."""
+    size = H3_EDGE_KM[res]
+    q, r = cells[:, 0].astype(np.float64), cells[:, 1].astype(np.float64)
+    cx, cy = size * SQRT3 * (q + r / 2), size * 1.5 * r
+    ang = np.radians(30 + 60 * np.arange(7))
+    vx, vy = cx[:, None] + size * np.cos(ang), cy[:, None] + size * np.sin(ang)
+    clon, clat = _unproject(cx, cy)
+    rlon, rlat = _unproject(vx, vy)
+    return np.column_stack((clon, clat)), np.stack((rlon, rlat), axis=-1)
+
+
+def hex_ids(cells: np.ndarray, res: int) -> List[str]:
+    return [f"h{res}:{q}:{r}" for q, r in cells.tolist()]
+
+
+# ---- geohash -------------------------------------------------------------
+
+def _spread(v: np.ndarray, bits: int) -> np.ndarray:
+    out = np.zeros_like(v)
+    for b in range(bits):
+        out |= ((v >> np.uint64(b)) & np.uint64(1)) << np.uint64(2 * b)
+    return out
+
+
+def geohash_cells(lon, lat, precision: int) -> np.ndarray:
+    """(N, 2) integer lon/lat cell indices of the geohash cell of each point."""
+    nbits = 5 * precision
+    lon_bits, lat_bits = (nbits + 1) // 2, nbits // 2
+    x = np.clip(np.floor((np.asarray(lon) + 180) / 360 * (1 << lon_bits)), 0, (1 << lon_bits) - 1)
+    y = np.clip(np.floor((np.asarray(lat) + 90) / 180 * (1 << lat_bits)), 0, (1 << lat_bits) - 1)
+    return np.column_stack((x, y)).astype(np.int64)
+
+
+def geohash_ids(cells: np.ndarray, precision: int) -> List[str]:
+    nbits = 5 * precision
+    lon_bits, lat_bits = (nbits + 1) // 2, nbits // 2
+    x, y = cells[:, 0].astype(np.uint64), cells[:, 1].astype(np.uint64)
+    # geohash interleaves from the most significant bit, longitude first:
+    # with an odd bit count longitude holds the lowest bit, else latitude does
+    if nbits % 2:
+        code = _spread(x, lon_bits) | (_spread(y, lat_bits) << np.uint64(1))
+    else:
+        code = (_spread(x, lon_bits) << np.uint64(1)) | _spread(y, lat_bits)
+    chars = np.stack([(code >> np.uint64(5 * (precision - 1 - i))) & np.uint64(31)
+                      for i in range(precision)], axis=1).astype(np.int64)
+    return [b"".join(row).decode() for row in GEOHASH_ALPHABET[chars].tolist()]
+
+
+def geohash_polygons(cells: np.ndarray, precision: int):
+    nbits = 5 * precision
+    w = 360 / (1 << ((nbits + 1) // 2))
+    h = 180 / (1 << (nbits // 2))
+    x0, y0 = cells[:, 0] * w - 180, cells[:, 1] * h - 90
+    xs = np.column_stack((x0, x0 + w, x0 + w, x0, x0))
+    ys = np.column_stack((y0, y0, y0 + h, y0 + h, y0))
+    return np.column_stack((x0 + w / 2, y0 + h / 2)), np.stack((xs, ys), axis=-1)
+
+
+GRIDS = {
+    "hex": (hex_cells, hex_ids, hex_polygons),
+    "geohash": (geohash_cells, geohash_ids, geohash_polygons),
+}
+
+
+# ---- aggregation ---------------------------------------------------------
+
+def locations(features) -> np.ndarray:
+    """(N, 2) lon/lat per feature: LocationID, else the geometry centroid."""
+    lat, lon = parse_locations([(f.get("properties") or {}).get("LocationID") for f in features])
+    pts = np.column_stack((lon, lat))
+    missing = ~np.isfinite(pts).all(axis=1)
+    if missing.any():
+        pts[missing] = geometry.centroids(geometry.pack([features[i] for i in np.flatnonzero(missing)]))
+    return pts
+
+
+def measure_values(features, measure: Optional[str]) -> Optional[np.ndarray]:
+    if not measure:
+        return None
+    if measure == "AreaKm2":
+        return np.nan_to_num(geometry.areas_km2(geometry.pack(features)))
+    vals = []
+    for f in features:
+        v = (f.get("properties") or {}).get(measure)
+        try:
+            vals.append(float(v))
+        except (TypeError, ValueError):
+            vals.append(0.0)
+    return np.asarray(vals)
+
+
+def aggregate(features, grid: str = "hex", resolutions: Sequence[int] = (4,),
+              measure: Optional[str] = None, digits: int = 5) -> Dict[int, List[dict]]:
+    """
+    Resolution -> rows, one per (cell, LegendID) with points in it. Locations,
+    legends and the measure are read once and shared by every resolution.
+    """
+    cells_fn, ids_fn, poly_fn = GRIDS[grid]
+    features = list(features)
+    pts = locations(features)
+    ok = np.isfinite(pts).all(axis=1)
+    legends = np.array([str((f.get("properties") or {}).get("LegendID") or "") for f in features], dtype=object)
+    names, code = np.unique(legends[ok], return_inverse=True)
+    values = measure_values(features, measure)
+    weights = values[ok] if values is not None else None
+    lon, lat = pts[ok, 0], pts[ok, 1]
+
+    out = {}
+    for res in resolutions:
+        keys = np.column_stack((cells_fn(lon, lat, res), code))
+        uniq, inv = np.unique(keys, axis=0, return_inverse=True)
+        inv = inv.ravel()
+        counts = np.bincount(inv, minlength=len(uniq))
+        sums = np.bincount(inv, weights=weights, minlength=len(uniq)) if weights is not None else None
+        centers, rings = poly_fn(uniq[:, :2], res)
+        ids = ids_fn(uniq[:, :2], res)
+        rows = []
+        for i in range(len(uniq)):
+            row = {"Resolution": res, "CellID": ids[i], "LegendID": names[uniq[i, 2]], "Count": int(counts[i])}
+            if sums is not None:
+                row[f"Sum{measure}"] = round(float(sums[i]), 3)
+            row["CenterLon"] = round(float(centers[i, 0]), digits)
+            row["CenterLat"] = round(float(centers[i, 1]), digits)
+            row["PolygonCoordinates"] = ring_string(rings[i], digits)
+            rows.append(row)
+        out[res] = rows
+    return out
+
+
+def columns(measure: Optional[str]) -> List[str]:
+    return (["Resolution", "CellID", "LegendID", "Count"] + ([f"Sum{measure}"] if measure else [])
+            + ["CenterLon", "CenterLat", "PolygonCoordinates"])
+
+
+def write_rows(path: Path, rows: List[dict], measure: Optional[str]) -> int:
+    if path.suffix.lower() in (".geojson", ".json"):
+        feats = []
+        for r in rows:
+            ring = [[float(v) for v in p.split(",")] for p in r["PolygonCoordinates"].split(";")]
+            props = {k: v for k, v in r.items() if k != "PolygonCoordinates"}
+            feats.append({"type": "Feature", "properties": props,
+                          "geometry": {"type": "Polygon", "coordinates": [ring]}})
+        return write_collection(path, feats)
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        w = csv.DictWriter(fh, fieldnames=columns(measure))
+        w.writeheader()
+        w.writerows(rows)
+    return len(rows)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Hexagon / geohash density tables from asset locations.")
+    ap.add_argument("input", help="asset FeatureCollection")
+    ap.add_argument("-o", "--output", required=True,
+                    help="output stem; writes <stem>_<grid><res>.csv (or .geojson if the stem ends so)")
+    ap.add_argument("--grid", choices=sorted(GRIDS), default="hex")
+    ap.add_argument("--resolutions", help="comma list (default 3,4,5)")
+    ap.add_argument("--measure", help="numeric property to sum per cell, or AreaKm2 (polygon area)")
+    ap.add_argument("--precision", type=int, default=5, help="decimal digits for coordinates")
+    args = ap.parse_args(argv)
+
+    limit = len(H3_EDGE_KM) - 1 if args.grid == "hex" else 12
+    try:
+        res = [int(v) for v in args.resolutions.split(",")] if args.resolutions else DEFAULT_RESOLUTIONS[args.grid]
+        if any(not 0 <= r <= limit for r in res) or (args.grid == "geohash" and 0 in res):
+            raise ValueError
+    except ValueError:
+        print(f"ERROR: --resolutions must be integers in {1 if args.grid == 'geohash' else 0}..{limit}",
+              file=sys.stderr)
+        sys.exit(2)
+
+    try:
+        feats = load_collection(args.input)["features"]
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    out = Path(args.output)
+    suffix = out.suffix if out.suffix.lower() in (".geojson", ".json", ".csv") else ".csv"
+    stem = out.with_suffix("") if out.suffix.lower() in (".geojson", ".json", ".csv") else out
+    for r, rows in aggregate(feats, args.grid, res, args.measure, args.precision).items():
+        path = stem.with_name(f"{stem.name}_{args.grid}{r}{suffix}")
+        n = write_rows(path, rows, args.measure)
+        print(f"Wrote {n} cells -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+dissolve.py — union region polygons per LegendID for the low-zoom layer.
+
+At national zoom the visuals draw every region with its own fill and
+outline; after dissolving, each LegendID (optionally split by Display) is one
+MultiPolygon, so overlapping and adjacent regions cost one fill and no inner
+edges.
+
+Unions are cascaded: polygons are put in Hilbert order, unioned in
+spatially compact chunks, and the partial results are unioned again in
+small groups until one geometry is left. With --workers > 1 each round runs
+across a process pool (geometries travel as WKB), so large legends use all
+cores instead of one long GEOS call.
+
+Needs shapely >= 2 (pip install shapely); the rest of geotools does not.
+
+Usage:
+  python3 -m geotools.dissolve Asset_Locations_Regions_Polygons.geojson -o lowzoom.geojson
+  python3 -m geotools.dissolve big.geojson -o lowzoom.geojson --by-display --workers 8 --simplify 0.01
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from . import hilbert
+from .io import load_collection, write_collection
+from .wkb import positions
+
+DEFAULT_CHUNK = 256     # polygons per first-round union
+FANOUT = 8              # partial results per later-round union
+LAYER_TYPE = "Dissolved"
+
+
+def _shapely():
+    try:
+        import shapely
+    except ImportError as e:
+        raise RuntimeError("dissolve needs shapely >= 2 (pip install shapely)") from e
+    return shapely
+
+
+def _rings(geom) -> List[list]:
+    """Polygons of a GeoJSON geometry as lists of closed (N, 2) rings."""
+    if not geom:
+        return []
+    t, c = geom.get("type"), geom.get("coordinates")
+    polys = [c] if t == "Polygon" else c if t == "MultiPolygon" else []
+    out = []
+    for poly in polys or ():
+        rings = []
+        for r in poly or ():
+            pts = positions(r)
+            if len(pts) and not np.array_equal(pts[0], pts[-1]):
+                pts = np.vstack((pts, pts[:1]))
+            if len(pts) >= 4:
+                rings.append(pts)
+        if rings:
+            out.append(rings)
+    return out
+
+
+def to_shapes(features) -> np.ndarray:
+    """Valid shapely (Multi)Polygons, one per feature (None without area)."""
+    shapely = _shapely()
+    out = np.empty(len(features), dtype=object)
+    for i, f in enumerate(features):
+        polys = [shapely.polygons(rings[0], holes=rings[1:] or None) for rings in _rings(f.get("geometry"))]
+        if not polys:
+            continue
+        g = polys[0] if len(polys) == 1 else shapely.multipolygons(polys)
+        if not shapely.is_valid(g):
+            g = shapely.make_valid(g)
+            parts = [p for p in shapely.get_parts(g) if shapely.get_type_id(p) in (3, 6)]
+            g = shapely.union_all(parts) if parts else None
+        out[i] = None if g is None or shapely.is_empty(g) else g
+    return out
+
+
+def _union_wkb(blobs: Sequence[bytes]) -> bytes:
+    shapely = _shapely()
+    return shapely.to_wkb(shapely.union_all(shapely.from_wkb(list(blobs))))
+
+
+def cascaded_union(geoms: Sequence, pool: Optional[ProcessPoolExecutor] = None,
+                   chunk: int = DEFAULT_CHUNK):
+    """Union of shapely geometries in Hilbert-ordered chunks, rounds run on `pool`."""
+    shapely = _shapely()
+    geoms = [g for g in geoms if g is not None]
+    if not geoms:
+        return None
+    if pool is None or len(geoms) <= chunk:
+        return shapely.union_all(geoms)
+
+    xy = shapely.get_coordinates(shapely.centroid(geoms))
+    order = np.argsort(hilbert.hilbert_keys(xy), kind="stable")
+    blobs = [shapely.to_wkb(geoms[i]) for i in order]
+    size = chunk
+    while len(blobs) > 1:
+        groups = [blobs[i:i + size] for i in range(0, len(blobs), size)]
+        blobs = list(pool.map(_union_wkb, groups))
+        size = FANOUT
+    return shapely.from_wkb(blobs[0])
+
+
+def dissolve(features, by_display: bool = False, workers: int = 1, chunk: int = DEFAULT_CHUNK,
+             simplify: Optional[float] = None) -> List[dict]:
+    """One MultiPolygon feature per LegendID (and Display flag), sorted by key."""
+    shapely = _shapely()
+    features = list(features)
+    shapes = to_shapes(features)
+    groups: Dict[tuple, List[int]] = {}
+    for i, f in enumerate(features):
+        if shapes[i] is None:
+            continue
+        p = f.get("properties") or {}
+        key = (str(p.get("LegendID") or ""),) + ((bool(p.get("Display")),) if by_display else ())
+        groups.setdefault(key, []).append(i)
+
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        out = []
+        for key in sorted(groups):
+            idx = groups[key]
+            g = cascaded_union(shapes[idx], pool, chunk)
+            if simplify:
+                g = shapely.simplify(g, simplify, preserve_topology=True)
+            if g is None or shapely.is_empty(g):
+                continue
+            geom = json.loads(shapely.to_geojson(g))
+            if geom["type"] == "Polygon":
+                geom = {"type": "MultiPolygon", "coordinates": [geom["coordinates"]]}
+            props = {"LegendID": key[0], "LayerType": LAYER_TYPE, "Count": len(idx)}
+            if by_display:
+                props["Display"] = key[1]
+            out.append({"type": "Feature", "properties": props, "geometry": geom})
+        return out
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Dissolve region polygons per LegendID for the low-zoom layer.")
+    ap.add_argument("input", help="source FeatureCollection")
+    ap.add_argument("-o", "--output", required=True, help="dissolved FeatureCollection (.geojson)")
+    ap.add_argument("--by-display", action="store_true", help="keep Display=true/false regions apart")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="processes for the cascaded union (default: all cores; 1 = in process)")
+    ap.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="polygons per first-round union")
+    ap.add_argument("--simplify", type=float, default=None, help="topology-preserving tolerance in degrees")
+    args = ap.parse_args(argv)
+
+    try:
+        fc = load_collection(args.input)
+        out = dissolve(fc["features"], args.by_display, args.workers, args.chunk, args.simplify)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+    write_collection(args.output, out)
+    print(f"Dissolved {len(fc['features'])} features into {len(out)} -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+export.py — asset GeoJSON -> Power BI table (CSV) or enriched GeoJSON.
+
+Adds per-feature summary columns computed once, vectorized, so the visuals
+never have to walk polygon vertices to fit bounds or place labels:
+
+  MinLon MinLat MaxLon MaxLat   feature bbox
+  CentroidLon CentroidLat       area-weighted centroid
+  AreaKm2                       spherical area
+  LabelLon LabelLat             pole of inaccessibility (label anchor; in the
+                                CSV only on a feature's first polygon row, so
+                                a MultiPolygon gets one label, not one per part)
+
+The CSV carries one row per polygon ring with PolygonCoordinates in the
+"lon,lat;lon,lat;…" form jMapv6 parses: Part numbers the polygons of a
+feature and Ring is 0 for a polygon's exterior and 1, 2, … for its holes,
+which jMapv6 cuts back out of the exterior (visuals that don't read Ring
+should keep only Ring = 0 rows). --with-points adds a point row per feature
+for its LocationID. A .geojson output keeps the features and adds the
+columns to their properties plus a standard "bbox" member.
+
+--dissolve appends the per-LegendID union of the regions (geotools.dissolve)
+flagged LowZoom=1; jMapv6 draws those rows instead of the individual regions
+below its "dissolve below zoom" setting. Holes in a union are coverage gaps,
+so they are written as Ring rows like any other hole.
+
+--mercator-zoom Z also stores every vertex as integer Web Mercator tile units
+at zoom Z (geotools.mercator): a MercatorCoordinates column "X,Y;X,Y;…"
+beside PolygonCoordinates in the CSV, or a "mercator" member per feature in
+GeoJSON, so the projection is not recomputed per render.
+
+Usage:
+  python3 -m geotools.export Asset_Locations_Regions_Polygons.geojson -o assets.csv
+  python3 -m geotools.export tAsset_Locations_Regions_Polygons.geojson -o t.geojson
+  python3 -m geotools.export in.geojson -o out.csv --with-points --precision 5
+  python3 -m geotools.export in.geojson -o out.geojson --hilbert
+  python3 -m geotools.export in.geojson -o out.csv --dissolve --dissolve-simplify 0.01
+  python3 -m geotools.export in.geojson -o out.csv --mercator-zoom 12
+"""
+import argparse
+import csv
+import itertools
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from . import geometry
+from .io import SCHEMA, load_collection, parse_location
+from .mercator import EXTENT, MAX_ZOOM, annotate, quantize_rings
+
+SUMMARY_COLUMNS = ("MinLon", "MinLat", "MaxLon", "MaxLat",
+                   "CentroidLon", "CentroidLat", "AreaKm2", "LabelLon", "LabelLat")
+TABLE_COLUMNS = SCHEMA + ("Lat", "Lon", "PolygonCoordinates", "Part", "Ring") + SUMMARY_COLUMNS
+LOW_ZOOM_COLUMN = "LowZoom"
+MERCATOR_COLUMNS = ("MercatorZoom", "MercatorCoordinates")
+
+
+def summary_columns(features, label_precision=None, labels=True) -> dict:
+    """Per-feature summary arrays, keyed by SUMMARY_COLUMNS.
+
+    labels=False skips the (per-feature, non-vectorized) polylabel search and
+    leaves LabelLon/LabelLat empty.
+    """
+    p = geometry.pack(features)
+    b = geometry.bounds(p)
+    c = geometry.centroids(p)
+    lab = geometry.label_anchors(p, label_precision) if labels else np.full_like(c, np.nan)
+    return {
+        "MinLon": b[:, 0], "MinLat": b[:, 1], "MaxLon": b[:, 2], "MaxLat": b[:, 3],
+        "CentroidLon": c[:, 0], "CentroidLat": c[:, 1],
+        "AreaKm2": geometry.areas_km2(p),
+        "LabelLon": lab[:, 0], "LabelLat": lab[:, 1],
+    }
+
+
+def _num(v, digits):
+    if v is None or (isinstance(v, float) and not np.isfinite(v)):
+        return ""
+    return round(float(v), digits)
+
+
+def ring_string(ring, digits=6) -> str:
+    """[[lon, lat], …] -> "lon,lat;lon,lat;…" (the PolygonCoordinates column format)."""
+    xy = np.round(np.asarray([c[:2] for c in ring if len(c) >= 2], dtype=np.float64), digits)
+    return ";".join(f"{x},{y}" for x, y in xy.tolist())
+
+
+def _valid_ring(ring) -> bool:
+    # some exports carry empty placeholder geometries ([[[]]])
+    return sum(1 for c in ring if len(c) >= 2) >= 3
+
+
+def _polygon_rings(geom):
+    """(part, ring, positions) per ring; ring 0 is a polygon's exterior, 1.. its holes."""
+    if not geom:
+        return []
+    if geom.get("type") == "Polygon":
+        polys = [geom["coordinates"]]
+    elif geom.get("type") == "MultiPolygon":
+        polys = geom["coordinates"]
+    else:
+        return []
+    out = []
+    for poly in polys:
+        if not poly or not _valid_ring(poly[0]):
+            continue
+        part = out[-1][0] + 1 if out else 0
+        rings = [poly[0]] + [r for r in poly[1:] if _valid_ring(r)]
+        out.extend((part, k, r) for k, r in enumerate(rings))
+    return out
+
+
+def table_rows(features, cols: dict, with_points=False, digits=6, mercator=None):
+    """
+    Yield table rows (dicts keyed by TABLE_COLUMNS, plus MERCATOR_COLUMNS
+    when `mercator` is a (zoom, extent) pair).
+    """
+    for i, f in enumerate(features):
+        props = f.get("properties") or {}
+        base = {k: props.get(k, "") for k in SCHEMA}
+        loc = parse_location(props.get("LocationID"))
+        base["Lat"], base["Lon"] = (_num(loc[0], digits), _num(loc[1], digits)) if loc else ("", "")
+        for k in SUMMARY_COLUMNS:
+            base[k] = _num(cols[k][i], 3 if k == "AreaKm2" else digits)
+
+        rings = _polygon_rings(f.get("geometry"))
+        rest = dict(base, LabelLon="", LabelLat="")
+        if mercator:
+            base["MercatorZoom"] = mercator[0]
+            quantized = quantize_rings([r for _, _, r in rings], *mercator)
+            for j, ((part, k, ring), q) in enumerate(zip(rings, quantized)):
+                yield dict(rest if j else base, PolygonCoordinates=ring_string(ring, digits), Part=part, Ring=k,
+                           MercatorCoordinates=";".join(f"{x},{y}" for x, y in q.tolist()))
+        else:
+            for j, (part, k, ring) in enumerate(rings):
+                yield dict(rest if j else base, PolygonCoordinates=ring_string(ring, digits), Part=part, Ring=k)
+        if with_points and loc:
+            yield dict(base, PolygonCoordinates="", Part="", Ring="",
+                       **({"MercatorCoordinates": ""} if mercator else {}))
+
+
+def write_csv(path, rows, columns=TABLE_COLUMNS) -> int:
+    n = 0
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        w = csv.DictWriter(fh, fieldnames=columns)
+        w.writeheader()
+        for r in rows:
+            w.writerow(r)
+            n += 1
+    return n
+
+
+def enrich(fc: dict, cols: dict, digits=6) -> dict:
+    """Add the summary columns to each feature's properties and a bbox member."""
+    for i, f in enumerate(fc["features"]):
+        props = f.setdefault("properties", {})
+        for k in SUMMARY_COLUMNS:
+            v = _num(cols[k][i], 3 if k == "AreaKm2" else digits)
+            props[k] = None if v == "" else v
+        if np.isfinite(cols["MinLon"][i]):
+            f["bbox"] = [_num(cols[k][i], digits) for k in ("MinLon", "MinLat", "MaxLon", "MaxLat")]
+    return fc
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export asset GeoJSON with precomputed bbox/centroid/area/label columns.")
+    ap.add_argument("input", help="source FeatureCollection (.geojson)")
+    ap.add_argument("-o", "--output", required=True, help="output .csv (Power BI table) or .geojson")
+    ap.add_argument("--with-points", action="store_true", help="CSV: also emit a point row per LocationID")
+    ap.add_argument("--precision", type=int, default=6, help="decimal digits for coordinates (default 6)")
+    ap.add_argument("--label-precision", type=float, default=None,
+                    help="polylabel stopping precision in degrees (default: 1/1000 of the feature size)")
+    ap.add_argument("--hilbert", action="store_true", help="write features in Hilbert order of their centroids")
+    ap.add_argument("--dissolve", action="store_true",
+                    help="append per-LegendID dissolved polygons flagged LowZoom=1 (needs shapely)")
+    ap.add_argument("--dissolve-simplify", type=float, default=None,
+                    help="simplification tolerance for the dissolved polygons, in degrees")
+    ap.add_argument("--mercator-zoom", type=int, default=None,
+                    help="also store vertices as integer Web Mercator tile units at this zoom")
+    ap.add_argument("--mercator-extent", type=int, default=EXTENT,
+                    help=f"tile extent for --mercator-zoom (default {EXTENT}, MapLibre's)")
+    args = ap.parse_args(argv)
+    mercator = None
+    if args.mercator_zoom is not None:
+        if not 0 <= args.mercator_zoom <= MAX_ZOOM or args.mercator_extent <= 0:
+            print(f"ERROR: --mercator-zoom must be 0..{MAX_ZOOM} and --mercator-extent positive", file=sys.stderr)
+            sys.exit(2)
+        mercator = (args.mercator_zoom, args.mercator_extent)
+
+    try:
+        fc = load_collection(args.input)
+        low = []
+        if args.dissolve:
+            from .dissolve import dissolve
+            low = dissolve(fc["features"], simplify=args.dissolve_simplify)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    if args.hilbert:
+        from .hilbert import sort_features
+        fc["features"] = sort_features(fc["features"])
+    feats = fc["features"]
+    cols = summary_columns(feats, args.label_precision)
+    out = Path(args.output)
+    if out.suffix.lower() in (".geojson", ".json"):
+        for f in low:
+            f["properties"][LOW_ZOOM_COLUMN] = True
+        fc["features"] = feats + low
+        enrich(fc, summary_columns(fc["features"], args.label_precision) if low else cols, args.precision)
+        if mercator:
+            annotate(fc, *mercator)
+        out.write_text(json.dumps(fc), encoding="utf-8")
+        n = len(fc["features"])
+    else:
+        rows = table_rows(feats, cols, args.with_points, args.precision, mercator)
+        columns = TABLE_COLUMNS + (MERCATOR_COLUMNS if mercator else ())
+        if low:
+            low_rows = table_rows(low, summary_columns(low, labels=False), digits=args.precision, mercator=mercator)
+            rows = itertools.chain(rows, (dict(r, **{LOW_ZOOM_COLUMN: 1}) for r in low_rows))
+            columns += (LOW_ZOOM_COLUMN,)
+        n = write_csv(out, rows, columns)
+    print(f"Wrote {n} rows -> {out}")
+
+
+if __name__ == "__main__":
+    main()
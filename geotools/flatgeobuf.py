@@ -0,0 +1,670 @@
+#!/usr/bin/env python3
+"""
+flatgeobuf.py — FlatGeobuf files with a packed Hilbert R-tree, and bbox
+queries over seek / HTTP range reads.
+
+A .fgb file is
+
+  magic (8) | header size (4) | header | R-tree index | features
+
+with the header and every feature stored as a size-prefixed FlatBuffer.
+Features are written in Hilbert order of their bbox centers and the index is
+the static packed R-tree of the spec (root first, 40-byte nodes). The file
+is self-contained: any static host that honors Range requests can serve it
+and clients (flatgeobuf JS/GDAL or the reader here) fetch only the index
+nodes on the query path and the byte ranges of the matching features.
+
+The reader walks the index level by level, merging nearby node and feature
+ranges so one viewport costs a handful of requests. It reads local files by
+seek() and http(s) URLs through one kept-alive connection. `serve` is a
+small Range-capable stand-in for a static host (python -m http.server
+ignores Range).
+
+Usage:
+  python3 -m geotools.flatgeobuf write Asset_Locations_Regions_Polygons.geojson -o assets.fgb
+  python3 -m geotools.flatgeobuf query assets.fgb --bbox=-88,30,-84,35 -o viewport.geojson
+  python3 -m geotools.flatgeobuf serve . --port 8000 &
+  python3 -m geotools.flatgeobuf query http://127.0.0.1:8000/assets.fgb --bbox=-88,30,-84,35
+"""
+import argparse
+import http.client
+import http.server
+import json
+import math
+import os
+import re
+import struct
+import sys
+from typing import List, Optional, Sequence
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from . import geometry, rtree
+from .io import SCHEMA, load_collection, write_collection
+from .wkb import positions
+
+MAGIC = b"fgb\x03fgb\x00"
+NODE_SIZE = rtree.NODE_SIZE
+NODE_ITEM = np.dtype([("minx", "<f8"), ("miny", "<f8"), ("maxx", "<f8"), ("maxy", "<f8"), ("offset", "<u8")])
+MERGE_GAP = 4096        # bytes; ranges closer than this are fetched in one read
+
+# GeometryType
+UNKNOWN, POINT, LINESTRING, POLYGON, MULTIPOINT, MULTILINESTRING, MULTIPOLYGON, COLLECTION = range(8)
+GEOMETRY_TYPES = {
+    "Point": POINT, "LineString": LINESTRING, "Polygon": POLYGON, "MultiPoint": MULTIPOINT,
+    "MultiLineString": MULTILINESTRING, "MultiPolygon": MULTIPOLYGON, "GeometryCollection": COLLECTION,
+}
+GEOMETRY_NAMES = {v: k for k, v in GEOMETRY_TYPES.items()}
+
+# ColumnType (the subset the writer emits; the reader knows all scalar ones)
+BOOL, LONG, DOUBLE, STRING, JSON = 2, 7, 10, 11, 12
+_SCALAR_COLUMNS = {0: "<b", 1: "<B", 2: "<?", 3: "<h", 4: "<H", 5: "<i", 6: "<I",
+                   7: "<q", 8: "<Q", 9: "<f", 10: "<d"}
+
+
+# ---- FlatBuffers ---------------------------------------------------------
+# A table is given as a list indexed by field id; each entry is None or
+# (kind, value) with kind a struct format ("B", "?", "H", "i", "Q") or one of
+# "str", "f64s", "u32s", "u8s", "table", "tables".
+
+class _Builder:
+    """
+    Front-to-back FlatBuffers writer: each table is emitted before the
+    objects it references, so every uoffset points forward as required.
+    """
+
+    def __init__(self):
+        self.buf = bytearray(4)   # root uoffset
+
+    def _pad(self, align: int, extra: int = 0):
+        self.buf.extend(b"\0" * (-(len(self.buf) + extra) % align))
+
+    def finish(self, fields) -> bytes:
+        struct.pack_into("<I", self.buf, 0, self.table(fields))
+        return bytes(self.buf)
+
+    def table(self, fields) -> int:
+        while fields and fields[-1] is None:
+            fields = fields[:-1]
+        entries = [(i, e[0], e[1]) for i, e in enumerate(fields) if e is not None]
+        width = lambda k: struct.calcsize("<" + k) if len(k) == 1 else 4  # noqa: E731
+        entries.sort(key=lambda e: -width(e[1]))
+        layout, size = {}, 4
+        for i, k, _ in entries:
+            w = width(k)
+            size += -size % w
+            layout[i] = size
+            size += w
+        size += -size % 4
+
+        self._pad(2)
+        vt = len(self.buf)
+        self.buf += struct.pack(f"<HH{len(fields)}H", 4 + 2 * len(fields), size,
+                                *(layout.get(i, 0) for i in range(len(fields))))
+        self._pad(max([width(k) for _, k, _ in entries] + [4]))
+        t = len(self.buf)
+        self.buf += bytes(size)
+        struct.pack_into("<i", self.buf, t, t - vt)
+        for i, k, v in entries:
+            if len(k) == 1:
+                struct.pack_into("<" + k, self.buf, t + layout[i], v)
+        for i, k, v in entries:
+            if len(k) > 1:
+                loc = t + layout[i]
+                struct.pack_into("<I", self.buf, loc, self._object(k, v) - loc)
+        return t
+
+    def _object(self, kind: str, v) -> int:
+        if kind == "table":
+            return self.table(v)
+        if kind == "str":
+            data = v.encode("utf-8")
+            self._pad(4)
+            p = len(self.buf)
+            self.buf += struct.pack("<I", len(data)) + data + b"\0"
+            return p
+        if kind == "tables":
+            self._pad(4)
+            p = len(self.buf)
+            self.buf += struct.pack("<I", len(v)) + bytes(4 * len(v))
+            for j, sub in enumerate(v):
+                loc = p + 4 + 4 * j
+                struct.pack_into("<I", self.buf, loc, self.table(sub) - loc)
+            return p
+        dtype = {"f64s": "<f8", "u32s": "<u4", "u8s": "u1"}[kind]
+        arr = np.ascontiguousarray(v, dtype=dtype)
+        self._pad(max(4, arr.itemsize), extra=4)
+        p = len(self.buf)
+        self.buf += struct.pack("<I", arr.size) + arr.tobytes()
+        return p
+
+
+class _Table:
+    """Read-only view of one FlatBuffers table."""
+
+    def __init__(self, buf, pos: int):
+        self.buf, self.pos = buf, pos
+        self.vt = pos - struct.unpack_from("<i", buf, pos)[0]
+        self.nfields = (struct.unpack_from("<H", buf, self.vt)[0] - 4) // 2
+
+    @classmethod
+    def root(cls, buf) -> "_Table":
+        return cls(buf, struct.unpack_from("<I", buf, 0)[0])
+
+    def _field(self, i: int) -> int:
+        return struct.unpack_from("<H", self.buf, self.vt + 4 + 2 * i)[0] if i < self.nfields else 0
+
+    def scalar(self, i: int, fmt: str, default=0):
+        o = self._field(i)
+        return struct.unpack_from(fmt, self.buf, self.pos + o)[0] if o else default
+
+    def _target(self, i: int) -> Optional[int]:
+        o = self._field(i)
+        if not o:
+            return None
+        loc = self.pos + o
+        return loc + struct.unpack_from("<I", self.buf, loc)[0]
+
+    def string(self, i: int) -> Optional[str]:
+        p = self._target(i)
+        if p is None:
+            return None
+        n = struct.unpack_from("<I", self.buf, p)[0]
+        return bytes(self.buf[p + 4:p + 4 + n]).decode("utf-8")
+
+    def vector(self, i: int, dtype: str) -> Optional[np.ndarray]:
+        p = self._target(i)
+        if p is None:
+            return None
+        n = struct.unpack_from("<I", self.buf, p)[0]
+        return np.frombuffer(self.buf, dtype=dtype, count=n, offset=p + 4)
+
+    def table(self, i: int) -> Optional["_Table"]:
+        p = self._target(i)
+        return None if p is None else _Table(self.buf, p)
+
+    def tables(self, i: int) -> List["_Table"]:
+        p = self._target(i)
+        if p is None:
+            return []
+        n = struct.unpack_from("<I", self.buf, p)[0]
+        locs = p + 4 + 4 * np.arange(n)
+        return [_Table(self.buf, int(loc) + struct.unpack_from("<I", self.buf, int(loc))[0]) for loc in locs]
+
+
+# ---- encoding ------------------------------------------------------------
+
+def _geometry_fields(geom: dict) -> list:
+    t = geom.get("type")
+    code = GEOMETRY_TYPES.get(t)
+    if code is None:
+        raise ValueError(f"unsupported geometry type {t!r}")
+    c = geom.get("coordinates")
+    ends = xy = parts = None
+    if code == POINT:
+        xy = positions([c])
+    elif code in (LINESTRING, MULTIPOINT):
+        xy = positions(c)
+    elif code in (POLYGON, MULTILINESTRING):
+        rings = [positions(r) for r in c or ()]
+        xy = np.concatenate(rings) if rings else np.zeros((0, 2))
+        if len(rings) > 1:
+            ends = np.cumsum([len(r) for r in rings])
+    elif code == MULTIPOLYGON:
+        parts = [_geometry_fields({"type": "Polygon", "coordinates": p}) for p in c or ()]
+    else:
+        parts = [_geometry_fields(g) for g in geom.get("geometries") or ()]
+    return [
+        None if ends is None else ("u32s", ends),
+        None if xy is None else ("f64s", xy.ravel()),
+        None, None, None, None,
+        ("B", code),
+        None if parts is None else ("tables", parts),
+    ]
+
+
+def _decode_geometry(g: _Table, default_type: int) -> dict:
+    code = g.scalar(6, "<B", 0) or default_type
+    if code in (MULTIPOLYGON, COLLECTION):
+        sub = [_decode_geometry(p, POLYGON if code == MULTIPOLYGON else UNKNOWN) for p in g.tables(7)]
+        if code == COLLECTION:
+            return {"type": "GeometryCollection", "geometries": sub}
+        return {"type": "MultiPolygon", "coordinates": [s["coordinates"] for s in sub]}
+    xy = g.vector(1, "<f8")
+    pts = xy.reshape(-1, 2).tolist() if xy is not None else []
+    if code == POINT:
+        return {"type": "Point", "coordinates": pts[0] if pts else []}
+    if code in (LINESTRING, MULTIPOINT):
+        return {"type": GEOMETRY_NAMES[code], "coordinates": pts}
+    if code in (POLYGON, MULTILINESTRING):
+        ends = g.vector(0, "<u4")
+        cuts = [0] + (ends.tolist() if ends is not None and len(ends) else [len(pts)])
+        return {"type": GEOMETRY_NAMES[code], "coordinates": [pts[a:b] for a, b in zip(cuts, cuts[1:])]}
+    raise ValueError(f"unsupported FlatGeobuf geometry type {code}")
+
+
+def _column_type(values) -> int:
+    vals = [v for v in values if v is not None]
+    if vals and all(isinstance(v, bool) for v in vals):
+        return BOOL
+    if vals and all(isinstance(v, int) and not isinstance(v, bool) for v in vals):
+        return LONG
+    if vals and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in vals):
+        return DOUBLE
+    if any(isinstance(v, (dict, list)) for v in vals):
+        return JSON
+    return STRING
+
+
+def _encode_properties(props: dict, columns) -> bytes:
+    out = bytearray()
+    for idx, (name, ctype) in enumerate(columns):
+        v = props.get(name)
+        if v is None:
+            continue
+        out += struct.pack("<H", idx)
+        if ctype == BOOL:
+            out += struct.pack("<?", bool(v))
+        elif ctype == LONG:
+            out += struct.pack("<q", v)
+        elif ctype == DOUBLE:
+            out += struct.pack("<d", float(v))
+        else:
+            data = (json.dumps(v) if ctype == JSON else str(v)).encode("utf-8")
+            out += struct.pack("<I", len(data)) + data
+    return bytes(out)
+
+
+def _decode_properties(data, columns) -> dict:
+    props = {name: None for name, _ in columns}
+    pos, n = 0, len(data)
+    while pos < n:
+        idx = struct.unpack_from("<H", data, pos)[0]
+        pos += 2
+        name, ctype = columns[idx]
+        fmt = _SCALAR_COLUMNS.get(ctype)
+        if fmt:
+            props[name] = struct.unpack_from(fmt, data, pos)[0]
+            pos += struct.calcsize(fmt)
+            continue
+        size = struct.unpack_from("<I", data, pos)[0]
+        raw = bytes(data[pos + 4:pos + 4 + size])
+        pos += 4 + size
+        if ctype == STRING or ctype == JSON:
+            text = raw.decode("utf-8")
+            props[name] = json.loads(text) if ctype == JSON else text
+        else:
+            props[name] = raw
+    return props
+
+
+def level_bounds(num_items: int, node_size: int) -> List[tuple]:
+    """(start, end) node range of each tree level, leaves first; the root is node 0."""
+    sizes, n = [num_items], num_items
+    while True:
+        n = math.ceil(n / node_size)
+        sizes.append(n)
+        if n == 1:
+            break
+    end = sum(sizes)
+    out = []
+    for s in sizes:
+        out.append((end - s, end))
+        end -= s
+    return out
+
+
+def build_index(boxes: np.ndarray, offsets: np.ndarray, node_size: int) -> np.ndarray:
+    """Packed R-tree nodes in FlatGeobuf layout over leaves already in file order."""
+    levels = level_bounds(len(boxes), node_size)
+    nodes = np.zeros(levels[0][1], dtype=NODE_ITEM)
+    a, b = levels[0]
+    for j, k in enumerate(("minx", "miny", "maxx", "maxy")):
+        nodes[k][a:b] = boxes[:, j]
+    nodes["offset"][a:b] = offsets
+    for (ca, cb), (pa, pb) in zip(levels, levels[1:]):
+        groups = np.arange(ca, cb, node_size)
+        for k, red in (("minx", np.minimum), ("miny", np.minimum), ("maxx", np.maximum), ("maxy", np.maximum)):
+            nodes[k][pa:pb] = red.reduceat(nodes[k][ca:cb], groups - ca)
+        nodes["offset"][pa:pb] = groups
+    return nodes
+
+
+def write(path, features: Sequence[dict], node_size: int = NODE_SIZE, name: str = "") -> int:
+    """Write features as FlatGeobuf (Hilbert-sorted, indexed unless node_size=0)."""
+    features = list(features)
+    bounds = geometry.bounds(geometry.pack(features))
+    if node_size and features:
+        order = rtree.hilbert_order(bounds)
+        features = [features[i] for i in order]
+        bounds = bounds[order]
+    else:
+        node_size = 0
+
+    props = [f.get("properties") or {} for f in features]
+    names = list(SCHEMA) + sorted({k for p in props for k in p} - set(SCHEMA))
+    columns = [(n, _column_type([p.get(n) for p in props])) for n in names]
+    types = {(f.get("geometry") or {}).get("type") for f in features}
+    header_type = GEOMETRY_TYPES.get(types.pop()) if len(types) == 1 else UNKNOWN
+
+    blobs = []
+    for f, p in zip(features, props):
+        geom = f.get("geometry")
+        blobs.append(_Builder().finish([
+            ("table", _geometry_fields(geom)) if geom else None,
+            ("u8s", np.frombuffer(_encode_properties(p, columns), dtype="u1")),
+        ]))
+    sizes = np.fromiter((4 + len(b) for b in blobs), dtype=np.int64, count=len(blobs))
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.uint64)
+
+    ok = np.isfinite(bounds).all(axis=1)
+    envelope = ([bounds[ok, 0].min(), bounds[ok, 1].min(), bounds[ok, 2].max(), bounds[ok, 3].max()]
+                if ok.any() else None)
+    header = _Builder().finish([
+        ("str", name) if name else None,
+        ("f64s", envelope) if envelope else None,
+        ("B", header_type),
+        None, None, None, None,
+        ("tables", [[("str", n), ("B", t)] for n, t in columns]),
+        ("Q", len(features)),
+        ("H", node_size),
+        ("table", [("str", "EPSG"), ("i", 4326)]),
+    ])
+
+    with open(path, "wb") as fh:
+        fh.write(MAGIC)
+        fh.write(struct.pack("<I", len(header)) + header)
+        if node_size:
+            # empty geometries get an inverted box: it never intersects and
+            # leaves its parents' extent alone
+            boxes = np.where(ok[:, None], bounds, [math.inf, math.inf, -math.inf, -math.inf])
+            fh.write(build_index(boxes, offsets, node_size).tobytes())
+        for b in blobs:
+            fh.write(struct.pack("<I", len(b)) + b)
+    return len(features)
+
+
+# ---- range sources -------------------------------------------------------
+
+class FileSource:
+    def __init__(self, path):
+        self.fh = open(path, "rb")
+        self.requests = self.bytes_read = 0
+
+    def read(self, offset: int, length: Optional[int] = None) -> bytes:
+        self.fh.seek(offset)
+        data = self.fh.read(-1 if length is None else length)
+        self.requests += 1
+        self.bytes_read += len(data)
+        return data
+
+    def close(self):
+        self.fh.close()
+
+
+class HttpSource:
+    """Range reads over one persistent HTTP/1.1 connection."""
+
+    def __init__(self, url: str):
+        u = urlsplit(url)
+        conn = http.client.HTTPSConnection if u.scheme == "https" else http.client.HTTPConnection
+        self.conn = conn(u.hostname, u.port, timeout=30)
+        self.path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+        self.requests = self.bytes_read = 0
+
+    def read(self, offset: int, length: Optional[int] = None) -> bytes:
+        end = "" if length is None else offset + length - 1
+        self.conn.request("GET", self.path, headers={"Range": f"bytes={offset}-{end}"})
+        resp = self.conn.getresponse()
+        data = resp.read()
+        self.requests += 1
+        self.bytes_read += len(data)
+        if resp.status == 416:
+            return b""
+        if resp.status == 200:      # server ignored Range
+            return data[offset:None if length is None else offset + length]
+        if resp.status != 206:
+            raise OSError(f"HTTP {resp.status} for {self.path}")
+        return data
+
+    def close(self):
+        self.conn.close()
+
+
+def open_source(src):
+    return HttpSource(src) if re.match(r"https?://", str(src)) else FileSource(src)
+
+
+def _split(data: bytes):
+    """(offset, buffer) of each size-prefixed feature in a run of feature bytes."""
+    view, pos = memoryview(data), 0
+    while pos + 4 <= len(data):
+        size = struct.unpack_from("<I", data, pos)[0]
+        yield pos, view[pos + 4:pos + 4 + size]
+        pos += 4 + size
+
+
+def _merge(ranges, gap: int):
+    """Sorted (start, end) ranges with neighbors closer than `gap` joined."""
+    out = []
+    for a, b in sorted(ranges):
+        if out and a - out[-1][1] <= gap:
+            out[-1][1] = max(out[-1][1], b)
+        else:
+            out.append([a, b])
+    return out
+
+
+class Reader:
+    """
+    bbox queries against a FlatGeobuf file or URL.
+
+      with Reader("assets.fgb") as r:
+          feats = r.query((-88, 30, -84, 35))
+    """
+
+    def __init__(self, src, gap: int = MERGE_GAP):
+        self.source = open_source(src)
+        self.gap = gap
+        head = self.source.read(0, 12)
+        if head[:3] != MAGIC[:3]:
+            raise ValueError(f"{src}: not a FlatGeobuf file")
+        size = struct.unpack_from("<I", head, 8)[0]
+        h = _Table.root(self.source.read(12, size))
+        self.name = h.string(0)
+        env = h.vector(1, "<f8")
+        self.envelope = tuple(env.tolist()) if env is not None and len(env) == 4 else None
+        self.geometry_type = h.scalar(2, "<B", UNKNOWN)
+        self.columns = [(c.string(0), c.scalar(1, "<B", STRING)) for c in h.tables(7)]
+        self.count = h.scalar(8, "<Q", 0)
+        self.node_size = h.scalar(9, "<H", NODE_SIZE)
+        self.index_offset = 12 + size
+        index_nodes = level_bounds(self.count, self.node_size)[0][1] if self.node_size and self.count else 0
+        self.features_offset = self.index_offset + index_nodes * NODE_ITEM.itemsize
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.source.close()
+
+    def _decode(self, buf) -> dict:
+        f = _Table.root(buf)
+        g = f.table(0)
+        props = f.vector(1, "u1")
+        return {"type": "Feature",
+                "properties": _decode_properties(props if props is not None else b"", self.columns),
+                "geometry": _decode_geometry(g, self.geometry_type) if g is not None else None}
+
+    def _features_at(self, ranges) -> List[dict]:
+        """Decode the features starting at each range's offset; ranges may share reads."""
+        wanted = {a for a, _ in ranges}
+        out = []
+        for a, b in _merge(ranges, self.gap):
+            data = self.source.read(self.features_offset + a, None if b is None else b - a)
+            out.extend(self._decode(buf) for pos, buf in _split(data) if a + pos in wanted)
+        return out
+
+    def features(self) -> List[dict]:
+        """Every feature, in file order."""
+        if not self.count:
+            return []
+        return [self._decode(buf) for _, buf in _split(self.source.read(self.features_offset))]
+
+    def query(self, bbox: Sequence[float]) -> List[dict]:
+        """Features whose bbox intersects minx, miny, maxx, maxy, in file order."""
+        if not self.count:
+            return []
+        if not self.node_size:
+            raise ValueError("file has no spatial index")
+        minx, miny, maxx, maxy = bbox
+        levels = level_bounds(self.count, self.node_size)
+        item = NODE_ITEM.itemsize
+        pending = [(0, 1)]
+        leaf_end = levels[0][1]
+        offsets, hits = {}, []
+        for lvl in range(len(levels) - 1, -1, -1):
+            nodes, idx = [], []
+            span = [(a * item, b * item) for a, b in pending]
+            for a, b in _merge(span, self.gap):
+                data = self.source.read(self.index_offset + a, b - a)
+                nodes.append(np.frombuffer(data, dtype=NODE_ITEM))
+                idx.append(np.arange(a // item, b // item))
+            if not nodes:
+                break
+            nodes, idx = np.concatenate(nodes), np.concatenate(idx)
+            m = ((nodes["minx"] <= maxx) & (nodes["miny"] <= maxy) &
+                 (nodes["maxx"] >= minx) & (nodes["maxy"] >= miny))
+            if lvl == 0:
+                offsets = dict(zip(idx.tolist(), nodes["offset"].tolist()))
+                hits = idx[m].tolist()
+                break
+            child_end = levels[lvl - 1][1]
+            pending = []
+            for off in nodes["offset"][m].tolist():
+                # one extra leaf gives the end offset of the last hit's feature
+                extra = 1 if lvl == 1 else 0
+                pending.append((off, min(off + self.node_size + extra, child_end)))
+
+        ranges = [(offsets[i], offsets.get(i + 1) if i + 1 < leaf_end else None) for i in hits]
+        # the last feature of the file has no successor: read it to the end
+        tail = [r for r in ranges if r[1] is None]
+        return self._features_at([r for r in ranges if r[1] is not None]) + self._features_at(tail)
+
+
+# ---- local HTTP stand-in -------------------------------------------------
+
+class _Slice:
+    def __init__(self, fh, length: int):
+        self.fh, self.left = fh, length
+
+    def read(self, n: int = -1) -> bytes:
+        n = self.left if n < 0 else min(n, self.left)
+        data = self.fh.read(n)
+        self.left -= len(data)
+        return data
+
+    def close(self):
+        self.fh.close()
+
+
+class RangeRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler plus single-range `Range: bytes=` support and keep-alive."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True   # headers and body go out as separate writes
+
+    def send_head(self):
+        m = re.fullmatch(r"bytes=(\d*)-(\d*)", (self.headers.get("Range") or "").strip())
+        path = self.translate_path(self.path)
+        if not m or not os.path.isfile(path) or m.groups() == ("", ""):
+            return super().send_head()
+        size = os.path.getsize(path)
+        a, b = m.groups()
+        if a == "":
+            start, end = max(0, size - int(b)), size - 1
+        else:
+            start, end = int(a), min(int(b), size - 1) if b else size - 1
+        if start >= size or start > end:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        fh = open(path, "rb")
+        fh.seek(start)
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        return _Slice(fh, end - start + 1)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def serve(directory: str = ".", port: int = 8000, bind: str = "127.0.0.1"):
+    handler = lambda *a, **kw: RangeRequestHandler(*a, directory=directory, **kw)  # noqa: E731
+    with http.server.ThreadingHTTPServer((bind, port), handler) as httpd:
+        print(f"Serving {os.path.abspath(directory)} with Range support on http://{bind}:{port}/")
+        httpd.serve_forever()
+
+
+def _parse_bbox(s):
+    try:
+        v = tuple(float(x) for x in s.split(","))
+    except ValueError:
+        v = ()
+    if len(v) != 4:
+        print("ERROR: --bbox must be minx,miny,maxx,maxy", file=sys.stderr)
+        sys.exit(2)
+    return v
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="FlatGeobuf export and bbox range reads for the asset files.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    w = sub.add_parser("write", help="GeoJSON -> FlatGeobuf")
+    w.add_argument("input", help="source FeatureCollection")
+    w.add_argument("-o", "--output", required=True, help="output .fgb")
+    w.add_argument("--node-size", type=int, default=NODE_SIZE, help="R-tree node size; 0 writes no index")
+    w.add_argument("--name", default="", help="dataset name stored in the header")
+    q = sub.add_parser("query", help="bbox query against a .fgb path or http(s) URL")
+    q.add_argument("source", help="file path or URL")
+    q.add_argument("--bbox", help="minx,miny,maxx,maxy (omit to read everything)")
+    q.add_argument("-o", "--output", help="write matches as GeoJSON")
+    s = sub.add_parser("serve", help="static file server with Range support")
+    s.add_argument("directory", nargs="?", default=".")
+    s.add_argument("--port", type=int, default=8000)
+    s.add_argument("--bind", default="127.0.0.1")
+    args = ap.parse_args(argv)
+
+    try:
+        if args.cmd == "write":
+            fc = load_collection(args.input)
+            n = write(args.output, fc["features"], args.node_size, args.name)
+            print(f"Wrote {n} features -> {args.output}")
+        elif args.cmd == "query":
+            bbox = _parse_bbox(args.bbox) if args.bbox else None
+            with Reader(args.source) as r:
+                feats = r.query(bbox) if bbox else r.features()
+                print(f"{len(feats)}/{r.count} features; {r.source.requests} reads, "
+                      f"{r.source.bytes_read} bytes")
+            if args.output:
+                write_collection(args.output, feats)
+                print(f"Wrote {len(feats)} features -> {args.output}")
+        else:
+            serve(args.directory, args.port, args.bind)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
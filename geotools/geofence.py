@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+geofence.py — streaming enter/exit events for positions against the asset regions.
+
+Positions (ServiceVehicle, technicians, anything with an id) arrive as lines
+on stdin, a file (read once or tailed), or local TCP / Unix sockets:
+
+  {"id": "SV-17", "lon": -83.16, "lat": 42.19, "ts": 1760000000}
+  SV-17,-83.16,42.19,1760000000                 (CSV: id,lon,lat[,ts])
+
+Each entity's current set of regions is kept in memory and a JSON line is
+written only when it changes:
+
+  {"event": "enter", "entity": "SV-17", "region": "POLY3", "legend": "ServiceVehicle", "ts": ..., "lon": ..., "lat": ...}
+
+The first position of an entity enters every region it is in. Regions may
+overlap, so one position can enter and exit several at once.
+
+Index: a sparse uniform grid over the region bboxes. A cell that no region
+edge crosses is classified once at build time (inside / outside per region),
+so most positions resolve with one dict lookup. A boundary cell keeps, per
+region, the inside state at its lower-right corner, the y values where the
+boundary crosses its right side, and the few edges passing through it; the
+crossing-number test then runs over those edges only. Holes and
+multipolygons fall out of the parity count.
+
+Everything runs on one asyncio loop. Input is read in 64 KiB chunks and
+split into lines in bulk, and events are flushed once per chunk, so the
+per-message cost is a parse, a grid lookup and (rarely) a short edge loop.
+
+Usage:
+  python3 -m geotools.geofence Asset_Locations_Regions_Polygons.geojson < positions.csv
+  python3 -m geotools.geofence regions.geojson --tail positions.jsonl -o events.jsonl
+  python3 -m geotools.geofence regions.geojson --listen tcp:127.0.0.1:7070 --listen unix:/tmp/geofence.sock
+  python3 -m geotools.geofence regions.geojson --legend WarehouseSmallParts --file replay.csv --stats
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import stat
+import sys
+import time
+from bisect import bisect_right
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import geometry
+from .io import load_collection
+
+CHUNK = 1 << 16
+TAIL_POLL = 0.2           # seconds between size checks when tailing
+CELLS_PER_REGION = 256    # auto cell size aims at about this many cells per region bbox
+EMPTY: FrozenSet[int] = frozenset()
+POLYGONAL = ("Polygon", "MultiPolygon")
+
+
+# ---- index ---------------------------------------------------------------
+
+def _inside(edges, px: float, py: float) -> bool:
+    """Crossing number over (x0, y0, y1, dx/dy) edges, ray towards +x."""
+    inside = False
+    for x0, y0, y1, k in edges:
+        if (y0 > py) != (y1 > py) and px < x0 + (py - y0) * k:
+            inside = not inside
+    return inside
+
+
+class RegionIndex:
+    """Point -> ids of the regions containing it (sparse grid, see module doc)."""
+
+    def __init__(self, features: Sequence[dict], cell: Optional[float] = None):
+        self.features = list(features)
+        packed = geometry.pack(self.features)
+        b = geometry.bounds(packed)
+        ok = np.isfinite(b[:, 0])
+        if not ok.any():
+            raise ValueError("no polygon regions to index")
+        if cell is None:
+            span = np.maximum(b[ok, 2] - b[ok, 0], b[ok, 3] - b[ok, 1])
+            cell = float(np.median(span[span > 0])) / math.sqrt(CELLS_PER_REGION) if (span > 0).any() else 1.0
+        self.cell = cell
+        self.inv = 1.0 / cell
+        self.ox, self.oy = float(b[ok, 0].min()), float(b[ok, 1].min())
+        self.cols = int((b[ok, 2].max() - self.ox) * self.inv) + 1
+        self.rows = int((b[ok, 3].max() - self.oy) * self.inv) + 1
+
+        sure: Dict[int, List[int]] = {}
+        maybe: Dict[int, list] = {}
+        c, off = packed.coords, packed.ring_offsets
+        for rid in np.flatnonzero(ok):
+            rings = np.flatnonzero(packed.ring_feature == rid)
+            a = np.concatenate([c[off[r]:off[r + 1]] for r in rings])
+            bb = np.concatenate([np.roll(c[off[r]:off[r + 1]], -1, axis=0) for r in rings])
+            keep = a[:, 1] != bb[:, 1]                      # horizontal edges never cross the ray
+            x0, y0, x1, y1 = a[keep, 0], a[keep, 1], bb[keep, 0], bb[keep, 1]
+            k = (x1 - x0) / (y1 - y0)
+            ylo, yhi = np.minimum(y0, y1), np.maximum(y0, y1)
+            ix0, iy0, ix1, iy1 = self._cell(b[rid, 0], b[rid, 1]) + self._cell(b[rid, 2], b[rid, 3])
+            for iy in range(iy0, iy1 + 1):
+                blo, bhi = self.oy + iy * cell, self.oy + (iy + 1) * cell
+                sel = np.flatnonzero((ylo <= bhi) & (yhi >= blo))
+                ex0, ey0, ey1, ek, ex1 = x0[sel], y0[sel], y1[sel], k[sel], x1[sel]
+                edges = list(zip(ex0.tolist(), ey0.tolist(), ey1.tolist(), ek.tolist()))
+                # x extent of each edge inside this row band
+                ya, yb = np.clip(ey0, blo, bhi), np.clip(ey1, blo, bhi)
+                xa, xb = ex0 + (ya - ey0) * ek, ex0 + (yb - ey0) * ek
+                exlo, exhi = np.minimum(xa, xb), np.maximum(xa, xb)
+                ca = ((exlo - self.ox) * self.inv).astype(np.int64)
+                cb = ((exhi - self.ox) * self.inv).astype(np.int64)
+                touched = np.zeros(ix1 - ix0 + 1, dtype=bool)
+                for lo, hi in zip(np.clip(ca - ix0, 0, None).tolist(), np.clip(cb - ix0, None, ix1 - ix0).tolist()):
+                    touched[lo:hi + 1] = True
+                for j, ix in enumerate(range(ix0, ix1 + 1)):
+                    key = iy * self.cols + ix
+                    xl, xr = self.ox + ix * cell, self.ox + (ix + 1) * cell
+                    if not touched[j]:
+                        if _inside(edges, xl + 0.5 * cell, blo + 0.5 * cell):
+                            sure.setdefault(key, []).append(int(rid))
+                        continue
+                    local = np.flatnonzero((exhi >= xl) & (exlo <= xr))
+                    cross = np.flatnonzero((ex0 > xr) != (ex1 > xr))
+                    ys = ey0[cross] + (xr - ex0[cross]) / ek[cross]
+                    breaks = tuple(sorted(ys[(ys > blo) & (ys <= bhi)].tolist()))
+                    maybe.setdefault(key, []).append(
+                        (int(rid), (xr, _inside(edges, xr, blo), breaks, tuple(edges[i] for i in local))))
+        self.grid: Dict[int, Tuple[FrozenSet[int], tuple]] = {
+            key: (frozenset(sure.get(key, ())), tuple(maybe.get(key, ())))
+            for key in set(sure) | set(maybe)}
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int((x - self.ox) * self.inv), int((y - self.oy) * self.inv)
+
+    def locate(self, lon: float, lat: float) -> FrozenSet[int]:
+        """Indexes (into features) of the regions containing the point."""
+        fx, fy = (lon - self.ox) * self.inv, (lat - self.oy) * self.inv
+        if not (0 <= fx < self.cols and 0 <= fy < self.rows):
+            return EMPTY
+        entry = self.grid.get(int(fy) * self.cols + int(fx))
+        if entry is None:
+            return EMPTY
+        sure, maybe = entry
+        if not maybe:
+            return sure
+        # boundary cell: the ray to +x is split at the cell's right side xr.
+        # Beyond xr its parity is the inside state at (xr, lat): the state at
+        # the cell corner, flipped once per boundary crossing of x = xr below
+        # lat. Up to xr only the cell's own edges count.
+        hits = []
+        for rid, (xr, inside, breaks, edges) in maybe:
+            if breaks:
+                inside ^= bisect_right(breaks, lat) & 1
+            for x0, y0, y1, k in edges:
+                if (y0 > lat) != (y1 > lat) and lon < x0 + (lat - y0) * k <= xr:
+                    inside = not inside
+            if inside:
+                hits.append(rid)
+        return sure.union(hits) if hits else sure
+
+    def stats(self) -> dict:
+        boundary = sum(1 for s, m in self.grid.values() if m)
+        return {"regions": len(self.features), "cell_deg": round(self.cell, 6),
+                "cells": len(self.grid), "boundary_cells": boundary}
+
+
+# ---- engine --------------------------------------------------------------
+
+def _ts(text: str):
+    """A CSV ts as the JSON path would carry it: int or float when numeric, else the string."""
+    if not text:
+        return None
+    for kind in (int, float):
+        try:
+            v = kind(text)
+        except ValueError:
+            continue
+        if kind is int or math.isfinite(v):
+            return v
+    return text
+
+
+def parse_position(line: bytes):
+    """(entity, lon, lat, ts) from a JSON object or `id,lon,lat[,ts]` line; None if unusable."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        if line[:1] == b"{":
+            o = json.loads(line)
+            ent = o.get("id", o.get("entity"))
+            lon = o.get("lon", o.get("lng", o.get("longitude")))
+            lat = o.get("lat", o.get("latitude"))
+            ts = o.get("ts")
+        else:
+            parts = line.decode("utf-8").split(",")
+            ent, lon, lat = parts[0].strip(), parts[1], parts[2]
+            ts = _ts(parts[3].strip()) if len(parts) > 3 else None
+        lon, lat = float(lon), float(lat)
+    except (ValueError, IndexError, TypeError, AttributeError, UnicodeDecodeError):
+        return None
+    if ent is None or ent == "" or not (math.isfinite(lon) and math.isfinite(lat)):
+        return None
+    return ent, lon, lat, ts
+
+
+class GeofenceEngine:
+    """Per-entity region state; writes enter/exit lines to `out` on transitions."""
+
+    def __init__(self, index: RegionIndex, out=None, id_field: str = "UniqueID"):
+        self.index = index
+        self.out = out
+        self.state: Dict[object, FrozenSet[int]] = {}
+        props = [f.get("properties") or {} for f in index.features]
+        self.region_ids = [p.get(id_field, i) for i, p in enumerate(props)]
+        self.legends = [p.get("LegendID", "") for p in props]
+        self.messages = self.events = self.errors = 0
+
+    def update(self, entity, lon: float, lat: float, ts=None) -> List[dict]:
+        """Apply one position; the transition events it caused (usually none)."""
+        self.messages += 1
+        now = self.index.locate(lon, lat)
+        old = self.state.get(entity, EMPTY)
+        if now == old:
+            if entity not in self.state:
+                self.state[entity] = now
+            return []
+        self.state[entity] = now
+        ev = [self._event("exit", entity, r, ts, lon, lat) for r in sorted(old - now)]
+        ev += [self._event("enter", entity, r, ts, lon, lat) for r in sorted(now - old)]
+        self.events += len(ev)
+        return ev
+
+    def _event(self, kind, entity, rid, ts, lon, lat) -> dict:
+        return {"event": kind, "entity": entity, "region": self.region_ids[rid],
+                "legend": self.legends[rid], "ts": ts, "lon": lon, "lat": lat}
+
+    def feed(self, lines: Sequence[bytes]):
+        """Process raw input lines, writing events as JSON lines."""
+        out = []
+        for line in lines:
+            pos = parse_position(line)
+            if pos is None:
+                if line.strip():
+                    self.errors += 1
+                continue
+            ev = self.update(*pos)
+            if ev:
+                out.extend(json.dumps(e, separators=(",", ":")) for e in ev)
+        if out and self.out is not None:
+            self.out.write("\n".join(out) + "\n")
+            self.out.flush()
+
+
+# ---- sources -------------------------------------------------------------
+
+async def consume(reader: asyncio.StreamReader, engine: GeofenceEngine):
+    buf = b""
+    while True:
+        chunk = await reader.read(CHUNK)
+        if not chunk:
+            break
+        lines = (buf + chunk).split(b"\n")
+        buf = lines.pop()
+        engine.feed(lines)
+    if buf:
+        engine.feed([buf])
+
+
+async def read_stdin(engine: GeofenceEngine):
+    if stat.S_ISREG(os.fstat(sys.stdin.fileno()).st_mode):  # `< file`: no pipe transport for files
+        await read_file(engine, sys.stdin.buffer)
+        return
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=CHUNK * 4)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    await consume(reader, engine)
+
+
+async def read_file(engine: GeofenceEngine, path, follow: bool = False):
+    """Read a file (path or open binary file) to EOF; with follow, keep polling for appended lines (tail -F)."""
+    fh = open(path, "rb") if isinstance(path, (str, os.PathLike)) else path
+    buf, pos = b"", 0
+    try:
+        while True:
+            chunk = fh.read(CHUNK)
+            if chunk:
+                pos += len(chunk)
+                lines = (buf + chunk).split(b"\n")
+                buf = lines.pop()
+                engine.feed(lines)
+                await asyncio.sleep(0)           # let socket sources run between chunks
+                continue
+            if not follow:
+                break
+            await asyncio.sleep(TAIL_POLL)
+            try:
+                if os.fstat(fh.fileno()).st_size < pos or os.stat(path).st_ino != os.fstat(fh.fileno()).st_ino:
+                    fh.close()                   # truncated or rotated: start over on the current file
+                    fh = open(path, "rb")
+                    buf, pos = b"", 0
+            except OSError:
+                pass
+    finally:
+        if fh is not path:
+            fh.close()
+    if buf:
+        engine.feed([buf])
+
+
+async def listen(engine: GeofenceEngine, addr: str):
+    """Serve `tcp:host:port` or `unix:/path`; every connection streams positions."""
+    async def handle(reader, writer):
+        try:
+            await consume(reader, engine)
+        finally:
+            writer.close()
+
+    kind, _, rest = addr.partition(":")
+    if kind == "unix":
+        if os.path.exists(rest):
+            os.unlink(rest)
+        server = await asyncio.start_unix_server(handle, rest, limit=CHUNK * 4)
+    elif kind == "tcp":
+        host, _, port = rest.rpartition(":")
+        server = await asyncio.start_server(handle, host or "127.0.0.1", int(port), limit=CHUNK * 4)
+    else:
+        raise ValueError(f"bad --listen address {addr!r} (tcp:host:port or unix:/path)")
+    print(f"Listening on {addr}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+async def run(engine: GeofenceEngine, files=(), tails=(), listens=(), stdin: bool = False):
+    tasks = [read_file(engine, p) for p in files] + [read_file(engine, p, True) for p in tails]
+    tasks += [listen(engine, a) for a in listens]
+    if stdin:
+        tasks.append(read_stdin(engine))
+    await asyncio.gather(*tasks)
+
+
+# ---- CLI -----------------------------------------------------------------
+
+def load_regions(paths, legends=()) -> List[dict]:
+    feats = []
+    for p in paths:
+        for f in load_collection(p)["features"]:
+            if (f.get("geometry") or {}).get("type") not in POLYGONAL:
+                continue
+            if legends and (f.get("properties") or {}).get("LegendID") not in legends:
+                continue
+            feats.append(f)
+    return feats
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Stream positions, emit enter/exit events for the asset regions.")
+    ap.add_argument("regions", nargs="+", help="region FeatureCollection(s)")
+    ap.add_argument("--legend", action="append", default=[], help="only regions with this LegendID (repeatable)")
+    ap.add_argument("--id-field", default="UniqueID", help="region property reported as `region`")
+    ap.add_argument("--cell", type=float, help="grid cell size in degrees (default: from region sizes)")
+    ap.add_argument("--file", action="append", default=[], help="read positions from a file once (repeatable)")
+    ap.add_argument("--tail", action="append", default=[], help="follow a file for appended positions")
+    ap.add_argument("--listen", action="append", default=[], help="tcp:host:port or unix:/path (repeatable)")
+    ap.add_argument("-o", "--output", help="events file (default stdout)")
+    ap.add_argument("--stats", action="store_true", help="print index and throughput stats to stderr")
+    args = ap.parse_args(argv)
+
+    try:
+        t0 = time.perf_counter()
+        index = RegionIndex(load_regions(args.regions, set(args.legend)), args.cell)
+        build = time.perf_counter() - t0
+        out = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+    if args.stats:
+        print(json.dumps(dict(index.stats(), build_s=round(build, 3))), file=sys.stderr)
+
+    engine = GeofenceEngine(index, out, args.id_field)
+    stdin = not (args.file or args.tail or args.listen)
+    t0 = time.perf_counter()
+    try:
+        asyncio.run(run(engine, args.file, args.tail, args.listen, stdin))
+    except KeyboardInterrupt:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+    finally:
+        if args.output:
+            out.close()
+    if args.stats:
+        dt = time.perf_counter() - t0
+        print(json.dumps({"messages": engine.messages, "events": engine.events, "errors": engine.errors,
+                          "entities": len(engine.state), "seconds": round(dt, 3),
+                          "msg_per_s": round(engine.messages / dt) if dt > 0 else None}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+"""
+Vectorized per-feature geometry summaries (NumPy).
+
+All vertices of a collection are packed into one (V, 2) array with ring and
+feature offsets, so bbox / centroid / area are a handful of ufunc reductions
+over the whole collection instead of Python loops over coordinates.
+
+  packed = pack(fc["features"])
+  bounds(packed)          -> (F, 4)  minLon, minLat, maxLon, maxLat
+  centroids(packed)       -> (F, 2)  area-weighted centroid (lon, lat)
+  areas_km2(packed)       -> (F,)    spherical area, holes subtracted
+  label_anchors(packed)   -> (F, 2)  pole of inaccessibility of the largest part
+  simplify_geometry(g, tolerance)    Douglas-Peucker on GeoJSON coordinates
+
+Features without coordinates get NaN rows.
+"""
+import heapq
+import math
+from typing import List, NamedTuple
+
+import numpy as np
+
+EARTH_RADIUS_M = 6378137.0
+
+# ring kinds
+OTHER, EXTERIOR, HOLE = 0, 1, 2
+
+
+class PackedGeometry(NamedTuple):
+    coords: np.ndarray        # (V, 2) float64 lon/lat
+    ring_offsets: np.ndarray  # (R + 1,) vertex start of each ring
+    ring_feature: np.ndarray  # (R,) feature index of each ring
+    ring_part: np.ndarray     # (R,) polygon-part id (global), -1 for non-polygons
+    ring_kind: np.ndarray     # (R,) OTHER / EXTERIOR / HOLE
+    n_features: int
+
+
+def _geometry_rings(geom):
+    """Yield (kind, part_local, ring) for one GeoJSON geometry."""
+    if not geom:
+        return
+    t, c = geom.get("type"), geom.get("coordinates")
+    if t == "Point":
+        yield OTHER, -1, [c]
+    elif t in ("MultiPoint", "LineString"):
+        yield OTHER, -1, c
+    elif t == "MultiLineString":
+        for line in c:
+            yield OTHER, -1, line
+    elif t == "Polygon":
+        for i, ring in enumerate(c):
+            yield (EXTERIOR if i == 0 else HOLE), 0, ring
+    elif t == "MultiPolygon":
+        for p, poly in enumerate(c):
+            for i, ring in enumerate(poly):
+                yield (EXTERIOR if i == 0 else HOLE), p, ring
+    elif t == "GeometryCollection":
+        for p, g in enumerate(geom.get("geometries") or []):
+            for kind, part, ring in _geometry_rings(g):
+                yield kind, (p * 1_000_000 + part if part >= 0 else -1), ring
+
+
+def pack(features) -> PackedGeometry:
+    rings: List[np.ndarray] = []
+    ring_feature, ring_part, ring_kind = [], [], []
+    part_ids = {}
+    n = 0
+    for fi, f in enumerate(features):
+        n = fi + 1
+        for kind, part, ring in _geometry_rings(f.get("geometry")):
+            arr = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+            if not len(arr):
+                continue
+            rings.append(arr)
+            ring_feature.append(fi)
+            ring_kind.append(kind)
+            ring_part.append(part_ids.setdefault((fi, part), len(part_ids)) if part >= 0 else -1)
+
+    lengths = np.fromiter((len(r) for r in rings), dtype=np.int64, count=len(rings))
+    offsets = np.zeros(len(rings) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return PackedGeometry(
+        coords=np.concatenate(rings) if rings else np.empty((0, 2)),
+        ring_offsets=offsets,
+        ring_feature=np.asarray(ring_feature, dtype=np.int64),
+        ring_part=np.asarray(ring_part, dtype=np.int64),
+        ring_kind=np.asarray(ring_kind, dtype=np.int8),
+        n_features=n,
+    )
+
+
+def _next_index(p: PackedGeometry) -> np.ndarray:
+    """Index of the following vertex, wrapping to the ring start at the ring end."""
+    nxt = np.arange(1, len(p.coords) + 1, dtype=np.int64)
+    if len(p.ring_feature):
+        nxt[p.ring_offsets[1:] - 1] = p.ring_offsets[:-1]
+    return nxt
+
+
+def _ring_sum(p: PackedGeometry, values: np.ndarray) -> np.ndarray:
+    if not len(p.ring_feature):
+        return np.zeros(0)
+    return np.add.reduceat(values, p.ring_offsets[:-1])
+
+
+def _per_feature(p: PackedGeometry, ufunc, values: np.ndarray, fill=np.nan) -> np.ndarray:
+    """Reduce per-vertex values to per-feature values (vertices are feature-contiguous)."""
+    out = np.full(p.n_features, fill, dtype=np.float64)
+    if not len(p.ring_feature):
+        return out
+    first = np.flatnonzero(np.r_[True, p.ring_feature[1:] != p.ring_feature[:-1]])
+    out[p.ring_feature[first]] = ufunc.reduceat(values, p.ring_offsets[first])
+    return out
+
+
+def bounds(p: PackedGeometry) -> np.ndarray:
+    x, y = p.coords[:, 0], p.coords[:, 1]
+    return np.column_stack([
+        _per_feature(p, np.minimum, x),
+        _per_feature(p, np.minimum, y),
+        _per_feature(p, np.maximum, x),
+        _per_feature(p, np.maximum, y),
+    ])
+
+
+def _ring_weight(p: PackedGeometry) -> np.ndarray:
+    return np.select([p.ring_kind == EXTERIOR, p.ring_kind == HOLE], [1.0, -1.0], 0.0)
+
+
+def centroids(p: PackedGeometry) -> np.ndarray:
+    """Area-weighted planar centroid in lon/lat; vertex mean where area is zero."""
+    out = np.full((p.n_features, 2), np.nan)
+    if not len(p.ring_feature):
+        return out
+    lengths = np.diff(p.ring_offsets)
+    # shift every ring to its first vertex to keep the shoelace well conditioned
+    origin = np.repeat(p.coords[p.ring_offsets[:-1]], lengths, axis=0)
+    local = p.coords - origin
+    nxt = _next_index(p)
+    x0, y0 = local[:, 0], local[:, 1]
+    x1, y1 = local[nxt, 0], local[nxt, 1]
+    cross = x0 * y1 - x1 * y0
+
+    a2 = _ring_sum(p, cross)                      # 2 * signed ring area
+    cx = _ring_sum(p, (x0 + x1) * cross)          # 6 * A * cx
+    cy = _ring_sum(p, (y0 + y1) * cross)
+    w = np.abs(a2) * _ring_weight(p)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rx = np.where(a2 != 0, cx / (3 * a2), 0.0) + p.coords[p.ring_offsets[:-1], 0]
+        ry = np.where(a2 != 0, cy / (3 * a2), 0.0) + p.coords[p.ring_offsets[:-1], 1]
+
+    f = p.ring_feature
+    wsum = np.bincount(f, weights=w, minlength=p.n_features)
+    wx = np.bincount(f, weights=w * rx, minlength=p.n_features)
+    wy = np.bincount(f, weights=w * ry, minlength=p.n_features)
+
+    mean_x = _per_feature(p, np.add, p.coords[:, 0], fill=0.0)
+    mean_y = _per_feature(p, np.add, p.coords[:, 1], fill=0.0)
+    count = np.bincount(f, weights=lengths, minlength=p.n_features)
+    has = count > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ok = has & (np.abs(wsum) > 0)
+        out[ok, 0] = wx[ok] / wsum[ok]
+        out[ok, 1] = wy[ok] / wsum[ok]
+        fb = has & ~ok
+        out[fb, 0] = mean_x[fb] / count[fb]
+        out[fb, 1] = mean_y[fb] / count[fb]
+    return out
+
+
+def areas_km2(p: PackedGeometry) -> np.ndarray:
+    """Spherical polygon area (same formula as turf/d3), holes subtracted."""
+    out = np.full(p.n_features, np.nan)
+    if not len(p.ring_feature):
+        return out
+    lon = np.radians(p.coords[:, 0])
+    slat = np.sin(np.radians(p.coords[:, 1]))
+    nxt = _next_index(p)
+    term = (lon[nxt] - lon) * (2 + slat + slat[nxt])
+    ring_m2 = np.abs(_ring_sum(p, term)) * EARTH_RADIUS_M ** 2 / 2
+    total = np.bincount(p.ring_feature, weights=ring_m2 * _ring_weight(p), minlength=p.n_features)
+    has = np.bincount(p.ring_feature, minlength=p.n_features) > 0
+    out[has] = np.maximum(total[has], 0.0) / 1e6
+    return out
+
+
+# ---- pole of inaccessibility ---------------------------------------------
+
+def _signed_distance(px, py, ax, ay, bx, by):
+    """Distance from each point to the ring edges, negative outside (even-odd rule)."""
+    pxc, pyc = px[:, None], py[:, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        straddle = (ay > pyc) != (by > pyc)
+        xint = (bx - ax) * (pyc - ay) / (by - ay) + ax
+        inside = np.count_nonzero(straddle & (pxc < xint), axis=1) % 2 == 1
+
+    dx, dy = bx - ax, by - ay
+    ll = dx * dx + dy * dy
+    t = ((pxc - ax) * dx + (pyc - ay) * dy) / np.where(ll > 0, ll, 1.0)
+    t = np.clip(np.where(ll > 0, t, 0.0), 0.0, 1.0)
+    ex = ax + t * dx - pxc
+    ey = ay + t * dy - pyc
+    d = np.sqrt((ex * ex + ey * ey).min(axis=1))
+    return np.where(inside, d, -d)
+
+
+def polylabel(rings: List[np.ndarray], precision: float = None):
+    """
+    Pole of inaccessibility of one polygon (exterior ring first, then holes),
+    following mapbox/polylabel. Each batch of candidate cells is evaluated
+    against every edge at once. Longitude is scaled by cos(lat) so distances
+    are roughly isotropic.
+    """
+    ext = rings[0]
+    minx, miny = ext.min(axis=0)
+    maxx, maxy = ext.max(axis=0)
+    kx = math.cos(math.radians((miny + maxy) / 2)) or 1.0
+
+    pts = [r * (kx, 1.0) for r in rings]
+    a = np.concatenate(pts)
+    b = np.concatenate([np.roll(r, -1, axis=0) for r in pts])
+    ax, ay, bx, by = a[:, 0], a[:, 1], b[:, 0], b[:, 1]
+    x0, x1 = minx * kx, maxx * kx
+    w, h = x1 - x0, maxy - miny
+    cell = min(w, h)
+    if cell == 0:
+        return float(minx), float(miny)
+    if precision is None:
+        precision = max(w, h) / 1000.0
+
+    def evaluate(cx, cy, half):
+        d = _signed_distance(cx, cy, ax, ay, bx, by)
+        return d, d + half * math.sqrt(2)
+
+    # seed with the bbox center and a grid over the bbox
+    half = cell / 2
+    gx, gy = np.meshgrid(np.arange(x0, x1, cell) + half, np.arange(miny, maxy, cell) + half)
+    cx, cy = gx.ravel(), gy.ravel()
+    d, mx = evaluate(cx, cy, half)
+    heap = [(-m, float(x), float(y), half, float(dd)) for x, y, dd, m in zip(cx, cy, d, mx)]
+    heapq.heapify(heap)
+
+    bcx, bcy = np.array([(x0 + x1) / 2]), np.array([(miny + maxy) / 2])
+    best_d = float(evaluate(bcx, bcy, 0)[0][0])
+    best = (float(bcx[0]), float(bcy[0]))
+
+    while heap:
+        negmax, x, y, hh, dd = heapq.heappop(heap)
+        if dd > best_d:
+            best_d, best = dd, (x, y)
+        if -negmax - best_d <= precision:
+            continue
+        q = hh / 2
+        kx4 = np.array([x - q, x + q, x - q, x + q])
+        ky4 = np.array([y - q, y - q, y + q, y + q])
+        d4, m4 = evaluate(kx4, ky4, q)
+        for i in range(4):
+            if m4[i] > best_d:
+                heapq.heappush(heap, (-float(m4[i]), float(kx4[i]), float(ky4[i]), q, float(d4[i])))
+
+    return best[0] / kx, best[1]
+
+
+def label_anchors(p: PackedGeometry, precision: float = None) -> np.ndarray:
+    """Label point per feature: polylabel of the largest polygon part, else centroid."""
+    out = centroids(p)
+    poly = p.ring_part >= 0
+    if not poly.any():
+        return out
+    lengths = np.diff(p.ring_offsets)
+    starts = p.ring_offsets[:-1]
+    # largest part by exterior-ring bbox area: cheap and good enough to pick a part
+    span = np.maximum.reduceat(p.coords, starts) - np.minimum.reduceat(p.coords, starts)
+    size = span[:, 0] * span[:, 1]
+
+    best_part = {}
+    for r in np.flatnonzero(poly & (p.ring_kind == EXTERIOR)):
+        f = int(p.ring_feature[r])
+        if f not in best_part or size[r] > best_part[f][1]:
+            best_part[f] = (int(p.ring_part[r]), size[r])
+
+    ring_ids = {}
+    for r in np.flatnonzero(poly):
+        ring_ids.setdefault(int(p.ring_part[r]), []).append(r)
+
+    for f, (part, _) in best_part.items():
+        rings = [p.coords[p.ring_offsets[r]:p.ring_offsets[r + 1]] for r in ring_ids[part]
+                 if lengths[r] >= 3]
+        if rings and p.ring_kind[ring_ids[part][0]] == EXTERIOR:
+            out[f] = polylabel(rings, precision)
+    return out
+
+
+# ---- simplification ------------------------------------------------------
+
+def _segment_distance(pts: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    d = b - a
+    ll = float(d @ d)
+    if ll == 0:
+        return np.hypot(*(pts - a).T)
+    t = np.clip(((pts - a) @ d) / ll, 0.0, 1.0)
+    return np.hypot(*(a + t[:, None] * d - pts).T)
+
+
+def simplify_line(pts: np.ndarray, tolerance: float) -> np.ndarray:
+    """Douglas-Peucker on an (N, 2) array; endpoints are always kept."""
+    pts = np.asarray(pts, dtype=np.float64)
+    n = len(pts)
+    if n < 3 or tolerance <= 0:
+        return pts
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        d = _segment_distance(pts[a + 1:b], pts[a], pts[b])
+        i = int(np.argmax(d))
+        if d[i] > tolerance:
+            k = a + 1 + i
+            keep[k] = True
+            stack.append((a, k))
+            stack.append((k, b))
+    return pts[keep]
+
+
+def simplify_geometry(geom: dict, tolerance: float) -> dict:
+    """Simplify (Multi)Polygon / (Multi)LineString coordinates; rings keep >= 4 positions."""
+    if not geom:
+        return geom
+
+    def ring(r):
+        arr = np.asarray(r, dtype=np.float64).reshape(-1, 2)
+        if len(arr) <= 4:
+            return arr.tolist()
+        s = simplify_line(arr, tolerance)
+        return (s if len(s) >= 4 else arr).tolist()
+
+    t, c = geom.get("type"), geom.get("coordinates")
+    if t == "LineString":
+        return {"type": t, "coordinates": simplify_line(np.asarray(c, dtype=np.float64), tolerance).tolist()}
+    if t == "MultiLineString":
+        return {"type": t, "coordinates": [simplify_line(np.asarray(x, dtype=np.float64), tolerance).tolist()
+                                           for x in c]}
+    if t == "Polygon":
+        return {"type": t, "coordinates": [ring(r) for r in c]}
+    if t == "MultiPolygon":
+        return {"type": t, "coordinates": [[ring(r) for r in poly] for poly in c]}
+    return geom
+
+
+def simplify_packed(p: PackedGeometry, tolerance: float, min_ring: int = 4) -> PackedGeometry:
+    """
+    Douglas-Peucker over every ring of a packed collection at once.
+
+    Each pass finds, for every still-open segment of every ring, its farthest
+    vertex (one vectorized distance pass plus a scatter-max) and splits the
+    segments whose farthest vertex exceeds the tolerance, so the number of
+    NumPy passes is the recursion depth, not the number of rings. Polygon
+    rings that would drop below `min_ring` positions are kept unsimplified.
+    """
+    n = len(p.coords)
+    if not n or tolerance <= 0:
+        return p
+    starts, ends = p.ring_offsets[:-1], p.ring_offsets[1:] - 1
+    keep = np.zeros(n, dtype=bool)
+    keep[starts] = keep[ends] = True
+    idx = np.arange(n)
+    open_ = ~keep
+    x, y = p.coords[:, 0], p.coords[:, 1]
+
+    while open_.any():
+        prev = np.maximum.accumulate(np.where(keep, idx, 0))
+        nxt = np.minimum.accumulate(np.where(keep, idx, n)[::-1])[::-1]
+        v = np.flatnonzero(open_)
+        a, b = prev[v], nxt[v]
+        dx, dy = x[b] - x[a], y[b] - y[a]
+        ll = dx * dx + dy * dy
+        t = np.clip(((x[v] - x[a]) * dx + (y[v] - y[a]) * dy) / np.where(ll > 0, ll, 1.0), 0.0, 1.0)
+        d = np.hypot(x[a] + t * dx - x[v], y[a] + t * dy - y[v])
+
+        seg_max = np.zeros(n)
+        np.maximum.at(seg_max, a, d)
+        split = d > tolerance
+        # settle every vertex of a segment that will not split again
+        open_[v[seg_max[a] <= tolerance]] = False
+        cand = split & (d == seg_max[a])
+        if not cand.any():
+            break
+        _, first = np.unique(a[cand], return_index=True)
+        chosen = v[np.flatnonzero(cand)[first]]
+        keep[chosen] = True
+        open_[chosen] = False
+
+    # polygon rings must stay rings
+    ring_id = np.repeat(np.arange(len(starts)), np.diff(p.ring_offsets))
+    kept = np.bincount(ring_id, weights=keep, minlength=len(starts))
+    restore = (p.ring_kind != OTHER) & (kept < min_ring)
+    keep |= restore[ring_id]
+
+    lengths = np.bincount(ring_id[keep], minlength=len(starts))
+    offsets = np.zeros(len(starts) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return p._replace(coords=p.coords[keep], ring_offsets=offsets)
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+geoparquet.py — asset FeatureCollections as GeoParquet with prunable row groups.
+
+Writes one row per feature (GeoParquet 1.1):
+
+  AssetID … LayerType   the io.SCHEMA properties; LegendID and LayerType are
+                        dictionary-encoded (a few distinct values per file)
+  geometry              WKB (geotools.wkb), the primary geometry column
+  bbox                  struct<xmin, ymin, xmax, ymax>, declared as the
+                        geometry's bbox covering in the "geo" metadata
+
+Rows are written in Hilbert order of their centroids (geotools.hilbert), so
+each row group covers a compact region and the Parquet min/max statistics of
+bbox.* describe it tightly. The reader checks those statistics — and the
+LegendID min/max — before touching any data and only decodes row groups that
+can match, then filters rows inside them.
+
+Needs pyarrow (pip install pyarrow); the rest of geotools does not.
+
+Usage:
+  python3 -m geotools.geoparquet write Asset_Locations_Regions_Polygons.geojson -o assets.parquet
+  python3 -m geotools.geoparquet write big.geojson -o big.parquet --row-group-size 2048
+  python3 -m geotools.geoparquet read assets.parquet --bbox=-88,30,-84,35 --legend WarehouseSmallParts -o sub.geojson
+"""
+import argparse
+import json
+import sys
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from . import geometry, hilbert, wkb
+from .io import SCHEMA, load_collection, write_collection
+
+GEOPARQUET_VERSION = "1.1.0"
+DEFAULT_ROW_GROUP = 4096
+DICTIONARY_COLUMNS = ("LegendID", "LayerType")
+BBOX_FIELDS = ("xmin", "ymin", "xmax", "ymax")
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("GeoParquet support needs pyarrow (pip install pyarrow)") from e
+    return pa, pq
+
+
+def _column(pa, values: list):
+    try:
+        arr = pa.array(values)
+        # an all-empty column (Color in most exports) still gets a usable type
+        return arr.cast(pa.string()) if pa.types.is_null(arr.type) else arr
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # mixed types across exports (e.g. AssetID 10000167 vs "A-17"): keep as text
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def build_table(features: Sequence[dict], sort: bool = True):
+    """pyarrow Table of the features (Hilbert-sorted unless sort=False)."""
+    pa, _ = _pyarrow()
+    features = list(features)
+    if sort:
+        features = [features[i] for i in hilbert.sort_order(features)]
+
+    props = [f.get("properties") or {} for f in features]
+    names = list(SCHEMA) + sorted({k for p in props for k in p} - set(SCHEMA))
+    arrays, fields = [], []
+    for k in names:
+        arr = _column(pa, [p.get(k) for p in props])
+        if k in DICTIONARY_COLUMNS and pa.types.is_string(arr.type):
+            arr = arr.dictionary_encode()
+        arrays.append(arr)
+        fields.append(k)
+
+    arrays.append(pa.array([wkb.dumps(f.get("geometry")) for f in features], type=pa.binary()))
+    fields.append("geometry")
+
+    b = geometry.bounds(geometry.pack(features))
+    missing = ~np.isfinite(b).all(axis=1)
+    arrays.append(pa.StructArray.from_arrays(
+        [pa.array(b[:, i], mask=missing) for i in range(4)], names=list(BBOX_FIELDS),
+        mask=pa.array(missing)))
+    fields.append("bbox")
+
+    table = pa.Table.from_arrays(arrays, names=fields)
+    return table.replace_schema_metadata({b"geo": json.dumps(geo_metadata(features, b)).encode()})
+
+
+def geo_metadata(features, bounds: np.ndarray) -> dict:
+    types = sorted({(f.get("geometry") or {}).get("type") for f in features} - {None})
+    ok = np.isfinite(bounds).all(axis=1)
+    col = {
+        "encoding": "WKB",
+        "geometry_types": types,
+        "covering": {"bbox": {k: ["bbox", k] for k in BBOX_FIELDS}},
+    }
+    if ok.any():
+        col["bbox"] = [float(bounds[ok, 0].min()), float(bounds[ok, 1].min()),
+                       float(bounds[ok, 2].max()), float(bounds[ok, 3].max())]
+    return {"version": GEOPARQUET_VERSION, "primary_column": "geometry", "columns": {"geometry": col}}
+
+
+def write(path, features: Iterable[dict], row_group_size: int = DEFAULT_ROW_GROUP,
+          compression: str = "zstd", sort: bool = True) -> int:
+    """Write features as GeoParquet; returns the number of row groups."""
+    _, pq = _pyarrow()
+    table = build_table(features, sort=sort)
+    pq.write_table(table, path, row_group_size=row_group_size, compression=compression,
+                   write_statistics=True)
+    return pq.ParquetFile(path).num_row_groups
+
+
+# ---- reading -------------------------------------------------------------
+
+def _stats_index(meta) -> dict:
+    if not meta.num_row_groups:
+        return {}
+    rg = meta.row_group(0)
+    return {rg.column(j).path_in_schema: j for j in range(rg.num_columns)}
+
+
+def _min_max(rg, j):
+    if j is None:
+        return None
+    st = rg.column(j).statistics
+    if st is None or not st.has_min_max:
+        return None
+    return st.min, st.max
+
+
+def select_row_groups(pf, bbox: Optional[Sequence[float]] = None,
+                      legends: Optional[Iterable[str]] = None) -> List[int]:
+    """Row groups whose statistics allow a match for bbox / LegendID filters."""
+    meta = pf.metadata
+    idx = _stats_index(meta)
+    legends = sorted(set(legends)) if legends else None
+    keep = []
+    for i in range(meta.num_row_groups):
+        rg = meta.row_group(i)
+        if bbox is not None:
+            qminx, qminy, qmaxx, qmaxy = bbox
+            xmin, ymin, xmax, ymax = (_min_max(rg, idx.get(f"bbox.{k}")) for k in BBOX_FIELDS)
+            if ((xmin and xmin[0] > qmaxx) or (ymin and ymin[0] > qmaxy)
+                    or (xmax and xmax[1] < qminx) or (ymax and ymax[1] < qminy)):
+                continue
+        if legends is not None:
+            mm = _min_max(rg, idx.get("LegendID"))
+            if mm and not any(mm[0] <= v <= mm[1] for v in legends):
+                continue
+        keep.append(i)
+    return keep
+
+
+def read(path, bbox: Optional[Sequence[float]] = None, legends: Optional[Iterable[str]] = None,
+         columns: Optional[List[str]] = None):
+    """
+    Rows matching the filters as a pyarrow Table. Row groups are pruned on
+    their statistics first; only the survivors are decoded and row-filtered.
+    """
+    pa, pq = _pyarrow()
+    import pyarrow.compute as pc
+
+    pf = pq.ParquetFile(path)
+    groups = select_row_groups(pf, bbox, legends)
+    cols = None
+    if columns is not None:
+        cols = list(dict.fromkeys(list(columns)
+                                  + (["bbox"] if bbox is not None else [])
+                                  + (["LegendID"] if legends else [])))
+    table = pf.read_row_groups(groups, columns=cols) if groups else pf.schema_arrow.empty_table()
+    if cols is not None and not groups:
+        table = table.select(cols)
+
+    mask = None
+    if bbox is not None:
+        qminx, qminy, qmaxx, qmaxy = bbox
+        b = table.column("bbox")
+        f = lambda k: pc.struct_field(b, k)  # noqa: E731
+        mask = pc.and_(pc.and_(pc.less_equal(f("xmin"), qmaxx), pc.greater_equal(f("xmax"), qminx)),
+                       pc.and_(pc.less_equal(f("ymin"), qmaxy), pc.greater_equal(f("ymax"), qminy)))
+    if legends:
+        m = pc.is_in(pc.cast(table.column("LegendID"), pa.string()),
+                     value_set=pa.array(sorted(set(legends)), type=pa.string()))
+        mask = m if mask is None else pc.and_(mask, m)
+    if mask is not None:
+        table = table.filter(pc.fill_null(mask, False))
+    if columns is not None:
+        table = table.select(list(columns))
+    return table
+
+
+def to_features(table) -> List[dict]:
+    """Table rows back to GeoJSON features (bbox member from the covering column)."""
+    props_cols = [c for c in table.column_names if c not in ("geometry", "bbox")]
+    out = []
+    for row in table.to_pylist():
+        f = {"type": "Feature",
+             "properties": {k: row[k] for k in props_cols},
+             "geometry": wkb.loads(row.get("geometry"))}
+        bb = row.get("bbox")
+        if bb and None not in bb.values():
+            f["bbox"] = [bb[k] for k in BBOX_FIELDS]
+        out.append(f)
+    return out
+
+
+def _parse_bbox(s):
+    try:
+        v = tuple(float(x) for x in s.split(","))
+    except ValueError:
+        v = ()
+    if len(v) != 4:
+        print("ERROR: --bbox must be minx,miny,maxx,maxy", file=sys.stderr)
+        sys.exit(2)
+    return v
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="GeoParquet export and filtered reads for the asset files.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    w = sub.add_parser("write", help="GeoJSON -> GeoParquet")
+    w.add_argument("input", help="source FeatureCollection")
+    w.add_argument("-o", "--output", required=True, help="output .parquet")
+    w.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP,
+                   help=f"rows per row group (default {DEFAULT_ROW_GROUP})")
+    w.add_argument("--compression", default="zstd", help="zstd, snappy, gzip or none")
+    w.add_argument("--no-sort", action="store_true", help="keep input order instead of Hilbert order")
+    r = sub.add_parser("read", help="filtered read, row groups pruned on statistics")
+    r.add_argument("input", help="GeoParquet file")
+    r.add_argument("--bbox", help="minx,miny,maxx,maxy")
+    r.add_argument("--legend", action="append", help="LegendID to keep (repeatable)")
+    r.add_argument("-o", "--output", help="write matches as GeoJSON")
+    args = ap.parse_args(argv)
+
+    try:
+        if args.cmd == "write":
+            fc = load_collection(args.input)
+            groups = write(args.output, fc["features"], args.row_group_size,
+                           args.compression, sort=not args.no_sort)
+            print(f"Wrote {len(fc['features'])} rows in {groups} row groups -> {args.output}")
+            return
+
+        _, pq = _pyarrow()
+        bbox = _parse_bbox(args.bbox) if args.bbox else None
+        pf = pq.ParquetFile(args.input)
+        groups = select_row_groups(pf, bbox, args.legend)
+        table = read(args.input, bbox, args.legend)
+        print(f"Row groups read: {len(groups)}/{pf.num_row_groups}; rows matched: {table.num_rows}")
+        if args.output:
+            write_collection(args.output, to_features(table))
+            print(f"Wrote {table.num_rows} features -> {args.output}")
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+hilbert.py — spatial ordering of features by the Hilbert index of their centroid.
+
+Keys are computed for all centroids at once: coordinates are scaled to a
+16-bit grid over the dataset extent and mapped with the branch-free Hilbert
+function used by flatbush, giving a uint32 key per feature. Sorting by key
+puts spatially adjacent regions next to each other in the file, which helps
+compression, tiling, range reads and the packed R-tree.
+
+In memory:
+  feats = sort_features(feats)
+
+Larger than memory (--external): the input is streamed in chunks, each
+chunk is sorted and spilled to a run file, and the runs are merged with a
+k-way heap merge into the output. The extent comes from a first streaming
+pass unless given. Ties keep input order in both modes.
+
+Usage:
+  python3 -m geotools.hilbert tAsset_Locations_Regions_Polygons.geojson -o sorted.geojson
+  python3 -m geotools.hilbert big.geojson -o big_sorted.geojson --external --chunk 200000
+  python3 -m geotools.hilbert big.geojson -o out.geojson --extent -125,24,-66,50
+"""
+import argparse
+import heapq
+import json
+import os
+import sys
+import tempfile
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from . import geometry
+from .io import load_collection, stream_features, write_collection
+
+HILBERT_MAX = 0xFFFF
+NO_KEY = np.uint32(0xFFFFFFFF)   # features without coordinates sort last
+DEFAULT_CHUNK = 100_000
+
+
+def hilbert(x, y) -> np.ndarray:
+    """Hilbert index of 16-bit grid coordinates (uint32 arrays in, uint32 out)."""
+    x = np.asarray(x, dtype=np.uint32)
+    y = np.asarray(y, dtype=np.uint32)
+    m = np.uint32(0xFFFF)
+
+    a = x ^ y
+    b = m ^ a
+    c = m ^ (x | y)
+    d = x & (y ^ m)
+    A = a | (b >> 1)
+    B = (a >> 1) ^ a
+    C = ((c >> 1) ^ (b & (d >> 1))) ^ c
+    D = ((a & (c >> 1)) ^ (d >> 1)) ^ d
+
+    for s in (2, 4):
+        a, b, c, d = A, B, C, D
+        A = (a & (a >> s)) ^ (b & (b >> s))
+        B = (a & (b >> s)) ^ (b & ((a ^ b) >> s))
+        C = C ^ ((a & (c >> s)) ^ (b & (d >> s)))
+        D = D ^ ((b & (c >> s)) ^ ((a ^ b) & (d >> s)))
+
+    a, b, c, d = A, B, C, D
+    C = C ^ ((a & (c >> 8)) ^ (b & (d >> 8)))
+    D = D ^ ((b & (c >> 8)) ^ ((a ^ b) & (d >> 8)))
+
+    a = C ^ (C >> 1)
+    b = D ^ (D >> 1)
+    i0 = x ^ y
+    i1 = b | (m ^ (i0 | a))
+    return (_interleave(i1) << np.uint32(1)) | _interleave(i0)
+
+
+def _interleave(v: np.ndarray) -> np.ndarray:
+    v = (v | (v << np.uint32(8))) & np.uint32(0x00FF00FF)
+    v = (v | (v << np.uint32(4))) & np.uint32(0x0F0F0F0F)
+    v = (v | (v << np.uint32(2))) & np.uint32(0x33333333)
+    v = (v | (v << np.uint32(1))) & np.uint32(0x55555555)
+    return v
+
+
+def extent_of(points: np.ndarray) -> Optional[Sequence[float]]:
+    ok = np.isfinite(points).all(axis=1)
+    if not ok.any():
+        return None
+    p = points[ok]
+    return (*p.min(axis=0), *p.max(axis=0))
+
+
+def hilbert_keys(points: np.ndarray, extent: Optional[Sequence[float]] = None) -> np.ndarray:
+    """uint32 Hilbert key per (x, y) row, scaled to `extent` (default: the points' own)."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    extent = extent or extent_of(points)
+    keys = np.full(len(points), NO_KEY, dtype=np.uint32)
+    if extent is None:
+        return keys
+    minx, miny, maxx, maxy = extent
+    ok = np.isfinite(points).all(axis=1)
+    w = (maxx - minx) or 1.0
+    h = (maxy - miny) or 1.0
+    gx = np.clip(np.floor(HILBERT_MAX * (points[ok, 0] - minx) / w), 0, HILBERT_MAX)
+    gy = np.clip(np.floor(HILBERT_MAX * (points[ok, 1] - miny) / h), 0, HILBERT_MAX)
+    keys[ok] = hilbert(gx, gy)
+    return keys
+
+
+def feature_keys(features, extent=None) -> np.ndarray:
+    return hilbert_keys(geometry.centroids(geometry.pack(features)), extent)
+
+
+def sort_order(features, extent=None) -> np.ndarray:
+    """Stable permutation putting features in Hilbert order of their centroids."""
+    return np.argsort(feature_keys(features, extent), kind="stable")
+
+
+def sort_features(features, extent=None) -> List[dict]:
+    features = list(features)
+    return [features[i] for i in sort_order(features, extent)]
+
+
+# ---- external merge sort -------------------------------------------------
+
+def scan_extent(path, chunk: int = DEFAULT_CHUNK):
+    """Centroid extent of a FeatureCollection, streamed in chunks."""
+    ext = None
+    for batch in _chunks(stream_features(path), chunk):
+        e = extent_of(geometry.centroids(geometry.pack(batch)))
+        if e is not None:
+            ext = e if ext is None else (min(ext[0], e[0]), min(ext[1], e[1]),
+                                         max(ext[2], e[2]), max(ext[3], e[3]))
+    return ext
+
+
+def _chunks(it, size):
+    batch = []
+    for f in it:
+        batch.append(f)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def external_sort(src, dst, extent=None, chunk: int = DEFAULT_CHUNK, tmpdir=None) -> int:
+    """Hilbert-sort a FeatureCollection that does not fit in memory."""
+    extent = extent or scan_extent(src, chunk)
+    runs = []
+    seq = 0
+    with tempfile.TemporaryDirectory(dir=tmpdir, prefix="hilbert-") as tmp:
+        for batch in _chunks(stream_features(src), chunk):
+            keys = feature_keys(batch, extent)
+            path = os.path.join(tmp, f"run{len(runs):05d}.txt")
+            with open(path, "w", encoding="utf-8") as fh:
+                for i in np.argsort(keys, kind="stable"):
+                    # key + input sequence make every line's prefix unique and ordered
+                    fh.write(f"{int(keys[i]):08x}{seq + int(i):012x}\t"
+                             f"{json.dumps(batch[i], separators=(',', ':'))}\n")
+            seq += len(batch)
+            runs.append(path)
+
+        handles = [open(p, encoding="utf-8") for p in runs]
+        try:
+            merged = heapq.merge(*handles)
+            return write_collection(dst, (json.loads(line.split("\t", 1)[1]) for line in merged))
+        finally:
+            for fh in handles:
+                fh.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Order features by the Hilbert index of their centroids.")
+    ap.add_argument("input", help="source FeatureCollection")
+    ap.add_argument("-o", "--output", required=True, help="sorted FeatureCollection")
+    ap.add_argument("--external", action="store_true", help="stream through an external merge sort")
+    ap.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="features per in-memory run (external mode)")
+    ap.add_argument("--extent", help="minx,miny,maxx,maxy of the key grid (default: data extent)")
+    ap.add_argument("--tmpdir", help="directory for run files (external mode)")
+    args = ap.parse_args(argv)
+
+    extent = None
+    if args.extent:
+        try:
+            extent = tuple(float(v) for v in args.extent.split(","))
+            assert len(extent) == 4
+        except (ValueError, AssertionError):
+            print("ERROR: --extent must be minx,miny,maxx,maxy", file=sys.stderr)
+            sys.exit(2)
+
+    try:
+        if args.external:
+            n = external_sort(args.input, args.output, extent, args.chunk, args.tmpdir)
+        else:
+            fc = load_collection(args.input)
+            feats = sort_features(fc.pop("features"), extent)
+            fc.pop("type", None)
+            n = write_collection(args.output, feats, extra=fc)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+    print(f"Wrote {n} features in Hilbert order -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
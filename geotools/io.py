@@ -0,0 +1,226 @@
+"""
+Reading the asset FeatureCollections.
+
+The checked-in files were exported by different tools, so they come as UTF-8,
+UTF-8 with BOM, or UTF-16 LE with CRLF line endings, and their properties
+disagree on types (AssetID 10000167 vs "10000167", Display true vs "true").
+Everything here hands back one normalized shape.
+"""
+import itertools
+import json
+import re
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+# Property columns shared by the asset files, in export order.
+SCHEMA = ("AssetID", "LocationID", "UniqueID", "LegendID", "Display", "Color", "LayerType")
+
+
+STREAM_CHUNK = 1 << 20
+_FEATURES_KEY = re.compile(r'"features"\s*:\s*\[')
+
+
+def _encoding(head: bytes) -> str:
+    if head[:2] in (b"\xff\xfe", b"\xfe\xff"):
+        return "utf-16"
+    return "utf-8-sig"
+
+
+def read_text(path) -> str:
+    raw = Path(path).read_bytes()
+    return raw.decode(_encoding(raw[:2]))
+
+
+def load_collection(path) -> dict:
+    """Load a FeatureCollection with normalized properties."""
+    data = json.loads(read_text(path))
+    if data.get("type") != "FeatureCollection":
+        raise ValueError(f"{path}: not a FeatureCollection")
+    for f in data.get("features", []):
+        f["properties"] = normalize_properties(f.get("properties") or {})
+    return data
+
+
+def iter_features(path) -> Iterator[dict]:
+    yield from load_collection(path)["features"]
+
+
+def stream_features(path, chunk: int = STREAM_CHUNK, members: Optional[dict] = None) -> Iterator[dict]:
+    """
+    Yield normalized features of a FeatureCollection without loading the
+    whole document: the "features" array is decoded one object at a time
+    from a rolling text buffer.
+
+    `members`, if given, receives the collection's other top-level members
+    (name, crs, bbox, ...): those written before the array once reading
+    starts, those after it when the array is done.
+    """
+    with open(path, "rb") as fh:
+        enc = _encoding(fh.read(2))
+    dec = json.JSONDecoder()
+    with open(path, encoding=enc, newline="") as fh:
+        buf, eof = "", False
+
+        def more() -> bool:
+            nonlocal buf, eof
+            data = fh.read(chunk)
+            eof = not data
+            buf += data
+            return not eof
+
+        while True:
+            m = _FEATURES_KEY.search(buf)
+            if m:
+                if members is not None:
+                    members.update(_members(buf[:m.start()].strip().lstrip("\ufeff").rstrip(",") + "}", path))
+                buf = buf[m.end():]
+                break
+            if members is None:
+                buf = buf[-64:]   # the key may straddle the next read
+            if not more():
+                raise ValueError(f"{path}: no features array")
+
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                buf, pos = "", 0
+                if not more():
+                    raise ValueError(f"{path}: unterminated features array")
+                continue
+            if buf[pos] == "]":
+                if members is not None:
+                    members.update(_members("{" + (buf[pos + 1:] + fh.read()).strip().lstrip(","), path))
+                return
+            try:
+                f, end = dec.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                buf, pos = buf[pos:], 0
+                if not more():
+                    raise
+                continue
+            f["properties"] = normalize_properties(f.get("properties") or {})
+            yield f
+            pos = end
+
+
+def _members(text: str, path) -> dict:
+    try:
+        head = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{path}: bad FeatureCollection members: {e}") from None
+    head.pop("type", None)
+    return head
+
+
+def round_coordinates(coords, digits: int):
+    """Nested GeoJSON coordinates rounded to `digits` decimals (same nesting)."""
+    if not isinstance(coords, list):
+        return coords
+    if coords and not isinstance(coords[0], list):
+        return [round(c, digits) if isinstance(c, float) else c for c in coords]
+    return [round_coordinates(c, digits) for c in coords]
+
+
+def round_geometry(geom, digits: int):
+    """Copy of a GeoJSON geometry with rounded coordinates (and bbox)."""
+    if not geom:
+        return geom
+    out = dict(geom)
+    if "coordinates" in out:
+        out["coordinates"] = round_coordinates(out["coordinates"], digits)
+    if "geometries" in out:
+        out["geometries"] = [round_geometry(g, digits) for g in out["geometries"] or ()]
+    if "bbox" in out:
+        out["bbox"] = round_coordinates(out["bbox"], digits)
+    return out
+
+
+def _compact(f: dict, precision: Optional[int]) -> str:
+    if precision is not None:
+        f = dict(f, geometry=round_geometry(f.get("geometry"), precision))
+        if "bbox" in f:
+            f["bbox"] = round_coordinates(f["bbox"], precision)
+    return json.dumps(f, separators=(",", ":"), ensure_ascii=False)
+
+
+def write_collection(path, features: Iterable[dict], extra: Optional[dict] = None,
+                     precision: Optional[int] = None) -> int:
+    """
+    Stream a compact FeatureCollection, one feature per line; returns the
+    count. `precision` rounds coordinates to that many decimals.
+
+    `extra` members go before the array; the head is written once the first
+    feature is in, and members added to `extra` while the features are read
+    (stream_features(members=extra)) go after the array.
+    """
+    extra = {} if extra is None else extra
+    it = iter(features)
+    first = next(it, None)
+    head = {"type": "FeatureCollection", **extra}
+    n = 0
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(json.dumps(head, separators=(",", ":"), ensure_ascii=False)[:-1] + ',"features":[\n')
+        for f in (it if first is None else itertools.chain((first,), it)):
+            fh.write((",\n" if n else "") + _compact(f, precision))
+            n += 1
+        tail = {k: v for k, v in extra.items() if k not in head}
+        fh.write("\n]" + ("," + json.dumps(tail, separators=(",", ":"), ensure_ascii=False)[1:] if tail else "}") + "\n")
+    return n
+
+
+def write_seq(path, features: Iterable[dict], precision: Optional[int] = None, rs: bool = False) -> int:
+    """
+    Stream newline-delimited GeoJSON (GeoJSONSeq): one feature per line,
+    each prefixed with the RFC 8142 record separator when `rs`.
+    """
+    prefix = "\x1e" if rs else ""
+    n = 0
+    with open(path, "w", encoding="utf-8") as fh:
+        for f in features:
+            fh.write(prefix + _compact(f, precision) + "\n")
+            n += 1
+    return n
+
+
+def stream_seq(path) -> Iterator[dict]:
+    """Yield normalized features of a GeoJSONSeq file (with or without RS)."""
+    with open(path, encoding="utf-8-sig") as fh:
+        for line in fh:
+            line = line.strip("\x1e \t\r\n")
+            if line:
+                f = json.loads(line)
+                f["properties"] = normalize_properties(f.get("properties") or {})
+                yield f
+
+
+def _as_bool(v) -> bool:
+    if isinstance(v, str):
+        return v.strip().lower() in ("true", "1", "yes")
+    return bool(v)
+
+
+def normalize_properties(props: dict) -> dict:
+    out = dict(props)
+    aid = out.get("AssetID")
+    if isinstance(aid, str) and aid.strip().isdigit():
+        out["AssetID"] = int(aid)
+    if "Display" in out:
+        out["Display"] = _as_bool(out["Display"])
+    if out.get("LegendID") is None:
+        out["LegendID"] = ""
+    return out
+
+
+def parse_location(s) -> Optional[Tuple[float, float]]:
+    """LocationID "33.53679,-86.78230" -> (lat, lon); None if unparseable."""
+    if not s:
+        return None
+    parts = str(s).split(",")
+    if len(parts) != 2:
+        return None
+    try:
+        return float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+mercator.py — Web Mercator projection and quantized integer tile coordinates.
+
+MapLibre's GeoJSON source (geojson-vt) projects every lon/lat vertex to the
+unit Web Mercator square on each setData, then scales it to tile units. Done
+once here with NumPy, a vertex becomes an integer pair in world tile units at
+a base zoom:
+
+  X = round(x * 2**zoom * extent)     x, y in [0, 1] (geojson-vt's projectX/Y)
+
+so X // extent, Y // extent is the tile at that zoom and X % extent,
+Y % extent the tile-local coordinate, exactly as geojson-vt rounds them.
+Coarser zooms are a right shift away (X >> (zoom - z) for power-of-two
+extents). The default extent is MapLibre's 8192.
+
+geotools.export --mercator-zoom writes these next to the lon/lat output.
+
+Usage:
+  python3 -m geotools.mercator Asset_Locations_Regions_Polygons.geojson -o merc.geojson --zoom 12
+  python3 -m geotools.mercator in.geojson -o merc.geojson --zoom 10 --extent 4096
+"""
+import argparse
+import json
+import sys
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from .io import load_collection
+from .wkb import positions
+
+EXTENT = 8192          # MapLibre tile extent
+MAX_ZOOM = 24          # 2**24 * 8192 still fits comfortably in int64
+
+
+def project(lon, lat) -> Tuple[np.ndarray, np.ndarray]:
+    """lon/lat degrees -> x, y in the unit Web Mercator square (y down, clamped)."""
+    x = np.asarray(lon, dtype=np.float64) / 360.0 + 0.5
+    s = np.sin(np.radians(np.asarray(lat, dtype=np.float64)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        y = 0.5 - 0.25 * np.log((1 + s) / (1 - s)) / np.pi
+    return x, np.clip(y, 0.0, 1.0)
+
+
+def unproject(x, y) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverse of project()."""
+    lon = (np.asarray(x, dtype=np.float64) - 0.5) * 360.0
+    lat = np.degrees(2 * np.arctan(np.exp((0.5 - np.asarray(y, dtype=np.float64)) * 2 * np.pi)) - np.pi / 2)
+    return lon, lat
+
+
+def quantize(lonlat: np.ndarray, zoom: int, extent: int = EXTENT) -> np.ndarray:
+    """(N, 2) lon/lat -> (N, 2) int64 world tile units at `zoom`."""
+    lonlat = np.asarray(lonlat, dtype=np.float64).reshape(-1, 2)
+    x, y = project(lonlat[:, 0], lonlat[:, 1])
+    scale = float(extent) * (1 << zoom)
+    return np.column_stack((np.round(x * scale), np.round(y * scale))).astype(np.int64)
+
+
+def dequantize(xy: np.ndarray, zoom: int, extent: int = EXTENT) -> np.ndarray:
+    """(N, 2) world tile units -> (N, 2) lon/lat."""
+    xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+    scale = float(extent) * (1 << zoom)
+    lon, lat = unproject(xy[:, 0] / scale, xy[:, 1] / scale)
+    return np.column_stack((lon, lat))
+
+
+def tiles(xy: np.ndarray, extent: int = EXTENT) -> Tuple[np.ndarray, np.ndarray]:
+    """World tile units -> (tile x/y, tile-local x/y)."""
+    xy = np.asarray(xy, dtype=np.int64)
+    return xy // extent, xy % extent
+
+
+def quantize_rings(rings: Sequence, zoom: int, extent: int = EXTENT) -> List[np.ndarray]:
+    """Lists of positions -> int64 (n, 2) arrays, all projected in one NumPy pass."""
+    arrays = [positions(r) for r in rings]
+    if not arrays:
+        return []
+    q = quantize(np.concatenate(arrays), zoom, extent)
+    return np.split(q, np.cumsum([len(a) for a in arrays])[:-1])
+
+
+def _leaves(coords, depth: int) -> List:
+    """Position lists of a GeoJSON coordinates array nested `depth` levels."""
+    if depth == 0:
+        return [coords]
+    return [leaf for c in coords or () for leaf in _leaves(c, depth - 1)]
+
+
+_DEPTH = {"LineString": 0, "MultiPoint": 0, "Polygon": 1, "MultiLineString": 1, "MultiPolygon": 2}
+
+
+def _rebuild(coords, depth: int, it) -> list:
+    if depth == 0:
+        return next(it).tolist()
+    return [_rebuild(c, depth - 1, it) for c in coords or ()]
+
+
+def quantize_geometry(geom, zoom: int, extent: int = EXTENT):
+    """A GeoJSON geometry's coordinates as integer tile units, same nesting."""
+    if not geom:
+        return None
+    t, c = geom.get("type"), geom.get("coordinates")
+    if t == "Point":
+        return quantize([c[:2]], zoom, extent)[0].tolist() if c and len(c) >= 2 else None
+    if t == "GeometryCollection":
+        return [quantize_geometry(g, zoom, extent) for g in geom.get("geometries") or ()]
+    if t not in _DEPTH:
+        return None
+    depth = _DEPTH[t]
+    return _rebuild(c, depth, iter(quantize_rings(_leaves(c, depth), zoom, extent)))
+
+
+def annotate(fc: dict, zoom: int, extent: int = EXTENT) -> dict:
+    """
+    Add a "mercator" member to each feature (its coordinates in tile units)
+    and {"zoom", "extent"} to the collection.
+    """
+    for f in fc["features"]:
+        f["mercator"] = quantize_geometry(f.get("geometry"), zoom, extent)
+    fc["mercator"] = {"zoom": zoom, "extent": extent}
+    return fc
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Add quantized Web Mercator tile coordinates to a FeatureCollection.")
+    ap.add_argument("input", help="source FeatureCollection")
+    ap.add_argument("-o", "--output", required=True, help="output .geojson")
+    ap.add_argument("--zoom", type=int, default=12, help="base zoom (default 12)")
+    ap.add_argument("--extent", type=int, default=EXTENT, help=f"tile extent (default {EXTENT})")
+    args = ap.parse_args(argv)
+
+    if not 0 <= args.zoom <= MAX_ZOOM or args.extent <= 0:
+        print(f"ERROR: --zoom must be 0..{MAX_ZOOM} and --extent positive", file=sys.stderr)
+        sys.exit(2)
+    try:
+        fc = load_collection(args.input)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(annotate(fc, args.zoom, args.extent), fh, separators=(",", ":"))
+    print(f"Wrote {len(fc['features'])} features (zoom {args.zoom}, extent {args.extent}) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+minify.py — rewrite asset GeoJSON compactly, with coordinate precision control.
+
+The checked-in files are pretty-printed with one coordinate component per
+line, so most of their bytes are indentation. This streams the features in
+(io.stream_features, one object at a time) and streams them out compact:
+no whitespace, coordinates rounded to --precision decimals (6 ≈ 0.1 m, 5 ≈
+1 m), one feature per line. Neither side holds the whole document.
+
+Output is a FeatureCollection, or GeoJSONSeq (one feature per line) with
+--seq or a .geojsonl / .geojsons / .ndjson output name; .geojsons and --rs
+add the RFC 8142 record separator. GeoJSONSeq inputs are read line by line.
+
+Properties come out normalized (io.normalize_properties), like every other
+geotools writer. The collection's other top-level members (name, crs, ...)
+are kept as they are.
+
+Usage:
+  python3 -m geotools.minify Asset_Locations_Regions_Polygons.geojson -o assets.min.geojson
+  python3 -m geotools.minify in.geojson -o in.geojsonl --precision 5
+  python3 -m geotools.minify *.geojson --out-dir min/ --precision 6
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from .io import stream_features, stream_seq, write_collection, write_seq
+
+SEQ_SUFFIXES = (".geojsonl", ".geojsons", ".ndjson", ".jsonl")
+DEFAULT_PRECISION = 6
+
+
+def read_any(path, members=None):
+    """
+    Features of a FeatureCollection or a GeoJSONSeq file, streamed; see
+    io.stream_features for `members`.
+    """
+    return stream_seq(path) if Path(path).suffix.lower() in SEQ_SUFFIXES else stream_features(path, members=members)
+
+
+def minify(src, dst, precision=DEFAULT_PRECISION, seq=None, rs=None) -> int:
+    """Stream src into a compact dst; seq/rs default from dst's suffix."""
+    suffix = Path(dst).suffix.lower()
+    seq = suffix in SEQ_SUFFIXES if seq is None else seq
+    rs = suffix == ".geojsons" if rs is None else rs
+    members = {}
+    feats = read_any(src, members)
+    if seq:
+        return write_seq(dst, feats, precision, rs)
+    return write_collection(dst, feats, extra=members, precision=precision)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compact, precision-limited GeoJSON / GeoJSONSeq rewrite.")
+    ap.add_argument("inputs", nargs="+", help="FeatureCollection or GeoJSONSeq files")
+    ap.add_argument("-o", "--output", help="output file (single input)")
+    ap.add_argument("--out-dir", help="write each input here under its own name")
+    ap.add_argument("--precision", type=int, default=DEFAULT_PRECISION,
+                    help=f"coordinate decimals (default {DEFAULT_PRECISION}; -1 keeps them as is)")
+    ap.add_argument("--seq", action="store_true", help="write GeoJSONSeq (one feature per line)")
+    ap.add_argument("--rs", action="store_true", help="GeoJSONSeq with RFC 8142 record separators")
+    args = ap.parse_args(argv)
+
+    if bool(args.output) == bool(args.out_dir) or (args.output and len(args.inputs) > 1):
+        print("ERROR: give -o for one input or --out-dir for several", file=sys.stderr)
+        sys.exit(2)
+    precision = None if args.precision < 0 else args.precision
+    seq = True if args.seq or args.rs else None
+    jobs = [(args.inputs[0], Path(args.output))] if args.output else []
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+        ext = (".geojsons" if args.rs else ".geojsonl") if seq else None
+        for src in args.inputs:
+            name = Path(src).name if ext is None else Path(src).stem + ext
+            jobs.append((src, Path(args.out_dir) / name))
+
+    for src, dst in jobs:
+        if Path(src).resolve() == dst.resolve():
+            print(f"ERROR: {src}: output would overwrite the input", file=sys.stderr)
+            sys.exit(2)
+        try:
+            n = minify(src, dst, precision, seq, True if args.rs else None)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: {src}: {e}", file=sys.stderr)
+            sys.exit(2)
+        before, after = os.path.getsize(src), os.path.getsize(dst)
+        print(f"{src}: {n} features, {before:,} -> {after:,} bytes ({before / max(after, 1):.1f}x) -> {dst}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+nearest.py — nearest facility (and facilities within a radius) per location.
+
+LocationID strings are parsed once into lat/lon arrays and turned into unit
+vectors. A static KD-tree over those vectors answers every query of a batch
+together: the queries walk the tree level by level as (query, node) frontier
+arrays, pruned by the distance from each query to each node's box. Chord
+length on the unit sphere is monotonic in great-circle distance, so the
+tree works in 3D Euclidean space and only the results are converted to km
+(the haversine distance on a sphere of EARTH_RADIUS_KM).
+
+The CLI writes one row per source location with, for each target legend,
+the nearest target's UniqueID and distance (and optionally k nearest and a
+count within a radius) — a table that joins to the asset table on UniqueID
+in the Power BI model.
+
+Usage:
+  python3 -m geotools.nearest Asset_Locations_Regions_Polygons.geojson -o nearest.csv
+  python3 -m geotools.nearest in.geojson -o nearest.csv -k 3 --radius-km 150
+  python3 -m geotools.nearest in.geojson -o nearest.csv --from ServiceVehicle --to WarehouseCenter
+"""
+import argparse
+import csv
+import math
+import sys
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from .io import load_collection
+
+EARTH_RADIUS_KM = 6371.0088          # mean radius, as turf/haversine use
+LEAF_SIZE = 32
+QUERY_BLOCK = 8192
+SOURCES = ("TechnicianDieboldNixdorf", "TechnicianAlpitronic")
+TARGETS = ("WarehouseSmallParts", "WarehouseLargeParts")
+
+
+def parse_locations(values: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """LocationID strings ("lat,lon") -> lat, lon float arrays (NaN where unparseable)."""
+    arr = np.asarray(["" if v is None else str(v) for v in values], dtype=str)
+    lat = np.full(len(arr), np.nan)
+    lon = np.full(len(arr), np.nan)
+    if not len(arr):
+        return lat, lon
+    parts = np.char.partition(arr, ",")
+    try:
+        lat[:], lon[:] = parts[:, 0].astype(np.float64), parts[:, 2].astype(np.float64)
+    except ValueError:
+        # a few malformed entries: fall back to per-value parsing for them all
+        for i, (a, _, b) in enumerate(parts.tolist()):
+            try:
+                lat[i], lon[i] = float(a), float(b)
+            except ValueError:
+                pass
+    bad = (np.abs(lat) > 90) | (np.abs(lon) > 180)
+    lat[bad] = lon[bad] = np.nan
+    return lat, lon
+
+
+def unit_vectors(lat, lon) -> np.ndarray:
+    la, lo = np.radians(lat), np.radians(lon)
+    c = np.cos(la)
+    return np.column_stack((c * np.cos(lo), c * np.sin(lo), np.sin(la)))
+
+
+def chord2_to_km(d2: np.ndarray) -> np.ndarray:
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.sqrt(d2) / 2, 0, 1))
+
+
+def km_to_chord2(km: float) -> float:
+    return (2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)) ** 2
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    h = np.sin((p2 - p1) / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(np.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0, 1)))
+
+
+class SphereKDTree:
+    """
+    Balanced KD-tree over points on the unit sphere, in an implicit layout:
+    node i has children 2i+1 / 2i+2, all leaves sit at `depth`, and each
+    subtree's points are a contiguous run of `perm`.
+
+      tree = SphereKDTree(lat, lon)
+      km, idx = tree.query(qlat, qlon, k=3)
+      qi, pi, km = tree.query_radius(qlat, qlon, 100.0)
+    """
+
+    def __init__(self, lat, lon, leaf_size: int = LEAF_SIZE):
+        lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+        self.ids = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        self.points = pts = unit_vectors(lat[self.ids], lon[self.ids])
+        self.n = n = len(pts)
+        self.depth = depth = max(0, math.ceil(math.log2(n / leaf_size))) if n > leaf_size else 0
+        perm = np.arange(n)
+        for lvl in range(depth):
+            edges, child = self._edges(lvl), self._edges(lvl + 1)
+            for s in range(1 << lvl):
+                a, b, mid = edges[s], edges[s + 1], child[2 * s + 1]
+                if b - a < 2 or not a < mid < b:
+                    continue
+                seg = perm[a:b]
+                p = pts[seg]
+                axis = int(np.argmax(p.max(axis=0) - p.min(axis=0)))
+                perm[a:b] = seg[np.argpartition(p[:, axis], mid - a)]
+        self.perm = perm
+
+        nodes = (2 << depth) - 1
+        self.lo = np.full((nodes, 3), np.inf)
+        self.hi = np.full((nodes, 3), -np.inf)
+        if n:
+            first = (1 << depth) - 1
+            starts = self._edges(depth)[:-1]
+            ordered = pts[perm]
+            self.lo[first:] = np.minimum.reduceat(ordered, starts)
+            self.hi[first:] = np.maximum.reduceat(ordered, starts)
+            for lvl in range(depth - 1, -1, -1):
+                ids = np.arange((1 << lvl) - 1, (2 << lvl) - 1)
+                self.lo[ids] = np.minimum(self.lo[2 * ids + 1], self.lo[2 * ids + 2])
+                self.hi[ids] = np.maximum(self.hi[2 * ids + 1], self.hi[2 * ids + 2])
+
+    def _edges(self, lvl: int) -> np.ndarray:
+        """Start offsets (plus the end) of the 2**lvl subtrees at level lvl."""
+        return (np.arange((1 << lvl) + 1, dtype=np.int64) * self.n) >> lvl
+
+    def _box_d2(self, q: np.ndarray, node: np.ndarray) -> np.ndarray:
+        d = np.maximum(np.maximum(self.lo[node] - q, q - self.hi[node]), 0)
+        return np.einsum("ij,ij->i", d, d)
+
+    def _within(self, q: np.ndarray, r2: np.ndarray):
+        """(query, point position, chord²) for every point within r2 of its query."""
+        qi = np.flatnonzero(self._box_d2(q, np.zeros(len(q), dtype=np.int64)) <= r2)
+        node = np.zeros(len(qi), dtype=np.int64)
+        for _ in range(self.depth):
+            qi = np.repeat(qi, 2)
+            node = 2 * np.repeat(node, 2) + 1 + np.tile([0, 1], len(node))
+            keep = self._box_d2(q[qi], node) <= r2[qi]
+            qi, node = qi[keep], node[keep]
+        edges = self._edges(self.depth)
+        leaf = node - ((1 << self.depth) - 1)
+        counts = edges[leaf + 1] - edges[leaf]
+        qi = np.repeat(qi, counts)
+        pos = np.repeat(edges[leaf] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        diff = q[qi] - self.points[self.perm[pos]]
+        d2 = np.einsum("ij,ij->i", diff, diff)
+        keep = d2 <= r2[qi]
+        return qi[keep], self.perm[pos[keep]], d2[keep]
+
+    def _seed_radius(self, q: np.ndarray, k: int) -> np.ndarray:
+        """Chord² to the k-th nearest point of the subtree each query falls in: an upper bound."""
+        lvl = min(self.depth, max(0, int(math.log2(self.n / k)) - 1))
+        node = np.zeros(len(q), dtype=np.int64)
+        for _ in range(lvl):
+            left = 2 * node + 1
+            go_right = self._box_d2(q, left + 1) < self._box_d2(q, left)
+            node = left + go_right
+        edges = self._edges(lvl)
+        s = node - ((1 << lvl) - 1)
+        start, size = edges[s], edges[s + 1] - edges[s]
+        cols = np.arange(size.max())
+        pos = np.minimum(start[:, None] + cols, self.n - 1)
+        diff = q[:, None, :] - self.points[self.perm[pos]]
+        d2 = np.where(cols < size[:, None], np.einsum("ijk,ijk->ij", diff, diff), np.inf)
+        return np.partition(d2, k - 1, axis=1)[:, k - 1]
+
+    def query(self, lat, lon, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """(Q, k) distances in km and input indices of the k nearest points (-1 / inf if fewer)."""
+        lat, lon = np.atleast_1d(lat).astype(np.float64), np.atleast_1d(lon).astype(np.float64)
+        km = np.full((len(lat), k), np.inf)
+        idx = np.full((len(lat), k), -1, dtype=np.int64)
+        ok = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        if not self.n or not len(ok):
+            return km, idx
+        kk = min(k, self.n)
+        for a in range(0, len(ok), QUERY_BLOCK):
+            rows = ok[a:a + QUERY_BLOCK]
+            q = unit_vectors(lat[rows], lon[rows])
+            r2 = self._seed_radius(q, kk) * (1 + 1e-12) + 1e-15
+            qi, pi, d2 = self._within(q, r2)
+            o = np.lexsort((pi, d2, qi))
+            qi, pi, d2 = qi[o], pi[o], d2[o]
+            rank = np.arange(len(qi)) - np.searchsorted(qi, qi)
+            take = rank < kk
+            km[rows[qi[take]], rank[take]] = chord2_to_km(d2[take])
+            idx[rows[qi[take]], rank[take]] = self.ids[pi[take]]
+        return km, idx
+
+    def query_radius(self, lat, lon, radius_km: float):
+        """(query index, point index, km) for every point within radius_km, by query then distance."""
+        lat, lon = np.atleast_1d(lat).astype(np.float64), np.atleast_1d(lon).astype(np.float64)
+        ok = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        out = []
+        for a in range(0, len(ok) if self.n else 0, QUERY_BLOCK):
+            rows = ok[a:a + QUERY_BLOCK]
+            q = unit_vectors(lat[rows], lon[rows])
+            qi, pi, d2 = self._within(q, np.full(len(rows), km_to_chord2(radius_km)))
+            o = np.lexsort((pi, d2, qi))
+            out.append((rows[qi[o]], self.ids[pi[o]], chord2_to_km(d2[o])))
+        if not out:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+        return tuple(np.concatenate(c) for c in zip(*out))
+
+
+def nearest_table(features, sources: Sequence[str] = SOURCES, targets: Sequence[str] = TARGETS,
+                  k: int = 1, radius_km: float = None) -> Tuple[List[str], List[dict]]:
+    """Column names and one row per source feature with its nearest targets."""
+    props = [f.get("properties") or {} for f in features]
+    legend = np.array([str(p.get("LegendID") or "") for p in props], dtype=object)
+    lat, lon = parse_locations([p.get("LocationID") for p in props])
+    uid = [p.get("UniqueID", "") for p in props]
+    src = np.flatnonzero(np.isin(legend, list(sources)))
+
+    columns = ["UniqueID", "AssetID", "LocationID", "LegendID"]
+    rows = [{"UniqueID": uid[i], "AssetID": props[i].get("AssetID", ""),
+             "LocationID": props[i].get("LocationID", ""), "LegendID": legend[i]} for i in src]
+    for t in targets:
+        tgt = np.flatnonzero(legend == t)
+        tree = SphereKDTree(lat[tgt], lon[tgt])
+        km, idx = tree.query(lat[src], lon[src], k)
+        names = [(f"Nearest{t}" + (f"_{j + 1}" if j else ""), f"Nearest{t}" + (f"_{j + 1}" if j else "") + "Km")
+                 for j in range(k)]
+        for a, b in names:
+            columns += [a, b]
+        count_col = None
+        if radius_km is not None:
+            count_col = f"{t}Within{radius_km:g}Km"
+            columns.append(count_col)
+            qi, _, _ = tree.query_radius(lat[src], lon[src], radius_km)
+            counts = np.bincount(qi, minlength=len(src))
+        for r, row in enumerate(rows):
+            for j, (a, b) in enumerate(names):
+                hit = idx[r, j] >= 0
+                row[a] = uid[tgt[idx[r, j]]] if hit else ""
+                row[b] = round(float(km[r, j]), 3) if hit else ""
+            if count_col:
+                row[count_col] = int(counts[r])
+    return columns, rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Nearest target facility per source location (haversine km).")
+    ap.add_argument("input", help="asset FeatureCollection")
+    ap.add_argument("-o", "--output", required=True, help="output CSV")
+    ap.add_argument("--from", dest="sources", default=",".join(SOURCES), help="source LegendIDs (comma list)")
+    ap.add_argument("--to", dest="targets", default=",".join(TARGETS), help="target LegendIDs (comma list)")
+    ap.add_argument("-k", type=int, default=1, help="nearest targets per legend (default 1)")
+    ap.add_argument("--radius-km", type=float, default=None, help="also count targets within this distance")
+    args = ap.parse_args(argv)
+    if args.k < 1:
+        print("ERROR: -k must be >= 1", file=sys.stderr)
+        sys.exit(2)
+
+    try:
+        feats = load_collection(args.input)["features"]
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+    split = lambda s: [x.strip() for x in s.split(",") if x.strip()]  # noqa: E731
+    columns, rows = nearest_table(feats, split(args.sources), split(args.targets), args.k, args.radius_km)
+    with open(args.output, "w", newline="", encoding="utf-8") as fh:
+        w = csv.DictWriter(fh, fieldnames=columns)
+        w.writeheader()
+        w.writerows(rows)
+    print(f"Wrote {len(rows)} rows -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+pbiviz.py — assemble a .pbiviz from the build outputs in .tmp/drop, without
+the pbiviz CLI's final packaging step.
+
+A .pbiviz is a zip of package.json and resources/<guid>.pbiviz.json, one
+JSON document embedding the visual metadata, capabilities, compiled JS and
+CSS and the icon. pbiviz rewrites the whole ~1 MB artifact on every bump.
+Here the resources JSON is produced as a stream of byte segments (the JS and
+CSS are read and JSON-escaped in 256 KiB pieces, never as one string), and
+each segment is deflated on its own in a thread pool and ends with a sync
+flush. Because the segments share no history, their concatenation plus a
+final empty block is a valid deflate stream, and a segment's compressed
+bytes depend only on its own content and the level.
+
+The segment table (raw length, compressed length, sha256 prefix, level) is
+kept in a zip extra field (id 0x7367) on each member. The next build reads
+it from the previous artifact and copies every unchanged segment's
+compressed bytes instead of deflating it again. Re-stamping a version only
+recompresses the few hundred bytes of metadata.
+
+Output is reproducible: fixed member order, fixed timestamps
+(SOURCE_DATE_EPOCH, else 1980-01-01), no data descriptors, and the same
+bytes for the same inputs and level, whatever was reused. `verify`
+rebuilds in memory and compares against an artifact byte for byte.
+
+The compiled JS has the guid baked in (.tmp/drop/status names it). If
+pbiviz.json has a new guid, the build refuses unless --rename-guid, which
+rewrites that identifier in the JS.
+
+Usage:
+  python3 -m geotools.pbiviz build TomTom_RB
+  python3 -m geotools.pbiviz build TomTom_RB --level 9 --workers 4 -o /tmp/visual.pbiviz
+  python3 -m geotools.pbiviz build pbi-maplibre-minimal --rename-guid
+  python3 -m geotools.pbiviz verify TomTom_RB TomTom_RB/dist/PY48efce4ed296.1.0.0.55.pbiviz
+"""
+import argparse
+import base64
+import calendar
+import hashlib
+import io
+import json
+import os
+import re
+import struct
+import sys
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+SEGMENT = 1 << 18            # raw bytes (JS/CSS characters) per independently deflated segment
+DEFAULT_LEVEL = 6
+EXTRA_ID = 0x7367            # zip extra field holding a member's segment table
+KEY_BYTES = 16               # sha256 prefix identifying a segment
+_ENTRY = struct.Struct("<II16s")
+_FINAL = b"\x03\x00"         # empty final fixed-Huffman block
+_LAST_BREAK = re.compile(r"[^\w$](?=[\w$]*\Z)")
+
+
+def read_json(path: Path) -> dict:
+    return json.loads(path.read_text(encoding="utf-8-sig"))
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def artifact_name(visual: dict) -> str:
+    return f"{visual['guid']}.{visual['version']}.pbiviz"
+
+
+def visual_of(cfg: dict) -> dict:
+    """pbiviz.json's visual block as pbiviz writes it (gitHubUrl always present)."""
+    return {**cfg["visual"], "gitHubUrl": cfg["visual"].get("gitHubUrl", "")}
+
+
+def built_guid(root: Path) -> Optional[str]:
+    """Guid the last webpack build compiled into .tmp/drop/visual.js."""
+    try:
+        lines = (root / ".tmp" / "drop" / "status").read_text().split()
+    except OSError:
+        return None
+    return lines[1] if len(lines) > 1 else None
+
+
+def string_resources(root: Path, paths: Iterable[str]) -> dict:
+    out = {}
+    for p in paths or ():
+        data = read_json(root / p)
+        out[data.get("locale", Path(p).parent.name)] = data.get("values", data)
+    return out
+
+
+def package_json(visual: dict, author=None) -> str:
+    """The zip's package.json, laid out as pbiviz writes it."""
+    return ("{\n"
+            f'\t\t"version": {json.dumps(visual["version"])},\n'
+            f'\t\t"author": {_dumps(author or {"name": "", "email": ""})},\n'
+            '\t\t"resources": [\n\t\t\t{\n\t\t\t\t"resourceId": "rId0",\n\t\t\t\t"sourceType": 5,\n'
+            f'\t\t\t\t"file": "resources/{visual["guid"]}.pbiviz.json"\n\t\t\t}}\n\t\t],\n'
+            f'\t\t"visual": {_dumps(visual)},\n'
+            '\t\t"metadata": {\n\t\t\t"pbivizjson": {\n\t\t\t\t"resourceId": "rId0"\n\t\t\t}\n\t\t}\n\t}')
+
+
+def _escaped(path: Path, rename: Optional[Tuple[str, str]] = None) -> Iterator[bytes]:
+    """A text file as a JSON string body, SEGMENT characters at a time."""
+    pattern = re.compile(r"(?<![\w$])" + re.escape(rename[0]) + r"(?![\w$])") if rename else None
+    with open(path, encoding="utf-8", newline="") as fh:
+        carry = ""
+        while True:
+            chunk = fh.read(SEGMENT)
+            text, carry = carry + chunk, ""
+            if pattern:
+                if chunk:
+                    # cut after the last non-identifier character so no guid straddles two pieces
+                    m = _LAST_BREAK.search(text)
+                    cut = m.end() if m else 0
+                    text, carry = text[:cut], text[cut:]
+                text = pattern.sub(rename[1], text)
+            if text:
+                yield json.dumps(text, ensure_ascii=False)[1:-1].encode("utf-8")
+            if not chunk:
+                return
+
+
+def resources_segments(root: Path, cfg: dict, rename: Optional[Tuple[str, str]] = None) -> Iterator[bytes]:
+    """
+    resources/<guid>.pbiviz.json as byte segments: metadata head, the JS in
+    SEGMENT pieces, the CSS likewise, then the icon and trailing members.
+    """
+    drop = root / ".tmp" / "drop"
+    head = {"visual": visual_of(cfg), "author": cfg.get("author", ""), "apiVersion": cfg.get("apiVersion"),
+            "style": cfg.get("style"), "stringResources": string_resources(root, cfg.get("stringResources")),
+            "capabilities": read_json(root / cfg.get("capabilities", "capabilities.json"))}
+    if cfg.get("dependencies") and (root / cfg["dependencies"]).is_file():
+        head["dependencies"] = read_json(root / cfg["dependencies"])
+    yield (_dumps(head)[:-1] + ',"content":{"js":"').encode("utf-8")
+    yield from _escaped(drop / "visual.js", rename)
+    if (drop / "visual.css").is_file():
+        yield b'","css":"'
+        yield from _escaped(drop / "visual.css")
+    tail = '"'
+    icon = (cfg.get("assets") or {}).get("icon")
+    if icon and (root / icon).is_file():
+        tail += ',"iconBase64":' + json.dumps("data:image/png;base64,"
+                                              + base64.b64encode((root / icon).read_bytes()).decode())
+    tail += ('},"visualEntryPoint":"","externalJS":' + _dumps(cfg.get("externalJS") or [])
+             + ',"assets":' + _dumps(cfg.get("assets") or {}) + "}")
+    yield tail.encode("utf-8")
+
+
+def _deflate(raw: bytes, level: int) -> bytes:
+    c = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return c.compress(raw) + c.flush(zlib.Z_SYNC_FLUSH)
+
+
+def _dos_time(mtime: Optional[float]) -> Tuple[int, int]:
+    if mtime is None:
+        mtime = float(os.environ.get("SOURCE_DATE_EPOCH", 315532800))    # 1980-01-01 UTC
+    t = time.gmtime(max(mtime, 315532800))
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday)
+
+
+def previous_segments(path, level: int) -> Dict[bytes, bytes]:
+    """sha256 prefix -> compressed bytes for every segment recorded in an artifact built at `level`."""
+    out = {}
+    try:
+        z = zipfile.ZipFile(path)
+    except (OSError, zipfile.BadZipFile):
+        return out
+    with z, open(path, "rb") as fh:
+        for info in z.infolist():
+            table = _read_extra(info.extra)
+            if table is None or table[0] != level:
+                continue
+            fh.seek(info.header_offset)
+            local = fh.read(30)
+            n, m = struct.unpack("<HH", local[26:30])
+            fh.seek(info.header_offset + 30 + n + m)
+            data = fh.read(info.compress_size)
+            if sum(e[1] for e in table[1]) + len(_FINAL) != len(data):
+                continue
+            pos = 0
+            for _, clen, key in table[1]:
+                out[key] = data[pos:pos + clen]
+                pos += clen
+    return out
+
+
+def _read_extra(extra: bytes):
+    pos = 0
+    while pos + 4 <= len(extra):
+        hid, size = struct.unpack_from("<HH", extra, pos)
+        body = extra[pos + 4:pos + 4 + size]
+        pos += 4 + size
+        if hid == EXTRA_ID and len(body) >= 3:
+            level, count = struct.unpack_from("<BH", body)
+            if len(body) == 3 + count * _ENTRY.size:
+                return level, [_ENTRY.unpack_from(body, 3 + i * _ENTRY.size) for i in range(count)]
+    return None
+
+
+def _extra(level: int, table: List[Tuple[int, int, bytes]]) -> bytes:
+    body = struct.pack("<BH", level, len(table)) + b"".join(_ENTRY.pack(*e) for e in table)
+    if len(body) > 0xFFFF:
+        return b""          # too many segments to record: the member just won't be reused
+    return struct.pack("<HH", EXTRA_ID, len(body)) + body
+
+
+class ZipWriter:
+    """Minimal deterministic zip writer for members deflated segment by segment."""
+
+    def __init__(self, fh, level: int, pool: ThreadPoolExecutor, reuse: Dict[bytes, bytes],
+                 mtime: Optional[float] = None, inflight: int = 8):
+        self.fh, self.level, self.pool, self.reuse = fh, level, pool, reuse
+        self.time, self.date = _dos_time(mtime)
+        self.inflight = inflight
+        self.central: List[bytes] = []
+        self.stats = {"segments": 0, "reused": 0, "raw_bytes": 0}
+
+    def _local(self, name: bytes, method: int, crc: int, csize: int, size: int, extra: bytes, attr: int):
+        offset = self.fh.tell()
+        head = struct.pack("<IHHHHHIIIHH", 0x04034B50, 20, 0x800, method, self.time, self.date,
+                           crc, csize, size, len(name), len(extra))
+        self.central.append(struct.pack("<IHHHHHHIIIHHHHHII", 0x02014B50, 20, 20, 0x800, method,
+                                        self.time, self.date, crc, csize, size, len(name), len(extra),
+                                        0, 0, 0, attr, offset) + name + extra)
+        return head + name + extra
+
+    def directory(self, name: str):
+        self.fh.write(self._local(name.encode(), 0, 0, 0, 0, b"", 0x10))
+
+    def member(self, name: str, segments: Iterable[bytes]):
+        """Deflate `segments` (in parallel, reusing known ones) into one member."""
+        start = self.fh.tell()
+        bname = name.encode()
+        self.fh.write(b"\0" * (30 + len(bname)))       # local header, patched below
+        crc = size = csize = 0
+        table = []
+        queue = deque()
+
+        def drain(limit):
+            nonlocal csize
+            while len(queue) > limit:
+                rlen, key, comp = queue.popleft()
+                data = comp.result() if isinstance(comp, Future) else comp
+                self.fh.write(data)
+                csize += len(data)
+                table.append((rlen, len(data), key))
+
+        for raw in segments:
+            if not raw:
+                continue
+            crc = zlib.crc32(raw, crc)
+            size += len(raw)
+            key = hashlib.sha256(raw).digest()[:KEY_BYTES]
+            self.stats["segments"] += 1
+            if key in self.reuse:
+                self.stats["reused"] += 1
+                queue.append((len(raw), key, self.reuse[key]))
+            else:
+                queue.append((len(raw), key, self.pool.submit(_deflate, raw, self.level)))
+            drain(self.inflight)
+        drain(0)
+        self.fh.write(_FINAL)
+        csize += len(_FINAL)
+        self.stats["raw_bytes"] += size
+        # the segment table goes in the central directory only, so the local header keeps its size
+        end = self.fh.tell()
+        self.fh.seek(start)
+        self.fh.write(self._local(bname, 8, crc, csize, size, b"", 0))
+        self._set_central_extra(_extra(self.level, table))
+        self.fh.seek(end)
+
+    def _set_central_extra(self, extra: bytes):
+        entry = self.central[-1]
+        n = struct.unpack_from("<H", entry, 28)[0]
+        self.central[-1] = entry[:30] + struct.pack("<H", len(extra)) + entry[32:46 + n] + extra
+
+    def close(self):
+        offset = self.fh.tell()
+        for entry in self.central:
+            self.fh.write(entry)
+        size = self.fh.tell() - offset
+        self.fh.write(struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, len(self.central), len(self.central),
+                                  size, offset, 0))
+
+
+def assemble(root, output=None, level: int = DEFAULT_LEVEL, reuse=None, workers: Optional[int] = None,
+             mtime: Optional[float] = None, rename_guid: bool = False, write_package_json: bool = True) -> dict:
+    """
+    Build the .pbiviz for project `root` (default output dist/<guid>.<version>.pbiviz;
+    a file object is written to in place). `reuse` is a previous artifact
+    to copy unchanged segments from: None picks the newest in dist/, False
+    disables it. Returns path, bytes, sha256, segment counts and seconds.
+    """
+    t0 = time.perf_counter()
+    root = Path(root)
+    cfg = read_json(root / "pbiviz.json")
+    visual = visual_of(cfg)
+    if not (root / ".tmp" / "drop" / "visual.js").is_file():
+        raise ValueError(f"{root}: no .tmp/drop/visual.js; run pbiviz package once first")
+    rename = None
+    built = built_guid(root)
+    if built and built != visual["guid"]:
+        if not rename_guid:
+            raise ValueError(f"visual.js was built for guid {built} but pbiviz.json has {visual['guid']}; "
+                             "rebuild with pbiviz package or pass --rename-guid")
+        rename = (built, visual["guid"])
+    if reuse is None:
+        found = sorted((root / "dist").glob("*.pbiviz"), key=lambda p: p.stat().st_mtime)
+        reuse = found[-1] if found else False
+    segments = previous_segments(reuse, level) if reuse else {}
+
+    pkg = package_json(visual, cfg.get("author"))
+    buf = io.BytesIO()
+    threads = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(threads) as pool:
+        z = ZipWriter(buf, level, pool, segments, mtime, inflight=2 * threads)
+        z.member("package.json", [pkg.encode("utf-8")])
+        z.directory("resources/")
+        z.member(f"resources/{visual['guid']}.pbiviz.json", resources_segments(root, cfg, rename))
+        z.close()
+    data = buf.getvalue()
+    path = None
+    if hasattr(output, "write"):
+        output.write(data)
+    else:
+        path = Path(output) if output is not None else root / "dist" / artifact_name(visual)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        if write_package_json and output is None:
+            (root / "dist" / "package.json").write_text(pkg, encoding="utf-8")
+    return dict(z.stats, path=str(path) if path else None, bytes=len(data),
+                sha256=hashlib.sha256(data).hexdigest(), seconds=round(time.perf_counter() - t0, 3))
+
+
+def verify(root, artifact, rename_guid: bool = False) -> Tuple[bool, str]:
+    """Rebuild `root` in memory with the artifact's level and time stamps; (identical, detail)."""
+    with zipfile.ZipFile(artifact) as z:
+        infos = z.infolist()
+        table = next((t for t in (_read_extra(i.extra) for i in infos) if t), None)
+        level = table[0] if table else DEFAULT_LEVEL
+        stamp = calendar.timegm(infos[0].date_time) if infos else None
+        old = {i.filename: z.read(i) for i in infos}
+    buf = io.BytesIO()
+    assemble(root, buf, level, artifact, mtime=stamp, rename_guid=rename_guid)
+    new_bytes = buf.getvalue()
+    if new_bytes == Path(artifact).read_bytes():
+        return True, f"identical ({len(new_bytes):,} bytes, sha256 {hashlib.sha256(new_bytes).hexdigest()})"
+    with zipfile.ZipFile(io.BytesIO(new_bytes)) as z:
+        new = {i.filename: z.read(i) for i in z.infolist()}
+    for name in sorted(old.keys() | new.keys()):
+        if old.get(name) != new.get(name):
+            return False, f"content differs in {name}"
+    return False, "same content, different container bytes (level, time stamps or another tool)"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Assemble a .pbiviz from .tmp/drop, reproducibly.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("build", help="write dist/<guid>.<version>.pbiviz")
+    p.add_argument("project", nargs="?", default=".", help="folder with pbiviz.json (default .)")
+    p.add_argument("-o", "--output", help="artifact path (default dist/<guid>.<version>.pbiviz)")
+    p.add_argument("--level", type=int, choices=range(10), default=DEFAULT_LEVEL, metavar="0-9")
+    p.add_argument("--workers", type=int, help="compression threads (default: CPU count)")
+    p.add_argument("--reuse", help="artifact to reuse segments from (default: newest in dist/)")
+    p.add_argument("--no-reuse", action="store_true", help="deflate everything")
+    p.add_argument("--rename-guid", action="store_true", help="rewrite the built guid in visual.js")
+    p = sub.add_parser("verify", help="rebuild in memory and compare with an artifact")
+    p.add_argument("project")
+    p.add_argument("artifact")
+    p.add_argument("--rename-guid", action="store_true")
+    args = ap.parse_args(argv)
+
+    try:
+        if args.cmd == "build":
+            reuse = False if args.no_reuse else args.reuse
+            r = assemble(args.project, args.output, args.level, reuse, args.workers,
+                         rename_guid=args.rename_guid)
+            print(f"Wrote {r['path']} ({r['bytes']:,} bytes from {r['raw_bytes']:,}, {r['reused']}/"
+                  f"{r['segments']} segments reused) in {r['seconds']:.2f}s\n  sha256 {r['sha256']}")
+        else:
+            same, detail = verify(args.project, args.artifact, args.rename_guid)
+            print(f"{args.artifact}: {detail}")
+            sys.exit(0 if same else 1)
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+propindex.py — inverted property indexes and boolean filter expressions.
+
+Built once over a loaded collection, each property column becomes either
+
+  a dictionary column   distinct values + per-value posting lists (feature
+                        ids grouped by one stable argsort of the codes), for
+                        strings, booleans and mixed columns
+  a numeric column      float64 values + a sorted-array index, so ranges are
+                        two searchsorted calls and a slice
+
+and queries are answered from those instead of scanning property dicts.
+Leaf predicates are evaluated to boolean masks (bitmaps over the features)
+and combined with NumPy &, |, ~; leaf masks and parsed expressions are
+cached, so slicing the same collection many ways costs little after the
+first query.
+
+Expression syntax (keywords are case-insensitive):
+
+  LegendID in (TechnicianDieboldNixdorf, "WarehouseSmallParts") and Display
+  not Display or LayerType == Polygon
+  AssetID >= 10000100 and AssetID < 10000200
+  Color == null
+
+Comparisons are == (or =), !=, <, <=, >, >=, in (…) and not in (…); a bare
+property name tests truthiness. Values are numbers, quoted or bare strings,
+true, false and null.
+
+Usage:
+  python3 -m geotools.propindex Asset_Locations_Regions_Polygons.geojson "LegendID in (ServiceVehicle) and Display"
+  python3 -m geotools.propindex in.geojson "AssetID >= 10000100" -o subset.geojson
+"""
+import argparse
+import re
+import sys
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .io import SCHEMA, load_collection, write_collection
+
+MASK_CACHE = 256        # leaf masks kept per index
+
+_TOKEN = re.compile(r"""\s*(?:
+    (?P<str>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<num>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?(?![\w.]))
+  | (?P<op>==|!=|<=|>=|=|<|>|\(|\)|,)
+  | (?P<word>[A-Za-z_][\w.\-]*)
+)""", re.VERBOSE)
+_KEYWORDS = {"and", "or", "not", "in", "true", "false", "null"}
+_CMP = {"==", "!=", "<", "<=", ">", ">="}
+
+
+# ---- expressions ---------------------------------------------------------
+
+def _tokenize(text: str) -> List[Tuple[str, object]]:
+    out, pos = [], 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"bad filter syntax at {text[pos:pos + 20]!r}")
+        pos = m.end()
+        if m.group("str") is not None:
+            s = m.group("str")[1:-1]
+            out.append(("val", re.sub(r"\\(.)", r"\1", s)))
+        elif m.group("num") is not None:
+            n = m.group("num")
+            out.append(("val", int(n) if re.fullmatch(r"[-+]?\d+", n) else float(n)))
+        elif m.group("op") is not None:
+            op = m.group("op")
+            out.append(("op", "==" if op == "=" else op))
+        else:
+            w = m.group("word")
+            lw = w.lower()
+            if lw in ("true", "false"):
+                out.append(("val", lw == "true"))
+            elif lw == "null":
+                out.append(("val", None))
+            elif lw in _KEYWORDS:
+                out.append(("kw", lw))
+            else:
+                out.append(("name", w))
+    return out
+
+
+class _Parser:
+    """Recursive descent: or > and > not > comparison / ( … ) / truthy name."""
+
+    def __init__(self, tokens):
+        self.toks, self.i = tokens, 0
+
+    def peek(self, kind=None, value=None):
+        if self.i >= len(self.toks):
+            return None
+        t = self.toks[self.i]
+        if (kind and t[0] != kind) or (value is not None and t[1] != value):
+            return None
+        return t
+
+    def take(self, kind=None, value=None):
+        t = self.peek(kind, value)
+        if t is None:
+            got = self.toks[self.i][1] if self.i < len(self.toks) else "end of expression"
+            raise ValueError(f"expected {value or kind}, got {got!r}")
+        self.i += 1
+        return t
+
+    def parse(self):
+        node = self.or_()
+        if self.i != len(self.toks):
+            raise ValueError(f"unexpected {self.toks[self.i][1]!r}")
+        return node
+
+    def or_(self):
+        node = self.and_()
+        while self.peek("kw", "or"):
+            self.i += 1
+            node = ("or", node, self.and_())
+        return node
+
+    def and_(self):
+        node = self.not_()
+        while self.peek("kw", "and"):
+            self.i += 1
+            node = ("and", node, self.not_())
+        return node
+
+    def not_(self):
+        if self.peek("kw", "not"):
+            self.i += 1
+            return ("not", self.not_())
+        return self.atom()
+
+    def value(self):
+        t = self.peek("val") or self.peek("name")
+        if t is None:
+            self.take("val")
+        self.i += 1
+        return t[1]
+
+    def atom(self):
+        if self.peek("op", "("):
+            self.i += 1
+            node = self.or_()
+            self.take("op", ")")
+            return node
+        name = self.take("name")[1]
+        if self.peek("kw", "not") and self.i + 1 < len(self.toks) and self.toks[self.i + 1] == ("kw", "in"):
+            self.i += 2
+            return ("not", ("in", name, self.values()))
+        if self.peek("kw", "in"):
+            self.i += 1
+            return ("in", name, self.values())
+        t = self.peek("op")
+        if t and t[1] in _CMP:
+            self.i += 1
+            return ("cmp", name, t[1], self.value())
+        return ("truthy", name)
+
+    def values(self) -> tuple:
+        self.take("op", "(")
+        out = [self.value()]
+        while self.peek("op", ","):
+            self.i += 1
+            out.append(self.value())
+        self.take("op", ")")
+        return tuple(out)
+
+
+@lru_cache(maxsize=256)
+def parse(expr: str):
+    """Filter expression -> nested tuple AST (cached)."""
+    return _Parser(_tokenize(expr)).parse()
+
+
+# ---- columns -------------------------------------------------------------
+
+def _is_number(v) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _key(v):
+    """Dictionary key of a property value: str, bool or None; other types as str."""
+    return v if v is None or isinstance(v, (str, bool)) else str(v)
+
+
+def _compare(a, op: str, b) -> bool:
+    if op == "==":
+        return a == b
+    if op == "!=":
+        return a is not None and a != b      # missing values match no comparison but == null
+    if a is None or b is None or type(a) is not type(b):
+        return False
+    return {"<": a < b, "<=": a <= b, ">": a > b, ">=": a >= b}[op]
+
+
+class DictColumn:
+    """Distinct values and the feature ids holding each (posting lists)."""
+
+    def __init__(self, values: Sequence):
+        keys = [_key(v) for v in values]
+        self.values: List = []
+        lookup: Dict = {}
+        codes = np.empty(len(keys), dtype=np.int32)
+        for i, k in enumerate(keys):
+            c = lookup.get((type(k), k))
+            if c is None:
+                c = lookup[(type(k), k)] = len(self.values)
+                self.values.append(k)
+            codes[i] = c
+        self.codes = codes
+        self.order = np.argsort(codes, kind="stable")
+        self.starts = np.searchsorted(codes[self.order], np.arange(len(self.values) + 1))
+        self.n = len(keys)
+
+    def postings(self, code: int) -> np.ndarray:
+        return self.order[self.starts[code]:self.starts[code + 1]]
+
+    def _literal(self, lit):
+        return lit if lit is None or isinstance(lit, (str, bool)) else str(lit)
+
+    def select(self, pred) -> np.ndarray:
+        """Mask of features whose value satisfies pred (evaluated per distinct value)."""
+        mask = np.zeros(self.n, dtype=bool)
+        for code, v in enumerate(self.values):
+            if pred(v):
+                mask[self.postings(code)] = True
+        return mask
+
+    def compare(self, op: str, lit) -> np.ndarray:
+        lit = self._literal(lit)
+        return self.select(lambda v: _compare(v, op, lit))
+
+    def isin(self, lits) -> np.ndarray:
+        want = {(type(k), k) for k in map(self._literal, lits)}
+        return self.select(lambda v: (type(v), v) in want)
+
+    def truthy(self) -> np.ndarray:
+        return self.select(bool)
+
+
+class NumericColumn:
+    """float64 values (NaN = missing) with a sorted-array index for ranges."""
+
+    def __init__(self, values: Sequence):
+        self.data = np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+        valid = np.flatnonzero(~np.isnan(self.data))
+        self.order = valid[np.argsort(self.data[valid], kind="stable")]
+        self.sorted = self.data[self.order]
+        self.n = len(self.data)
+
+    def _span(self, lo: int, hi: int) -> np.ndarray:
+        mask = np.zeros(self.n, dtype=bool)
+        mask[self.order[lo:hi]] = True
+        return mask
+
+    def compare(self, op: str, lit) -> np.ndarray:
+        if lit is None:
+            nulls = np.isnan(self.data)
+            return nulls if op == "==" else ~nulls if op == "!=" else np.zeros(self.n, dtype=bool)
+        if not _is_number(lit):
+            try:
+                lit = float(lit)
+            except (TypeError, ValueError):
+                # a number never equals a non-numeric literal
+                return ~np.isnan(self.data) if op == "!=" else np.zeros(self.n, dtype=bool)
+        s = self.sorted
+        if op == "==":
+            return self._span(np.searchsorted(s, lit, "left"), np.searchsorted(s, lit, "right"))
+        if op == "!=":
+            return self._span(0, len(s)) & ~self.compare("==", lit)
+        if op == "<":
+            return self._span(0, np.searchsorted(s, lit, "left"))
+        if op == "<=":
+            return self._span(0, np.searchsorted(s, lit, "right"))
+        if op == ">":
+            return self._span(np.searchsorted(s, lit, "right"), len(s))
+        return self._span(np.searchsorted(s, lit, "left"), len(s))
+
+    def isin(self, lits) -> np.ndarray:
+        mask = np.zeros(self.n, dtype=bool)
+        for lit in lits:
+            mask |= self.compare("==", lit)
+        return mask
+
+    def truthy(self) -> np.ndarray:
+        return ~np.isnan(self.data) & (self.data != 0)
+
+
+def build_column(values: Sequence):
+    """NumericColumn when every present value is a number, else DictColumn."""
+    present = [v for v in values if v is not None]
+    if present and all(_is_number(v) for v in present):
+        return NumericColumn(values)
+    return DictColumn(values)
+
+
+# ---- index ---------------------------------------------------------------
+
+class PropertyIndex:
+    """
+    Per-property indexes over a feature list. Columns are built on first use
+    unless listed in `columns`; ids are positions in `features`.
+    """
+
+    def __init__(self, features: Sequence[dict], columns: Optional[Sequence[str]] = None):
+        self.features = features if isinstance(features, list) else list(features)
+        self.n = len(self.features)
+        self.columns: Dict[str, object] = {}
+        self._masks: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._names = None
+        for c in columns or ():
+            self.column(c)
+
+    def names(self) -> set:
+        if self._names is None:
+            self._names = set(SCHEMA)
+            for f in self.features:
+                self._names.update((f.get("properties") or {}).keys())
+        return self._names
+
+    def column(self, name: str):
+        col = self.columns.get(name)
+        if col is None:
+            if name not in self.names():
+                raise ValueError(f"unknown property {name!r}")
+            col = self.columns[name] = build_column(
+                [(f.get("properties") or {}).get(name) for f in self.features])
+        return col
+
+    def _leaf(self, node) -> np.ndarray:
+        key = repr(node)      # repr keeps True and 1 apart
+        mask = self._masks.get(key)
+        if mask is not None:
+            self._masks.move_to_end(key)
+            return mask
+        col = self.column(node[1])
+        if node[0] == "cmp":
+            mask = col.compare(node[2], node[3])
+        elif node[0] == "in":
+            mask = col.isin(node[2])
+        else:
+            mask = col.truthy()
+        mask.flags.writeable = False
+        self._masks[key] = mask
+        if len(self._masks) > MASK_CACHE:
+            self._masks.popitem(last=False)
+        return mask
+
+    def _eval(self, node) -> np.ndarray:
+        op = node[0]
+        if op == "and":
+            return self._eval(node[1]) & self._eval(node[2])
+        if op == "or":
+            return self._eval(node[1]) | self._eval(node[2])
+        if op == "not":
+            return ~self._eval(node[1])
+        return self._leaf(node)
+
+    def mask(self, expr: str) -> np.ndarray:
+        """Boolean mask over the features for a filter expression."""
+        return self._eval(parse(expr))
+
+    def ids(self, expr: str) -> np.ndarray:
+        """Sorted int64 feature ids matching a filter expression."""
+        return np.flatnonzero(self.mask(expr))
+
+    def select(self, expr: str) -> List[dict]:
+        return [self.features[i] for i in self.ids(expr).tolist()]
+
+    def count(self, expr: str) -> int:
+        return int(np.count_nonzero(self.mask(expr)))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Filter a FeatureCollection with an indexed boolean expression.")
+    ap.add_argument("input", help="source FeatureCollection")
+    ap.add_argument("expr", nargs="+", help="filter expression(s); each is counted, the last is written")
+    ap.add_argument("-o", "--output", help="matching features as GeoJSON")
+    args = ap.parse_args(argv)
+
+    try:
+        feats = load_collection(args.input)["features"]
+        t0 = time.perf_counter()
+        idx = PropertyIndex(feats)
+        results = []
+        for e in args.expr:
+            t = time.perf_counter()
+            ids = idx.ids(e)
+            results.append((e, ids, time.perf_counter() - t))
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    for e, ids, dt in results:
+        print(f"{len(ids):8d} / {len(feats)}  {dt * 1000:8.2f} ms  {e}")
+    print(f"total {(time.perf_counter() - t0) * 1000:.1f} ms including index builds")
+    if args.output:
+        n = write_collection(args.output, (feats[i] for i in results[-1][1].tolist()))
+        print(f"Wrote {n} features -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Static packed R-tree over feature bounding boxes (flatbush layout).
+
+Items are sorted once, packed bottom-up into nodes of `node_size` children,
+and stored in flat NumPy arrays — no per-node objects. Each visited node
+tests all of its children in one vectorized comparison.
+
+  tree = PackedRTree(bounds)            # (N, 4) minx, miny, maxx, maxy
+  ids = tree.search(minx, miny, maxx, maxy)
+
+Leaves are ordered by the Hilbert index of their bbox center (as flatbush
+and FlatGeobuf do); str_order gives sort-tile-recursive order instead.
+Empty (NaN) boxes sort last and never match a search.
+"""
+import math
+from typing import Optional
+
+import numpy as np
+
+NODE_SIZE = 16
+
+
+def hilbert_order(bounds: np.ndarray) -> np.ndarray:
+    """Leaf order by Hilbert index of bbox centers over the boxes' extent."""
+    from .hilbert import hilbert_keys
+    centers = np.column_stack(((bounds[:, 0] + bounds[:, 2]) / 2, (bounds[:, 1] + bounds[:, 3]) / 2))
+    return np.argsort(hilbert_keys(centers), kind="stable")
+
+
+def str_order(bounds: np.ndarray, node_size: int = NODE_SIZE) -> np.ndarray:
+    """Sort-tile-recursive leaf order."""
+    n = len(bounds)
+    cx = (bounds[:, 0] + bounds[:, 2]) / 2
+    cy = (bounds[:, 1] + bounds[:, 3]) / 2
+    slices = max(1, math.ceil(math.sqrt(math.ceil(n / node_size))))
+    per_slice = slices * node_size
+    by_x = np.argsort(cx, kind="stable")
+    slice_id = np.empty(n, dtype=np.int64)
+    slice_id[by_x] = np.arange(n) // per_slice
+    return np.lexsort((cy, slice_id))
+
+
+class PackedRTree:
+    def __init__(self, bounds, node_size: int = NODE_SIZE, order: Optional[np.ndarray] = None):
+        bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+        self.num_items = n = len(bounds)
+        self.node_size = node_size = max(2, int(node_size))
+        if order is None:
+            order = hilbert_order(bounds) if n else np.zeros(0, dtype=np.int64)
+
+        # level sizes, leaves first
+        sizes = [n]
+        while sizes[-1] > 1:
+            sizes.append(math.ceil(sizes[-1] / node_size))
+        self.level_bounds = np.cumsum(sizes)          # end offset of each level
+        total = int(self.level_bounds[-1]) if n else 0
+
+        self.boxes = np.empty((total, 4), dtype=np.float64)
+        self.indices = np.empty(total, dtype=np.int64)
+        self.boxes[:n] = bounds[order]
+        self.indices[:n] = order
+
+        start = 0
+        for lvl in range(1, len(sizes)):
+            end = int(self.level_bounds[lvl - 1])
+            child = self.boxes[start:end]
+            groups = np.arange(start, end, node_size)
+            parent = slice(end, end + len(groups))
+            # fmin/fmax skip NaN, so an empty box cannot hide its siblings
+            self.boxes[parent, 0] = np.fmin.reduceat(child[:, 0], groups - start)
+            self.boxes[parent, 1] = np.fmin.reduceat(child[:, 1], groups - start)
+            self.boxes[parent, 2] = np.fmax.reduceat(child[:, 2], groups - start)
+            self.boxes[parent, 3] = np.fmax.reduceat(child[:, 3], groups - start)
+            self.indices[parent] = groups            # first child position
+            start = end
+
+    @property
+    def extent(self):
+        if not self.num_items:
+            return None
+        return tuple(self.boxes[-1])
+
+    def search(self, minx, miny, maxx, maxy) -> np.ndarray:
+        """Item ids whose bbox intersects the query box."""
+        if not self.num_items:
+            return np.zeros(0, dtype=np.int64)
+        out = []
+        root = len(self.boxes) - 1
+        stack = [(root, root + 1, len(self.level_bounds) - 1)]
+        while stack:
+            a, b, lvl = stack.pop()
+            box = self.boxes[a:b]
+            hit = np.flatnonzero((box[:, 0] <= maxx) & (box[:, 1] <= maxy) &
+                                 (box[:, 2] >= minx) & (box[:, 3] >= miny)) + a
+            if lvl == 0:
+                out.append(self.indices[hit])
+                continue
+            child_end = int(self.level_bounds[lvl - 1])
+            for pos in hit:
+                c = int(self.indices[pos])
+                stack.append((c, min(c + self.node_size, child_end), lvl - 1))
+        return np.sort(np.concatenate(out)) if out else np.zeros(0, dtype=np.int64)
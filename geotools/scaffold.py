@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+scaffold.py — new Power BI visual projects, and resetting a broken one to a
+minimal visual.
+
+  new --template tomtom   MapLibre + TomTom points visual with Legend /
+                          Latitude / Longitude roles (was tom.py)
+  new --template table    minimal table-like visual (was
+                          customTable/…/setup_and_package.py)
+  fix                     move src/ to src_backup_<time>, write a minimal
+                          visual.ts and sane package.json / tsconfig.json /
+                          .eslintrc.json / pbiviz.json / icon (was
+                          fix_and_package.py)
+
+With --package, dependencies are installed and pbiviz package runs
+afterwards (geotools.visual). Missing arguments for `new --template tomtom`
+are prompted for, as tom.py did; TOMTOM_API_KEY supplies the key.
+
+Usage:
+  python3 -m geotools.scaffold new MyMap --template tomtom --display "TomTom Map"
+  python3 -m geotools.scaffold new customTable/powerbi-custom-table-visual --template table --force --package
+  python3 -m geotools.scaffold fix customTable/powerbi-custom-table-visual --package
+"""
+import argparse
+import base64
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+PBIVIZ_TOOLS_VERSION = "6.1.3"
+PBI_API_VERSION = "5.11.0"
+TEMPLATES = ("tomtom", "table")
+
+# 1x1 PNG placeholder icon (no network)
+ICON_PNG = base64.b64decode("iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mP8/x8AAwMB/ea9S2sAAAAASUVORK5CYII=")
+
+MINIMAL_TABLE_TS = """import powerbi from "powerbi-visuals-api";
+import IVisual = powerbi.extensibility.visual.IVisual;
+import VisualUpdateOptions = powerbi.extensibility.visual.VisualUpdateOptions;
+
+export class Visual implements IVisual {
+  private root: HTMLElement;
+  constructor(options: any) {
+    this.root = options.element;
+    this.root.style.fontFamily = "Segoe UI, Arial, sans-serif";
+    this.root.innerHTML = "<div style='padding:8px;color:#333'>Custom Table Visual — minimal scaffold</div>";
+  }
+  public update(options: VisualUpdateOptions) { /* minimal no-op */ }
+  public destroy() {}
+}
+"""
+
+FIX_TS = """import powerbi from "powerbi-visuals-api";
+import IVisual = powerbi.extensibility.visual.IVisual;
+import VisualUpdateOptions = powerbi.extensibility.visual.VisualUpdateOptions;
+
+export class Visual implements IVisual {
+  private root: HTMLElement;
+  constructor(options: any) {
+    this.root = options.element;
+    this.root.innerHTML = "<div style='padding:12px;font-family:Segoe UI, Arial, sans-serif;color:#222'>Minimal Custom Table Visual</div>";
+  }
+  public update(options: VisualUpdateOptions) {}
+  public destroy() {}
+}
+"""
+
+
+def _write(path: Path, data, overwrite: bool = True) -> bool:
+    if path.exists() and not overwrite:
+        print(f"SKIP existing: {path}")
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(data, bytes):
+        path.write_bytes(data)
+    else:
+        path.write_text(data, encoding="utf-8")
+    print(f"WROTE {path}")
+    return True
+
+
+def _guid(prefix: str) -> str:
+    return prefix + os.urandom(5).hex()
+
+
+def tomtom(root: Path, api_key: str, display: str = "TomTom Map"):
+    """MapLibre + TomTom points visual in a new folder `root`."""
+    proj = root.name
+    root.mkdir(parents=True)
+
+    # --- package.json (only what we need) ---
+    package_json = {
+        "name": proj, "version": "1.0.0", "private": True,
+        "scripts": {
+            "start": "pbiviz start",
+            "package": "pbiviz package --verbose"
+        },
+        "devDependencies": {
+            "powerbi-visuals-tools": PBIVIZ_TOOLS_VERSION,
+            "typescript": "^5.6.2",
+            "@typescript-eslint/parser": "^8.41.0",
+            "@typescript-eslint/eslint-plugin": "^8.41.0",
+            "eslint": "^9.14.0"
+        },
+        "dependencies": {
+            "maplibre-gl": "^4.5.0",
+            "powerbi-visuals-api": PBI_API_VERSION
+        }
+    }
+    _write(root / "package.json", json.dumps(package_json, indent=2))
+
+    # --- pbiviz.json ---
+    pbiviz_json = {
+        "visual": {
+            "name": proj,
+            "displayName": display,
+            "guid": f"{proj.replace('-', '')}GUID",
+            "visualClassName": "Visual",
+            "version": "1.0.0.0",
+            "description": "Minimal MapLibre + TomTom points",
+            "supportUrl": "https://www.maplibre.org/"
+        },
+        "apiVersion": PBI_API_VERSION,
+        "assets": {"icon": "assets/icon.png"},
+        "style": "style/visual.less",
+        "capabilities": "capabilities.json",
+        "dependencies": "dependencies.json",
+        "stringResources": []
+    }
+    _write(root / "pbiviz.json", json.dumps(pbiviz_json, indent=2))
+
+    # --- tsconfig.json (simple) ---
+    tsconfig = {
+        "compilerOptions": {
+            "target": "ES2020",
+            "module": "ESNext",
+            "moduleResolution": "bundler",
+            "strict": False,
+            "outDir": "./.tmp/build/",
+            "rootDir": "./",
+            "sourceMap": True,
+            "skipLibCheck": True,
+            "types": ["powerbi-visuals-api"]
+        },
+        "include": ["src/**/*"]
+    }
+    _write(root / "tsconfig.json", json.dumps(tsconfig, indent=2))
+
+    # --- eslint flat config to avoid tsconfigRootDir errors ---
+    eslint_cfg = """\
+import path from "path";
+import tsParser from "@typescript-eslint/parser";
+import tsPlugin from "@typescript-eslint/eslint-plugin";
+const __ROOT = path.resolve(process.cwd());
+export default [{
+  files: ["src/**/*.ts"],
+  languageOptions: {
+    parser: tsParser,
+    parserOptions: { ecmaVersion: 2022, sourceType: "module", tsconfigRootDir: __ROOT, project: ["./tsconfig.json"] }
+  },
+  plugins: { "@typescript-eslint": tsPlugin },
+  rules: { "no-unused-vars": "off", "@typescript-eslint/no-unused-vars": "off" }
+}];
+"""
+    _write(root / "eslint.config.cjs", eslint_cfg)
+
+    # --- capabilities: Legend (category), Latitude & Longitude (measures or groupings) ---
+    capabilities = {
+        "dataRoles": [
+            {"name": "legend", "kind": "Grouping", "displayName": "Legend"},
+            {"name": "latitude", "kind": "Grouping", "displayName": "Latitude"},
+            {"name": "longitude", "kind": "Grouping", "displayName": "Longitude"}
+        ],
+        "dataViewMappings": [{
+            "categorical": {
+                "categories": [{ "for": {"in": "legend"} }],
+                "values": {
+                    "group": { "by": "legend", "select": [
+                        {"bind": {"to": "latitude"}},
+                        {"bind": {"to": "longitude"}}
+                    ]}
+                }
+            }
+        }],
+        "suppressDefaultTitle": True
+    }
+    _write(root / "capabilities.json", json.dumps(capabilities, indent=2))
+
+    # --- dependencies.json: load maplibre js/css ---
+    deps = {
+        "externalJS": [],
+        "resources": [
+            {"resourceId":"maplibre-js","source":"node_modules/maplibre-gl/dist/maplibre-gl.js","type":"js"},
+            {"resourceId":"maplibre-css","source":"node_modules/maplibre-gl/dist/maplibre-gl.css","type":"css"}
+        ]
+    }
+    _write(root / "dependencies.json", json.dumps(deps, indent=2))
+
+    # --- minimal styles ---
+    visual_less = """\
+@import (less) "node_modules/maplibre-gl/dist/maplibre-gl.css";
+.visualHost { position:relative; width:100%; height:100%; }
+#map { position:absolute; inset:0; }
+.legendBadge { position:absolute; top:8px; left:8px; background:rgba(255,255,255,.9); padding:6px 8px; border-radius:8px; font-size:12px; pointer-events:none; }
+"""
+    _write(root / "style" / "visual.less", visual_less)
+
+    # --- icon ---
+    tiny_png = base64.b64decode("iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR4nGMAAQAABQABJ4oYVQAAAABJRU5ErkJggg==")
+    _write(root / "assets" / "icon.png", tiny_png)
+
+    # --- src/visual.ts (SUPER MINIMAL) ---
+    visual_ts = f"""\
+import "./../style/visual.less";
+import powerbi from "powerbi-visuals-api";
+import DataView = powerbi.DataView;
+import IVisual = powerbi.extensibility.visual.IVisual;
+import VisualUpdateOptions = powerbi.extensibility.visual.VisualUpdateOptions;
+// @ts-ignore
+import * as maplibregl from "maplibre-gl/dist/maplibre-gl.js";
+
+let MAP:any=null; let READY=false;
+
+export class Visual implements IVisual {{
+  private host: HTMLElement;
+  private legend: HTMLElement;
+  private apiKey: string = "{api_key}";
+
+  constructor(opts: powerbi.extensibility.visual.VisualConstructorOptions) {{
+    this.host = document.createElement("div");
+    this.host.className = "visualHost";
+    opts.element.appendChild(this.host);
+
+    const mapDiv = document.createElement("div");
+    mapDiv.id = "map";
+    this.host.appendChild(mapDiv);
+
+    this.legend = document.createElement("div");
+    this.legend.className = "legendBadge";
+    this.legend.textContent = "Legend";
+    this.host.appendChild(this.legend);
+
+    const styleUrl = `https://api.tomtom.com/style/1/style/21.2.1-WTP-basic.json?key=${{this.apiKey}}`;
+    MAP = new maplibregl.Map({{ container: mapDiv, style: styleUrl, center: [-98.5795,39.8283], zoom: 3 }});
+    MAP.on("load", ()=>{{ READY=true; }});
+  }}
+
+  public update(o: VisualUpdateOptions) {{
+    const dv: DataView | undefined = o.dataViews && o.dataViews[0];
+    if (!dv || !dv.categorical) return;
+    const cat = dv.categorical;
+    const legends = cat.categories && cat.categories[0];
+    const vals = cat.values;
+    if (!legends || !vals || vals.length<2) return;
+    const latCol = vals[0], lonCol = vals[1];
+
+    const feats:any[]=[];
+    for (let i=0;i<latCol.values.length;i++) {{
+      const lat=Number(latCol.values[i]); const lon=Number(lonCol.values[i]);
+      if (Number.isFinite(lat) && Number.isFinite(lon)) {{
+        const label=String(legends.values[i]??"");
+        feats.push({{ type:"Feature", geometry:{{type:"Point",coordinates:[lon,lat]}}, properties:{{label}} }});
+      }}
+    }}
+    const fc={{ type:"FeatureCollection", features:feats }};
+    const render=()=>{{
+      if (MAP.getSource("pts")) (MAP.getSource("pts") as any).setData(fc);
+      else {{
+        MAP.addSource("pts",{{ type:"geojson", data:fc }});
+        MAP.addLayer({{ id:"pts", type:"circle", source:"pts", paint:{{"circle-radius":5,"circle-opacity":0.85}} }});
+      }}
+      if (feats.length) {{
+        const c=feats.map(f=>f.geometry.coordinates);
+        const b=c.reduce((B:any,p:any)=>B.extend(p), new maplibregl.LngLatBounds(c[0],c[0]));
+        try{{ MAP.fitBounds(b,{{padding:40,duration:0}}); }}catch(e){{}}
+      }}
+      const sample=[...new Set(feats.map(f=>f.properties.label))].slice(0,5);
+      this.legend.textContent = sample.length ? "Legend: "+sample.join(", ") : "Legend";
+    }};
+    if (!READY) MAP.once("load", render); else render();
+  }}
+}}
+"""
+    _write(root / "src" / "visual.ts", visual_ts)
+
+    # --- tiny README ---
+    readme = f"""\
+# {display}
+
+Minimal MapLibre + TomTom Power BI visual.
+Fields:
+- Legend (text)
+- Latitude (number)
+- Longitude (number)
+
+## Build
+npm install
+npx -y powerbi-visuals-tools@{PBIVIZ_TOOLS_VERSION} --version
+npm run package
+"""
+    _write(root / "README.md", readme)
+
+    # .gitignore
+    _write(root / ".gitignore", ".tmp/\ndist/\nnode_modules/\n")
+
+def table(root: Path, force: bool = False):
+    """Minimal table-like visual; existing files are kept unless `force` (src/visual.ts always is)."""
+    _write(root / "pbiviz.json", json.dumps({
+        "visual": {
+            "name": "CustomTableVisual",
+            "displayName": "Custom Table Visual",
+            "guid": _guid("CTV"),
+            "visualClassName": "Visual",
+            "version": "1.0.0.0",
+            "description": "Minimal custom table-like visual"
+        },
+        "apiVersion": PBI_API_VERSION,
+        "author": {"name": "", "email": ""},
+        "assets": {"icon": "assets/icon.png"},
+        "capabilities": "capabilities.json",
+        "externalJS": None,
+        "style": "style/visual.less"
+    }, indent=2), force)
+    _write(root / "package.json", json.dumps({
+        "name": "custom-table-visual",
+        "version": "1.0.0",
+        "description": "Minimal Power BI custom visual scaffold",
+        "scripts": {"package": "pbiviz package"},
+        "devDependencies": {}
+    }, indent=2), force)
+    _write(root / "tsconfig.json", json.dumps({
+        "compilerOptions": {
+            "target": "ES5",
+            "module": "commonjs",
+            "outDir": "./.tmp/build",
+            "rootDir": "./src",
+            "strict": True,
+            "esModuleInterop": True,
+            "skipLibCheck": True
+        },
+        "files": ["./src/visual.ts"]
+    }, indent=2), force)
+    # ESLint: tsconfigRootDir must be a string in JSON
+    _write(root / ".eslintrc.json", json.dumps({
+        "parser": "@typescript-eslint/parser",
+        "parserOptions": {"tsconfigRootDir": ".", "project": "./tsconfig.json"},
+        "plugins": ["@typescript-eslint"],
+        "extends": ["eslint:recommended", "plugin:@typescript-eslint/recommended"],
+        "rules": {"no-unused-vars": "off", "@typescript-eslint/no-unused-vars": ["error"]}
+    }, indent=2), force)
+    _write(root / "capabilities.json", json.dumps({
+        "dataRoles": [
+            {"name": "Values", "displayName": "Values", "kind": "Measure"},
+            {"name": "Rows", "displayName": "Rows", "kind": "Grouping"}
+        ],
+        "dataViewMappings": [
+            {"table": {"rows": {"select": [{"for": {"in": "Rows"}}, {"for": {"in": "Values"}}]}}}
+        ],
+        "version": "1.0.0.0"
+    }, indent=2), force)
+    _write(root / "src" / "visual.ts", MINIMAL_TABLE_TS, overwrite=False)
+    _write(root / "assets" / "icon.png", ICON_PNG, force)
+
+
+def fix(root: Path):
+    """Back up src/, write a minimal visual and sane configs, keeping what pbiviz.json already has."""
+    src = root / "src"
+    if src.exists():
+        backup = root / f"src_backup_{int(time.time())}"
+        print(f"Backing up {src} -> {backup}")
+        shutil.move(str(src), str(backup))
+    _write(src / "visual.ts", FIX_TS)
+
+    pbiviz_path = root / "pbiviz.json"
+    try:
+        pb = json.loads(pbiviz_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        pb = {}
+    vis = pb.setdefault("visual", {})
+    vis.setdefault("name", "CustomTableVisual")
+    vis.setdefault("displayName", "Custom Table Visual")
+    vis.setdefault("guid", _guid("CTV"))
+    vis.setdefault("visualClassName", "Visual")
+    vis.setdefault("version", "1.0.0.0")
+    pb.setdefault("apiVersion", PBI_API_VERSION)
+    pb.setdefault("assets", {"icon": "assets/icon.png"})
+    _write(pbiviz_path, json.dumps(pb, indent=2))
+
+    pkg_path = root / "package.json"
+    pkg = json.loads(pkg_path.read_text(encoding="utf-8")) if pkg_path.exists() else {}
+    pkg.setdefault("name", "custom-table-visual")
+    pkg.setdefault("version", "1.0.0")
+    pkg.setdefault("description", "Minimal Power BI custom visual scaffold")
+    pkg.setdefault("scripts", {})["package"] = "pbiviz package"
+    deps = pkg.setdefault("dependencies", {})
+    deps["powerbi-visuals-api"] = pb["apiVersion"]
+    # runtime polyfills the pbiviz toolchain expects
+    deps["core-js"] = "^3.32.2"
+    deps["regenerator-runtime"] = "^0.13.11"
+    _write(pkg_path, json.dumps(pkg, indent=2))
+
+    _write(root / "tsconfig.json", json.dumps({
+        "compilerOptions": {
+            "target": "ES5",
+            "module": "commonjs",
+            # rootDir is the project so pbiviz's generated .tmp files are under it
+            "rootDir": ".",
+            "outDir": "./.tmp/build",
+            "strict": True,
+            "esModuleInterop": True,
+            "skipLibCheck": True
+        },
+        "files": ["./src/visual.ts"]
+    }, indent=2))
+    # the linter wants an absolute tsconfigRootDir
+    _write(root / ".eslintrc.json", json.dumps({
+        "parser": "@typescript-eslint/parser",
+        "parserOptions": {"tsconfigRootDir": str(root), "project": "./tsconfig.json"},
+        "plugins": ["@typescript-eslint"],
+        "extends": ["eslint:recommended", "plugin:@typescript-eslint/recommended"],
+        "rules": {"no-unused-vars": "off", "@typescript-eslint/no-unused-vars": ["error"]}
+    }, indent=2))
+    _write(root / "assets" / "icon.png", ICON_PNG, overwrite=False)
+
+
+def _ask(prompt: str) -> str:
+    # piped answers (printf 'KEY\nfolder\n' | tom.py) are read without a prompt
+    if not sys.stdin.isatty():
+        return sys.stdin.readline().strip()
+    return input(prompt).strip()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Create or reset Power BI visual projects.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("new", help="scaffold a project")
+    p.add_argument("project", nargs="?", help="folder to create (prompted for if omitted)")
+    p.add_argument("--template", choices=TEMPLATES, default="tomtom")
+    p.add_argument("--display", help="display name shown in Power BI (tomtom)")
+    p.add_argument("--api-key", help="TomTom key baked into visual.ts (default $TOMTOM_API_KEY)")
+    p.add_argument("--force", action="store_true", help="table: overwrite existing config files")
+    p.add_argument("--package", action="store_true", help="install dependencies and package afterwards")
+    p = sub.add_parser("fix", help="reset src/ and configs to a minimal visual")
+    p.add_argument("project", nargs="?", default=".")
+    p.add_argument("--package", action="store_true", help="install dependencies and package afterwards")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "new" and args.template == "tomtom":
+        api_key = args.api_key or os.environ.get("TOMTOM_API_KEY") or _ask("TomTom API key: ")
+        proj = args.project or _ask("Folder name (no spaces): ")
+        display = args.display or _ask("Display name (shown in Power BI): ") or "TomTom Map"
+        if not api_key or not proj:
+            print("ERROR: a TomTom API key and a folder name are required", file=sys.stderr)
+            sys.exit(2)
+        root = Path(proj).resolve()
+        if root.exists():
+            print(f"ERROR: {root} exists; pick another folder", file=sys.stderr)
+            sys.exit(2)
+        tomtom(root, api_key, display)
+        print(f"Created in: {root}")
+        if not args.package:
+            print(f"Next: python3 -m geotools.visual package {proj}, then import the .pbiviz from dist/ "
+                  "and bind Legend/Latitude/Longitude.")
+    elif args.cmd == "new":
+        root = Path(args.project or ".").resolve()
+        table(root, args.force)
+    else:
+        root = Path(args.project).resolve()
+        fix(root)
+
+    if args.package:
+        from .visual import package, run
+        if args.cmd == "fix":
+            # package-lock may not match the rewritten package.json
+            run("npm install --no-audit --no-fund", root)
+        rc = package(root, skip_install=args.cmd == "fix")
+        print("\nPackaging " + ("failed; see the output above." if rc else "completed; see dist/*.pbiviz"))
+        sys.exit(rc)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+serve.py — asyncio static server with precompressed variants, ETags and ranges.
+
+For local development and load-time benchmarks, so the visuals fetch our
+datasets and tiles the way a real static host or CDN would deliver them:
+
+  precompress   writes file.gz (gzip -9, mtime 0 so reruns are byte-identical)
+                and file.br (brotli q11, if the brotli package is installed)
+                next to every compressible file, skipping up-to-date ones
+  serve         GET/HEAD over HTTP/1.1 keep-alive. Accept-Encoding picks the
+                smallest fresh variant (br, then gzip) and the file is sent
+                as is (Content-Encoding, Vary: Accept-Encoding); nothing is
+                compressed per request. Every representation has a strong
+                ETag (content hash, cached by path/size/mtime), answered with
+                304 on If-None-Match. Single byte ranges (Range / If-Range,
+                strong comparison) apply to the selected representation; a
+                malformed or unsatisfiable Range gets 416 with
+                Content-Range: bytes */size, several ranges the full body. Bodies go out with
+                loop.sendfile. CORS is open so Power BI's sandboxed iframe
+                can fetch from it.
+
+Usage:
+  python3 -m geotools.serve precompress . --min-size 1024
+  python3 -m geotools.serve serve . --port 8080
+  python3 -m geotools.serve serve build/ --port 8080 --max-age 3600
+"""
+import argparse
+import asyncio
+import email.utils
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import sys
+import urllib.parse
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+COMPRESSIBLE = (".geojson", ".geojsonl", ".geojsons", ".json", ".csv", ".pbf", ".mvt",
+                ".fgb", ".js", ".css", ".html", ".svg", ".txt", ".wkt", ".xml")
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))      # preference order
+MIN_SIZE = 512
+MAX_HEADER = 64 * 1024
+TYPES = {
+    ".geojson": "application/geo+json", ".geojsonl": "application/geo+json-seq",
+    ".geojsons": "application/geo+json-seq", ".pbf": "application/x-protobuf",
+    ".mvt": "application/vnd.mapbox-vector-tile", ".fgb": "application/octet-stream",
+    ".json": "application/json",
+}
+REASONS = {200: "OK", 204: "No Content", 206: "Partial Content", 304: "Not Modified",
+           400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+           416: "Range Not Satisfiable", 502: "Bad Gateway", 504: "Gateway Timeout"}
+CORS = {"Access-Control-Allow-Origin": "*",
+        "Access-Control-Expose-Headers": "ETag, Content-Range, Content-Encoding, Content-Length"}
+PREFLIGHT = dict(CORS, **{"Access-Control-Allow-Methods": "GET, HEAD, OPTIONS",
+                          "Access-Control-Allow-Headers": "Range, If-None-Match, If-Range",
+                          "Access-Control-Max-Age": "86400"})
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+# ---- build step ----------------------------------------------------------
+
+def _stale(src: Path, dst: Path) -> bool:
+    return not dst.exists() or dst.stat().st_mtime_ns < src.stat().st_mtime_ns
+
+
+def _walk(root):
+    for d, dirs, files in os.walk(root):
+        dirs[:] = sorted(x for x in dirs if x != "node_modules" and not x.startswith("."))
+        for name in sorted(files):
+            yield Path(d) / name
+
+
+def precompress(root, min_size: int = MIN_SIZE, suffixes=COMPRESSIBLE, force: bool = False) -> Dict[str, int]:
+    """Write missing / stale .gz and .br variants under root; returns counts."""
+    brotli = _brotli()
+    done = {"gzip": 0, "br": 0, "skipped": 0}
+    for path in _walk(root):
+        if path.suffix.lower() not in suffixes:
+            continue
+        if path.stat().st_size < min_size:
+            done["skipped"] += 1
+            continue
+        data = None
+        gz = path.with_name(path.name + ".gz")
+        if force or _stale(path, gz):
+            data = path.read_bytes()
+            gz.write_bytes(gzip.compress(data, 9, mtime=0))
+            done["gzip"] += 1
+        br = path.with_name(path.name + ".br")
+        if brotli is not None and (force or _stale(path, br)):
+            data = path.read_bytes() if data is None else data
+            br.write_bytes(brotli.compress(data, quality=11))
+            done["br"] += 1
+    if brotli is None:
+        print("note: brotli not installed, .br variants skipped (pip install brotli)", file=sys.stderr)
+    return done
+
+
+# ---- serving -------------------------------------------------------------
+
+_ETAGS: Dict[Tuple[str, int, int], str] = {}
+
+
+def etag(path: str, st: os.stat_result) -> str:
+    """Strong ETag from the file's content hash, recomputed when size/mtime change."""
+    key = (path, st.st_size, st.st_mtime_ns)
+    tag = _ETAGS.get(key)
+    if tag is None:
+        h = hashlib.blake2b(digest_size=12)
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        tag = _ETAGS[key] = f'"{h.hexdigest()}"'
+    return tag
+
+
+def content_type(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    return TYPES.get(ext) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def accepted(header: str) -> Dict[str, float]:
+    """Accept-Encoding -> {coding: q}."""
+    out = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        m = re.search(r"q=([0-9.]+)", params)
+        if m:
+            try:
+                q = float(m.group(1))
+            except ValueError:
+                q = 0.0
+        if name:
+            out[name.strip().lower()] = q
+    return out
+
+
+def select(path: str, accept_encoding: str):
+    """(file to send, Content-Encoding or None, its stat) for a source file."""
+    src = os.stat(path)
+    acc = accepted(accept_encoding)
+    best = (path, None, src)
+    for coding, ext in ENCODINGS:
+        q = acc.get(coding, acc.get("*", 0.0))
+        if q <= 0:
+            continue
+        try:
+            st = os.stat(path + ext)
+        except OSError:
+            continue
+        if st.st_mtime_ns >= src.st_mtime_ns and st.st_size < best[2].st_size:
+            best = (path + ext, coding, st)
+    return best
+
+
+def parse_range(header: Optional[str], size: int):
+    """
+    Range header (RFC 9110 §14) against a representation of `size` bytes:
+    None to send the full body (no header, another range unit, or several
+    ranges, which we don't serve as multipart), "bad" for a malformed or
+    unsatisfiable set (416), else (start, end) inclusive.
+    """
+    if header is None:
+        return None
+    unit, eq, spec = header.partition("=")
+    if not eq:
+        return "bad"
+    if unit.strip().lower() != "bytes":
+        return None
+    specs = [r.strip() for r in spec.split(",") if r.strip()]
+    ranges = []
+    for r in specs:
+        m = re.fullmatch(r"([0-9]*)\s*-\s*([0-9]*)", r)
+        if not m or m.groups() == ("", ""):
+            return "bad"
+        a, b = m.groups()
+        if a == "":
+            start, end = max(0, size - int(b)), size - 1
+            if int(b) == 0:
+                continue                    # empty suffix: unsatisfiable
+        else:
+            start = int(a)
+            if b and int(b) < start:
+                return "bad"
+            end = min(int(b), size - 1) if b else size - 1
+        if start < size:
+            ranges.append((start, end))
+    if not ranges:
+        return "bad"
+    return ranges[0] if len(specs) == 1 else None
+
+
+def tag_list(header: str):
+    """Entity tags of an If-None-Match header, weak ones without their W/ (weak comparison)."""
+    return [t.strip()[2:] if t.strip().startswith("W/") else t.strip() for t in header.split(",")]
+
+
+async def read_request(reader: asyncio.StreamReader):
+    """
+    (method, target, headers, keep_alive) of the next request on a
+    connection, or None if the request line is malformed. Header names are
+    lower-cased. Raises IncompleteReadError at end of stream.
+    """
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ", 2)
+    except ValueError:
+        return None
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            k, v = line.split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+    conn = headers.get("connection", "").lower()
+    keep = conn != "close" if version == "HTTP/1.1" else conn == "keep-alive"
+    return method, target, headers, keep
+
+
+def response_head(status: int, headers: dict, length: int = 0, keep: bool = True) -> bytes:
+    lines = [f"HTTP/1.1 {status} {REASONS[status]}"]
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    if status != 304:
+        lines.append(f"Content-Length: {length}")
+    lines.append("Connection: keep-alive" if keep else "Connection: close")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+class StaticServer:
+    def __init__(self, root: str, max_age: Optional[int] = None):
+        self.root = os.path.realpath(root)
+        self.cache_control = f"public, max-age={max_age}" if max_age is not None else "no-cache"
+
+    def resolve(self, target: str) -> Optional[str]:
+        path = urllib.parse.unquote(urllib.parse.urlsplit(target).path)
+        full = os.path.realpath(os.path.join(self.root, path.lstrip("/")))
+        if full != self.root and not full.startswith(self.root + os.sep):
+            return None
+        if os.path.isdir(full):
+            full = os.path.join(full, "index.html")
+        return full if os.path.isfile(full) else None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while await self._one(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def _one(self, reader, writer) -> bool:
+        req = await read_request(reader)
+        if req is None:
+            await self._send(writer, 400, CORS, keep=False)
+            return False
+        method, target, headers, keep = req
+
+        if method == "OPTIONS":
+            await self._send(writer, 204, PREFLIGHT, keep=keep)
+            return keep
+        if method not in ("GET", "HEAD"):
+            await self._send(writer, 405, dict(CORS, Allow="GET, HEAD, OPTIONS"), keep=keep)
+            return keep
+        path = self.resolve(target)
+        if path is None:
+            await self._send(writer, 404, CORS, keep=keep)
+            return keep
+
+        send_path, coding, st = select(path, headers.get("accept-encoding", ""))
+        tag = etag(send_path, st)
+        base = dict(CORS, **{
+            "Content-Type": content_type(path),
+            "ETag": tag,
+            "Last-Modified": email.utils.formatdate(st.st_mtime, usegmt=True),
+            "Cache-Control": self.cache_control,
+            "Accept-Ranges": "bytes",
+            "Vary": "Accept-Encoding",
+        })
+        if coding:
+            base["Content-Encoding"] = coding
+        inm = headers.get("if-none-match")
+        if inm and (inm.strip() == "*" or tag in tag_list(inm)):
+            await self._send(writer, 304, base, keep=keep)
+            return keep
+
+        size, start, length, status = st.st_size, 0, st.st_size, 200
+        rng = parse_range(headers.get("range"), size)
+        # If-Range needs a strong match: a weak tag or a date sends the full body
+        if_range = headers.get("if-range")
+        if rng is not None and (if_range is None or if_range.strip() == tag):
+            if rng == "bad":
+                await self._send(writer, 416, dict(base, **{"Content-Range": f"bytes */{size}"}), keep=keep)
+                return keep
+            start, end = rng
+            length, status = end - start + 1, 206
+            base["Content-Range"] = f"bytes {start}-{end}/{size}"
+        await self._send(writer, status, base, length, keep=keep,
+                         body=None if method == "HEAD" else (send_path, start))
+        return keep
+
+    async def _send(self, writer, status, headers, length=0, keep=True, body=None):
+        writer.write(response_head(status, headers, length, keep))
+        if body and length:
+            path, start = body
+            with open(path, "rb") as fh:
+                await writer.drain()
+                await asyncio.get_running_loop().sendfile(writer.transport, fh, start, length)
+        await writer.drain()
+
+
+async def run(root: str = ".", port: int = 8080, bind: str = "127.0.0.1", max_age: Optional[int] = None):
+    srv = StaticServer(root, max_age)
+    server = await asyncio.start_server(srv.handle, bind, port, limit=MAX_HEADER)
+    for sock in server.sockets:
+        print(f"Serving {srv.root} on http://{bind}:{sock.getsockname()[1]}/ (precompressed variants, ETag, Range)")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Precompress datasets and serve them with ETag / Range support.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("precompress", help="write .gz / .br variants next to compressible files")
+    p.add_argument("root", nargs="?", default=".")
+    p.add_argument("--min-size", type=int, default=MIN_SIZE, help="skip files smaller than this")
+    p.add_argument("--force", action="store_true", help="rewrite variants even when fresh")
+    s = sub.add_parser("serve", help="asyncio static server")
+    s.add_argument("root", nargs="?", default=".")
+    s.add_argument("--port", type=int, default=8080)
+    s.add_argument("--bind", default="127.0.0.1")
+    s.add_argument("--max-age", type=int, default=None,
+                   help="Cache-Control max-age in seconds (default: no-cache, always revalidate)")
+    args = ap.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        print(f"ERROR: {args.root}: not a directory", file=sys.stderr)
+        sys.exit(2)
+    if args.cmd == "precompress":
+        done = precompress(args.root, args.min_size, force=args.force)
+        print(f"Wrote {done['gzip']} .gz and {done['br']} .br variants ({done['skipped']} small files skipped)")
+    else:
+        try:
+            asyncio.run(run(args.root, args.port, args.bind, args.max_age))
+        except KeyboardInterrupt:
+            pass
+        except OSError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+shard.py — split the asset collections into shards that each fit a Power BI
+table dataView, keyed by LegendID and space.
+
+Features are grouped by LegendID (unless --no-legend) and, with
+--boundaries, by the boundary polygon (a state, say) containing their
+centroid. A group with more table rows than --max-rows is cut along a Web
+Mercator quadtree of the centroids: a cell is split into its four children
+until it fits, and the leaves, in quadkey (Z) order, are packed into shards
+of about equal size that never exceed the cap. Rows are counted the way
+geotools.export writes them (one per polygon ring, plus one per LocationID
+with --with-points), so a CSV shard is exactly what the visual loads.
+
+Shard names are stable: a group that fits is one shard named after the
+group; a split group's shards are named by the first quadkey they cover. A
+new region only changes the shard it falls in, so refreshes touch few files.
+
+Output directory:
+
+  manifest.json        per shard: file, LegendID, boundary, quadkeys, bbox,
+                       feature and row counts, bytes, sha256
+  <shard>.csv          export.py table (or .geojson with --format geojson)
+
+Shards are written in parallel (--workers). A shard whose content is
+unchanged keeps its file (and mtime), and files of shards that no longer
+exist are removed, so the manifest diff is the list of tables to refresh.
+
+Usage:
+  python3 -m geotools.shard tAsset_Locations_Regions_Polygons.geojson -o shards/ --max-rows 30000
+  python3 -m geotools.shard *.geojson -o shards/ --max-rows 100 --no-legend --workers 4
+  python3 -m geotools.shard assets.geojson -o shards/ --boundaries states.geojson --boundary-field NAME
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import geometry
+from .export import _polygon_rings, summary_columns, table_rows, write_csv, TABLE_COLUMNS
+from .io import load_collection, parse_location, write_collection
+from .mercator import project
+
+DEFAULT_MAX_ROWS = 30000     # Power BI's default row reduction for table mappings
+MAX_DEPTH = 16               # quadtree depth limit (features at one spot cannot be split further)
+MANIFEST = "manifest.json"
+NO_KEY = "_none"
+
+
+def _slug(s) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(s)).strip("_") or NO_KEY
+
+
+def table_row_counts(features, with_points: bool = False) -> np.ndarray:
+    """Rows export.table_rows emits per feature."""
+    out = np.empty(len(features), dtype=np.int64)
+    for i, f in enumerate(features):
+        n = len(_polygon_rings(f.get("geometry")))
+        if with_points and parse_location((f.get("properties") or {}).get("LocationID")):
+            n += 1
+        out[i] = n
+    return out
+
+
+def anchor_points(features, centroids: np.ndarray) -> np.ndarray:
+    """Centroid per feature, LocationID where there is no geometry; NaN if neither."""
+    pts = centroids.copy()
+    for i in np.flatnonzero(~np.isfinite(pts[:, 0])):
+        loc = parse_location((features[i].get("properties") or {}).get("LocationID"))
+        if loc:
+            pts[i] = (loc[1], loc[0])
+    return pts
+
+
+# ---- spatial keys --------------------------------------------------------
+
+def quadtree_leaves(tx: np.ndarray, ty: np.ndarray, rows: np.ndarray, max_rows: int,
+                    idx: np.ndarray, depth: int = 0, key: str = "") -> List[Tuple[str, np.ndarray]]:
+    """(quadkey, member indexes) leaves in Z order; cells split while over max_rows."""
+    if rows[idx].sum() <= max_rows or depth >= MAX_DEPTH or len(idx) < 2:
+        return [(key, idx)] if len(idx) else []
+    shift = MAX_DEPTH - depth - 1
+    qx, qy = (tx[idx] >> shift) & 1, (ty[idx] >> shift) & 1
+    child = qx + 2 * qy                      # Bing quadkey digit
+    out = []
+    for d in range(4):
+        out += quadtree_leaves(tx, ty, rows, max_rows, idx[child == d], depth + 1, key + str(d))
+    return out
+
+
+def pack_leaves(leaves, rows: np.ndarray, max_rows: int) -> List[List[Tuple[str, np.ndarray]]]:
+    """Consecutive leaves into shards near total / ceil(total / max_rows), never over max_rows."""
+    sizes = [int(rows[i].sum()) for _, i in leaves]
+    total = sum(sizes)
+    target = total / max(1, math.ceil(total / max_rows))
+    shards, cur, acc = [], [], 0
+    for leaf, n in zip(leaves, sizes):
+        if cur and (acc + n > max_rows or abs(acc - target) < abs(acc + n - target)):
+            shards.append(cur)
+            cur, acc = [], 0
+        cur.append(leaf)
+        acc += n
+    if cur:
+        shards.append(cur)
+    return shards
+
+
+def boundary_names(points: np.ndarray, boundaries: Sequence[dict], field: str) -> List[str]:
+    """Name of the first boundary polygon containing each point (NO_KEY if none)."""
+    from .geofence import RegionIndex
+    index = RegionIndex(boundaries)
+    names = [str((f.get("properties") or {}).get(field, i)) for i, f in enumerate(index.features)]
+    out = []
+    for x, y in points.tolist():
+        hit = index.locate(x, y) if math.isfinite(x) else ()
+        out.append(names[min(hit)] if hit else NO_KEY)
+    return out
+
+
+# ---- partition -----------------------------------------------------------
+
+def partition(features: Sequence[dict], max_rows: int = DEFAULT_MAX_ROWS, by_legend: bool = True,
+              boundaries: Optional[Sequence[dict]] = None, boundary_field: str = "NAME",
+              with_points: bool = False) -> List[dict]:
+    """Shard descriptors: id, LegendID, boundary, quadkeys, member indexes, rows."""
+    features = list(features)
+    rows = table_row_counts(features, with_points)
+    pts = anchor_points(features, geometry.centroids(geometry.pack(features)))
+    ok = np.isfinite(pts[:, 0])
+    x, y = project(np.where(ok, pts[:, 0], 0.0), np.where(ok, pts[:, 1], 0.0))
+    scale = 1 << MAX_DEPTH
+    tx = np.clip((x * scale).astype(np.int64), 0, scale - 1)
+    ty = np.clip((y * scale).astype(np.int64), 0, scale - 1)
+
+    legend = [str((f.get("properties") or {}).get("LegendID") or NO_KEY) if by_legend else "" for f in features]
+    bound = boundary_names(pts, boundaries, boundary_field) if boundaries else [""] * len(features)
+    groups: Dict[Tuple[str, str, bool], List[int]] = {}
+    for i in range(len(features)):
+        groups.setdefault((legend[i], bound[i], bool(ok[i])), []).append(i)
+
+    shards = []
+    for (leg, bnd, located), members in sorted(groups.items()):
+        idx = np.asarray(members, dtype=np.int64)
+        name = ".".join(_slug(p) for p in (leg, bnd) if p) or "all"
+        if not located:
+            name += ".nogeom"
+        leaves = quadtree_leaves(tx, ty, rows, max_rows, idx) if located else [("", idx)]
+        packed = pack_leaves(leaves, rows, max_rows)
+        for part in packed:
+            qks = [k for k, _ in part]
+            sid = name if len(packed) == 1 else f"{name}.q{qks[0]}"
+            members = np.sort(np.concatenate([i for _, i in part]))
+            shards.append({"id": sid, "LegendID": leg or None, "boundary": bnd or None,
+                           "quadkeys": qks if len(packed) > 1 else [], "members": members,
+                           "rows": int(rows[members].sum())})
+    return shards
+
+
+# ---- output --------------------------------------------------------------
+
+def _write_shard(job) -> Tuple[str, int, str, bool]:
+    """Write one shard unless an identical file is already there; (file, bytes, sha256, changed)."""
+    path, feats, fmt, with_points, labels, digits = job
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    if fmt == "csv":
+        cols = summary_columns(feats, labels=labels)
+        write_csv(tmp, table_rows(feats, cols, with_points, digits))
+    else:
+        write_collection(tmp, feats, precision=digits)
+    data = tmp.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    if path.exists() and hashlib.sha256(path.read_bytes()).hexdigest() == digest:
+        tmp.unlink()
+        return path.name, len(data), digest, False
+    os.replace(tmp, path)
+    return path.name, len(data), digest, True
+
+
+def write_shards(out_dir, features: Sequence[dict], shards: List[dict], fmt: str = "csv",
+                 with_points: bool = False, labels: bool = True, digits: int = 6, workers: int = 1,
+                 meta: Optional[dict] = None) -> dict:
+    """Write shard files and the manifest; returns the manifest (with a `changed` list)."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    ext = ".csv" if fmt == "csv" else ".geojson"
+    jobs = [(out / (s["id"] + ext), [features[i] for i in s["members"]], fmt, with_points, labels, digits)
+            for s in shards]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_write_shard, jobs))
+    else:
+        results = [_write_shard(j) for j in jobs]
+
+    old = out / MANIFEST
+    stale = []
+    if old.exists():
+        try:
+            keep = {r[0] for r in results}
+            stale = [s["file"] for s in json.loads(old.read_text(encoding="utf-8")).get("shards", [])
+                     if s.get("file") not in keep]
+        except (ValueError, KeyError):
+            pass
+    for name in stale:
+        try:
+            (out / name).unlink()
+        except OSError:
+            pass
+
+    entries = []
+    for s, (name, size, digest, _) in zip(shards, results):
+        b = geometry.bounds(geometry.pack([features[i] for i in s["members"]]))
+        bbox = [round(float(v), 6) for v in (np.nanmin(b[:, 0]), np.nanmin(b[:, 1]),
+                                             np.nanmax(b[:, 2]), np.nanmax(b[:, 3]))] \
+            if np.isfinite(b[:, 0]).any() else None
+        entries.append({"id": s["id"], "file": name, "LegendID": s["LegendID"], "boundary": s["boundary"],
+                        "quadkeys": s["quadkeys"], "bbox": bbox, "features": int(len(s["members"])),
+                        "rows": s["rows"], "bytes": size, "sha256": digest})
+    manifest = dict(meta or {}, version=1, format=fmt, columns=list(TABLE_COLUMNS) if fmt == "csv" else None,
+                    features=len(features), rows=sum(s["rows"] for s in shards), shards=entries)
+    old.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    manifest["changed"] = [r[0] for r in results if r[3]]
+    manifest["removed"] = stale
+    return manifest
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Split asset collections into row-capped shards with a manifest.")
+    ap.add_argument("inputs", nargs="+", help="asset FeatureCollections")
+    ap.add_argument("-o", "--out-dir", required=True)
+    ap.add_argument("--max-rows", type=int, default=DEFAULT_MAX_ROWS,
+                    help=f"table rows per shard (default {DEFAULT_MAX_ROWS})")
+    ap.add_argument("--no-legend", action="store_true", help="do not split by LegendID")
+    ap.add_argument("--boundaries", help="FeatureCollection of polygons (e.g. states) to key shards by")
+    ap.add_argument("--boundary-field", default="NAME", help="boundary property naming the shard (default NAME)")
+    ap.add_argument("--format", choices=("csv", "geojson"), default="csv")
+    ap.add_argument("--with-points", action="store_true", help="CSV: also a point row per LocationID")
+    ap.add_argument("--no-labels", action="store_true", help="skip the polylabel label anchors (faster)")
+    ap.add_argument("--precision", type=int, default=6)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args(argv)
+    if args.max_rows < 1:
+        print("ERROR: --max-rows must be >= 1", file=sys.stderr)
+        sys.exit(2)
+
+    t0 = time.perf_counter()
+    try:
+        feats = [f for p in args.inputs for f in load_collection(p)["features"]]
+        bounds = load_collection(args.boundaries)["features"] if args.boundaries else None
+        shards = partition(feats, args.max_rows, not args.no_legend, bounds, args.boundary_field,
+                           args.with_points and args.format == "csv")
+        meta = {"sources": [Path(p).name for p in args.inputs], "max_rows": args.max_rows,
+                "keys": (["LegendID"] if not args.no_legend else []) + (["boundary"] if bounds else [])
+                + ["quadtree"]}
+        m = write_shards(args.out_dir, feats, shards, args.format, args.with_points, not args.no_labels,
+                         args.precision, args.workers, meta)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+    sizes = [s["rows"] for s in m["shards"]]
+    for s in m["shards"]:
+        if s["rows"] > args.max_rows:
+            print(f"WARNING: {s['id']} has {s['rows']} rows (features at one spot cannot be split)",
+                  file=sys.stderr)
+    print(f"Wrote {len(sizes)} shards ({min(sizes, default=0)}-{max(sizes, default=0)} rows, "
+          f"{m['rows']} total) to {args.out_dir} in {time.perf_counter() - t0:.1f}s; "
+          f"{len(m['changed'])} changed, {len(m['removed'])} removed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+store.py — content-addressed, versioned store for the asset FeatureCollections.
+
+Revisions of a dataset are kept today as whole-file copies ("… - Copy",
+ZAsset_…, BAsset_…), so each one costs the full file. Here a collection is
+chunked at the feature level instead: every feature is serialized to
+compact JSON (key order and raw property values kept, no normalization),
+hashed with sha256 and stored once, zlib-compressed, under
+objects/ab/<sha256>. The geometry is a chunk of its own that the feature
+refers to by hash, so features that differ only in properties (the copies
+disagree on AssetID / Display types) share it. A version is a manifest
+object listing its features' hashes plus the collection's other top-level
+members (name, crs), so a new revision stores only the features that
+changed, and two files with the same content have the same manifest hash
+whatever their encoding or indentation.
+
+Versions are indexed in SQLite (store.db) per dataset, numbered 1, 2, …,
+with time, message and source file. A version is selected by number,
+negative offset from the latest (-1 is the one before it), manifest hash
+prefix, or --at TIME (latest version at or before it). Checkout writes
+the compact one-feature-per-line FeatureCollection geotools.io writes, by
+concatenating the stored feature text, so no JSON is re-encoded.
+
+Usage:
+  python3 -m geotools.store commit "Asset_Locations_Regions_Polygons - Copy.geojson" \\
+      Asset_Locations_Regions_Polygons.geojson --dataset assets -m "Q3 regions"
+  python3 -m geotools.store log assets
+  python3 -m geotools.store checkout assets --at 2025-09-01 -o assets_sep.geojson
+  python3 -m geotools.store diff assets -2 -1 --key AssetID
+  python3 -m geotools.store stats
+  python3 -m geotools.store gc
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .io import normalize_properties, read_text
+
+DEFAULT_ROOT = ".geostore"
+LEVEL = 6
+BATCH = 500          # digests per SQLite IN (...) lookup
+GEOM_REF = "$geometry"
+_REF = b'"geometry":{"' + GEOM_REF.encode() + b'":"'
+
+
+def canonical(obj) -> bytes:
+    """Compact JSON a feature or geometry is stored and addressed by."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def split_feature(feature: dict) -> Tuple[bytes, Optional[bytes]]:
+    """
+    (skeleton, geometry) chunks of a feature: the skeleton is the feature
+    with its geometry replaced by a reference to the geometry chunk's hash,
+    so variants that only differ in properties share the geometry.
+    """
+    geom = feature.get("geometry")
+    if not isinstance(geom, dict):
+        return canonical(feature), None
+    gdata = canonical(geom)
+    return canonical(dict(feature, geometry={GEOM_REF: _digest(gdata)})), gdata
+
+
+def _epoch(ts) -> float:
+    try:
+        return float(ts)
+    except (TypeError, ValueError):
+        d = datetime.fromisoformat(str(ts).strip().replace("Z", "+00:00"))
+        return (d if d.tzinfo else d.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def _iso(t: float) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class Store:
+    """Feature objects under root/objects, version index in root/store.db."""
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = Path(root)
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.root / "store.db"))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS objects (
+            digest TEXT PRIMARY KEY, size INTEGER, stored INTEGER)""")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS versions (
+            dataset TEXT, seq INTEGER, manifest TEXT, created REAL, message TEXT,
+            source TEXT, source_bytes INTEGER, features INTEGER, added INTEGER, added_bytes INTEGER,
+            PRIMARY KEY (dataset, seq))""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS versions_manifest ON versions(manifest)")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def _blob(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest[2:]
+
+    def known(self, digests: Iterable[str]) -> set:
+        """The subset of `digests` already stored."""
+        digests = list(digests)
+        out = set()
+        for i in range(0, len(digests), BATCH):
+            part = digests[i:i + BATCH]
+            out.update(r[0] for r in self.db.execute(
+                f"SELECT digest FROM objects WHERE digest IN ({','.join('?' * len(part))})", part))
+        return out
+
+    def _write(self, digest: str, data: bytes) -> int:
+        path = self._blob(digest)
+        path.parent.mkdir(exist_ok=True)
+        body = zlib.compress(data, LEVEL)
+        tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+        tmp.write_bytes(body)
+        os.replace(tmp, path)
+        return len(body)
+
+    def put_many(self, chunks: Dict[str, bytes]) -> Tuple[int, int]:
+        """Store the chunks not yet present; returns (objects added, compressed bytes added)."""
+        have = self.known(chunks)
+        new = [d for d in chunks if d not in have]
+        rows = [(d, len(chunks[d]), self._write(d, chunks[d])) for d in new]
+        self.db.executemany("INSERT OR IGNORE INTO objects VALUES (?, ?, ?)", rows)
+        return len(rows), sum(r[2] for r in rows)
+
+    def get(self, digest: str) -> bytes:
+        try:
+            return zlib.decompress(self._blob(digest).read_bytes())
+        except OSError:
+            raise ValueError(f"missing object {digest}") from None
+
+    # -- versions
+
+    def commit(self, collection: dict, dataset: str, message: str = "",
+               source: str = "", source_bytes: int = 0) -> dict:
+        """
+        Record `collection` as the next version of `dataset`; returns its row.
+        Nothing is recorded when it matches the latest version (row["seq"]
+        is then that version and row["added"] is None).
+        """
+        if collection.get("type") != "FeatureCollection":
+            raise ValueError(f"{source or dataset}: not a FeatureCollection")
+        chunks, hashes = {}, []
+        for f in collection.get("features") or ():
+            skel, gdata = split_feature(f)
+            if gdata is not None:
+                chunks[_digest(gdata)] = gdata
+            d = _digest(skel)
+            chunks[d] = skel
+            hashes.append(d)
+        head = {k: v for k, v in collection.items() if k not in ("type", "features")}
+        manifest = json.dumps({"head": head, "features": hashes}, separators=(",", ":")).encode()
+        mdigest = _digest(manifest)
+        latest = self.latest(dataset)
+        if latest and latest["manifest"] == mdigest:
+            return dict(latest, added=None)
+        chunks[mdigest] = manifest
+        added, added_bytes = self.put_many(chunks)
+        seq = latest["seq"] + 1 if latest else 1
+        self.db.execute("INSERT INTO versions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (dataset, seq, mdigest, time.time(), message, source, source_bytes,
+                         len(hashes), added, added_bytes))
+        self.db.commit()
+        return self.version(dataset, seq)
+
+    def commit_file(self, path, dataset: Optional[str] = None, message: str = "") -> dict:
+        """Commit a GeoJSON file; the dataset defaults to its "name" member or file stem."""
+        collection = json.loads(read_text(path))
+        if not isinstance(collection, dict):
+            raise ValueError(f"{path}: not a FeatureCollection")
+        name = dataset or collection.get("name") or Path(path).stem
+        return self.commit(collection, name, message, str(path), os.path.getsize(path))
+
+    _COLS = ("dataset", "seq", "manifest", "created", "message", "source", "source_bytes",
+             "features", "added", "added_bytes")
+
+    def _rows(self, sql: str, args=()) -> List[dict]:
+        return [dict(zip(self._COLS, r)) for r in self.db.execute(
+            f"SELECT {', '.join(self._COLS)} FROM versions {sql}", args)]
+
+    def versions(self, dataset: Optional[str] = None) -> List[dict]:
+        if dataset is None:
+            return self._rows("ORDER BY dataset, seq")
+        return self._rows("WHERE dataset = ? ORDER BY seq", (dataset,))
+
+    def datasets(self) -> List[str]:
+        return [r[0] for r in self.db.execute("SELECT DISTINCT dataset FROM versions ORDER BY dataset")]
+
+    def latest(self, dataset: str) -> Optional[dict]:
+        rows = self._rows("WHERE dataset = ? ORDER BY seq DESC LIMIT 1", (dataset,))
+        return rows[0] if rows else None
+
+    def version(self, dataset: str, seq: int) -> dict:
+        rows = self._rows("WHERE dataset = ? AND seq = ?", (dataset, seq))
+        if not rows:
+            raise ValueError(f"{dataset}: no version {seq}")
+        return rows[0]
+
+    def resolve(self, dataset: str, rev=None, at=None) -> dict:
+        """
+        A version of `dataset`: `rev` is a number, a negative offset from the
+        latest (-1 = previous), or a manifest hash prefix; `at` (epoch s or
+        ISO 8601, naive = UTC) picks the latest version created at or before
+        it. Neither means the latest.
+        """
+        if at is not None:
+            rows = self._rows("WHERE dataset = ? AND created <= ? ORDER BY seq DESC LIMIT 1",
+                              (dataset, _epoch(at)))
+            if not rows:
+                raise ValueError(f"{dataset}: no version at or before {at}")
+            return rows[0]
+        latest = self.latest(dataset)
+        if latest is None:
+            raise ValueError(f"no dataset {dataset!r}")
+        if rev is None:
+            return latest
+        rev = str(rev)
+        if rev.lstrip("-").isdigit() and len(rev.lstrip("-")) < 6:
+            n = int(rev)
+            return self.version(dataset, latest["seq"] + n if n < 0 else n)
+        rows = self._rows("WHERE dataset = ? AND manifest LIKE ? ORDER BY seq", (dataset, rev.lower() + "%"))
+        if len({r["manifest"] for r in rows}) != 1:
+            raise ValueError(f"{dataset}: {'ambiguous' if rows else 'no'} version {rev}")
+        return rows[-1]
+
+    def manifest(self, version: dict) -> dict:
+        return json.loads(self.get(version["manifest"]))
+
+    def feature(self, digest: str) -> bytes:
+        """Compact JSON of a stored feature, geometry spliced back in."""
+        skel = self.get(digest)
+        i = skel.find(_REF)
+        if i < 0:
+            return skel
+        j = i + len(_REF)
+        return skel[:i] + b'"geometry":' + self.get(skel[j:j + 64].decode()) + skel[j + 66:]
+
+    def feature_text(self, version: dict) -> Iterator[bytes]:
+        """Compact JSON of the version's features, in order."""
+        for d in self.manifest(version)["features"]:
+            yield self.feature(d)
+
+    def load(self, version: dict) -> dict:
+        """The version as a FeatureCollection with normalized properties (like io.load_collection)."""
+        m = self.manifest(version)
+        feats = []
+        for d in m["features"]:
+            f = json.loads(self.feature(d))
+            f["properties"] = normalize_properties(f.get("properties") or {})
+            feats.append(f)
+        return {"type": "FeatureCollection", **m["head"], "features": feats}
+
+    def checkout(self, version: dict, path) -> int:
+        """Write the version as a compact FeatureCollection; returns bytes written."""
+        m = self.manifest(version)
+        head = {"type": "FeatureCollection", **m["head"]}
+        tmp = Path(str(path) + f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as fh:
+            fh.write((json.dumps(head, separators=(",", ":"))[:-1] + ',"features":[\n').encode())
+            for i, d in enumerate(m["features"]):
+                if i:
+                    fh.write(b",\n")
+                fh.write(self.feature(d))
+            fh.write(b"\n]}\n")
+            size = fh.tell()
+        os.replace(tmp, path)
+        return size
+
+    def diff(self, a: dict, b: dict, key: Optional[str] = None) -> dict:
+        """
+        Features removed from `a` / added in `b` (by content). With `key` (a
+        property), a removed and an added feature sharing its value count as
+        changed instead.
+        """
+        ca = Counter(self.manifest(a)["features"])
+        cb = Counter(self.manifest(b)["features"])
+        removed, added = list((ca - cb).elements()), list((cb - ca).elements())
+        out = {"unchanged": sum((ca & cb).values()), "removed": removed, "added": added, "changed": []}
+        if key:
+            def keyed(ds):
+                m = {}
+                for d in ds:
+                    k = (json.loads(self.get(d)).get("properties") or {}).get(key)
+                    m.setdefault(str(k), []).append(d)
+                return m
+            ra, rb = keyed(removed), keyed(added)
+            for k in sorted(ra.keys() & rb.keys()):
+                for da, db in zip(ra[k], rb[k]):
+                    out["changed"].append((k, da, db))
+                    removed.remove(da)
+                    added.remove(db)
+        return out
+
+    # -- maintenance
+
+    def referenced(self) -> set:
+        out = set()
+        for (m,) in self.db.execute("SELECT DISTINCT manifest FROM versions").fetchall():
+            out.add(m)
+            for d in json.loads(self.get(m))["features"]:
+                if d not in out:
+                    out.add(d)
+                    skel = self.get(d)
+                    i = skel.find(_REF)
+                    if i >= 0:
+                        out.add(skel[i + len(_REF):i + len(_REF) + 64].decode())
+        return out
+
+    def gc(self) -> Tuple[int, int]:
+        """Delete objects no version references (e.g. from an interrupted commit); returns (count, bytes)."""
+        keep = self.referenced()
+        n = size = 0
+        for (d,) in self.db.execute("SELECT digest FROM objects").fetchall():
+            if d not in keep:
+                try:
+                    size += self._blob(d).stat().st_size
+                    self._blob(d).unlink()
+                except OSError:
+                    pass
+                self.db.execute("DELETE FROM objects WHERE digest = ?", (d,))
+                n += 1
+        for p in (self.root / "objects").glob("*/*.tmp"):
+            p.unlink()
+        self.db.commit()
+        return n, size
+
+    def stats(self) -> dict:
+        objects, raw, stored = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored), 0) FROM objects").fetchone()
+        nver, source = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(source_bytes), 0) FROM versions").fetchone()
+        return {"datasets": len(self.datasets()), "versions": nver, "objects": objects,
+                "raw_bytes": raw, "stored_bytes": stored, "source_bytes": source,
+                "ratio": round(source / stored, 2) if stored else None}
+
+
+def _short(v: dict) -> str:
+    return f"{v['dataset']} v{v['seq']} {v['manifest'][:12]}"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Versioned, feature-deduplicated store for asset collections.")
+    ap.add_argument("--root", default=DEFAULT_ROOT, help=f"store directory (default {DEFAULT_ROOT})")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("commit", help="record files as new versions")
+    p.add_argument("inputs", nargs="+", help="FeatureCollections, committed in order")
+    p.add_argument("--dataset", help="dataset name (default: the collection's name, else file stem)")
+    p.add_argument("-m", "--message", default="")
+    p = sub.add_parser("log", help="list versions")
+    p.add_argument("dataset", nargs="?")
+    p = sub.add_parser("checkout", help="write a version as GeoJSON")
+    p.add_argument("dataset")
+    p.add_argument("rev", nargs="?", help="number, -N from the latest, or manifest hash prefix")
+    p.add_argument("--at", help="latest version at or before (epoch s or ISO 8601)")
+    p.add_argument("-o", "--output", required=True)
+    p = sub.add_parser("diff", help="features removed / added / changed between versions")
+    p.add_argument("dataset")
+    p.add_argument("old")
+    p.add_argument("new", nargs="?")
+    p.add_argument("--key", help="property pairing removed and added features as changed (e.g. AssetID)")
+    sub.add_parser("stats")
+    sub.add_parser("gc", help="delete unreferenced objects")
+    args = ap.parse_args(argv)
+
+    try:
+        store = Store(args.root)
+        if args.cmd == "commit":
+            for path in args.inputs:
+                t0 = time.perf_counter()
+                v = store.commit_file(path, args.dataset, args.message)
+                if v["added"] is None:
+                    print(f"{path}: unchanged ({_short(v)})")
+                else:
+                    print(f"{path}: {_short(v)}, {v['features']:,} features, {v['added']:,} new objects "
+                          f"({v['added_bytes']:,} bytes for a {v['source_bytes']:,}-byte file) "
+                          f"in {time.perf_counter() - t0:.2f}s")
+        elif args.cmd == "log":
+            for v in store.versions(args.dataset):
+                print(f"{_short(v)}  {_iso(v['created'])}  {v['features']:>6,} features  "
+                      f"+{v['added_bytes']:,} B  {v['source']}" + (f"  {v['message']}" if v["message"] else ""))
+        elif args.cmd == "checkout":
+            t0 = time.perf_counter()
+            v = store.resolve(args.dataset, args.rev, args.at)
+            size = store.checkout(v, args.output)
+            print(f"Wrote {_short(v)} ({v['features']:,} features, {size:,} bytes) to {args.output} "
+                  f"in {time.perf_counter() - t0:.2f}s")
+        elif args.cmd == "diff":
+            a = store.resolve(args.dataset, args.old)
+            b = store.resolve(args.dataset, args.new)
+            d = store.diff(a, b, args.key)
+            print(f"{_short(a)} -> {_short(b)}: {d['unchanged']:,} unchanged, {len(d['changed']):,} changed, "
+                  f"{len(d['removed']):,} removed, {len(d['added']):,} added")
+            for k, _, _ in d["changed"]:
+                print(f"  ~ {args.key}={k}")
+        elif args.cmd == "stats":
+            print(json.dumps(store.stats(), indent=2))
+        else:
+            n, size = store.gc()
+            print(f"Removed {n} objects ({size:,} bytes)")
+        store.close()
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+"""
+stylebundle.py — offline style bundles for the MapLibre visuals.
+
+pbi-maplibre-minimal and jMapv6 start from a remote style
+(demotiles.maplibre.org, or a TomTom style), so the first frame waits on the
+style JSON, its TileJSON, the sprite sheet and glyph PBFs, and in tenants
+that block those hosts the basemap never renders. This resolves a style
+once, keeps only what its layers use, and writes it into the visual's source
+tree as a generated module:
+
+  src/styleBundle.ts   style JSON (TileJSON sources inlined), sprite sheets
+                       cut down to the referenced icons (1x and @2x), and the
+                       glyph PBF ranges for the referenced font stacks
+
+The visual registers a bundle:// protocol from that module before creating
+the map, so style, sprite and glyph requests are answered from memory and
+initial render needs no network round trip for styling (vector tiles are
+still fetched from their source). A style URL the user set in the format
+pane wins over the bundle unless it is the URL the bundle was built from.
+Each visual is its own pbiviz project, so each gets its own copy of the
+module; they differ only in payload, and TEMPLATE below is the one source.
+
+Glyph ranges: basemap labels come out of vector tiles and can't be
+enumerated here, so --ranges names the 256-codepoint blocks to keep
+(default 0-255, Latin-1); --text adds the blocks needed by the string
+properties a GeoJSON file feeds into text-field. Requests for a block that
+isn't bundled get an empty PBF, and MapLibre draws those labels without the
+missing characters instead of erroring.
+
+Font stacks: besides the stacks of the style's own layers, the stacks the
+visual uses for the layers it adds at runtime ("text-font": [...] literals
+in its src/*.ts, e.g. jMapv6's polygon labels) and any --fonts are bundled.
+Those are required: the build fails if their glyphs can't be fetched,
+rather than shipping a bundle whose labels render blank.
+
+Sprite icons: every string literal in icon-image / *-pattern values that
+names a sprite icon is kept. A layer that builds the image name from data
+("{class}-icon", ["get", ...]) can't be resolved statically; its sprite is
+kept whole unless --icons lists the names to keep.
+
+Resources are downloaded, or read from --mirror: either a tileproxy cache
+directory (index.db) or a directory laid out as <host>/<path> like the
+proxy's URLs.
+
+Usage:
+  python3 -m geotools.stylebundle https://demotiles.maplibre.org/style.json \\
+      --visual pbi-maplibre-minimal
+  python3 -m geotools.stylebundle style.json --visual jMapv6 --mirror .tilecache \\
+      --ranges 0-255,256-511 --text Asset_Locations_Regions_Polygons.geojson
+  python3 -m geotools.stylebundle style.json --visual jMapv6 --fonts "Noto Sans Bold"
+"""
+import argparse
+import base64
+import hashlib
+import json
+import re
+import struct
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+SCHEME = "bundle://"
+DEFAULT_FONTS = ("Open Sans Regular", "Arial Unicode MS Regular")  # MapLibre's text-font default
+IMAGE_PROPS = ("icon-image", "fill-pattern", "line-pattern", "fill-extrusion-pattern", "background-pattern")
+DYNAMIC_OPS = {"get", "concat", "to-string", "feature-state", "properties", "id"}
+TIMEOUT = 30.0
+MODULE = "src/styleBundle.ts"
+
+
+# ---- fetching ------------------------------------------------------------
+
+class Fetcher:
+    """Bytes for a URL (or local path), from a mirror when one is given."""
+
+    def __init__(self, mirror=None, offline: bool = False):
+        self.mirror = Path(mirror) if mirror else None
+        self.offline = offline
+        self.store = None
+        if self.mirror and (self.mirror / "index.db").exists():
+            from .tileproxy import CacheStore
+            self.store = CacheStore(self.mirror)
+        self.fetched = 0
+
+    def get(self, url: str) -> bytes:
+        if "://" not in url:
+            return Path(url).read_bytes()
+        body = self._mirrored(url)
+        if body is not None:
+            return body
+        if self.offline:
+            raise OSError(f"{url}: not in mirror (offline)")
+        req = urllib.request.Request(url, headers={"User-Agent": "geotools-stylebundle"})
+        try:
+            with urllib.request.urlopen(req, timeout=TIMEOUT) as r:
+                body = r.read()
+                if r.headers.get("Content-Encoding") == "gzip":
+                    body = zlib.decompress(body, 31)
+        except urllib.error.HTTPError as e:
+            raise OSError(f"{url}: HTTP {e.code}") from None
+        self.fetched += 1
+        return body
+
+    def _mirrored(self, url: str) -> Optional[bytes]:
+        if self.store is not None:
+            from .tileproxy import cache_key
+            hit = self.store.get(cache_key(url))
+            if hit and hit["status"] == 200:
+                body = hit["body"]
+                return zlib.decompress(body, 31) if hit["headers"].get("content-encoding") == "gzip" else body
+            return None
+        if self.mirror is not None:
+            u = urllib.parse.urlsplit(url)
+            path = self.mirror / u.netloc / urllib.parse.unquote(u.path).lstrip("/")
+            if path.is_file():
+                return path.read_bytes()
+        return None
+
+    def json(self, url: str):
+        return json.loads(self.get(url))
+
+
+def _join(base: str, ref: str) -> str:
+    """Resolve ref against a style URL or local style path."""
+    if "://" in ref:
+        return ref
+    if "://" in base:
+        return urllib.parse.urljoin(base, ref)
+    return str(Path(base).parent / ref)
+
+
+def _with_suffix(url: str, suffix: str) -> str:
+    """sprite base URL + suffix, keeping any query string (API keys)."""
+    u = urllib.parse.urlsplit(url)
+    return urllib.parse.urlunsplit(u._replace(path=u.path + suffix)) if u.scheme else url + suffix
+
+
+# ---- what the layers use -------------------------------------------------
+
+def _strings(v) -> Iterator[str]:
+    if isinstance(v, str):
+        yield v
+    elif isinstance(v, list):
+        for x in v:
+            yield from _strings(x)
+    elif isinstance(v, dict):
+        for x in v.values():
+            yield from _strings(x)
+
+
+def _dynamic(v) -> bool:
+    """True when an image value builds its name from feature data."""
+    if isinstance(v, str):
+        return "{" in v
+    if isinstance(v, dict):  # legacy function: identity, or stops keyed by a property
+        return ("property" in v and not v.get("stops")) or any(_dynamic(s[1]) for s in v.get("stops", []))
+    if not isinstance(v, list) or not v or not isinstance(v[0], str):
+        return False
+    op, args = v[0], v[1:]
+    if op in DYNAMIC_OPS:
+        return True
+    if op == "literal":
+        return False
+    if op == "match":    # input, label, output, ..., fallback
+        outs = args[2::2] + args[-1:]
+    elif op == "case":   # cond, output, ..., fallback
+        outs = args[1::2] + args[-1:]
+    elif op == "step":   # input, output0, stop, output, ...
+        outs = args[1::2]
+    else:
+        outs = args
+    return any(_dynamic(x) for x in outs)
+
+
+def font_stacks(value, top: bool = True) -> List[Tuple[str, ...]]:
+    """Font stacks a text-font value can produce (array, stops, or literal outputs of an expression)."""
+    if isinstance(value, dict):
+        return [s for stop in value.get("stops", []) for s in font_stacks(stop[1])]
+    if not isinstance(value, list) or not value:
+        return []
+    if top and all(isinstance(x, str) for x in value) and value[0] not in ("get", "coalesce", "to-string"):
+        return [tuple(value)]
+    if value[0] == "literal":
+        return font_stacks(value[1]) if len(value) > 1 else []
+    # inside an expression a string array only appears wrapped in "literal"
+    return [s for x in value[1:] for s in font_stacks(x, top=False)]
+
+
+def text_fields(value) -> Set[str]:
+    """Property names a text-field value reads."""
+    out: Set[str] = set()
+    if isinstance(value, str):
+        out.update(re.findall(r"{([^}]+)}", value))
+    elif isinstance(value, list):
+        if len(value) >= 2 and value[0] == "get" and isinstance(value[1], str):
+            out.add(value[1])
+        for x in value[1:]:
+            out |= text_fields(x)
+    elif isinstance(value, dict) and "property" in value:
+        out.add(value["property"])
+    return out
+
+
+def usage(style: dict) -> dict:
+    """Font stacks, text-field properties and sprite image references of the layers."""
+    stacks: Set[Tuple[str, ...]] = set()
+    fields: Set[str] = set()
+    images: Set[str] = set()
+    dynamic = False
+    for layer in style.get("layers", []):
+        layout, paint = layer.get("layout", {}), layer.get("paint", {})
+        if layer.get("type") == "symbol" and "text-field" in layout:
+            stacks.update(font_stacks(layout.get("text-font", list(DEFAULT_FONTS))) or [DEFAULT_FONTS])
+            fields |= text_fields(layout["text-field"])
+        for prop in IMAGE_PROPS:
+            v = layout.get(prop, paint.get(prop))
+            if v is None:
+                continue
+            images.update(_strings(v))
+            dynamic |= _dynamic(v)
+    return {"stacks": sorted(stacks), "fields": sorted(fields), "images": images, "dynamic": dynamic}
+
+
+def runtime_stacks(visual) -> Set[Tuple[str, ...]]:
+    """Font stacks written as "text-font": [...] literals in a visual's TypeScript sources."""
+    out: Set[Tuple[str, ...]] = set()
+    src = Path(visual) / "src"
+    for path in sorted(src.rglob("*.ts*")) if src.is_dir() else ():
+        if path.name == Path(MODULE).name:
+            continue
+        text = path.read_text(encoding="utf-8", errors="replace")
+        for m in re.finditer(r"""["']?text-font["']?\s*:\s*\[([^\]]*)\]""", text):
+            stack = tuple(re.findall(r"""["']([^"']+)["']""", m.group(1)))
+            if stack:
+                out.add(stack)
+    return out
+
+
+def parse_ranges(spec: str) -> Set[int]:
+    """'0-255,256-511' or block starts '0,256' -> block indexes."""
+    out: Set[int] = set()
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        a, _, b = part.partition("-")
+        lo, hi = int(a), int(b) if b else int(a)
+        out.update(range(lo // 256, hi // 256 + 1))
+    return out
+
+
+def text_blocks(paths, fields) -> Set[int]:
+    """Glyph blocks needed by the given properties (all string properties if none) of GeoJSON files."""
+    from .io import stream_features
+    out: Set[int] = set()
+    for p in paths:
+        for f in stream_features(p):
+            props = f.get("properties") or {}
+            for k, v in props.items():
+                if isinstance(v, str) and (not fields or k in fields):
+                    out.update(ord(c) >> 8 for c in v)
+    return out
+
+
+# ---- PNG -----------------------------------------------------------------
+
+_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+def _chunks(data: bytes) -> Iterator[Tuple[bytes, bytes]]:
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        raise ValueError("not a PNG")
+    pos = 8
+    while pos < len(data):
+        n, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        yield kind, data[pos + 8:pos + 8 + n]
+        pos += 12 + n
+
+
+def _unfilter(raw: bytes, h: int, stride: int, bpp: int) -> np.ndarray:
+    out = np.zeros((h, stride), np.uint8)
+    prev = np.zeros(stride, np.int32)
+    for y in range(h):
+        ft = raw[y * (stride + 1)]
+        line = np.frombuffer(raw, np.uint8, stride, y * (stride + 1) + 1).astype(np.int32)
+        if ft == 1:    # Sub: running sum per channel
+            line = np.cumsum(line.reshape(-1, bpp), axis=0).reshape(-1) & 0xFF
+        elif ft == 2:  # Up
+            line = (line + prev) & 0xFF
+        elif ft in (3, 4):  # Average / Paeth depend on the reconstructed left byte
+            cur, up = bytearray(line.astype(np.uint8).tobytes()), prev.astype(np.uint8).tobytes()
+            for i in range(stride):
+                a = cur[i - bpp] if i >= bpp else 0
+                b = up[i]
+                if ft == 3:
+                    cur[i] = (cur[i] + ((a + b) >> 1)) & 0xFF
+                else:
+                    c = up[i - bpp] if i >= bpp else 0
+                    p = a + b - c
+                    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                    cur[i] = (cur[i] + (a if pa <= pb and pa <= pc else b if pb <= pc else c)) & 0xFF
+            line = np.frombuffer(bytes(cur), np.uint8).astype(np.int32)
+        elif ft != 0:
+            raise ValueError(f"bad PNG filter type {ft}")
+        out[y] = line
+        prev = line
+    return out
+
+
+def decode_png(data: bytes) -> np.ndarray:
+    """8-bit non-interlaced PNG -> (h, w, 4) uint8 RGBA."""
+    idat, plte, trns = [], None, None
+    for kind, body in _chunks(data):
+        if kind == b"IHDR":
+            w, h, depth, ctype, _, _, interlace = struct.unpack(">IIBBBBB", body)
+        elif kind == b"PLTE":
+            plte = np.frombuffer(body, np.uint8).reshape(-1, 3)
+        elif kind == b"tRNS":
+            trns = np.frombuffer(body, np.uint8)
+        elif kind == b"IDAT":
+            idat.append(body)
+    if depth != 8 or interlace or ctype not in _CHANNELS:
+        raise ValueError(f"unsupported PNG (depth {depth}, color type {ctype}, interlace {interlace})")
+    bpp = _CHANNELS[ctype]
+    px = _unfilter(zlib.decompress(b"".join(idat)), h, w * bpp, bpp).reshape(h, w, bpp)
+    if ctype == 6:
+        return px
+    rgba = np.full((h, w, 4), 255, np.uint8)
+    if ctype == 3:
+        alpha = np.full(256, 255, np.uint8)
+        if trns is not None:
+            alpha[:len(trns)] = trns
+        pal = np.zeros((256, 3), np.uint8)
+        pal[:len(plte)] = plte
+        rgba[..., :3], rgba[..., 3] = pal[px[..., 0]], alpha[px[..., 0]]
+    elif ctype == 2:
+        rgba[..., :3] = px
+    else:
+        rgba[..., :3] = px[..., :1]
+        if ctype == 4:
+            rgba[..., 3] = px[..., 1]
+    return rgba
+
+
+def encode_png(img: np.ndarray) -> bytes:
+    h, w = img.shape[:2]
+
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    rows = np.zeros((h, w * 4 + 1), np.uint8)
+    rows[:, 1:] = img.reshape(h, w * 4)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows.tobytes(), 9)) + chunk(b"IEND", b""))
+
+
+# ---- sprites -------------------------------------------------------------
+
+def pack_sprite(index: dict, sheet: np.ndarray, keep) -> Tuple[dict, np.ndarray]:
+    """Cut the kept icons out of a sprite sheet and shelf-pack them into a new one."""
+    names = sorted((n for n in index if n in keep), key=lambda n: (-index[n]["height"], n))
+    width = max([index[n]["width"] for n in names] + [int(np.sqrt(sum(index[n]["width"] * index[n]["height"]
+                                                                      for n in names)) * 1.2) or 1])
+    placed, x, y, shelf = {}, 0, 0, 0
+    for n in names:
+        w, h = index[n]["width"], index[n]["height"]
+        if x + w > width:
+            x, y, shelf = 0, y + shelf, 0
+        placed[n] = (x, y)
+        x, shelf = x + w, max(shelf, h)
+    out = np.zeros((max(1, y + shelf), width, 4), np.uint8)
+    new = {}
+    for n in sorted(placed):
+        e, (nx, ny) = index[n], placed[n]
+        out[ny:ny + e["height"], nx:nx + e["width"]] = sheet[e["y"]:e["y"] + e["height"], e["x"]:e["x"] + e["width"]]
+        new[n] = dict(e, x=nx, y=ny)
+    return new, out
+
+
+def bundle_sprites(style: dict, base: str, fetch: Fetcher, use: dict, icons=None) -> Dict[str, bytes]:
+    """bundle path -> bytes for the kept sprite icons; rewrites style['sprite']."""
+    sprite = style.get("sprite")
+    if not sprite:
+        return {}
+    entries = [{"id": "default", "url": sprite}] if isinstance(sprite, str) else list(sprite)
+    files: Dict[str, bytes] = {}
+    refs = []
+    for ent in entries:
+        sid, url = ent["id"], _join(base, ent["url"])
+        prefix = "" if isinstance(sprite, str) else f"{sid}:"
+        for ratio in ("", "@2x"):
+            try:
+                index = fetch.json(_with_suffix(url, ratio + ".json"))
+                sheet = decode_png(fetch.get(_with_suffix(url, ratio + ".png")))
+            except (OSError, ValueError):
+                if ratio:  # @2x is optional; MapLibre falls back to 1x
+                    continue
+                raise
+            if icons:
+                keep = set(icons)
+            elif use["dynamic"]:
+                keep = set(index)
+            else:
+                keep = {s[len(prefix):] for s in use["images"] if s.startswith(prefix)}
+            new, out = pack_sprite(index, sheet, keep)
+            files[f"sprite/{sid}{ratio}.json"] = json.dumps(new, sort_keys=True, separators=(",", ":")).encode()
+            files[f"sprite/{sid}{ratio}.png"] = encode_png(out)
+        refs.append({"id": sid, "url": f"{SCHEME}sprite/{sid}"})
+    style["sprite"] = refs[0]["url"] if isinstance(sprite, str) else refs
+    return files
+
+
+# ---- glyphs --------------------------------------------------------------
+
+def bundle_glyphs(style: dict, base: str, fetch: Fetcher, stacks, blocks, required=()) -> Dict[str, bytes]:
+    """Glyph PBFs of `stacks`; a missing range of a `required` stack is an error, others are skipped."""
+    template = style.get("glyphs")
+    if not template:
+        if required:
+            raise ValueError(f"style has no glyphs URL for the visual's font stacks {sorted(required)}")
+        return {}
+    template = _join(base, template)
+    files: Dict[str, bytes] = {}
+    for stack in stacks:
+        fs = ",".join(stack)
+        for b in sorted(blocks):
+            rng = f"{b * 256}-{b * 256 + 255}"
+            url = template.replace("{fontstack}", urllib.parse.quote(fs)).replace("{range}", rng)
+            try:
+                files[f"glyphs/{fs}/{rng}.pbf"] = fetch.get(url)
+            except OSError as e:
+                if stack in required:
+                    raise ValueError(f"glyphs {fs} {rng} (needed by the visual): {e}") from e
+                print(f"  skip glyphs {fs} {rng}: {e}", file=sys.stderr)
+    style["glyphs"] = SCHEME + "glyphs/{fontstack}/{range}.pbf"
+    return files
+
+
+# ---- sources -------------------------------------------------------------
+
+def inline_sources(style: dict, base: str, fetch: Fetcher):
+    """Replace TileJSON `url` references with the TileJSON fields they resolve to."""
+    for src in style.get("sources", {}).values():
+        url = src.get("url")
+        if not url or url.startswith("mapbox://"):
+            continue
+        url = _join(base, url)
+        tj = fetch.json(url)
+        src.pop("url")
+        for k in ("tiles", "minzoom", "maxzoom", "bounds", "scheme", "attribution", "tileSize", "encoding"):
+            if k in tj and k not in src:
+                src[k] = [_join(url, t) for t in tj[k]] if k == "tiles" else tj[k]
+
+
+# ---- build ---------------------------------------------------------------
+
+def build(style_ref: str, fetch: Fetcher, ranges: str = "0-255", text=(), icons=None,
+          fonts=()) -> Tuple[dict, Dict[str, bytes]]:
+    """(rewritten style, {bundle path: bytes}); `fonts` are stacks that must be bundled."""
+    style = fetch.json(style_ref)
+    if style.get("version") != 8:
+        raise ValueError(f"{style_ref}: not a version 8 style")
+    inline_sources(style, style_ref, fetch)
+    use = usage(style)
+    blocks = parse_ranges(ranges) | text_blocks(text, use["fields"])
+    files = bundle_sprites(style, style_ref, fetch, use, icons)
+    required = {tuple(s) for s in fonts}
+    stacks = sorted(set(use["stacks"]) | required)
+    files.update(bundle_glyphs(style, style_ref, fetch, stacks, blocks, required))
+    return style, dict(sorted(files.items()))
+
+
+TEMPLATE = """\
+// Generated by `python3 -m geotools.stylebundle` — do not edit.
+// Each visual is its own pbiviz project and can't import from another, so
+// every visual gets a copy; the one source is TEMPLATE in stylebundle.py.
+// source: {source}
+// sha256: {digest}
+/* eslint-disable */
+
+export type StyleBundle = {{ style: any; files: Record<string, string> }};
+
+export const STYLE_BUNDLE: StyleBundle | null = {payload};
+
+// the style URL the bundle was built from (keys masked)
+export const STYLE_SOURCE = {source_json};
+
+const decode = (b64: string): ArrayBuffer => {{
+  const s = atob(b64), out = new Uint8Array(s.length);
+  for (let i = 0; i < s.length; i++) out[i] = s.charCodeAt(i);
+  return out.buffer;
+}};
+
+const mask = (url: string) => url.replace(/([?&](?:key|api_key|access_token)=)[^&]*/g, "$1…");
+
+// Register bundle:// (MapLibre 3 callback and 4+ promise protocol APIs) and
+// return the bundled style; undefined when no bundle was generated, or when
+// styleUrl names another style than the bundled one (a user setting wins).
+export function installStyleBundle(maplibregl: any, styleUrl?: string): any | undefined {{
+  const b = STYLE_BUNDLE;
+  if (!b) return undefined;
+  if (styleUrl && mask(styleUrl) !== STYLE_SOURCE) return undefined;
+  const load = (url: string) => {{
+    const path = decodeURIComponent(url.slice("{scheme}".length).split("?")[0]);
+    const hit = b.files[path] ?? b.files[path.replace("@2x", "")];  // MapLibre scales 1x sheets
+    if (hit === undefined && path.endsWith(".pbf")) return new ArrayBuffer(0); // range not bundled
+    if (hit === undefined) throw new Error(`style bundle: no ${{path}}`);
+    return path.endsWith(".json") ? JSON.parse(new TextDecoder().decode(decode(hit))) : decode(hit);
+  }};
+  try {{ maplibregl.removeProtocol?.("bundle"); }} catch {{}}
+  maplibregl.addProtocol("bundle", (params: any, cb?: any) => {{
+    if (typeof cb === "function") {{
+      try {{ cb(null, load(params.url)); }} catch (e) {{ cb(e); }}
+      return {{ cancel() {{}} }};
+    }}
+    return Promise.resolve().then(() => ({{ data: load(params.url) }}));
+  }});
+  return b.style;
+}}
+"""
+
+
+def render_module(style: Optional[dict], files: Dict[str, bytes], source: str = "") -> str:
+    if style is None:
+        return TEMPLATE.format(source="(none)", source_json='""', digest="-", payload="null", scheme=SCHEME)
+    payload = {"style": style, "files": {k: base64.b64encode(v).decode("ascii") for k, v in files.items()}}
+    text = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    src = re.sub(r"([?&](?:key|api_key|access_token)=)[^&]*", r"\1…", source)
+    return TEMPLATE.format(source=src, source_json=json.dumps(src, ensure_ascii=False),
+                           digest=hashlib.sha256(text.encode()).hexdigest(), payload=text, scheme=SCHEME)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Bundle a MapLibre style with its used sprites and glyphs into a visual.")
+    ap.add_argument("style", nargs="?", help="style URL or file (omit with --clear)")
+    ap.add_argument("--visual", required=True, help="visual project directory (writes src/styleBundle.ts)")
+    ap.add_argument("--mirror", help="tileproxy cache dir or <host>/<path> mirror to read before downloading")
+    ap.add_argument("--offline", action="store_true", help="never download; everything must be in --mirror")
+    ap.add_argument("--ranges", default="0-255", help="glyph codepoint ranges to keep, e.g. 0-255,256-511")
+    ap.add_argument("--text", action="append", default=[], help="GeoJSON whose label strings need glyphs (repeatable)")
+    ap.add_argument("--icons", help="comma-separated sprite icons to keep (overrides detection)")
+    ap.add_argument("--fonts", action="append", default=[],
+                    help="comma-separated font stack the visual needs besides its own text-font literals (repeatable)")
+    ap.add_argument("--clear", action="store_true", help="write an empty bundle (visual uses its remote style)")
+    args = ap.parse_args(argv)
+
+    out = Path(args.visual) / MODULE
+    try:
+        if args.clear:
+            out.write_text(render_module(None, {}), encoding="utf-8")
+            print(f"Cleared {out}")
+            return
+        if not args.style:
+            ap.error("style is required unless --clear")
+        fetch = Fetcher(args.mirror, args.offline)
+        icons = [s.strip() for s in args.icons.split(",") if s.strip()] if args.icons else None
+        fonts = runtime_stacks(args.visual)
+        fonts.update(tuple(f.strip() for f in s.split(",") if f.strip()) for s in args.fonts)
+        style, files = build(args.style, fetch, args.ranges, args.text, icons, sorted(fonts))
+        out.write_text(render_module(style, files, args.style), encoding="utf-8")
+        glyphs = sum(1 for k in files if k.startswith("glyphs/"))
+        print(f"Wrote {out}: {out.stat().st_size:,} bytes, {glyphs} glyph ranges, "
+              f"{len(files) - glyphs} sprite files, {fetch.fetched} downloads")
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
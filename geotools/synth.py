@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+synth.py — reproducible large-scale asset datasets for load and scaling tests.
+
+A Profile is learned from the checked-in asset files:
+  - LegendID mix and, per LegendID, the Display ratio and Color values
+  - ring vertex-count distribution per LegendID
+  - geographic spread: every source region's centroid and half-extent
+
+Each synthetic feature picks a source region of its LegendID, moves its
+center by a Gaussian offset on the scale of that region, and draws a
+star-shaped ring (sorted angles, noisy radius), so the output covers the same
+areas with the same density mix and stays a valid simple polygon.
+
+Features are generated in fixed batches of BATCH, each from its own
+seeded generator, so (seed, n) always gives the same bytes and a smaller n is
+a prefix of a larger one. Output is streamed; memory stays flat at any n.
+
+Usage:
+  python3 -m geotools.synth -n 100000 -o synth_100k.geojson
+  python3 -m geotools.synth --scale 100 --seed 7 -o synth_x100.csv
+  python3 -m geotools.synth -n 5000 --vertex-scale 4 -o dense.geojson
+  python3 -m geotools.synth --profile-out profile.json
+"""
+import argparse
+import csv
+import json
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from . import geometry
+from .io import load_collection, write_collection
+
+BATCH = 4096
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_SOURCES = sorted(REPO_ROOT.glob("*Asset_Locations_Regions_Polygons*.geojson"))
+
+
+@dataclass
+class Profile:
+    legends: List[str] = field(default_factory=list)
+    weights: List[float] = field(default_factory=list)          # LegendID mix
+    display_ratio: Dict[str, float] = field(default_factory=dict)
+    colors: Dict[str, List[str]] = field(default_factory=dict)
+    vertex_counts: Dict[str, List[int]] = field(default_factory=dict)
+    # per LegendID: [[centroid lon, centroid lat, half width, half height], …]
+    regions: Dict[str, List[List[float]]] = field(default_factory=dict)
+    source_features: int = 0
+
+    def save(self, path) -> None:
+        Path(path).write_text(json.dumps(asdict(self)), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path) -> "Profile":
+        return cls(**json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def learn(paths) -> Profile:
+    """Build a Profile from one or more asset FeatureCollections."""
+    feats = []
+    for p in paths:
+        feats.extend(f for f in load_collection(p)["features"]
+                     if f.get("properties", {}).get("LegendID"))
+    packed = geometry.pack(feats)
+    b = geometry.bounds(packed)
+    c = geometry.centroids(packed)
+    lengths = np.diff(packed.ring_offsets)
+    first_ring = {}
+    for r, f in enumerate(packed.ring_feature):
+        first_ring.setdefault(int(f), r)
+
+    prof = Profile(source_features=len(feats))
+    counts: Dict[str, int] = {}
+    shown: Dict[str, int] = {}
+    for i, f in enumerate(feats):
+        if i not in first_ring or not np.isfinite(c[i, 0]):
+            continue
+        props = f["properties"]
+        lg = str(props["LegendID"])
+        counts[lg] = counts.get(lg, 0) + 1
+        shown[lg] = shown.get(lg, 0) + int(bool(props.get("Display", True)))
+        if props.get("Color"):
+            colors = prof.colors.setdefault(lg, [])
+            if props["Color"] not in colors:
+                colors.append(props["Color"])
+        prof.vertex_counts.setdefault(lg, []).append(int(lengths[first_ring[i]]))
+        prof.regions.setdefault(lg, []).append([
+            float(c[i, 0]), float(c[i, 1]),
+            float(b[i, 2] - b[i, 0]) / 2, float(b[i, 3] - b[i, 1]) / 2,
+        ])
+
+    total = sum(counts.values())
+    if not total:
+        raise ValueError("no usable features in the source files")
+    prof.legends = sorted(counts)
+    prof.weights = [counts[lg] / total for lg in prof.legends]
+    prof.display_ratio = {lg: shown[lg] / counts[lg] for lg in prof.legends}
+    return prof
+
+
+def _flat(prof: Profile, table: Dict[str, list]):
+    """Concatenate a per-LegendID table into one array plus per-legend offsets."""
+    rows = [np.asarray(table[lg], dtype=np.float64) for lg in prof.legends]
+    counts = np.array([len(r) for r in rows])
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return np.concatenate(rows), offsets, counts
+
+
+def _batch(prof: Profile, start: int, size: int, seed: int, vertex_scale: float) -> List[dict]:
+    # Always draw a full BATCH and slice, so a short final batch is a prefix
+    # of the full one and smaller n reproduce the head of larger n.
+    rng = np.random.default_rng([seed, start // BATCH])
+    regions, reg_off, reg_cnt = _flat(prof, prof.regions)
+    verts, vc_off, vc_cnt = _flat(prof, prof.vertex_counts)
+
+    li = rng.choice(len(prof.legends), size=BATCH, p=prof.weights)
+    reg = regions[reg_off[li] + (rng.random(BATCH) * reg_cnt[li]).astype(np.int64)]
+    hw = np.maximum(reg[:, 2], 0.01)
+    hh = np.maximum(reg[:, 3], 0.01)
+    # move each region on its own scale, keep it on the map
+    cx = np.clip(reg[:, 0] + rng.normal(0, hw), -179.0, 179.0)
+    cy = np.clip(reg[:, 1] + rng.normal(0, hh), -84.0, 84.0)
+    scale = rng.lognormal(0.0, 0.3, BATCH)
+    nv = verts[vc_off[li] + (rng.random(BATCH) * vc_cnt[li]).astype(np.int64)]
+    nv = np.maximum(4, np.round(nv * vertex_scale).astype(np.int64)) - 1   # open ring length
+    display = rng.random(BATCH)
+    pick_color = rng.random(BATCH)
+
+    # one star-shaped ring per feature: sorted angles, noisy radius
+    fid = np.repeat(np.arange(BATCH), nv)
+    ang = rng.uniform(0, 2 * np.pi, len(fid))
+    ang = ang[np.lexsort((ang, fid))]
+    rad = scale[fid] * np.clip(rng.normal(1.0, 0.25, len(fid)), 0.3, 1.7)
+    xs = np.round(cx[fid] + rad * hw[fid] * np.cos(ang), 5)
+    ys = np.round(np.clip(cy[fid] + rad * hh[fid] * np.sin(ang), -85.0, 85.0), 5)
+    ends = np.cumsum(nv)
+
+    feats = []
+    for k in range(size):
+        a, b = ends[k] - nv[k], ends[k]
+        ring = np.column_stack([xs[a:b], ys[a:b]]).tolist()
+        ring.append(ring[0])
+        lg = prof.legends[li[k]]
+        colors = prof.colors.get(lg)
+        n = start + k
+        props = {
+            "AssetID": 10_000_000 + n,
+            "LocationID": f"{cy[k]:.5f},{cx[k]:.5f}",
+            "UniqueID": f"POLY{n + 1}",
+            "LegendID": lg,
+            "Display": bool(display[k] < prof.display_ratio.get(lg, 1.0)),
+            "Color": colors[int(pick_color[k] * len(colors))] if colors else "",
+            "LayerType": "Polygon",
+        }
+        feats.append({"type": "Feature", "properties": props,
+                      "geometry": {"type": "Polygon", "coordinates": [ring]}})
+    return feats
+
+
+def generate_batches(prof: Profile, n: int, seed: int = 0, vertex_scale: float = 1.0) -> Iterator[List[dict]]:
+    """Yield lists of at most BATCH synthetic features, n in total."""
+    for start in range(0, n, BATCH):
+        yield _batch(prof, start, min(BATCH, n - start), seed, vertex_scale)
+
+
+def generate(prof: Profile, n: int, seed: int = 0, vertex_scale: float = 1.0) -> Iterator[dict]:
+    for batch in generate_batches(prof, n, seed, vertex_scale):
+        yield from batch
+
+
+def write_geojson(path, batches) -> int:
+    """Stream a FeatureCollection, one feature per line."""
+    return write_collection(path, (f for batch in batches for f in batch))
+
+
+def write_table(path, batches, labels=False) -> int:
+    """Stream the Power BI table (same columns as geotools.export)."""
+    from . import export
+    n = 0
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        w = csv.DictWriter(fh, fieldnames=export.TABLE_COLUMNS)
+        w.writeheader()
+        for batch in batches:
+            cols = export.summary_columns(batch, labels=labels)
+            for row in export.table_rows(batch, cols):
+                w.writerow(row)
+                n += 1
+    return n
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate synthetic asset datasets shaped like the checked-in files.")
+    ap.add_argument("-n", type=int, help="number of features")
+    ap.add_argument("--scale", type=float, help="number of features as a multiple of the source feature count")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--vertex-scale", type=float, default=1.0, help="multiply sampled ring vertex counts")
+    ap.add_argument("--source", action="append", help="source .geojson (repeatable; default: repo asset files)")
+    ap.add_argument("--profile", help="use a saved profile instead of learning from sources")
+    ap.add_argument("--profile-out", help="save the learned profile as JSON")
+    ap.add_argument("--labels", action="store_true", help="CSV: compute label anchors too (slow at scale)")
+    ap.add_argument("-o", "--output", help="output .geojson (FeatureCollection) or .csv (Power BI table)")
+    args = ap.parse_args(argv)
+
+    try:
+        prof = Profile.load(args.profile) if args.profile else learn(args.source or DEFAULT_SOURCES)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+    if args.profile_out:
+        prof.save(args.profile_out)
+        print(f"Saved profile ({prof.source_features} source features) -> {args.profile_out}")
+    if not args.output:
+        return
+
+    n = args.n if args.n is not None else int(round((args.scale or 1.0) * prof.source_features))
+    batches = generate_batches(prof, n, args.seed, args.vertex_scale)
+    out = Path(args.output)
+    if out.suffix.lower() == ".csv":
+        written = write_table(out, batches, args.labels)
+    else:
+        written = write_geojson(out, batches)
+    print(f"Wrote {written} rows -> {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""
+tileproxy.py — disk-backed LRU caching proxy for the TomTom / MapLibre endpoints.
+
+Development and benchmark runs fetch the same style JSON, sprites, glyphs
+and tiles from api.tomtom.com and demotiles.maplibre.org over and over.
+Pointed at this proxy instead, a visual pays for each resource once:
+
+  http://127.0.0.1:8787/api.tomtom.com/style/2/style/standard.json?key=…&theme=main
+  http://127.0.0.1:8787/b.api.tomtom.com/map/1/tile/basic/main/{z}/{x}/{y}.png?key=…
+
+The first path segment names the upstream host (https, allow-listed). JSON
+responses (styles, TileJSON) have their absolute URLs for allow-listed hosts
+rewritten to point back at the proxy, so sprites, glyphs and tiles a style
+references are cached too.
+
+Cache: bodies are stored content-addressed (objects/ab/<sha256>) and indexed
+in SQLite by URL with the API key parameter removed, so identical tiles are
+stored once and a cache warmed with one key serves another. Total size is
+bounded; least recently used entries go first. Freshness follows
+Cache-Control (max-age / s-maxage, no-store, private, no-cache) and Expires,
+with the usual 10%-of-age heuristic from Last-Modified; stale entries are
+revalidated with If-None-Match / If-Modified-Since, and served stale if the
+upstream fails. --offline never contacts upstream: every cached entry is
+served regardless of age and misses are 504.
+
+Upstream connections are pooled per host (HTTP/1.1 keep-alive over TLS,
+bounded per host), and concurrent misses for one URL share a single fetch.
+
+Usage:
+  python3 -m geotools.tileproxy serve --cache .tilecache --max-size 2G --port 8787
+  python3 -m geotools.tileproxy serve --cache .tilecache --offline
+  python3 -m geotools.tileproxy warm --cache .tilecache \\
+      --tiles "https://a.api.tomtom.com/map/1/tile/basic/main/{z}/{x}/{y}.png?key=KEY" \\
+      --bbox=-125,24,-66,50 --zooms 0-7
+  python3 -m geotools.tileproxy stats --cache .tilecache
+"""
+import argparse
+import asyncio
+import email.utils
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import ssl
+import sys
+import time
+import urllib.parse
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .serve import CORS, MAX_HEADER, PREFLIGHT, REASONS, read_request, response_head
+
+DEFAULT_HOSTS = ("api.tomtom.com", "a.api.tomtom.com", "b.api.tomtom.com", "c.api.tomtom.com",
+                 "d.api.tomtom.com", "demotiles.maplibre.org")
+KEY_PARAMS = ("key", "api_key", "access_token")
+KEEP_HEADERS = ("content-type", "content-encoding", "etag", "last-modified", "cache-control",
+                "expires", "date", "vary")
+DEFAULT_MAX_SIZE = 1 << 30
+POOL_PER_HOST = 8
+TIMEOUT = 30.0
+HEURISTIC_CAP = 86400.0
+
+
+# ---- cache store ---------------------------------------------------------
+
+def cache_key(url: str) -> str:
+    """URL without API key parameters, query sorted."""
+    u = urllib.parse.urlsplit(url)
+    q = sorted((k, v) for k, v in urllib.parse.parse_qsl(u.query, keep_blank_values=True)
+               if k.lower() not in KEY_PARAMS)
+    return urllib.parse.urlunsplit((u.scheme, u.netloc.lower(), u.path, urllib.parse.urlencode(q), ""))
+
+
+def freshness(headers: Dict[str, str], now: float) -> Tuple[bool, float]:
+    """(storable, expires-at) from response headers."""
+    cc = {}
+    for part in headers.get("cache-control", "").lower().split(","):
+        k, _, v = part.strip().partition("=")
+        if k:
+            cc[k] = v.strip('"')
+    if "no-store" in cc or "private" in cc:
+        return False, now
+    if "no-cache" in cc:
+        return True, now
+    for k in ("s-maxage", "max-age"):
+        if k in cc:
+            try:
+                return True, now + max(0, int(cc[k]))
+            except ValueError:
+                break
+    date = _http_date(headers.get("date")) or now
+    if "expires" in headers:
+        exp = _http_date(headers["expires"])
+        return True, now + (exp - date) if exp else now
+    lm = _http_date(headers.get("last-modified"))
+    if lm and lm < date:
+        return True, now + min((date - lm) / 10, HEURISTIC_CAP)
+    return True, now
+
+
+def _http_date(v) -> Optional[float]:
+    if not v:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(v).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class CacheStore:
+    """Content-addressed blobs under root/objects, SQLite index, LRU by access time."""
+
+    def __init__(self, root, max_bytes: int = DEFAULT_MAX_SIZE):
+        self.root = Path(root)
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(str(self.root / "index.db"))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY, url TEXT, digest TEXT, status INTEGER, headers TEXT,
+            stored REAL, expires REAL, size INTEGER, atime REAL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_atime ON entries(atime)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_digest ON entries(digest)")
+        self.db.commit()
+
+    def _blob(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest[2:]
+
+    def get(self, key: str) -> Optional[dict]:
+        row = self.db.execute("SELECT url, digest, status, headers, stored, expires, size FROM entries "
+                              "WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        path = self._blob(row[1])
+        try:
+            body = path.read_bytes()
+        except OSError:
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.db.commit()
+            return None
+        self.db.execute("UPDATE entries SET atime = ? WHERE key = ?", (time.time(), key))
+        self.db.commit()
+        return {"url": row[0], "digest": row[1], "status": row[2], "headers": json.loads(row[3]),
+                "stored": row[4], "expires": row[5], "body": body}
+
+    def put(self, key: str, url: str, status: int, headers: Dict[str, str], body: bytes, expires: float):
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, path)
+        now = time.time()
+        old = self.db.execute("SELECT digest FROM entries WHERE key = ?", (key,)).fetchone()
+        self.db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (key, url, digest, status, json.dumps(headers), now, expires, len(body), now))
+        if old and old[0] != digest:
+            self._drop_blob(old[0])
+        self.db.commit()
+        self.evict()
+
+    def refresh(self, key: str, headers: Dict[str, str], expires: float):
+        self.db.execute("UPDATE entries SET headers = ?, expires = ?, atime = ? WHERE key = ?",
+                        (json.dumps(headers), expires, time.time(), key))
+        self.db.commit()
+
+    def _drop_blob(self, digest: str):
+        if self.db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None:
+            try:
+                self._blob(digest).unlink()
+            except OSError:
+                pass
+
+    def total_bytes(self) -> int:
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM "
+                               "(SELECT digest, MAX(size) AS size FROM entries GROUP BY digest)").fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until the distinct blobs fit max_bytes."""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        for key, digest, size in self.db.execute(
+                "SELECT key, digest, size FROM entries ORDER BY atime").fetchall():
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            if self.db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None:
+                self._drop_blob(digest)
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        self.db.commit()
+
+    def stats(self) -> dict:
+        n = self.db.execute("SELECT COUNT(*), COUNT(DISTINCT digest) FROM entries").fetchone()
+        stale = self.db.execute("SELECT COUNT(*) FROM entries WHERE expires <= ?", (time.time(),)).fetchone()[0]
+        return {"entries": n[0], "blobs": n[1], "bytes": self.total_bytes(),
+                "max_bytes": self.max_bytes, "stale": stale}
+
+
+# ---- upstream ------------------------------------------------------------
+
+class UpstreamPool:
+    """HTTP/1.1 keep-alive connections per (host, port), at most `per_host` open."""
+
+    def __init__(self, per_host: int = POOL_PER_HOST, timeout: float = TIMEOUT):
+        self.per_host, self.timeout = per_host, timeout
+        self.idle: Dict[Tuple[str, int, bool], List] = {}
+        self.limits: Dict[Tuple[str, int, bool], asyncio.Semaphore] = {}
+        self.ssl = ssl.create_default_context()
+
+    async def _connect(self, host, port, tls):
+        idle = self.idle.setdefault((host, port, tls), [])
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.open_connection(host, port, ssl=self.ssl if tls else None,
+                                                       limit=MAX_HEADER)
+        return reader, writer, False
+
+    async def fetch(self, url: str, headers: Dict[str, str]):
+        """GET url -> (status, headers lower-cased, body as sent, possibly gzip)."""
+        u = urllib.parse.urlsplit(url)
+        tls = u.scheme == "https"
+        host, port = u.hostname, u.port or (443 if tls else 80)
+        sem = self.limits.setdefault((host, port, tls), asyncio.Semaphore(self.per_host))
+        async with sem:
+            for attempt in range(2):
+                reader, writer, reused = await self._connect(host, port, tls)
+                try:
+                    return await asyncio.wait_for(self._exchange(reader, writer, u, host, port, tls, headers),
+                                                  self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    if not reused or attempt:
+                        raise
+                except BaseException:
+                    writer.close()
+                    raise
+
+    async def _exchange(self, reader, writer, u, host, port, tls, headers):
+        target = u.path or "/"
+        if u.query:
+            target += "?" + u.query
+        lines = [f"GET {target} HTTP/1.1", f"Host: {u.netloc}", "Accept-Encoding: gzip",
+                 "Connection: keep-alive", "User-Agent: geotools-tileproxy"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+        head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        status = int(head[0].split(" ", 2)[1])
+        resp = {}
+        for line in head[1:]:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                resp[k.strip().lower()] = v.strip()
+        keep = resp.get("connection", "").lower() != "close"
+        if status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif "chunked" in resp.get("transfer-encoding", "").lower():
+            parts = []
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if size == 0:
+                    while await reader.readuntil(b"\r\n") != b"\r\n":    # trailers
+                        pass
+                    break
+                parts.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(parts)
+        elif "content-length" in resp:
+            body = await reader.readexactly(int(resp["content-length"]))
+        else:
+            body, keep = await reader.read(), False
+        if keep:
+            self.idle.setdefault((host, port, tls), []).append((reader, writer))
+        else:
+            writer.close()
+        return status, resp, body
+
+    def close(self):
+        for conns in self.idle.values():
+            for _, writer in conns:
+                writer.close()
+        self.idle.clear()
+
+
+# ---- proxy ---------------------------------------------------------------
+
+class CachingProxy:
+    def __init__(self, store: CacheStore, hosts=DEFAULT_HOSTS, offline: bool = False,
+                 pool: Optional[UpstreamPool] = None):
+        self.store, self.hosts, self.offline = store, tuple(hosts), offline
+        self.pool = pool or UpstreamPool()
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.counts = {"hit": 0, "miss": 0, "revalidated": 0, "stale": 0, "error": 0}
+
+    async def lookup(self, url: str):
+        """(status, headers, body, cache state) for an upstream URL, via the cache."""
+        key = cache_key(url)
+        fut = self.inflight.get(key)
+        if fut is not None:
+            return await asyncio.shield(fut)
+        fut = self.inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await self._lookup(key, url)
+            fut.set_result(result)
+            return result
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()      # retrieved here so unawaited futures do not warn
+            raise
+        finally:
+            del self.inflight[key]
+
+    async def _lookup(self, key: str, url: str):
+        entry = self.store.get(key)
+        now = time.time()
+        if entry and (self.offline or entry["expires"] > now):
+            self.counts["hit"] += 1
+            return entry["status"], entry["headers"], entry["body"], "HIT"
+        if self.offline:
+            self.counts["error"] += 1
+            return 504, {"content-type": "text/plain"}, b"offline: not in cache\n", "MISS-OFFLINE"
+
+        cond = {}
+        if entry:
+            if entry["headers"].get("etag"):
+                cond["If-None-Match"] = entry["headers"]["etag"]
+            if entry["headers"].get("last-modified"):
+                cond["If-Modified-Since"] = entry["headers"]["last-modified"]
+        try:
+            status, headers, body = await self.pool.fetch(url, cond)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            if entry:
+                self.counts["stale"] += 1
+                return entry["status"], entry["headers"], entry["body"], "STALE"
+            self.counts["error"] += 1
+            return 502, {"content-type": "text/plain"}, f"upstream error: {e}\n".encode(), "ERROR"
+
+        kept = {k: v for k, v in headers.items() if k in KEEP_HEADERS}
+        storable, expires = freshness(headers, time.time())
+        if status == 304 and entry:
+            self.counts["revalidated"] += 1
+            merged = dict(entry["headers"], **{k: v for k, v in kept.items() if k != "content-encoding"})
+            self.store.refresh(key, merged, expires)
+            return entry["status"], merged, entry["body"], "REVALIDATED"
+        self.counts["miss"] += 1
+        if status == 200 and storable:
+            self.store.put(key, key, status, kept, body, expires)      # the API key never hits disk
+        return status, kept, body, "MISS"
+
+    def upstream(self, target: str) -> Optional[str]:
+        """/host/path?query -> https://host/path?query, if host is allowed."""
+        u = urllib.parse.urlsplit(target)
+        host, _, path = u.path.lstrip("/").partition("/")
+        if host.lower() not in self.hosts:
+            return None
+        return urllib.parse.urlunsplit(("https", host, "/" + path, u.query, ""))
+
+    def rewrite(self, body: bytes, base: str) -> bytes:
+        """Absolute URLs of allowed hosts in a JSON body -> through this proxy."""
+        text = body.decode("utf-8")
+        pattern = "|".join(re.escape(h) for h in sorted(self.hosts, key=len, reverse=True))
+        text = re.sub(rf"https?://({pattern})(?=[/\"?])", lambda m: f"{base}/{m.group(1)}", text)
+        return text.encode("utf-8")
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                req = await read_request(reader)
+                if req is None:
+                    writer.write(response_head(400, CORS, keep=False))
+                    break
+                method, target, headers, keep = req
+                await self._respond(writer, method, target, headers, keep)
+                await writer.drain()
+                if not keep:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, method, target, headers, keep):
+        if method == "OPTIONS":
+            writer.write(response_head(204, PREFLIGHT, keep=keep))
+            return
+        if method not in ("GET", "HEAD"):
+            writer.write(response_head(405, dict(CORS, Allow="GET, HEAD, OPTIONS"), keep=keep))
+            return
+        if urllib.parse.urlsplit(target).path == "/_proxy/stats":
+            body = json.dumps(dict(self.store.stats(), **self.counts, offline=self.offline)).encode()
+            writer.write(response_head(200, dict(CORS, **{"Content-Type": "application/json"}), len(body), keep))
+            writer.write(body if method == "GET" else b"")
+            return
+        url = self.upstream(target)
+        if url is None:
+            body = b"unknown upstream host\n"
+            writer.write(response_head(403, dict(CORS, **{"Content-Type": "text/plain"}), len(body), keep))
+            writer.write(body if method == "GET" else b"")
+            return
+
+        status, stored, body, state = await self.lookup(url)
+        out = {k.title(): v for k, v in stored.items() if k != "date"}
+        if "json" in stored.get("content-type", "") and status == 200:
+            if stored.get("content-encoding") == "gzip":
+                body = gzip.decompress(body)
+                out.pop("Content-Encoding", None)
+            body = self.rewrite(body, f"http://{headers.get('host', '127.0.0.1')}")
+        elif stored.get("content-encoding") == "gzip" and "gzip" not in headers.get("accept-encoding", ""):
+            body = gzip.decompress(body)
+            out.pop("Content-Encoding", None)
+        out = dict(CORS, **out, **{"X-Cache": state})
+        etag = stored.get("etag")
+        inm = headers.get("if-none-match")
+        if status == 200 and etag and inm and etag in [t.strip() for t in inm.split(",")]:
+            writer.write(response_head(304, out, keep=keep))
+            return
+        writer.write(response_head(status if status in REASONS else 502, out, len(body), keep))
+        if method == "GET":
+            writer.write(body)
+
+
+async def run(store: CacheStore, port: int, bind: str, offline: bool, hosts):
+    proxy = CachingProxy(store, hosts, offline)
+    server = await asyncio.start_server(proxy.handle, bind, port, limit=MAX_HEADER)
+    mode = "offline" if offline else "online"
+    print(f"Caching proxy ({mode}) on http://{bind}:{port}/<host>/… -> {store.root} "
+          f"({store.stats()['entries']} entries)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        proxy.pool.close()
+
+
+# ---- warming -------------------------------------------------------------
+
+def tile_range(bbox, z: int):
+    """Inclusive x/y tile ranges covering a lon/lat bbox at zoom z."""
+    from .mercator import project
+    (x0, x1), (y1, y0) = (project([bbox[0], bbox[2]], [bbox[1], bbox[3]]))
+    n = 1 << z
+    clamp = lambda v: min(n - 1, max(0, int(math.floor(v * n))))  # noqa: E731
+    return (clamp(x0), clamp(x1)), (clamp(y0), clamp(y1))
+
+
+def tile_urls(template: str, bbox, zooms) -> List[str]:
+    out = []
+    for z in zooms:
+        (xa, xb), (ya, yb) = tile_range(bbox, z)
+        for x in range(xa, xb + 1):
+            for y in range(ya, yb + 1):
+                out.append(template.replace("{z}", str(z)).replace("{x}", str(x)).replace("{y}", str(y)))
+    return out
+
+
+async def warm(store: CacheStore, urls: List[str], concurrency: int = 16) -> Dict[str, int]:
+    proxy = CachingProxy(store, hosts=(), pool=UpstreamPool(per_host=concurrency))
+    queue = list(reversed(urls))
+    states: Dict[str, int] = {}
+
+    async def worker():
+        while queue:
+            url = queue.pop()
+            status, _, _, state = await proxy.lookup(url)
+            key = state if status < 400 else f"{state} {status}"
+            states[key] = states.get(key, 0) + 1
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        proxy.pool.close()
+    return states
+
+
+def parse_size(s: str) -> int:
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*", s.lower())
+    if not m:
+        raise ValueError(f"bad size {s!r}")
+    return int(float(m.group(1)) * 1024 ** " kmgt".index(m.group(2) or " "))
+
+
+def _zooms(s: str) -> List[int]:
+    a, _, b = s.partition("-")
+    return list(range(int(a), int(b or a) + 1))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Disk LRU caching proxy for TomTom / MapLibre styles and tiles.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name in ("serve", "warm", "stats"):
+        p = sub.add_parser(name)
+        p.add_argument("--cache", default=".tilecache", help="cache directory (default .tilecache)")
+        p.add_argument("--max-size", default=str(DEFAULT_MAX_SIZE), help="cache bound, e.g. 500M, 2G")
+        if name == "serve":
+            p.add_argument("--port", type=int, default=8787)
+            p.add_argument("--bind", default="127.0.0.1")
+            p.add_argument("--offline", action="store_true", help="serve only from cache, never upstream")
+            p.add_argument("--allow", action="append", default=[], help="extra upstream host (repeatable)")
+        elif name == "warm":
+            p.add_argument("--url", action="append", default=[], help="URL to fetch (repeatable)")
+            p.add_argument("--url-file", help="file with one URL per line")
+            p.add_argument("--tiles", action="append", default=[], help="tile URL template with {z}/{x}/{y}")
+            p.add_argument("--bbox", help="minlon,minlat,maxlon,maxlat for --tiles (use --bbox=-125,…)")
+            p.add_argument("--zooms", default="0-6", help="zoom range for --tiles, e.g. 0-8")
+            p.add_argument("--concurrency", type=int, default=16)
+    args = ap.parse_args(argv)
+
+    try:
+        store = CacheStore(args.cache, parse_size(args.max_size))
+        if args.cmd == "stats":
+            print(json.dumps(store.stats(), indent=2))
+        elif args.cmd == "serve":
+            asyncio.run(run(store, args.port, args.bind, args.offline, DEFAULT_HOSTS + tuple(args.allow)))
+        else:
+            urls = list(args.url)
+            if args.url_file:
+                urls += [ln.strip() for ln in Path(args.url_file).read_text().splitlines() if ln.strip()]
+            if args.tiles:
+                bbox = tuple(float(v) for v in (args.bbox or "-180,-85,180,85").split(","))
+                if len(bbox) != 4:
+                    raise ValueError("--bbox must be minlon,minlat,maxlon,maxlat")
+                for t in args.tiles:
+                    urls += tile_urls(t, bbox, _zooms(args.zooms))
+            t0 = time.perf_counter()
+            states = asyncio.run(warm(store, urls, args.concurrency))
+            print(f"Warmed {len(urls)} URLs in {time.perf_counter() - t0:.1f}s: "
+                  + ", ".join(f"{k} {v}" for k, v in sorted(states.items())))
+            print(json.dumps(store.stats()))
+    except KeyboardInterrupt:
+        pass
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+trajectory.py — compressed ServiceVehicle tracks: time-aware simplification,
+delta-encoded columnar storage, LineString export.
+
+A day of 1 Hz pings is ~86k positions per vehicle, far more than a Power BI
+dataView can carry. `pack` reads position histories (the id,lon,lat,ts CSV /
+JSON lines geofence.py consumes; ts as epoch seconds or ISO 8601), simplifies
+each vehicle's track and stores what is left; `export` writes one LineString
+per vehicle, optionally simplified further and split where the vehicle
+sent nothing for a while.
+
+Simplification is top-down Douglas-Peucker in a local equirectangular
+projection (meters), with one of two error measures:
+
+  sed   synchronized Euclidean distance: a dropped ping is measured against
+        where the simplified track puts the vehicle *at that ping's time*,
+        so stops, dwell and speed changes survive (default)
+  dp    perpendicular distance to the segment (shape only, as geometry.py)
+
+Gaps are found on the raw pings: every silence longer than `pack --gap`
+seconds (default 60) is a segment break. Both positions around a break are
+kept, the runs between breaks are simplified separately, and the breaks are
+stored, so `export --split-gap` splits at real gaps rather than at the
+(long) spacing of a simplified track.
+
+A .trk file is columnar:
+
+  magic (8) | header size (4) | header JSON | t column | x column | y column
+
+Rows are grouped by vehicle and sorted by time. Each column holds integers
+(t in milliseconds, x/y in 1e-7 degrees by default) as zigzag varints of the
+difference to the previous row, restarting from the absolute value at every
+vehicle. The header lists the vehicles with their row counts and the byte
+offset of their slice in each column, so one vehicle decodes without
+touching the others, and the rows that start a segment after a gap.
+
+Usage:
+  python3 -m geotools.trajectory pack pings.csv -o day.trk --tolerance 5
+  python3 -m geotools.trajectory export day.trk -o tracks.geojson --tolerance 25
+  python3 -m geotools.trajectory export day.trk -o sv17.geojson --vehicle SV-17 --times
+  python3 -m geotools.trajectory info day.trk
+"""
+import argparse
+import json
+import math
+import struct
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .geofence import parse_position
+from .io import write_collection
+
+MAGIC = b"GTRK\x01\x00\x00\x00"
+COLUMNS = ("t", "x", "y")
+TIME_SCALE = 1000            # ticks per second stored (ms)
+COORD_SCALE = 10_000_000     # ticks per degree stored (1e-7 deg ~ 1 cm)
+DEFAULT_TOLERANCE = 5.0      # meters
+DEFAULT_GAP = 60.0           # seconds without a ping that break a track
+METHODS = ("sed", "dp")
+EARTH_RADIUS_M = 6371008.8
+LEGEND = "ServiceVehicle"
+
+
+# ---- varint columns ------------------------------------------------------
+
+def zigzag_varints(values: np.ndarray) -> bytes:
+    """int64 array -> concatenated zigzag LEB128 varints (vectorized)."""
+    v = np.asarray(values, dtype=np.int64)
+    z = ((v << 1) ^ (v >> 63)).view(np.uint64)
+    nbytes = np.ones(len(z), dtype=np.int64)
+    rest = z >> np.uint64(7)
+    while rest.any():
+        nbytes += rest > 0
+        rest >>= np.uint64(7)
+    starts = np.zeros(len(z), dtype=np.int64)
+    np.cumsum(nbytes[:-1], out=starts[1:])
+    out = np.zeros(int(nbytes.sum()), dtype=np.uint8)
+    for k in range(int(nbytes.max()) if len(z) else 0):
+        sel = np.flatnonzero(nbytes > k)
+        group = (z[sel] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (nbytes[sel] > k + 1).astype(np.uint8) << 7
+        out[starts[sel] + k] = group.astype(np.uint8) | more
+    return out.tobytes()
+
+
+def read_varints(data: bytes) -> np.ndarray:
+    """Inverse of zigzag_varints."""
+    b = np.frombuffer(data, dtype=np.uint8)
+    if not len(b):
+        return np.zeros(0, dtype=np.int64)
+    ends = b < 0x80
+    if not ends[-1]:
+        raise ValueError("truncated varint column")
+    first = np.r_[0, np.flatnonzero(ends)[:-1] + 1]
+    pos = np.arange(len(b)) - np.repeat(first, np.diff(np.r_[first, len(b)]))
+    z = np.bitwise_or.reduceat((b & 0x7F).astype(np.uint64) << (7 * pos).astype(np.uint64), first)
+    return (z >> np.uint64(1)).view(np.int64) ^ -(z & np.uint64(1)).view(np.int64)
+
+
+def _deltas(v: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    d = np.diff(v, prepend=0)
+    d[starts] = v[starts]
+    return d
+
+
+def _undelta(d: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Cumulative sum restarting at each vehicle start."""
+    c = np.cumsum(d)
+    if len(starts) < 2:
+        return c
+    before = np.r_[0, c[starts[1:] - 1]]
+    return c - np.repeat(before, np.diff(np.r_[starts, len(c)]))
+
+
+# ---- simplification ------------------------------------------------------
+
+def local_meters(lon: np.ndarray, lat: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Equirectangular projection around the track's mean latitude."""
+    k = math.radians(1) * EARTH_RADIUS_M
+    return lon * k * math.cos(math.radians(float(np.mean(lat)))), lat * k
+
+
+def simplify_track(t: np.ndarray, lon: np.ndarray, lat: np.ndarray, tolerance: float,
+                   method: str = "sed", breaks: Sequence[int] = ()) -> np.ndarray:
+    """Indexes of the positions kept at `tolerance` meters.
+
+    The first and last positions are always kept, and so is each break (a
+    position starting a new segment) with the position before it; the runs
+    between breaks are simplified on their own.
+    """
+    n = len(t)
+    if n < 3 or tolerance <= 0:
+        return np.arange(n)
+    x, y = local_meters(lon, lat)
+    breaks = np.asarray(breaks, dtype=np.int64)
+    bounds = np.unique(np.r_[0, n - 1, breaks - 1, breaks])
+    keep = np.zeros(n, dtype=bool)
+    keep[bounds] = True
+    stack = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        px, py = x[a + 1:b], y[a + 1:b]
+        dx, dy = x[b] - x[a], y[b] - y[a]
+        if method == "sed":
+            dt = t[b] - t[a]
+            f = (t[a + 1:b] - t[a]) / dt if dt > 0 else np.zeros(b - a - 1)
+        else:
+            ll = dx * dx + dy * dy
+            f = np.clip(((px - x[a]) * dx + (py - y[a]) * dy) / ll, 0.0, 1.0) if ll > 0 else np.zeros(b - a - 1)
+        d = np.hypot(px - (x[a] + f * dx), py - (y[a] + f * dy))
+        i = int(np.argmax(d))
+        if d[i] > tolerance:
+            k = a + 1 + i
+            keep[k] = True
+            stack.append((a, k))
+            stack.append((k, b))
+    return np.flatnonzero(keep)
+
+
+# ---- tracks --------------------------------------------------------------
+
+class Tracks:
+    """Vehicles with time-sorted t (epoch s), lon, lat arrays.
+
+    `breaks` marks the rows that start a segment after a gap in the raw
+    pings; None (raw tracks) means gaps are read off the timestamps.
+    """
+
+    def __init__(self, vehicles: List[str], counts: np.ndarray, t: np.ndarray, lon: np.ndarray,
+                 lat: np.ndarray, meta: Optional[dict] = None, breaks: Optional[np.ndarray] = None):
+        self.vehicles = list(vehicles)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.starts = np.zeros(len(self.counts), dtype=np.int64)
+        np.cumsum(self.counts[:-1], out=self.starts[1:])
+        self.t, self.lon, self.lat = t, lon, lat
+        self.meta = meta or {}
+        self.breaks = breaks
+
+    def __len__(self):
+        return len(self.vehicles)
+
+    def track(self, i: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        s = slice(int(self.starts[i]), int(self.starts[i] + self.counts[i]))
+        return self.t[s], self.lon[s], self.lat[s]
+
+    def gaps(self, i: int, gap: float = None) -> np.ndarray:
+        """Rows of vehicle i (relative to its start) that follow a silence longer than `gap` seconds."""
+        t = self.track(i)[0]
+        if self.breaks is None:
+            return np.flatnonzero(np.diff(t) > gap) + 1 if gap else np.zeros(0, dtype=np.int64)
+        kept = self.meta.get("gap_s", 0)
+        if gap is not None and not 0 < kept <= gap:
+            raise ValueError((f"only gaps over {kept:g} s were kept" if kept else "no gaps were kept")
+                             + f"; pack again with --gap {gap:g} or less")
+        s = int(self.starts[i])
+        rows = np.flatnonzero(self.breaks[s:s + len(t)])
+        rows = rows[rows > 0]
+        return rows if gap is None else rows[t[rows] - t[rows - 1] > gap]
+
+    @classmethod
+    def from_rows(cls, ids: Sequence, t, lon, lat) -> "Tracks":
+        """Group rows by vehicle, sort by time, drop repeated timestamps."""
+        ids = np.asarray([str(v) for v in ids], dtype=object)
+        t, lon, lat = (np.asarray(a, dtype=np.float64) for a in (t, lon, lat))
+        names, code = np.unique(ids, return_inverse=True)
+        order = np.lexsort((t, code))
+        code, t, lon, lat = code[order], t[order], lon[order], lat[order]
+        dup = np.r_[False, (code[1:] == code[:-1]) & (t[1:] == t[:-1])]
+        code, t, lon, lat = code[~dup], t[~dup], lon[~dup], lat[~dup]
+        return cls([str(v) for v in names], np.bincount(code, minlength=len(names)), t, lon, lat)
+
+    def simplified(self, tolerance: float, method: str = "sed", gap: float = None) -> "Tracks":
+        """Simplified copy; `gap` (raw tracks only) sets which silences become breaks."""
+        parts, counts = [], []
+        breaks = np.zeros(len(self.t), dtype=bool)
+        for i in range(len(self)):
+            t, lon, lat = self.track(i)
+            b = self.gaps(i, gap if self.breaks is None else None)
+            breaks[b + self.starts[i]] = True
+            k = simplify_track(t, lon, lat, tolerance, method, b) + self.starts[i]
+            parts.append(k)
+            counts.append(len(k))
+        idx = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+        meta = dict(self.meta, tolerance_m=tolerance, method=method,
+                    raw_points=self.meta.get("raw_points", int(self.counts.sum())))
+        if self.breaks is None:
+            meta["gap_s"] = gap or 0
+        return Tracks(self.vehicles, counts, self.t[idx], self.lon[idx], self.lat[idx], meta, breaks[idx])
+
+    def select(self, vehicles=None, start: float = None, end: float = None) -> "Tracks":
+        keep = [i for i, v in enumerate(self.vehicles) if not vehicles or v in vehicles]
+        parts, counts = [], []
+        for i in keep:
+            t = self.track(i)[0]
+            m = np.ones(len(t), dtype=bool)
+            if start is not None:
+                m &= t >= start
+            if end is not None:
+                m &= t <= end
+            parts.append(np.flatnonzero(m) + self.starts[i])
+            counts.append(int(m.sum()))
+        idx = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+        return Tracks([self.vehicles[i] for i in keep], counts, self.t[idx], self.lon[idx], self.lat[idx], self.meta,
+                      None if self.breaks is None else self.breaks[idx])
+
+
+def _epoch(ts) -> float:
+    if ts is None:
+        raise ValueError("position without ts")
+    try:
+        return float(ts)
+    except (TypeError, ValueError):
+        d = datetime.fromisoformat(str(ts).strip().replace("Z", "+00:00"))
+        return (d if d.tzinfo else d.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def read_positions(paths: Iterable) -> Tuple[Tracks, int]:
+    """Tracks from position files ('-' = stdin) and the number of unusable lines."""
+    ids, ts, xs, ys = [], [], [], []
+    bad = 0
+    for p in paths:
+        fh = sys.stdin.buffer if p == "-" else open(p, "rb")
+        try:
+            for line in fh:
+                pos = parse_position(line)
+                if pos is None:
+                    bad += bool(line.strip())
+                    continue
+                try:
+                    t = _epoch(pos[3])
+                except ValueError:
+                    bad += 1
+                    continue
+                ids.append(pos[0])
+                xs.append(pos[1])
+                ys.append(pos[2])
+                ts.append(t)
+        finally:
+            if fh is not sys.stdin.buffer:
+                fh.close()
+    return Tracks.from_rows(ids, ts, xs, ys), bad
+
+
+# ---- .trk files ----------------------------------------------------------
+
+def write(path, tracks: Tracks, coord_scale: int = COORD_SCALE, time_scale: int = TIME_SCALE) -> int:
+    """Write a .trk file; returns its size in bytes."""
+    st = tracks.starts
+    cols = {
+        "t": np.rint(tracks.t * time_scale).astype(np.int64),
+        "x": np.rint(tracks.lon * coord_scale).astype(np.int64),
+        "y": np.rint(tracks.lat * coord_scale).astype(np.int64),
+    }
+    blobs, offsets = {}, {}
+    for name, v in cols.items():
+        d = _deltas(v, st)
+        # per-vehicle byte offsets: encode slices so each vehicle decodes alone
+        chunks = [zigzag_varints(d[s:s + c]) for s, c in zip(st.tolist(), tracks.counts.tolist())]
+        offsets[name] = np.r_[0, np.cumsum([len(c) for c in chunks])].tolist()
+        blobs[name] = b"".join(chunks)
+    header = dict(tracks.meta, version=1, coord_scale=coord_scale, time_scale=time_scale, columns=list(COLUMNS),
+                  column_bytes=[len(blobs[c]) for c in COLUMNS],
+                  vehicles=[{"id": v, "count": int(c), **{f"{k}_offset": offsets[k][i] for k in COLUMNS}}
+                            for i, (v, c) in enumerate(zip(tracks.vehicles, tracks.counts))])
+    if tracks.breaks is not None:
+        for i, e in enumerate(header["vehicles"]):
+            e["breaks"] = tracks.gaps(i).tolist()
+    head = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    with open(path, "wb") as fh:
+        fh.write(MAGIC + struct.pack("<I", len(head)) + head)
+        for c in COLUMNS:
+            fh.write(blobs[c])
+    return Path(path).stat().st_size
+
+
+def read_header(fh) -> Tuple[dict, int]:
+    if fh.read(8) != MAGIC:
+        raise ValueError("not a .trk file")
+    (n,) = struct.unpack("<I", fh.read(4))
+    return json.loads(fh.read(n)), 12 + n
+
+
+def read(path, vehicles=None) -> Tracks:
+    """Load a .trk file, decoding only the requested vehicles' slices."""
+    with open(path, "rb") as fh:
+        h, base = read_header(fh)
+        col_start = dict(zip(COLUMNS, np.r_[base, base + np.cumsum(h["column_bytes"])[:-1]].tolist()))
+        pick = [j for j, e in enumerate(h["vehicles"]) if not vehicles or e["id"] in vehicles]
+        entries = [h["vehicles"][j] for j in pick]
+        cols = {}
+        for ci, c in enumerate(COLUMNS):
+            key = f"{c}_offset"
+            # a vehicle's slice ends where the next vehicle's begins
+            ends = [e[key] for e in h["vehicles"][1:]] + [h["column_bytes"][ci]]
+            parts = []
+            for j in pick:
+                fh.seek(col_start[c] + h["vehicles"][j][key])
+                parts.append(fh.read(ends[j] - h["vehicles"][j][key]))
+            cols[c] = read_varints(b"".join(parts))
+    counts = np.array([e["count"] for e in entries], dtype=np.int64)
+    starts = np.r_[0, np.cumsum(counts)[:-1]].astype(np.int64)
+    breaks = None
+    if "gap_s" in h:
+        breaks = np.zeros(int(counts.sum()), dtype=bool)
+        for s, e in zip(starts.tolist(), entries):
+            breaks[np.asarray(e.get("breaks", []), dtype=np.int64) + s] = True
+    starts = starts[counts > 0]
+    meta = {k: v for k, v in h.items() if k not in ("vehicles", "columns", "column_bytes", "version",
+                                                     "coord_scale", "time_scale")}
+    return Tracks([e["id"] for e in entries], counts,
+                  _undelta(cols["t"], starts) / h["time_scale"],
+                  _undelta(cols["x"], starts) / h["coord_scale"],
+                  _undelta(cols["y"], starts) / h["coord_scale"], meta, breaks)
+
+
+# ---- export --------------------------------------------------------------
+
+def _iso(t: float) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+def _pieces(n: int, cuts: np.ndarray) -> List[np.ndarray]:
+    """Index runs of an n-row track cut before `cuts`; a lone position joins the run before it (or after)."""
+    out = []
+    for p in np.split(np.arange(n), cuts):
+        if out and (len(p) < 2 or len(out[-1]) < 2):
+            out[-1] = np.r_[out[-1], p]
+        else:
+            out.append(p)
+    return out
+
+
+def features(tracks: Tracks, times: bool = False, split_gap: float = None) -> List[dict]:
+    """One LineString (MultiLineString when split at gaps) per vehicle."""
+    out = []
+    for i, v in enumerate(tracks.vehicles):
+        t, lon, lat = tracks.track(i)
+        if len(t) < 2:
+            continue
+        cuts = tracks.gaps(i, split_gap) if split_gap else np.zeros(0, dtype=np.int64)
+        pieces = _pieces(len(t), cuts)
+        lines = [np.column_stack((lon[p], lat[p])).tolist() for p in pieces]
+        geom = {"type": "LineString", "coordinates": lines[0]} if len(lines) == 1 else \
+            {"type": "MultiLineString", "coordinates": lines}
+        props = {"VehicleID": v, "LegendID": LEGEND, "Start": _iso(t[0]), "End": _iso(t[-1]),
+                 "Points": int(len(t)), "LayerType": geom["type"]}
+        if times:
+            props["Times"] = [round(float(x), 3) for x in t]
+        out.append({"type": "Feature", "geometry": geom, "properties": props})
+    return out
+
+
+# ---- CLI -----------------------------------------------------------------
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compress, store and export ServiceVehicle tracks.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("pack", help="position history -> simplified .trk")
+    p.add_argument("inputs", nargs="+", help="id,lon,lat,ts CSV or JSON-lines files ('-' for stdin)")
+    p.add_argument("-o", "--output", required=True)
+    p.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="meters (0 keeps every ping)")
+    p.add_argument("--method", choices=METHODS, default="sed")
+    p.add_argument("--gap", type=float, default=DEFAULT_GAP,
+                   help="seconds of silence that break a track (0: none)")
+    p.add_argument("--coord-scale", type=int, default=COORD_SCALE, help="stored ticks per degree")
+    p = sub.add_parser("export", help=".trk -> per-vehicle LineStrings")
+    p.add_argument("input")
+    p.add_argument("-o", "--output", required=True)
+    p.add_argument("--tolerance", type=float, default=0.0, help="simplify further (meters)")
+    p.add_argument("--method", choices=METHODS, default="sed")
+    p.add_argument("--vehicle", action="append", default=[], help="only this vehicle (repeatable)")
+    p.add_argument("--start", help="drop positions before (epoch s or ISO 8601)")
+    p.add_argument("--end", help="drop positions after (epoch s or ISO 8601)")
+    p.add_argument("--split-gap", type=float, help="start a new line after a gap of this many seconds "
+                   "(not below the pack --gap)")
+    p.add_argument("--times", action="store_true", help="add a Times property (epoch s per vertex)")
+    p = sub.add_parser("info")
+    p.add_argument("input")
+    args = ap.parse_args(argv)
+
+    try:
+        if args.cmd == "pack":
+            t0 = time.perf_counter()
+            tracks, bad = read_positions(args.inputs)
+            raw = int(tracks.counts.sum())
+            simple = tracks.simplified(args.tolerance, args.method, args.gap)
+            size = write(args.output, simple, args.coord_scale)
+            kept = int(simple.counts.sum())
+            print(f"Packed {raw:,} positions of {len(tracks)} vehicles -> {kept:,} "
+                  f"({kept / max(raw, 1):.1%}, {args.method} {args.tolerance:g} m), "
+                  f"{size:,} bytes in {time.perf_counter() - t0:.1f}s"
+                  + (f"; skipped {bad} bad lines" if bad else ""))
+        elif args.cmd == "export":
+            tracks = read(args.input, set(args.vehicle) or None)
+            start = _epoch(args.start) if args.start else None
+            end = _epoch(args.end) if args.end else None
+            if start is not None or end is not None:
+                tracks = tracks.select(start=start, end=end)
+            if args.tolerance > 0:
+                tracks = tracks.simplified(args.tolerance, args.method)
+            feats = features(tracks, args.times, args.split_gap)
+            n = write_collection(args.output, feats, precision=7)
+            print(f"Wrote {n} tracks, {sum(int(c) for c in tracks.counts):,} vertices to {args.output}")
+        else:
+            with open(args.input, "rb") as fh:
+                h, _ = read_header(fh)
+            counts = [e["count"] for e in h["vehicles"]]
+            print(json.dumps({k: v for k, v in h.items() if k not in ("vehicles", "columns")}
+                             | {"vehicles": len(counts), "points": sum(counts),
+                                "bytes_per_point": round(sum(h["column_bytes"]) / max(sum(counts), 1), 2)},
+                             indent=2))
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
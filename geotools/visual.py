@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+visual.py — version bumps, guarded packaging and environment checks for the
+Power BI visual projects.
+
+One copy of what bump_label_and_package.py, safe_package.py and
+testEnvironment4Pbiviz.py did in each project folder (those scripts now
+call into this module):
+
+  bump      PY<N> name, displayName, version and a fresh guid in pbiviz.json,
+            then package (or, with --assemble, re-stamp the last build's
+            compiled JS with geotools.pbiviz instead of running webpack)
+  package   [--guard: Node < 20 check, engines pin, .npmrc engine-strict,
+            .eslintrc.js with absolute tsconfigRootDir] npm ci / install, pbiviz package
+  doctor    Node / npm / pbiviz versions and project files; --fix installs
+            what is missing, --package packages afterwards
+
+Commands run under Node 18 via nvm when nvm is installed. Only the standard
+library is imported up front, so `bump --no-package` runs in tens of ms.
+
+Usage:
+  python3 -m geotools.visual bump TomTom_RB
+  python3 -m geotools.visual bump TomTom_RB --set 8 --sync-version-to-n --no-package
+  python3 -m geotools.visual bump TomTom_RB --assemble
+  python3 -m geotools.visual package pbi-maplibre-minimal --guard
+  python3 -m geotools.visual doctor customTable/powerbi-custom-table-visual --fix --package
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Optional, Tuple
+
+NODE_TARGET = "18"          # what pbiviz runs under
+NODE_MIN = 16               # inclusive
+NODE_MAX_EXCL = 20          # powerbi-visuals-tools 6.x breaks on Node >= 20
+PBIVIZ = "pbiviz.json"
+
+ESLINTRC = """const path = require('path');
+module.exports = {
+  root: true,
+  parser: '@typescript-eslint/parser',
+  parserOptions: {
+    project: [path.join(__dirname, 'tsconfig.json')],
+    tsconfigRootDir: __dirname
+  },
+  plugins: ['@typescript-eslint'],
+  rules: {
+    '@typescript-eslint/no-unused-vars': ['warn', { argsIgnorePattern: '^_', varsIgnorePattern: '^_' }]
+  }
+};
+"""
+
+
+# -- node / npm
+
+def have_nvm() -> bool:
+    return (Path(os.environ.get("NVM_DIR", str(Path.home() / ".nvm"))) / "nvm.sh").exists()
+
+
+def run(cmd: str, root: Path) -> int:
+    """Run a shell command in the project, under Node 18 via nvm when available."""
+    import shlex
+    import subprocess
+    print(f"==> $ {cmd}", flush=True)
+    if have_nvm():
+        nvm_dir = os.environ.get("NVM_DIR", str(Path.home() / ".nvm"))
+        cmd = ("bash -lc " + shlex.quote(f'export NVM_DIR="{nvm_dir}"; . "$NVM_DIR/nvm.sh" && '
+                                          f"(nvm use {NODE_TARGET} >/dev/null || nvm install {NODE_TARGET} "
+                                          f">/dev/null) && {cmd}"))
+    return subprocess.call(cmd, shell=True, cwd=str(root))
+
+
+def tool_version(cmd: str, root: Path = Path(".")) -> Optional[str]:
+    """First line a `--version` style command prints, None if it fails."""
+    import subprocess
+    try:
+        out = subprocess.run(cmd, shell=True, cwd=str(root), capture_output=True, text=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    lines = out.stdout.strip().splitlines()
+    return lines[0].strip() if out.returncode == 0 and lines else None
+
+
+def node_version() -> Optional[Tuple[int, int, int]]:
+    m = re.match(r"v?(\d+)\.(\d+)\.(\d+)", tool_version("node -v") or "")
+    return tuple(map(int, m.groups())) if m else None
+
+
+def node_ok() -> Tuple[bool, str]:
+    """Whether packaging can run: nvm (which selects Node 18) or a Node in range on PATH."""
+    if have_nvm():
+        return True, f"nvm (Node {NODE_TARGET})"
+    v = node_version()
+    if v is None:
+        return False, "Node.js not found; install Node 18 or nvm"
+    label = "v" + ".".join(map(str, v))
+    if not NODE_MIN <= v[0] < NODE_MAX_EXCL:
+        return False, (f"Node {label} found; >= {NODE_MIN} and < {NODE_MAX_EXCL} required "
+                       f"(nvm install {NODE_TARGET} && nvm use {NODE_TARGET})")
+    return True, f"Node {label}"
+
+
+# -- pbiviz.json
+
+def read_pbiviz(root: Path) -> dict:
+    path = root / PBIVIZ
+    if not path.is_file():
+        raise ValueError(f"{path} not found; run from (or pass) the visual project folder")
+    try:
+        return json.loads(path.read_text(encoding="utf-8-sig"))
+    except ValueError as e:
+        raise ValueError(f"failed to parse {path}: {e}") from None
+
+
+def write_pbiviz(root: Path, data: dict):
+    (root / PBIVIZ).write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def py_number(data: dict) -> Optional[int]:
+    """Current PY<N> from visual.name or displayName."""
+    vis = data.get("visual", {})
+    for s in (vis.get("name") or "", vis.get("displayName") or ""):
+        m = re.search(r"\bPY(\d+)\b", s, re.IGNORECASE)
+        if m:
+            return int(m.group(1))
+    return None
+
+
+def _version_parts(v: str) -> list:
+    parts = [int(x) if x.isdigit() else 0 for x in (v or "1.0.0.0").split(".")]
+    return parts + [0] * (4 - len(parts))
+
+
+def bump_version(v: str) -> str:
+    parts = _version_parts(v)
+    parts[-1] += 1
+    return ".".join(map(str, parts))
+
+
+def set_version_last(v: str, n: int) -> str:
+    parts = _version_parts(v)
+    parts[-1] = int(n)
+    return ".".join(map(str, parts))
+
+
+def bump(root: Path, set_n: Optional[int] = None, sync_version: bool = False) -> dict:
+    """Next PY number, version, displayName and guid, written to pbiviz.json; returns the visual block."""
+    data = read_pbiviz(root)
+    vis = data.setdefault("visual", {})
+    n = set_n if set_n is not None else (py_number(data) or 0) + 1
+    current = vis.get("version", "1.0.0.0")
+    version = set_version_last(current, n) if sync_version else bump_version(current)
+    vis["name"] = f"PY{n}"
+    vis["version"] = version
+    vis["displayName"] = f"PY{n} v{version}"
+    vis["guid"] = f"PY{n}{os.urandom(5).hex()}"     # new identity busts Power BI's visual cache
+    write_pbiviz(root, data)
+    return vis
+
+
+# -- packaging
+
+def ensure_engines(root: Path):
+    """Pin engines.node to >=16 <20 and make npm enforce it (.npmrc engine-strict)."""
+    pkg_path = root / "package.json"
+    if not pkg_path.is_file():
+        raise ValueError(f"{pkg_path} not found")
+    pkg = json.loads(pkg_path.read_text(encoding="utf-8"))
+    pkg.setdefault("engines", {})["node"] = f">={NODE_MIN} <{NODE_MAX_EXCL}"
+    pkg_path.write_text(json.dumps(pkg, indent=2), encoding="utf-8")
+    npmrc = root / ".npmrc"
+    lines = npmrc.read_text(encoding="utf-8").splitlines() if npmrc.exists() else []
+    if not any(line.strip().startswith("engine-strict=") for line in lines):
+        npmrc.write_text("\n".join(lines + ["engine-strict=true"]) + "\n", encoding="utf-8")
+
+
+def ensure_eslintrc(root: Path):
+    # pbiviz runs its own eslint; a legacy .eslintrc.js with an absolute
+    # tsconfigRootDir avoids "tsconfigRootDir must be an absolute path"
+    (root / ".eslintrc.js").write_text(ESLINTRC, encoding="utf-8")
+
+
+def install(root: Path) -> int:
+    return run("npm ci" if (root / "package-lock.json").is_file() else "npm install", root)
+
+
+def package(root: Path, guard: bool = False, skip_install: bool = False) -> int:
+    """[guard], install dependencies, pbiviz package; returns the first non-zero exit code."""
+    ok, detail = node_ok()
+    print(f"Node: {detail}")
+    if not ok:
+        return 3
+    if guard:
+        ensure_engines(root)
+        ensure_eslintrc(root)
+        print(f"Pinned engines.node >={NODE_MIN} <{NODE_MAX_EXCL}, engine-strict, .eslintrc.js")
+    for cmd in ([] if skip_install else [None]) + ["npx pbiviz --version", "npx pbiviz package --verbose"]:
+        rc = install(root) if cmd is None else run(cmd, root)
+        if rc:
+            return rc
+    return 0
+
+
+def doctor(root: Path, fix: bool = False) -> bool:
+    """Print the toolchain and project state; with `fix`, install what is missing. True if ready."""
+    ready = True
+    ok, detail = node_ok()
+    print(f"{'ok ' if ok else 'BAD'} node     {detail}")
+    ready &= ok
+    npm = tool_version("npm -v")
+    print(f"{'ok ' if npm else 'BAD'} npm      {npm or 'not found'}")
+    ready &= bool(npm)
+    pbiviz = tool_version("npx --no-install pbiviz --version", root)
+    print(f"{'ok ' if pbiviz else 'BAD'} pbiviz   {pbiviz or 'powerbi-visuals-tools not installed'}")
+    for name in (PBIVIZ, "package.json", "capabilities.json", "tsconfig.json"):
+        present = (root / name).is_file()
+        print(f"{'ok ' if present else 'BAD'} {name}")
+        ready &= present
+    modules = (root / "node_modules").is_dir()
+    print(f"{'ok ' if modules else 'BAD'} node_modules")
+    if fix and ok and npm and (root / "package.json").is_file():
+        if not modules or not pbiviz:
+            if install(root) == 0:
+                modules = True
+            pbiviz = tool_version("npx --no-install pbiviz --version", root)
+        if not pbiviz:
+            run("npm install --save-dev powerbi-visuals-tools", root)
+            pbiviz = tool_version("npx --no-install pbiviz --version", root)
+    return ready and modules and bool(pbiviz)
+
+
+def _bump(root: Path, args):
+    vis = bump(root, args.set_n, args.sync_version_to_n)
+    print(f"Updated {PBIVIZ}:")
+    for k in ("name", "version", "displayName", "guid"):
+        print(f"  {k:<11} = {vis[k]}")
+    if args.no_package:
+        return 0
+    if args.assemble:
+        from .pbiviz import assemble
+        r = assemble(root, rename_guid=True)
+        print(f"Wrote {r['path']} ({r['reused']}/{r['segments']} segments reused) in {r['seconds']:.2f}s")
+    else:
+        print("\nPackaging…")
+        rc = package(root)
+        if rc:
+            return rc
+    print("\nDone. Import the newest dist/*.pbiviz and remove older ones in Power BI "
+          "(… → Get more visuals → My visuals → Remove).")
+    return 0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Bump, package and check the Power BI visual projects.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("bump", help="new PY<N>, version and guid in pbiviz.json, then package")
+    p.add_argument("--set", type=int, dest="set_n", help="explicit PY number (default: current + 1)")
+    p.add_argument("--sync-version-to-n", action="store_true", help="visual.version = 1.0.0.N")
+    p.add_argument("--no-package", action="store_true", help="only update pbiviz.json")
+    p.add_argument("--assemble", action="store_true",
+                   help="re-stamp the last build's JS with geotools.pbiviz instead of npm + webpack")
+    p = sub.add_parser("package", help="install dependencies and run pbiviz package")
+    p.add_argument("--guard", action="store_true",
+                   help="pin engines to Node >=16 <20, engine-strict, .eslintrc.js with absolute root")
+    p.add_argument("--no-install", action="store_true", help="skip npm ci / install")
+    p = sub.add_parser("doctor", help="check the Node / pbiviz toolchain and project files")
+    p.add_argument("--fix", action="store_true", help="install missing node_modules / powerbi-visuals-tools")
+    p.add_argument("--package", action="store_true", help="package when the environment is ready")
+    for p in sub.choices.values():
+        p.add_argument("project", nargs="?", default=".", help="folder with pbiviz.json (default .)")
+    args = ap.parse_args(argv)
+
+    root = Path(args.project).resolve()
+    try:
+        if args.cmd == "bump":
+            rc = _bump(root, args)
+        elif args.cmd == "package":
+            read_pbiviz(root)
+            rc = package(root, args.guard, args.no_install)
+            if rc:
+                print("\nBuild failed. If you recently switched Node versions in this shell, open a fresh "
+                      "terminal so PATH uses Node 18, then re-run.", file=sys.stderr)
+            else:
+                print("\nBuild completed. Import the newest dist/*.pbiviz.")
+        else:
+            rc = 0 if doctor(root, args.fix) else 1
+            if rc:
+                print("\nEnvironment not ready" + ("" if args.fix else "; --fix installs what is missing"))
+            elif args.package:
+                rc = package(root, skip_install=True)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+    if rc:
+        sys.exit(rc)
+
+
+if __name__ == "__main__":
+    main()
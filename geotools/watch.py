@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+watch.py — watch a Power BI visual project and rebuild only the stage a
+change affects.
+
+bump_label_and_package.py re-bumps the version and runs npm ci plus a full
+pbiviz package on every call. While developing, this watcher runs the
+affected stage instead, after a burst of saves has been quiet for
+--debounce ms:
+
+  deps     npm ci                          package-lock.json
+  check    tsc --noEmit, eslint on the      src/**/*.ts(x), tsconfig.json,
+           changed files                   eslint config
+  bundle   pbiviz package                  after deps or a passing check,
+                                           style/, a new guid in pbiviz.json
+  zip      reassemble the artifact from     capabilities.json, dependencies.json,
+           .tmp/drop, no webpack            pbiviz.json, assets/, stringResources/
+
+The zip stage is geotools.pbiviz: dist/<guid>.<version>.pbiviz is
+reassembled from the compiled JS and CSS in .tmp/drop and the current
+capabilities, dependencies, string resources, icon and visual metadata,
+reusing the previous artifact's compressed segments. The guid is compiled
+into visual.js, so a guid change goes through bundle instead. The version
+is never bumped.
+
+Changes are picked up with inotify (through ctypes, Linux) or, elsewhere or
+with --poll, by comparing mtimes. node_modules, .tmp, dist and editor swap
+files are ignored. Commands run under Node 18 via nvm when nvm is
+installed (geotools.visual.run).
+
+Usage:
+  python3 -m geotools.watch TomTom_RB
+  python3 -m geotools.watch pbi-maplibre-minimal --debounce 500 --check-only
+  python3 -m geotools.watch jMapv6 --once zip
+"""
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import shlex
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from .pbiviz import assemble, built_guid, read_json
+from .visual import run
+
+STAGES = ("deps", "check", "bundle", "zip")
+DEFAULT_DEBOUNCE = 300       # ms of quiet before a burst of saves is built
+POLL_INTERVAL = 0.5
+IGNORE_DIRS = {"node_modules", ".tmp", "dist", ".git", ".vscode", "__pycache__"}
+IGNORE_SUFFIXES = (".swp", ".swx", ".tmp", "~")
+ESLINT_CONFIGS = ("eslint.config.js", "eslint.config.mjs", "eslint.config.cjs",
+                  ".eslintrc.js", ".eslintrc.cjs", ".eslintrc.json", ".eslintrc")
+ZIP_FILES = {"capabilities.json", "dependencies.json", "pbiviz.json"}
+ZIP_DIRS = ("assets/", "stringResources/")
+
+
+def ignored(rel: str) -> bool:
+    parts = rel.split("/")
+    name = parts[-1]
+    return (any(p in IGNORE_DIRS for p in parts[:-1]) or name in IGNORE_DIRS
+            or name.endswith(IGNORE_SUFFIXES) or name.startswith((".#", "webpack.statistics"))
+            or name == "4913")    # vim's write probe
+
+
+def stages_for(changed: Iterable[str], guid_changed: bool = False) -> Set[str]:
+    """Stages a set of changed project-relative paths calls for."""
+    out = set()
+    for rel in changed:
+        name = rel.rsplit("/", 1)[-1]
+        if rel == "package-lock.json":
+            out |= {"deps", "check", "bundle"}
+        elif rel.endswith((".ts", ".tsx")) or rel == "tsconfig.json" or name in ESLINT_CONFIGS:
+            out |= {"check", "bundle"}
+        elif rel.startswith("style/"):
+            out.add("bundle")
+        elif rel in ZIP_FILES or rel.startswith(ZIP_DIRS):
+            out.add("zip")
+    if guid_changed:
+        out.add("bundle")
+    if "bundle" in out:
+        out.discard("zip")      # pbiviz package writes the artifact itself
+    return out
+
+
+# -- change sources
+
+class Inotify:
+    """Recursive inotify watch over a project; wait() returns changed relative paths."""
+
+    IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO = 0x8, 0x40, 0x80
+    IN_CREATE, IN_DELETE, IN_Q_OVERFLOW, IN_IGNORED, IN_ISDIR = 0x100, 0x200, 0x4000, 0x8000, 0x40000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, root: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify not available")
+        self.libc = libc
+        self.root = root
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs: Dict[int, str] = {}
+        self._add_tree("")
+
+    def _add(self, rel: str):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(self.root / rel), self.MASK)
+        if wd >= 0:
+            self.dirs[wd] = rel
+
+    def _add_tree(self, rel: str):
+        self._add(rel)
+        for dirpath, dirnames, _ in os.walk(self.root / rel):
+            dirnames[:] = [d for d in dirnames if d not in IGNORE_DIRS]
+            for d in dirnames:
+                self._add(os.path.relpath(os.path.join(dirpath, d), self.root).replace(os.sep, "/"))
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        out = set()
+        while True:
+            try:
+                buf = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return out
+            pos = 0
+            while pos < len(buf):
+                wd, mask, _, n = self.EVENT.unpack_from(buf, pos)
+                name = buf[pos + 16:pos + 16 + n].rstrip(b"\0").decode(errors="replace")
+                pos += 16 + n
+                if mask & self.IN_Q_OVERFLOW:
+                    out.add("")        # events lost: treat as "everything"
+                    continue
+                if mask & self.IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                    continue
+                base = self.dirs.get(wd)
+                if base is None or not name:
+                    continue
+                rel = f"{base}/{name}" if base else name
+                if ignored(rel):
+                    continue
+                if mask & self.IN_ISDIR:
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                        self._add_tree(rel)
+                        out.update(p for p in Poller(self.root, rel).snapshot)
+                    continue
+                out.add(rel)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class Poller:
+    """mtime/size scan with the same wait() as Inotify."""
+
+    def __init__(self, root: Path, sub: str = "", interval: float = POLL_INTERVAL):
+        self.root, self.sub, self.interval = root, sub, interval
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        out = {}
+        for dirpath, dirnames, filenames in os.walk(self.root / self.sub):
+            dirnames[:] = [d for d in dirnames if d not in IGNORE_DIRS]
+            for f in filenames:
+                rel = os.path.relpath(os.path.join(dirpath, f), self.root).replace(os.sep, "/")
+                if ignored(rel):
+                    continue
+                try:
+                    st = os.stat(os.path.join(dirpath, f))
+                except OSError:
+                    continue
+                out[rel] = (st.st_mtime_ns, st.st_size)
+        return out
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        snap = self._scan()
+        changed = {k for k in snap.keys() | self.snapshot.keys() if snap.get(k) != self.snapshot.get(k)}
+        self.snapshot = snap
+        return changed
+
+    def close(self):
+        pass
+
+
+# -- stages
+
+class Builder:
+    def __init__(self, root: Path, check_only: bool = False):
+        self.root = root
+        self.check_only = check_only
+
+    def guid_changed(self) -> bool:
+        """pbiviz.json names a different guid than the last build compiled in."""
+        try:
+            built = built_guid(self.root)
+            return built is not None and read_json(self.root / "pbiviz.json")["visual"]["guid"] != built
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def check(self, changed: Iterable[str]) -> bool:
+        ok = True
+        if (self.root / "tsconfig.json").is_file():
+            ok = run("npx tsc --noEmit -p tsconfig.json", self.root) == 0
+        ts = sorted(p for p in changed if p.endswith((".ts", ".tsx")) and (self.root / p).is_file())
+        if ts and any((self.root / c).is_file() for c in ESLINT_CONFIGS):
+            ok = run("npx eslint " + " ".join(shlex.quote(p) for p in ts), self.root) == 0 and ok
+        return ok
+
+    def build(self, stages: Set[str], changed: Set[str]) -> bool:
+        """Run the stages in order; stop at the first failure."""
+        if self.check_only:
+            stages = stages & {"deps", "check"}
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            t0 = time.perf_counter()
+            if stage == "deps":
+                ok = run("npm ci", self.root) == 0
+            elif stage == "check":
+                ok = self.check(changed)
+            elif stage == "bundle":
+                ok = run("npx pbiviz package --verbose", self.root) == 0
+            else:
+                try:
+                    r = assemble(self.root)
+                    print(f"Wrote {Path(r['path']).relative_to(self.root)} "
+                          f"({r['reused']}/{r['segments']} segments reused)")
+                    ok = True
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"ERROR: {e}", file=sys.stderr)
+                    ok = False
+            print(f"[{time.strftime('%H:%M:%S')}] {stage} {'ok' if ok else 'FAILED'} "
+                  f"in {time.perf_counter() - t0:.1f}s", flush=True)
+            if not ok:
+                return False
+        return True
+
+
+def watch(root: Path, debounce: float = DEFAULT_DEBOUNCE / 1000, poll: bool = False,
+          check_only: bool = False):
+    builder = Builder(root, check_only)
+    try:
+        source = Poller(root) if poll else Inotify(root)
+    except OSError:
+        source = Poller(root)
+    print(f"Watching {root} ({type(source).__name__.lower()}, {debounce * 1000:.0f} ms debounce); Ctrl-C to stop",
+          flush=True)
+    pending: Set[str] = set()
+    deadline = None
+    try:
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            changed = source.wait(timeout)
+            if changed:
+                pending |= changed
+                deadline = time.monotonic() + debounce
+            elif deadline is not None and time.monotonic() >= deadline:
+                stages = stages_for(pending, builder.guid_changed())
+                if "" in pending:          # inotify queue overflow: events were lost
+                    stages = {"check", "bundle"}
+                if stages:
+                    print(f"[{time.strftime('%H:%M:%S')}] {', '.join(sorted(pending))} -> "
+                          f"{', '.join(s for s in STAGES if s in stages)}", flush=True)
+                    builder.build(stages, pending)
+                pending, deadline = set(), None
+    except KeyboardInterrupt:
+        pass
+    finally:
+        source.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Watch a visual project and rebuild only the affected stage.")
+    ap.add_argument("project", nargs="?", default=".", help="folder with pbiviz.json (default .)")
+    ap.add_argument("--debounce", type=int, default=DEFAULT_DEBOUNCE, help="quiet ms before building")
+    ap.add_argument("--poll", action="store_true", help="scan mtimes instead of inotify")
+    ap.add_argument("--check-only", action="store_true", help="stop after tsc/eslint (no bundle / zip)")
+    ap.add_argument("--once", nargs="+", choices=STAGES, help="run these stages now and exit")
+    args = ap.parse_args(argv)
+
+    root = Path(args.project).resolve()
+    if not (root / "pbiviz.json").is_file():
+        print(f"ERROR: {root}: no pbiviz.json", file=sys.stderr)
+        sys.exit(2)
+    if args.once:
+        changed = {str(p.relative_to(root)) for p in (root / "src").rglob("*.ts")} if "check" in args.once else set()
+        sys.exit(0 if Builder(root, args.check_only).build(set(args.once), changed) else 1)
+    watch(root, args.debounce / 1000, args.poll, args.check_only)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+GeoJSON geometry <-> little-endian ISO WKB (2D).
+
+Enough of the format for the asset files and the columnar writers: Point,
+LineString, Polygon, their Multi* forms and GeometryCollection. Coordinate
+runs go through NumPy so a ring is one tobytes()/frombuffer() call. Empty or
+malformed positions (the "[[[]]]" placeholders in the Copy files) are dropped.
+
+  blob = dumps(feature["geometry"])      # None for a missing geometry
+  geom = loads(blob)
+"""
+import struct
+from typing import Optional
+
+import numpy as np
+
+POINT, LINESTRING, POLYGON, MULTIPOINT, MULTILINESTRING, MULTIPOLYGON, COLLECTION = range(1, 8)
+TYPE_CODES = {
+    "Point": POINT, "LineString": LINESTRING, "Polygon": POLYGON,
+    "MultiPoint": MULTIPOINT, "MultiLineString": MULTILINESTRING,
+    "MultiPolygon": MULTIPOLYGON, "GeometryCollection": COLLECTION,
+}
+TYPE_NAMES = {v: k for k, v in TYPE_CODES.items()}
+
+_HEAD = struct.Struct("<BI")
+_COUNT = struct.Struct("<I")
+
+
+def positions(seq) -> np.ndarray:
+    """(N, 2) float64 array of the valid 2D positions in a coordinate list."""
+    pts = [p[:2] for p in seq or () if isinstance(p, (list, tuple)) and len(p) >= 2]
+    return np.asarray(pts, dtype="<f8").reshape(-1, 2)
+
+
+def _run(out: list, seq):
+    pts = positions(seq)
+    out.append(_COUNT.pack(len(pts)))
+    out.append(pts.tobytes())
+
+
+def _write(out: list, geom: dict):
+    t = geom.get("type")
+    code = TYPE_CODES.get(t)
+    if code is None:
+        raise ValueError(f"unsupported geometry type {t!r}")
+    c = geom.get("coordinates")
+    out.append(_HEAD.pack(1, code))
+    if code == POINT:
+        pts = positions([c])
+        out.append((pts[0] if len(pts) else np.full(2, np.nan)).astype("<f8").tobytes())
+    elif code == LINESTRING:
+        _run(out, c)
+    elif code == POLYGON:
+        out.append(_COUNT.pack(len(c or ())))
+        for ring in c or ():
+            _run(out, ring)
+    elif code == COLLECTION:
+        parts = geom.get("geometries") or []
+        out.append(_COUNT.pack(len(parts)))
+        for g in parts:
+            _write(out, g)
+    else:
+        single = {MULTIPOINT: "Point", MULTILINESTRING: "LineString", MULTIPOLYGON: "Polygon"}[code]
+        out.append(_COUNT.pack(len(c or ())))
+        for part in c or ():
+            _write(out, {"type": single, "coordinates": part})
+
+
+def dumps(geom: Optional[dict]) -> Optional[bytes]:
+    if not geom:
+        return None
+    out: list = []
+    _write(out, geom)
+    return b"".join(out)
+
+
+def _read(buf: memoryview, pos: int):
+    order = buf[pos]
+    fmt = "<" if order == 1 else ">"
+    code = struct.unpack_from(fmt + "I", buf, pos + 1)[0] % 1000
+    pos += 5
+    count = lambda p: (struct.unpack_from(fmt + "I", buf, p)[0], p + 4)  # noqa: E731
+
+    def run(p):
+        n, p = count(p)
+        arr = np.frombuffer(buf, dtype=fmt + "f8", count=2 * n, offset=p).reshape(-1, 2)
+        return arr.tolist(), p + 16 * n
+
+    if code == POINT:
+        x, y = struct.unpack_from(fmt + "dd", buf, pos)
+        return {"type": "Point", "coordinates": [x, y]}, pos + 16
+    if code == LINESTRING:
+        c, pos = run(pos)
+        return {"type": "LineString", "coordinates": c}, pos
+    if code == POLYGON:
+        n, pos = count(pos)
+        rings = []
+        for _ in range(n):
+            r, pos = run(pos)
+            rings.append(r)
+        return {"type": "Polygon", "coordinates": rings}, pos
+    if code in TYPE_NAMES:
+        n, pos = count(pos)
+        parts = []
+        for _ in range(n):
+            g, pos = _read(buf, pos)
+            parts.append(g)
+        if code == COLLECTION:
+            return {"type": "GeometryCollection", "geometries": parts}, pos
+        return {"type": TYPE_NAMES[code], "coordinates": [g["coordinates"] for g in parts]}, pos
+    raise ValueError(f"unsupported WKB geometry type {code}")
+
+
+def loads(blob) -> Optional[dict]:
+    if blob is None:
+        return None
+    geom, _ = _read(memoryview(blob), 0)
+    return geom
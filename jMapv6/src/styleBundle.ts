@@ -0,0 +1,46 @@
+// Generated by `python3 -m geotools.stylebundle` — do not edit.
+// Each visual is its own pbiviz project and can't import from another, so
+// every visual gets a copy; the one source is TEMPLATE in stylebundle.py.
+// source: (none)
+// sha256: -
+/* eslint-disable */
+
+export type StyleBundle = { style: any; files: Record<string, string> };
+
+export const STYLE_BUNDLE: StyleBundle | null = null;
+
+// the style URL the bundle was built from (keys masked)
+export const STYLE_SOURCE = "";
+
+const decode = (b64: string): ArrayBuffer => {
+  const s = atob(b64), out = new Uint8Array(s.length);
+  for (let i = 0; i < s.length; i++) out[i] = s.charCodeAt(i);
+  return out.buffer;
+};
+
+const mask = (url: string) => url.replace(/([?&](?:key|api_key|access_token)=)[^&]*/g, "$1…");
+
+// Register bundle:// (MapLibre 3 callback and 4+ promise protocol APIs) and
+// return the bundled style; undefined when no bundle was generated, or when
+// styleUrl names another style than the bundled one (a user setting wins).
+export function installStyleBundle(maplibregl: any, styleUrl?: string): any | undefined {
+  const b = STYLE_BUNDLE;
+  if (!b) return undefined;
+  if (styleUrl && mask(styleUrl) !== STYLE_SOURCE) return undefined;
+  const load = (url: string) => {
+    const path = decodeURIComponent(url.slice("bundle://".length).split("?")[0]);
+    const hit = b.files[path] ?? b.files[path.replace("@2x", "")];  // MapLibre scales 1x sheets
+    if (hit === undefined && path.endsWith(".pbf")) return new ArrayBuffer(0); // range not bundled
+    if (hit === undefined) throw new Error(`style bundle: no ${path}`);
+    return path.endsWith(".json") ? JSON.parse(new TextDecoder().decode(decode(hit))) : decode(hit);
+  };
+  try { maplibregl.removeProtocol?.("bundle"); } catch {}
+  maplibregl.addProtocol("bundle", (params: any, cb?: any) => {
+    if (typeof cb === "function") {
+      try { cb(null, load(params.url)); } catch (e) { cb(e); }
+      return { cancel() {} };
+    }
+    return Promise.resolve().then(() => ({ data: load(params.url) }));
+  });
+  return b.style;
+}
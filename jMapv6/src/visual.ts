@@ -6,6 +6,8 @@ import EnumerateVisualObjectInstancesOptions = powerbi.EnumerateVisualObjectInst
 
 // Use the browser build to avoid Node shims (maplibre-gl 3.x)
 import * as maplibregl from "maplibre-gl/dist/maplibre-gl.js";
+// offline style/sprite/glyphs, generated by `python3 -m geotools.stylebundle`
+import { installStyleBundle } from "./styleBundle";
 
 import { VisualSettings } from "./visualSettings";
 
@@ -87,9 +89,30 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
   private map: maplibregl.Map | null = null;
   private panel: HTMLDivElement | null = null;
   private settings: VisualSettings = new VisualSettings();
+  private host: powerbi.extensibility.visual.IVisualHost;
+
+  // segmented loading: features accumulate across fetchMoreData windows
+  private pointsByLayer = new Map<string, GeoJSON.Feature[]>();
+  private polysByLayer = new Map<string, GeoJSON.Feature[]>();
+  private labelsByLayer = new Map<string, GeoJSON.Feature[]>();
+  private lowPolysByLayer = new Map<string, GeoJSON.Feature[]>();
+  // Part/Ring rows (geotools.export): polygons by part key, and holes whose
+  // exterior row hasn't arrived yet
+  private polyByPart = new Map<string, GeoJSON.Feature>();
+  private pendingHoles = new Map<string, [number, number][][]>();
+  // features already labelled: one label per PolyId, not one per part row
+  private labelled = new Set<string>();
+  private used = new Set<string>();
+  // source data waiting for the next animation frame: segments that arrive
+  // within one frame cost a single setData per changed source
+  private pendingData = new Map<string, GeoJSON.FeatureCollection>();
+  private flushFrame = 0;
+  private extent: [number, number, number, number] = [Infinity, Infinity, -Infinity, -Infinity];
+  private loadedRows = 0;
 
   constructor(options: powerbi.extensibility.visual.VisualConstructorOptions) {
     this.root = options.element;
+    this.host = options.host;
 
     // clear root safely
     while (this.root.firstChild) this.root.removeChild(this.root.firstChild);
@@ -114,7 +137,7 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
     // maplibre
     this.map = new maplibregl.Map({
       container: mapDiv,
-      style: "https://demotiles.maplibre.org/style.json", // Add basemap
+      style: installStyleBundle(maplibregl) ?? "https://demotiles.maplibre.org/style.json", // Add basemap
       attributionControl: false,
       interactive: true
     });
@@ -126,6 +149,26 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
 
     this.settings = this.readSettings(dv);
 
+    // A Segment update carries only the rows of the next window (we request
+    // them with aggregateSegments=false); any other Data update starts a fresh
+    // load. Resize / ViewMode / Style updates keep the windows loaded so far
+    // and parse no rows (their dataView repeats the last window).
+    const isData = (options.type & powerbi.VisualUpdateType.Data) !== 0;
+    const fresh = isData && options.operationKind !== powerbi.VisualDataChangeOperationKind.Segment;
+    if (fresh) {
+      this.pendingData.clear();
+      this.pointsByLayer = new Map();
+      this.polysByLayer = new Map();
+      this.labelsByLayer = new Map();
+      this.lowPolysByLayer = new Map();
+      this.polyByPart = new Map();
+      this.pendingHoles = new Map();
+      this.labelled = new Set();
+      this.used = new Set();
+      this.extent = [Infinity, Infinity, -Infinity, -Infinity];
+      this.loadedRows = 0;
+    }
+
     const cols = dv.table.columns;
     const idx = {
       legend: cols.findIndex((c) => c.roles?.["LegendType"]),
@@ -133,29 +176,89 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
       lon: cols.findIndex((c) => c.roles?.["Lon"]),
       locid: cols.findIndex((c) => c.roles?.["LocationId"]),
       polyid: cols.findIndex((c) => c.roles?.["PolyId"]),
-      polyc: cols.findIndex((c) => c.roles?.["PolygonCoordinates"])
+      polyc: cols.findIndex((c) => c.roles?.["PolygonCoordinates"]),
+      part: cols.findIndex((c) => c.roles?.["Part"]),
+      ring: cols.findIndex((c) => c.roles?.["Ring"]),
+      // optional precomputed columns (geotools.export): bbox + label anchor
+      minLon: cols.findIndex((c) => c.roles?.["MinLon"]),
+      minLat: cols.findIndex((c) => c.roles?.["MinLat"]),
+      maxLon: cols.findIndex((c) => c.roles?.["MaxLon"]),
+      maxLat: cols.findIndex((c) => c.roles?.["MaxLat"]),
+      labelLon: cols.findIndex((c) => c.roles?.["LabelLon"]),
+      labelLat: cols.findIndex((c) => c.roles?.["LabelLat"]),
+      // dissolved per-legend polygons (geotools.export --dissolve)
+      lowZoom: cols.findIndex((c) => c.roles?.["LowZoom"])
     };
+    const numAt = (r: powerbi.PrimitiveValue[], i: number) =>
+      i >= 0 && r[i] != null && r[i] !== "" ? Number(r[i]) : NaN;
 
+    // features parsed from this window only
     const pointsByLayer = new Map<string, GeoJSON.Feature[]>();
     const polysByLayer = new Map<string, GeoJSON.Feature[]>();
-    const used = new Set<string>();
+    const labelsByLayer = new Map<string, GeoJSON.Feature[]>();
+    const lowPolysByLayer = new Map<string, GeoJSON.Feature[]>();
+    // sources whose features changed in this window (a fresh load changes all)
+    const changed = new Set<string>();
+    const used = this.used;
 
     // STRICT-TS SAFE ROW LOOP
-    const rows = (dv.table?.rows ?? []) as powerbi.PrimitiveValue[][];
+    const rows = (isData ? dv.table?.rows ?? [] : []) as powerbi.PrimitiveValue[][];
+    this.loadedRows += rows.length;
     for (const r of rows) {
       const layer = String((idx.legend >= 0 ? r[idx.legend] : undefined) ?? "Layer");
 
       const polyStr = idx.polyc >= 0 ? String(r[idx.polyc] ?? "") : "";
       if (polyStr) {
         const geom = parsePolygonCoordinates(polyStr);
-        if (geom) {
+        const isLow = numAt(r, idx.lowZoom) > 0;
+        const polyId = idx.polyid >= 0 ? (r[idx.polyid] ?? "") : "";
+        // a Ring > 0 row is a hole of the polygon with the same part key
+        // (dissolved layers: the coverage gaps), cut out of its exterior
+        const part = numAt(r, idx.part), ring = numAt(r, idx.ring);
+        const partKey = Number.isFinite(part) ? `${isLow ? 1 : 0}\0${layer}\0${polyId}\0${part}` : "";
+        if (geom && partKey && ring > 0) {
+          const owner = this.polyByPart.get(partKey);
+          if (owner) {
+            (owner.geometry as GeoJSON.Polygon).coordinates.push(geom.coordinates[0]);
+            changed.add(`${isLow ? "pgz" : "pg"}-${layer}`);
+          } else {
+            if (!this.pendingHoles.has(partKey)) this.pendingHoles.set(partKey, []);
+            this.pendingHoles.get(partKey)!.push(geom.coordinates[0] as [number, number][]);
+          }
+          continue;
+        }
+        if (geom && partKey) {
+          geom.coordinates.push(...(this.pendingHoles.get(partKey) ?? []));
+          this.pendingHoles.delete(partKey);
+        }
+        if (geom && isLow) {
+          const f: GeoJSON.Feature = { type: "Feature", properties: { __layer: layer }, geometry: geom };
+          if (partKey) this.polyByPart.set(partKey, f);
+          if (!lowPolysByLayer.has(layer)) lowPolysByLayer.set(layer, []);
+          lowPolysByLayer.get(layer)!.push(f);
+        } else if (geom) {
           const f: GeoJSON.Feature = {
             type: "Feature",
-            properties: { __layer: layer, __polyId: idx.polyid >= 0 ? (r[idx.polyid] ?? "") : "" },
+            properties: { __layer: layer, __polyId: polyId },
             geometry: geom
           };
+          const bbox = [numAt(r, idx.minLon), numAt(r, idx.minLat), numAt(r, idx.maxLon), numAt(r, idx.maxLat)];
+          if (bbox.every(Number.isFinite)) f.bbox = bbox as GeoJSON.BBox;
+          if (partKey) this.polyByPart.set(partKey, f);
           if (!polysByLayer.has(layer)) polysByLayer.set(layer, []);
           polysByLayer.get(layer)!.push(f);
+
+          const lx = numAt(r, idx.labelLon), ly = numAt(r, idx.labelLat);
+          const labelKey = `${layer}\0${polyId}`;
+          if (Number.isFinite(lx) && Number.isFinite(ly) && (polyId === "" || !this.labelled.has(labelKey))) {
+            if (polyId !== "") this.labelled.add(labelKey);
+            if (!labelsByLayer.has(layer)) labelsByLayer.set(layer, []);
+            labelsByLayer.get(layer)!.push({
+              type: "Feature",
+              properties: { __layer: layer, __polyId: polyId },
+              geometry: { type: "Point", coordinates: [lx, ly] }
+            });
+          }
         }
         continue;
       }
@@ -179,14 +282,41 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
       }
     }
 
+    // append this window to everything loaded so far
+    for (const [name, feats] of pointsByLayer) {
+      if (!this.pointsByLayer.has(name)) this.pointsByLayer.set(name, []);
+      this.pointsByLayer.get(name)!.push(...feats);
+      changed.add(`pt-${name}`);
+    }
+    for (const [name, feats] of polysByLayer) {
+      if (!this.polysByLayer.has(name)) this.polysByLayer.set(name, []);
+      this.polysByLayer.get(name)!.push(...feats);
+      changed.add(`pg-${name}`);
+    }
+    for (const [name, feats] of labelsByLayer) {
+      if (!this.labelsByLayer.has(name)) this.labelsByLayer.set(name, []);
+      this.labelsByLayer.get(name)!.push(...feats);
+      changed.add(`lb-${name}`);
+    }
+    for (const [name, feats] of lowPolysByLayer) {
+      if (!this.lowPolysByLayer.has(name)) this.lowPolysByLayer.set(name, []);
+      this.lowPolysByLayer.get(name)!.push(...feats);
+      changed.add(`pgz-${name}`);
+    }
+    // settings changes arrive as fresh loads, so a segment only has to send
+    // the data of the sources its rows changed (other updates send none); style, zoom range and
+    // visibility are still applied (the regions' zoom range depends on
+    // whether dissolved polygons have arrived)
+    const dirty = (src: string) => fresh || changed.has(src);
+
     const allLayers = Array.from(
-      new Set([...pointsByLayer.keys(), ...polysByLayer.keys()])
+      new Set([...this.pointsByLayer.keys(), ...this.polysByLayer.keys()])
     );
     
     // Add counters to verify features
-    const totalPts = [...pointsByLayer.values()].reduce((n,a)=>n+a.length,0);
-    const totalPolys = [...polysByLayer.values()].reduce((n,a)=>n+a.length,0);
-    console.log("features", { totalPts, totalPolys });
+    const totalPts = [...this.pointsByLayer.values()].reduce((n,a)=>n+a.length,0);
+    const totalPolys = [...this.polysByLayer.values()].reduce((n,a)=>n+a.length,0);
+    console.log("features", { totalPts, totalPolys, rows: this.loadedRows });
 
     const hidden = new Set(
       String(this.settings.layers.hiddenCsv || "")
@@ -207,11 +337,14 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
       colorOverrides = {};
     }
 
+    // below this zoom a legend's dissolved polygons stand in for its regions
+    const lowZoom = Math.min(24, Math.max(0, Number(this.settings.polygons.dissolveBelowZoom) || 0));
+
     for (const name of order) {
       const visible = !hidden.has(name);
       const color = colorFor(name, colorOverrides);
 
-      const pgs = polysByLayer.get(name);
+      const pgs = this.polysByLayer.get(name);
       if (pgs && this.settings.polygons.enable) {
         const fc: GeoJSON.FeatureCollection = { type: "FeatureCollection", features: pgs };
 
@@ -219,10 +352,27 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
         const polyOpacity = Number.isFinite(+this.settings.polygons.opacity) ? Math.min(1, Math.max(0, +this.settings.polygons.opacity)) : 0.4;
         const polyStroke = Number.isFinite(+this.settings.polygons.strokePx) ? Math.max(0, +this.settings.polygons.strokePx) : 1;
 
-        this.ensurePolygonLayer(name, fc, visible, color, polyOpacity, polyStroke);
+        const low = lowZoom > 0 ? this.lowPolysByLayer.get(name) : undefined;
+        const minZoom = low ? lowZoom : 0;
+        this.ensurePolygonLayer("pg", name, fc, dirty(`pg-${name}`), visible, color, polyOpacity, polyStroke, minZoom, 24);
+        if (low) {
+          const lfc: GeoJSON.FeatureCollection = { type: "FeatureCollection", features: low };
+          this.ensurePolygonLayer("pgz", name, lfc, dirty(`pgz-${name}`), visible, color, polyOpacity, polyStroke, 0,
+                                  lowZoom);
+        } else if (this.map.getLayer(`pgz-${name}-fill`)) {
+          this.map.setLayoutProperty(`pgz-${name}-fill`, "visibility", "none");
+          this.map.setLayoutProperty(`pgz-${name}-line`, "visibility", "none");
+        }
+
+        const lbs = this.labelsByLayer.get(name);
+        if (lbs && this.settings.polygons.labels) {
+          this.ensureLabelLayer(name, { type: "FeatureCollection", features: lbs }, dirty(`lb-${name}`), visible, minZoom);
+        } else if (this.map.getLayer(`lb-${name}-text`)) {
+          this.map.setLayoutProperty(`lb-${name}-text`, "visibility", "none");
+        }
       }
 
-      const pts = pointsByLayer.get(name);
+      const pts = this.pointsByLayer.get(name);
       if (pts && this.settings.points.enable) {
         const fc: GeoJSON.FeatureCollection = { type: "FeatureCollection", features: pts };
 
@@ -230,29 +380,65 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
         const ptSize = Number.isFinite(+this.settings.points.sizePx) ? Math.max(1, +this.settings.points.sizePx) : 5;
         const ptStroke = Number.isFinite(+this.settings.points.strokePx) ? Math.max(0, +this.settings.points.strokePx) : 0;
 
-        this.ensurePointLayer(name, fc, visible, color, ptSize, ptStroke);
+        this.ensurePointLayer(name, fc, dirty(`pt-${name}`), visible, color, ptSize, ptStroke);
       }
     }
 
-    this.fitBoundsOnce(order, pointsByLayer, polysByLayer);
+    const more = this.requestNextSegment(dv);
+    this.fitBoundsOnce(order, pointsByLayer, polysByLayer, !more);
     this.buildPanel(order, hidden, colorOverrides);
   }
 
+  // Ask Power BI for the next window of rows. Returns true while a segment
+  // is pending, so callers know the loaded data is still partial.
+  private requestNextSegment(dv: DataView): boolean {
+    if (!dv.metadata.segment || !this.settings.loading.segmented) return false;
+
+    const maxRows = Number(this.settings.loading.maxRows) || 0;
+    if (maxRows > 0 && this.loadedRows >= maxRows) return false;
+
+    return this.host.fetchMoreData(false);
+  }
+
+  // New sources get their data right away; an existing source whose features
+  // changed is updated on the next animation frame, with whatever the latest
+  // segment left in its arrays.
+  private setSourceData(src: string, fc: GeoJSON.FeatureCollection, changed: boolean) {
+    const map = this.map!;
+    if (!map.getSource(src)) {
+      map.addSource(src, { type: "geojson", data: fc } as any);
+      return;
+    }
+    if (!changed) return;
+    this.pendingData.set(src, fc);
+    if (this.flushFrame) return;
+    this.flushFrame = requestAnimationFrame(() => {
+      this.flushFrame = 0;
+      for (const [id, data] of this.pendingData) (this.map?.getSource(id) as any)?.setData(data);
+      this.pendingData.clear();
+    });
+  }
+
+  // prefix "pg" holds the regions, "pgz" the dissolved low-zoom polygons;
+  // the zoom range hands one over to the other.
   private ensurePolygonLayer(
+    prefix: string,
     name: string,
     fc: GeoJSON.FeatureCollection,
+    changed: boolean,
     visible: boolean,
     color: string,
     opacity: number,
-    stroke: number
+    stroke: number,
+    minZoom: number,
+    maxZoom: number
   ) {
     const map = this.map!;
-    const src = `pg-${name}`,
+    const src = `${prefix}-${name}`,
       fill = `${src}-fill`,
       line = `${src}-line`;
 
-    if (!map.getSource(src)) map.addSource(src, { type: "geojson", data: fc } as any);
-    else (map.getSource(src) as any).setData(fc);
+    this.setSourceData(src, fc, changed);
 
     if (!map.getLayer(fill)) {
       map.addLayer({
@@ -277,13 +463,44 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
       map.setPaintProperty(line, "line-width", stroke);
     }
 
+    map.setLayerZoomRange(fill, minZoom, maxZoom);
+    map.setLayerZoomRange(line, minZoom, maxZoom);
     map.setLayoutProperty(fill, "visibility", visible ? "visible" : "none");
     map.setLayoutProperty(line, "visibility", visible ? "visible" : "none");
   }
 
+  // Polygon labels sit on the precomputed LabelLon/LabelLat anchors, so
+  // MapLibre never has to search polygon interiors for a placement.
+  private ensureLabelLayer(name: string, fc: GeoJSON.FeatureCollection, changed: boolean, visible: boolean,
+                           minZoom: number) {
+    const map = this.map!;
+    const src = `lb-${name}`,
+      lyr = `${src}-text`;
+
+    this.setSourceData(src, fc, changed);
+
+    if (!map.getLayer(lyr)) {
+      map.addLayer({
+        id: lyr,
+        type: "symbol",
+        source: src,
+        layout: {
+          "text-field": ["to-string", ["get", "__polyId"]],
+          "text-font": ["Open Sans Semibold"],
+          "text-size": 11
+        },
+        paint: { "text-color": "#222222", "text-halo-color": "#ffffff", "text-halo-width": 1 }
+      } as any);
+    }
+
+    map.setLayerZoomRange(lyr, minZoom, 24);
+    map.setLayoutProperty(lyr, "visibility", visible ? "visible" : "none");
+  }
+
   private ensurePointLayer(
     name: string,
     fc: GeoJSON.FeatureCollection,
+    changed: boolean,
     visible: boolean,
     color: string,
     size: number,
@@ -293,8 +510,7 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
     const src = `pt-${name}`,
       lyr = `${src}-circle`;
 
-    if (!map.getSource(src)) map.addSource(src, { type: "geojson", data: fc } as any);
-    else (map.getSource(src) as any).setData(fc);
+    this.setSourceData(src, fc, changed);
 
     if (!map.getLayer(lyr)) {
       map.addLayer({
@@ -316,18 +532,18 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
     map.setLayoutProperty(lyr, "visibility", visible ? "visible" : "none");
   }
 
+  // Extends the running extent with the features of the current window and
+  // refits while segments stream in; the fit locks once loading completes.
   private fitBoundsOnce(
     order: string[],
     pts: Map<string, GeoJSON.Feature[]>,
-    pgs: Map<string, GeoJSON.Feature[]>
+    pgs: Map<string, GeoJSON.Feature[]>,
+    final: boolean
   ) {
     const mapAny = this.map as any;
     if (mapAny.__fitDone) return;
 
-    let minX = +Infinity,
-      minY = +Infinity,
-      maxX = -Infinity,
-      maxY = -Infinity;
+    let [minX, minY, maxX, maxY] = this.extent;
     const push = (x: number, y: number) => {
       if (x < minX) minX = x;
       if (y < minY) minY = y;
@@ -346,6 +562,12 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
 
       // polygon / multipolygon features
       for (const f of pgs.get(l) || []) {
+        // precomputed bbox columns: one push per corner instead of a vertex walk
+        if (f.bbox) {
+          push(f.bbox[0], f.bbox[1]);
+          push(f.bbox[2], f.bbox[3]);
+          continue;
+        }
         const g: any = f.geometry;
         if (!g) continue;
 
@@ -367,6 +589,7 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
       }
     }
 
+    this.extent = [minX, minY, maxX, maxY];
     if (isFinite(minX)) {
       (this.map as any).fitBounds(
         [
@@ -375,7 +598,7 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
         ],
         { padding: 24, animate: false }
       );
-      mapAny.__fitDone = true;
+      if (final) mapAny.__fitDone = true;
     }
   }
 
@@ -495,11 +718,16 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
     s.polygons.enable = pick("polygons", "enable", s.polygons.enable);
     s.polygons.strokePx = pick("polygons", "strokePx", s.polygons.strokePx);
     s.polygons.opacity = pick("polygons", "opacity", s.polygons.opacity);
+    s.polygons.labels = pick("polygons", "labels", s.polygons.labels);
+    s.polygons.dissolveBelowZoom = pick("polygons", "dissolveBelowZoom", s.polygons.dissolveBelowZoom);
 
     s.layers.orderCsv = pick("layers", "orderCsv", s.layers.orderCsv);
     s.layers.hiddenCsv = pick("layers", "hiddenCsv", s.layers.hiddenCsv);
     s.layers.colorJson = pick("layers", "colorJson", s.layers.colorJson);
 
+    s.loading.segmented = pick("loading", "segmented", s.loading.segmented);
+    s.loading.maxRows = pick("loading", "maxRows", s.loading.maxRows);
+
     return s;
   }
 
@@ -528,7 +756,9 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
           properties: {
             enable: !!this.settings.polygons.enable,
             strokePx: Number(this.settings.polygons.strokePx),
-            opacity: Number(this.settings.polygons.opacity)
+            opacity: Number(this.settings.polygons.opacity),
+            labels: !!this.settings.polygons.labels,
+            dissolveBelowZoom: Number(this.settings.polygons.dissolveBelowZoom)
           },
           selector: (null as unknown as powerbi.data.Selector)
         });
@@ -545,6 +775,17 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
           selector: (null as unknown as powerbi.data.Selector)
         });
         break;
+
+      case "loading":
+        instances.push({
+          objectName: "loading",
+          properties: {
+            segmented: !!this.settings.loading.segmented,
+            maxRows: Number(this.settings.loading.maxRows)
+          },
+          selector: (null as unknown as powerbi.data.Selector)
+        });
+        break;
     }
 
     return instances;
@@ -2,6 +2,7 @@ export class VisualSettings {
   points = new PointsSettings();
   polygons = new PolygonsSettings();
   layers = new LayersSettings();
+  loading = new LoadingSettings();
 }
 
 class PointsSettings {
@@ -15,6 +16,8 @@ class PolygonsSettings {
   enable: boolean = true;
   strokePx: number = 1;
   opacity: number = 0.4; // 0..1
+  labels: boolean = false; // needs LabelLon/LabelLat bound
+  dissolveBelowZoom: number = 5; // LowZoom rows replace regions below this zoom; 0 = off
 }
 
 class LayersSettings {
@@ -22,3 +25,8 @@ class LayersSettings {
   hiddenCsv: string = "";
   colorJson: string = "{}";
 }
+
+class LoadingSettings {
+  segmented: boolean = true; // keep calling fetchMoreData until all rows arrive
+  maxRows: number = 0; // 0 = no cap
+}
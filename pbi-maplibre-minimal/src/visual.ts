@@ -4,6 +4,8 @@ import DataView = powerbi.DataView;
 // Use browser bundle (no Node shims in PBI sandbox)
 // @ts-ignore
 import * as maplibregl from "maplibre-gl/dist/maplibre-gl.js";
+// offline style/sprite/glyphs, generated by `python3 -m geotools.stylebundle`
+import { installStyleBundle } from "./styleBundle";
 
 type MapSettings = { zoom: number; centerLat: number; centerLon: number; };
 
@@ -52,7 +54,9 @@ export class Visual implements powerbi.extensibility.visual.IVisual {
   private buildMapIfNeeded(center: [number, number], zoom: number, styleUrl?: string) {
     if (this.map) return;
 
-    const styleToUse = styleUrl || "https://demotiles.maplibre.org/style.json";
+    // a generated style bundle (first render then needs no styling requests)
+    // unless the format pane names another style than the bundled one
+    const styleToUse = installStyleBundle(maplibregl, styleUrl) ?? (styleUrl || "https://demotiles.maplibre.org/style.json");
 
     this.map = new maplibregl.Map({
       container: this.mapDiv,
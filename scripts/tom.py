@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""New MapLibre + TomTom points visual project (prompts for what is not given): `geotools new --template tomtom` (geotools.scaffold).
+
+  python3 tom.py [FOLDER] [--display NAME] [--api-key KEY] [--package]
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from geotools.scaffold import main  # noqa: E402
+
+if __name__ == "__main__":
+    main(["new", "--template", "tomtom", *sys.argv[1:]])
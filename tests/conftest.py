@@ -0,0 +1,62 @@
+"""
+Shared fixtures: seeded synthetic region features and the checked-in asset
+collection, so every module is checked against the same inputs.
+"""
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from geotools.io import load_collection
+
+ROOT = Path(__file__).resolve().parents[1]
+ASSETS = ROOT / "Asset_Locations_Regions_Polygons.geojson"
+LEGENDS = ("WarehouseSmallParts", "WarehouseLargeParts", "TechnicianAlpitronic")
+# two parts, the first with a hole
+HOLED = {"type": "MultiPolygon", "coordinates": [
+    [[[0.0, 0.0], [4.0, 0.0], [4.0, 4.0], [0.0, 4.0], [0.0, 0.0]],
+     [[1.0, 1.0], [1.0, 2.0], [2.0, 2.0], [2.0, 1.0], [1.0, 1.0]]],
+    [[[10.0, 10.0], [11.0, 10.0], [11.0, 11.0], [10.0, 10.0]]]]}
+
+
+def square(lon, lat, size):
+    """Closed counter-clockwise square ring with its south-west corner at lon, lat."""
+    return [[lon, lat], [lon + size, lat], [lon + size, lat + size], [lon, lat + size], [lon, lat]]
+
+
+def region_features(n, seed=0, extent=(-125.0, 25.0, -67.0, 49.0)):
+    """n square regions with the asset properties, scattered over `extent`."""
+    rng = np.random.default_rng(seed)
+    minx, miny, maxx, maxy = extent
+    lon = rng.uniform(minx, maxx, n)
+    lat = rng.uniform(miny, maxy, n)
+    size = rng.uniform(0.05, 2.0, n)
+    out = []
+    for i in range(n):
+        out.append({
+            "type": "Feature",
+            "properties": {
+                "AssetID": 1000 + i,
+                "LocationID": f"{lat[i] + size[i] / 2:.6f},{lon[i] + size[i] / 2:.6f}",
+                "UniqueID": f"POLY{i}",
+                "LegendID": LEGENDS[i % len(LEGENDS)],
+                "Display": bool(i % 2),
+                "Color": "#336699",
+                "LayerType": "Polygon",
+            },
+            "geometry": {"type": "Polygon",
+                         "coordinates": [square(round(lon[i], 6), round(lat[i], 6), round(size[i], 6))]},
+        })
+    return out
+
+
+@pytest.fixture
+def regions():
+    return region_features(300)
+
+
+@pytest.fixture(scope="session")
+def assets():
+    if not ASSETS.exists():
+        pytest.skip(f"{ASSETS.name} not checked out")
+    return load_collection(ASSETS)["features"]
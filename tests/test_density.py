@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from geotools import density
+
+from conftest import region_features
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat, lon, precision):
+    """Textbook geohash by interval bisection."""
+    lo = [[-90.0, 90.0], [-180.0, 180.0]]
+    bits, even = [], True
+    while len(bits) < 5 * precision:
+        rng, v = (lo[1], lon) if even else (lo[0], lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits.append(int(v >= mid))
+        rng[0 if v >= mid else 1] = mid
+        even = not even
+    return "".join(BASE32[int("".join(map(str, bits[i:i + 5])), 2)] for i in range(0, len(bits), 5))
+
+
+def geohash_ids(lat, lon, precision):
+    return density.geohash_ids(density.geohash_cells(np.asarray(lon), np.asarray(lat), precision), precision)
+
+
+def test_geohash_known_values():
+    assert geohash_ids([57.64911], [10.40744], 11) == ["u4pruydqqvj"]
+    assert geohash_ids([42.605], [-5.603], 5) == ["ezs42"]
+
+
+@pytest.mark.parametrize("precision", [1, 2, 3, 4, 5, 6, 7])
+def test_geohash_matches_bisection(precision):
+    rng = np.random.default_rng(precision)
+    lat, lon = rng.uniform(-89.9, 89.9, 500), rng.uniform(-179.9, 179.9, 500)
+    assert geohash_ids(lat, lon, precision) == [geohash(a, b, precision) for a, b in zip(lat, lon)]
+
+
+def test_geohash_cells_contain_their_points_up_to_the_edges():
+    lat = np.array([0.0, 45.3, -90.0, 90.0, 12.0])
+    lon = np.array([0.0, -120.7, -180.0, 180.0, 180.0])
+    cells = density.geohash_cells(lon, lat, 4)
+    centers, rings = density.geohash_polygons(cells, 4)
+    assert (rings[:, :, 0].min(axis=1) <= lon).all() and (lon <= rings[:, :, 0].max(axis=1)).all()
+    assert (rings[:, :, 1].min(axis=1) <= lat).all() and (lat <= rings[:, :, 1].max(axis=1)).all()
+    assert geohash_ids(lat[3:4], lon[3:4], 4) == ["zzzz"]
+
+
+@pytest.mark.parametrize("res", [2, 4, 6])
+def test_hex_cell_is_the_nearest_center(res):
+    rng = np.random.default_rng(res)
+    lon, lat = rng.uniform(-179, 179, 2000), rng.uniform(-80, 80, 2000)
+    cells = density.hex_cells(lon, lat, res)
+    x, y = density._project(lon, lat)
+    size = density.H3_EDGE_KM[res]
+
+    def dist(c):
+        q, r = c[:, 0], c[:, 1]
+        return np.hypot(x - size * np.sqrt(3) * (q + r / 2), y - size * 1.5 * r)
+
+    own = dist(cells)
+    for dq, dr in ((1, 0), (-1, 0), (0, 1), (0, -1), (1, -1), (-1, 1)):
+        assert (own <= dist(cells + [dq, dr]) + 1e-9).all()
+    assert (own <= size + 1e-9).all()
+
+
+def test_aggregate_counts_and_sums_every_located_feature():
+    feats = region_features(400, seed=51)
+    feats[0]["properties"]["LocationID"] = ""          # falls back to the centroid
+    feats[1]["properties"]["LocationID"] = "bad"
+    feats[1]["geometry"] = None                          # no location at all
+    out = density.aggregate(feats, "hex", (3, 5), measure="AssetID")
+    for res, rows in out.items():
+        assert len({(r["CellID"], r["LegendID"]) for r in rows}) == len(rows)
+        for legend in {f["properties"]["LegendID"] for f in feats}:
+            mine = [f for f in feats[2:] + feats[:1] if f["properties"]["LegendID"] == legend]
+            assert sum(r["Count"] for r in rows if r["LegendID"] == legend) == len(mine)
+            assert sum(r["SumAssetID"] for r in rows if r["LegendID"] == legend) == \
+                pytest.approx(sum(f["properties"]["AssetID"] for f in mine))
+    assert density.aggregate([], "geohash", (3,)) == {3: []}
@@ -0,0 +1,64 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+shapely = pytest.importorskip("shapely")
+
+from geotools.dissolve import LAYER_TYPE, cascaded_union, dissolve, to_shapes  # noqa: E402
+
+from conftest import HOLED, region_features, square  # noqa: E402
+
+
+def shape(geom):
+    return shapely.from_geojson(json.dumps(geom))
+
+
+def same_area(a, b, tol=1e-9):
+    return shapely.area(shapely.symmetric_difference(a, b)) <= tol * max(shapely.area(a), 1.0)
+
+
+def test_one_multipolygon_per_legend_equal_to_a_plain_union():
+    feats = region_features(300, seed=31)
+    out = dissolve(feats)
+    assert [f["properties"]["LegendID"] for f in out] == sorted({f["properties"]["LegendID"] for f in feats})
+    for f in out:
+        legend = f["properties"]["LegendID"]
+        members = [g for g in feats if g["properties"]["LegendID"] == legend]
+        assert f["geometry"]["type"] == "MultiPolygon"
+        assert f["properties"] == {"LegendID": legend, "LayerType": LAYER_TYPE, "Count": len(members)}
+        assert same_area(shape(f["geometry"]), shapely.union_all([shape(g["geometry"]) for g in members]))
+
+
+def test_cascaded_rounds_on_a_pool_match_one_union():
+    shapes = to_shapes(region_features(400, seed=32))
+    with ProcessPoolExecutor(2) as pool:
+        cascaded = cascaded_union(shapes, pool, chunk=16)
+    assert same_area(cascaded, shapely.union_all(list(shapes)))
+
+
+def test_by_display_splits_each_legend():
+    feats = region_features(60, seed=33)
+    keys = [(f["properties"]["LegendID"], f["properties"]["Display"]) for f in dissolve(feats, by_display=True)]
+    assert keys == sorted({(f["properties"]["LegendID"], f["properties"]["Display"]) for f in feats})
+
+
+def test_holes_survive_and_invalid_rings_are_repaired():
+    bowtie = {"type": "Polygon", "coordinates": [[[20, 0], [22, 2], [22, 0], [20, 2], [20, 0]]]}
+    feats = [{"type": "Feature", "properties": {"LegendID": "A"}, "geometry": HOLED},
+             {"type": "Feature", "properties": {"LegendID": "B"}, "geometry": bowtie}]
+    out = {f["properties"]["LegendID"]: shape(f["geometry"]) for f in dissolve(feats)}
+    assert shapely.area(out["A"]) == pytest.approx(16 - 1 + 0.5)
+    assert not shapely.contains_xy(out["A"], 1.5, 1.5)
+    assert shapely.is_valid(out["B"]) and shapely.area(out["B"]) == pytest.approx(2.0)
+
+
+def test_empty_input_and_features_without_area():
+    assert dissolve([]) == []
+    feats = [{"type": "Feature", "properties": {"LegendID": "A"}, "geometry": {"type": "Point", "coordinates": [0, 0]}},
+             {"type": "Feature", "properties": {"LegendID": "A"}, "geometry": None},
+             {"type": "Feature", "properties": {"LegendID": "B"},
+              "geometry": {"type": "Polygon", "coordinates": [square(0, 0, 1)]}}]
+    out = dissolve(feats)
+    assert [(f["properties"]["LegendID"], f["properties"]["Count"]) for f in out] == [("B", 1)]
+    assert cascaded_union([None, None]) is None
@@ -0,0 +1,90 @@
+import http.server
+import threading
+
+import numpy as np
+import pytest
+
+from geotools import flatgeobuf, geometry
+
+from conftest import HOLED, region_features
+
+QUERIES = [(-100, 30, -90, 40), (-80, 45, -79, 46), (0, 0, 1, 1), (-180, -90, 180, 90)]
+
+
+def ids(feats):
+    return sorted(f["properties"]["UniqueID"] for f in feats)
+
+
+def brute(feats, q):
+    b = geometry.bounds(geometry.pack(feats))
+    hit = (b[:, 0] <= q[2]) & (b[:, 1] <= q[3]) & (b[:, 2] >= q[0]) & (b[:, 3] >= q[1])
+    return ids([feats[i] for i in np.flatnonzero(hit)])
+
+
+def test_round_trip_of_the_asset_file(tmp_path, assets):
+    path = tmp_path / "assets.fgb"
+    assert flatgeobuf.write(path, assets, name="assets") == len(assets)
+    with flatgeobuf.Reader(path) as r:
+        assert (r.name, r.count, r.geometry_type) == ("assets", len(assets), flatgeobuf.POLYGON)
+        got = {f["properties"]["UniqueID"]: f for f in r.features()}
+    for f in assets:
+        g = got[f["properties"]["UniqueID"]]
+        assert g["geometry"] == f["geometry"]
+        assert {k: v for k, v in g["properties"].items() if v is not None} == f["properties"]
+
+
+@pytest.mark.parametrize("node_size", [2, 16])
+def test_query_matches_brute_force(tmp_path, node_size):
+    feats = region_features(500, seed=21)
+    path = tmp_path / "r.fgb"
+    flatgeobuf.write(path, feats, node_size=node_size)
+    with flatgeobuf.Reader(path) as r:
+        for q in QUERIES:
+            assert ids(r.query(q)) == brute(feats, q)
+
+
+def test_small_query_reads_a_fraction_of_the_file(tmp_path):
+    feats = region_features(2000, seed=22)
+    path = tmp_path / "r.fgb"
+    flatgeobuf.write(path, feats)
+    with flatgeobuf.Reader(path) as r:
+        assert ids(r.query((-124, 25, -123, 26))) == brute(feats, (-124, 25, -123, 26))
+        assert r.source.bytes_read < path.stat().st_size / 10
+
+
+def test_query_over_http_range_reads(tmp_path):
+    feats = region_features(300, seed=23)
+    flatgeobuf.write(tmp_path / "r.fgb", feats)
+    handler = lambda *a, **kw: flatgeobuf.RangeRequestHandler(*a, directory=str(tmp_path), **kw)  # noqa: E731
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{httpd.server_address[1]}/r.fgb"
+        with flatgeobuf.Reader(url) as r:
+            for q in QUERIES:
+                assert ids(r.query(q)) == brute(feats, q)
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_holes_missing_geometry_unindexed_and_empty(tmp_path):
+    feats = [{"type": "Feature", "properties": {"UniqueID": "a"}, "geometry": None},
+             {"type": "Feature", "properties": {"UniqueID": "b"}, "geometry": HOLED}]
+    path = tmp_path / "h.fgb"
+    flatgeobuf.write(path, feats)
+    with flatgeobuf.Reader(path) as r:
+        got = {f["properties"]["UniqueID"]: f["geometry"] for f in r.features()}
+        assert got == {"a": None, "b": HOLED}
+        assert ids(r.query((2, 2, 3, 3))) == ["b"]
+        assert r.query((20, 20, 30, 30)) == []
+
+    flatgeobuf.write(path, feats, node_size=0)
+    with flatgeobuf.Reader(path) as r:
+        assert len(r.features()) == 2
+        with pytest.raises(ValueError):
+            r.query((0, 0, 1, 1))
+
+    flatgeobuf.write(path, [])
+    with flatgeobuf.Reader(path) as r:
+        assert r.features() == [] and r.query((0, 0, 1, 1)) == []
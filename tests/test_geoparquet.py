@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from geotools import geometry, geoparquet  # noqa: E402
+
+from conftest import HOLED, region_features  # noqa: E402
+
+
+def by_id(feats):
+    return {f["properties"]["UniqueID"]: f for f in feats}
+
+
+def test_round_trip_of_the_asset_file(tmp_path, assets):
+    path = tmp_path / "assets.parquet"
+    assert geoparquet.write(path, assets, row_group_size=16) == -(-len(assets) // 16)
+    got = by_id(geoparquet.to_features(geoparquet.read(path)))
+    assert len(got) == len(assets)
+    for f in assets:
+        g = got[f["properties"]["UniqueID"]]
+        assert g["geometry"] == f["geometry"]
+        assert {k: v for k, v in g["properties"].items() if v is not None} == f["properties"]
+
+
+def test_bbox_and_legend_reads_match_brute_force(tmp_path):
+    feats = region_features(400, seed=11)
+    path = tmp_path / "r.parquet"
+    geoparquet.write(path, feats, row_group_size=32)
+    b = geometry.bounds(geometry.pack(feats))
+    for q in [(-100, 30, -90, 40), (-80, 45, -79, 46), (0, 0, 1, 1), (-180, -90, 180, 90)]:
+        hit = (b[:, 0] <= q[2]) & (b[:, 1] <= q[3]) & (b[:, 2] >= q[0]) & (b[:, 3] >= q[1])
+        want = {feats[i]["properties"]["UniqueID"] for i in np.flatnonzero(hit)}
+        got = geoparquet.read(path, bbox=q, columns=["UniqueID"]).column("UniqueID").to_pylist()
+        assert sorted(got) == sorted(want)
+
+    legend = feats[0]["properties"]["LegendID"]
+    got = geoparquet.read(path, legends=[legend]).column("UniqueID").to_pylist()
+    assert sorted(got) == sorted(f["properties"]["UniqueID"] for f in feats if f["properties"]["LegendID"] == legend)
+
+
+def test_small_bbox_prunes_row_groups(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "r.parquet"
+    geoparquet.write(path, region_features(1000, seed=12), row_group_size=50)
+    pf = pq.ParquetFile(path)
+    assert len(geoparquet.select_row_groups(pf, (-124, 25, -122, 27))) < pf.num_row_groups / 4
+    assert geoparquet.select_row_groups(pf, (0, 0, 1, 1)) == []
+
+
+def test_holes_missing_geometry_and_empty_input(tmp_path):
+    feats = [{"type": "Feature", "properties": {"UniqueID": "a"}, "geometry": None},
+             {"type": "Feature", "properties": {"UniqueID": "b"}, "geometry": HOLED}]
+    path = tmp_path / "h.parquet"
+    geoparquet.write(path, feats)
+    got = by_id(geoparquet.to_features(geoparquet.read(path)))
+    assert got["a"]["geometry"] is None and "bbox" not in got["a"]
+    assert got["b"]["geometry"] == HOLED
+    assert got["b"]["bbox"] == [0.0, 0.0, 11.0, 11.0]
+    assert [f["properties"]["UniqueID"] for f in geoparquet.to_features(geoparquet.read(path, bbox=(2, 2, 3, 3)))] == ["b"]
+
+    empty = tmp_path / "e.parquet"
+    geoparquet.write(empty, [])
+    assert geoparquet.read(empty).num_rows == 0
+    assert geoparquet.read(empty, bbox=(0, 0, 1, 1), legends=["x"]).num_rows == 0
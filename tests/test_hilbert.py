@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+
+from geotools import geometry
+from geotools.hilbert import NO_KEY, external_sort, hilbert, hilbert_keys, sort_features
+from geotools.io import write_collection
+
+from conftest import region_features
+
+
+def xy2d(n, x, y):
+    """Textbook Hilbert index of (x, y) on an n x n grid."""
+    d, s = 0, n // 2
+    while s:
+        rx, ry = int(x & s > 0), int(y & s > 0)
+        d += s * s * ((3 * rx) ^ ry)
+        if not ry:
+            if rx:
+                x, y = s - 1 - x, s - 1 - y
+            x, y = y, x
+        s //= 2
+    return d
+
+
+def test_matches_reference_curve():
+    rng = np.random.default_rng(1)
+    x, y = rng.integers(0, 1 << 16, 2000), rng.integers(0, 1 << 16, 2000)
+    keys = hilbert(x, y)
+    assert keys.dtype == np.uint32
+    assert keys.tolist() == [xy2d(1 << 16, int(a), int(b)) for a, b in zip(x, y)]
+
+
+def test_first_keys_walk_a_corner_square_cell_by_cell():
+    x, y = np.meshgrid(np.arange(64), np.arange(64))
+    keys = hilbert(x.ravel(), y.ravel())
+    assert sorted(keys.tolist()) == list(range(64 * 64))
+    order = np.argsort(keys)
+    steps = np.abs(np.diff(x.ravel()[order])) + np.abs(np.diff(y.ravel()[order]))
+    assert (steps == 1).all()
+
+
+def test_keys_of_missing_points_and_empty_input():
+    keys = hilbert_keys(np.array([[0.0, 0.0], [np.nan, 1.0], [1.0, 1.0]]))
+    assert keys[1] == NO_KEY
+    assert keys[0] == 0 and keys[2] != NO_KEY
+    assert hilbert_keys(np.zeros((0, 2))).shape == (0,)
+    assert (hilbert_keys(np.full((3, 2), np.nan)) == NO_KEY).all()
+
+
+def test_sort_is_a_permutation_in_key_order():
+    feats = region_features(200, seed=2)
+    out = sort_features(feats)
+    assert sorted(f["properties"]["UniqueID"] for f in out) == sorted(f["properties"]["UniqueID"] for f in feats)
+    keys = hilbert_keys(geometry.centroids(geometry.pack(out)))
+    assert (np.diff(keys.astype(np.int64)) >= 0).all()
+
+
+def test_sort_without_geometry_keeps_input_order():
+    feats = [{"type": "Feature", "properties": {"UniqueID": i}, "geometry": None} for i in range(5)]
+    assert [f["properties"]["UniqueID"] for f in sort_features(feats)] == list(range(5))
+    assert sort_features([]) == []
+
+
+def test_external_sort_matches_in_memory_sort(tmp_path):
+    feats = region_features(250, seed=3)
+    src, dst = tmp_path / "in.geojson", tmp_path / "out.geojson"
+    write_collection(src, feats)
+    assert external_sort(src, dst, chunk=32, tmpdir=tmp_path) == len(feats)
+    got = [f["properties"]["UniqueID"] for f in json.loads(dst.read_text())["features"]]
+    assert got == [f["properties"]["UniqueID"] for f in sort_features(feats)]
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from geotools.nearest import SphereKDTree, haversine_km, nearest_table, parse_locations
+
+from conftest import region_features
+
+
+def random_points(n, seed):
+    rng = np.random.default_rng(seed)
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+    lon = rng.uniform(-180, 180, n)
+    return lat, lon
+
+
+@pytest.mark.parametrize("n", [1, 5, 33, 2000])
+@pytest.mark.parametrize("k", [1, 4])
+def test_knn_matches_brute_force(n, k):
+    lat, lon = random_points(n, seed=n)
+    qlat, qlon = random_points(300, seed=n + 1)
+    km, idx = SphereKDTree(lat, lon, leaf_size=8).query(qlat, qlon, k)
+    d = haversine_km(qlat[:, None], qlon[:, None], lat[None, :], lon[None, :])
+    want = np.sort(d, axis=1)[:, :k]
+    kk = min(k, n)
+    assert np.allclose(km[:, :kk], want[:, :kk], atol=1e-6)
+    assert np.allclose(np.take_along_axis(d, idx[:, :kk], axis=1), want[:, :kk], atol=1e-6)
+    assert (idx[:, kk:] == -1).all() and np.isinf(km[:, kk:]).all()
+
+
+def test_radius_matches_brute_force():
+    lat, lon = random_points(1500, seed=41)
+    qlat, qlon = random_points(100, seed=42)
+    qi, pi, km = SphereKDTree(lat, lon).query_radius(qlat, qlon, 800.0)
+    d = haversine_km(qlat[:, None], qlon[:, None], lat[None, :], lon[None, :])
+    assert sorted(zip(qi.tolist(), pi.tolist())) == sorted(zip(*np.nonzero(d <= 800.0)))
+    assert np.allclose(km, d[qi, pi], atol=1e-6)
+
+
+def test_antimeridian_and_poles():
+    tree = SphereKDTree([0.0, 10.0, 89.9, -89.9], [179.9, -170.0, 0.0, 45.0])
+    km, idx = tree.query([0.0, 89.95, -89.95], [-179.9, 120.0, -90.0])
+    assert idx[:, 0].tolist() == [0, 2, 3]
+    assert km[0, 0] == pytest.approx(2 * np.pi * 6371.0088 * 0.2 / 360, rel=1e-6)
+
+
+def test_missing_locations_are_skipped():
+    lat, lon = parse_locations(["33.5,-86.7", "bad", None, "95,10", "40.1, -75.2"])
+    assert np.isnan(lat[[1, 2, 3]]).all() and lat[4] == 40.1
+    tree = SphereKDTree(lat, lon)
+    km, idx = tree.query([33.0, np.nan], [-86.0, 0.0])
+    assert idx[:, 0].tolist() == [0, -1]
+    assert SphereKDTree([], []).query([0.0], [0.0])[1].tolist() == [[-1]]
+    assert nearest_table([])[1] == []
+
+
+def test_table_joins_on_unique_id():
+    feats = region_features(90, seed=43)
+    sources, targets = ("TechnicianAlpitronic",), ("WarehouseSmallParts",)
+    columns, rows = nearest_table(feats, sources, targets, k=1, radius_km=500)
+    assert columns[-3:] == ["NearestWarehouseSmallParts", "NearestWarehouseSmallPartsKm",
+                            "WarehouseSmallPartsWithin500Km"]
+    tgt = [f for f in feats if f["properties"]["LegendID"] in targets]
+    tlat, tlon = parse_locations([f["properties"]["LocationID"] for f in tgt])
+    for row in rows:
+        lat, lon = parse_locations([row["LocationID"]])
+        d = haversine_km(lat, lon, tlat, tlon)
+        assert row["NearestWarehouseSmallParts"] == tgt[int(np.argmin(d))]["properties"]["UniqueID"]
+        assert row["NearestWarehouseSmallPartsKm"] == pytest.approx(d.min(), abs=1e-3)
+        assert row["WarehouseSmallPartsWithin500Km"] == int((d <= 500).sum())
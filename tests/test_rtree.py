@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from geotools.rtree import PackedRTree, str_order
+
+
+def random_boxes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    lo = rng.uniform(-180, 170, (n, 2))
+    size = rng.exponential(2.0, (n, 2))
+    return np.column_stack((lo, lo + size))
+
+
+def brute(bounds, q):
+    minx, miny, maxx, maxy = q
+    b = bounds
+    return np.flatnonzero((b[:, 0] <= maxx) & (b[:, 1] <= maxy) & (b[:, 2] >= minx) & (b[:, 3] >= miny))
+
+
+QUERIES = [(-100, -50, -60, 10), (0, 0, 0, 0), (-180, -180, 180, 180), (500, 500, 600, 600), (10, -5, 10.5, 80)]
+
+
+@pytest.mark.parametrize("node_size", [2, 4, 16, 64])
+@pytest.mark.parametrize("n", [1, 15, 16, 17, 1000])
+def test_search_matches_brute_force(n, node_size):
+    bounds = random_boxes(n, seed=n)
+    tree = PackedRTree(bounds, node_size)
+    for q in QUERIES + [tuple(bounds[0])]:
+        assert tree.search(*q).tolist() == brute(bounds, q).tolist()
+
+
+def test_str_order_gives_the_same_answers():
+    bounds = random_boxes(700, seed=5)
+    tree = PackedRTree(bounds, order=str_order(bounds))
+    for q in QUERIES:
+        assert tree.search(*q).tolist() == brute(bounds, q).tolist()
+
+
+def test_empty_boxes_never_match_and_do_not_hide_siblings():
+    bounds = random_boxes(100, seed=6)
+    bounds[::7] = np.nan
+    tree = PackedRTree(bounds, 4)
+    everything = tree.search(-1e9, -1e9, 1e9, 1e9)
+    assert everything.tolist() == [i for i in range(100) if i % 7]
+    ok = np.isfinite(bounds).all(axis=1)
+    assert tree.extent == (bounds[ok, 0].min(), bounds[ok, 1].min(), bounds[ok, 2].max(), bounds[ok, 3].max())
+
+
+def test_empty_tree():
+    tree = PackedRTree(np.zeros((0, 4)))
+    assert tree.extent is None
+    assert tree.search(-180, -90, 180, 90).tolist() == []
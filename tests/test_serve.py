@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from geotools.serve import StaticServer, parse_range
+
+
+@pytest.mark.parametrize("header, want", [
+    (None, None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=900-", (900, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=990-2000", (990, 999)),
+    ("items=0-9", None),
+    ("bytes=0-9,20-29", None),
+    ("bytes=1000-", "bad"),
+    ("bytes=-0", "bad"),
+    ("bytes=9-3", "bad"),
+    ("bytes=a-b", "bad"),
+    ("bytes=-", "bad"),
+    ("bytes", "bad"),
+])
+def test_parse_range(header, want):
+    assert parse_range(header, 1000) == want
+
+
+def fetch(root, *headers):
+    """One GET of /data.bin through StaticServer; returns (status line, headers, body)."""
+    async def run():
+        server = await asyncio.start_server(StaticServer(root).handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(("GET /data.bin HTTP/1.1\r\nHost: x\r\nConnection: close\r\n"
+                      + "".join(h + "\r\n" for h in headers) + "\r\n").encode())
+        raw = await reader.read()
+        writer.close()
+        server.close()
+        return raw
+
+    head, _, body = asyncio.run(run()).partition(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    return lines[0], {k.lower(): v.strip() for k, _, v in (h.partition(":") for h in lines[1:])}, body
+
+
+def test_ranges_and_if_range_over_http(tmp_path):
+    data = bytes(range(256)) * 4
+    (tmp_path / "data.bin").write_bytes(data)
+    status, headers, body = fetch(tmp_path, "Range: bytes=10-19")
+    assert status.endswith("206 Partial Content") and body == data[10:20]
+    assert headers["content-range"] == f"bytes 10-19/{len(data)}"
+    tag = headers["etag"]
+    assert not tag.startswith("W/")
+    status, headers, body = fetch(tmp_path, "Range: bytes=5000-")
+    assert " 416 " in status and headers["content-range"] == f"bytes */{len(data)}"
+    assert fetch(tmp_path, "Range: bytes=0-3", f"If-Range: {tag}")[2] == data[:4]
+    assert fetch(tmp_path, "Range: bytes=0-3", f"If-Range: W/{tag}")[2] == data
+    assert " 304 " in fetch(tmp_path, f"If-None-Match: W/{tag}")[0]
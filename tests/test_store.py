@@ -0,0 +1,108 @@
+import copy
+import json
+
+import pytest
+
+from geotools.io import normalize_properties
+from geotools.store import Store, canonical, split_feature
+
+from conftest import HOLED, region_features
+
+
+def collection(feats, **head):
+    return {"type": "FeatureCollection", **head, "features": feats}
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = Store(tmp_path / "store")
+    yield s
+    s.close()
+
+
+def test_checkout_and_load_round_trip(store, tmp_path):
+    feats = region_features(40, seed=61)
+    feats[3]["geometry"] = HOLED
+    feats[4]["geometry"] = None
+    feats[5]["properties"]["Display"] = "Région – é"
+    v = store.commit(collection(feats, name="assets", crs={"type": "name"}), "assets")
+    out = tmp_path / "out.geojson"
+    store.checkout(v, out)
+    text = json.loads(out.read_text(encoding="utf-8"))
+    assert text == collection(feats, name="assets", crs={"type": "name"})
+    assert [canonical(f) for f in text["features"]] == list(store.feature_text(v))
+    loaded = store.load(v)
+    assert loaded["name"] == "assets" and loaded["features"][3]["geometry"] == HOLED
+    assert [f["properties"] for f in loaded["features"]] == [normalize_properties(f["properties"]) for f in feats]
+
+
+def test_same_content_is_not_a_new_version(store, tmp_path):
+    feats = region_features(20, seed=62)
+    a = tmp_path / "a.geojson"
+    b = tmp_path / "b.geojson"
+    a.write_text(json.dumps(collection(feats), indent=2))
+    b.write_text(json.dumps(collection(feats), separators=(",", ":")))
+    first = store.commit_file(a, "assets")
+    again = store.commit_file(b, "assets")
+    assert again["seq"] == first["seq"] == 1 and again["added"] is None
+    assert len(store.versions("assets")) == 1
+
+
+def test_only_changed_features_are_stored_and_geometry_is_shared(store):
+    feats = region_features(50, seed=63)
+    v1 = store.commit(collection(feats), "assets")
+    assert v1["added"] == 2 * 50 + 1                    # skeleton + geometry per feature, manifest
+    edited = copy.deepcopy(feats)
+    edited[7]["properties"]["AssetID"] = str(edited[7]["properties"]["AssetID"])
+    v2 = store.commit(collection(edited), "assets")
+    assert v2["added"] == 2                             # new skeleton + manifest, geometry reused
+    skel, gdata = split_feature(edited[7])
+    assert gdata == canonical(edited[7]["geometry"]) and b'"$geometry"' in skel
+
+
+def test_diff_matches_a_brute_force_comparison(store):
+    feats = region_features(60, seed=64)
+    new = copy.deepcopy(feats[5:]) + region_features(3, seed=65)
+    for f in new[:4]:
+        f["properties"]["Display"] = not f["properties"]["Display"]
+    for i, f in enumerate(new[-3:]):
+        f["properties"]["AssetID"] = 9000 + i
+    a = store.commit(collection(feats), "assets")
+    b = store.commit(collection(new), "assets")
+    d = store.diff(a, b, key="AssetID")
+    old_c, new_c = {canonical(f) for f in feats}, {canonical(f) for f in new}
+    assert d["unchanged"] == len(old_c & new_c)
+    assert sorted(k for k, _, _ in d["changed"]) == sorted(str(f["properties"]["AssetID"]) for f in new[:4])
+    assert len(d["removed"]) == 5 and len(d["added"]) == 3
+    assert {store.feature(x) for x in d["added"]} == {canonical(f) for f in new[-3:]}
+
+
+def test_resolve_by_number_offset_hash_and_time(store):
+    versions = [store.commit(collection(region_features(5, seed=s)), "assets") for s in range(66, 70)]
+    assert store.resolve("assets")["seq"] == 4
+    assert store.resolve("assets", 2)["seq"] == 2
+    assert store.resolve("assets", -1)["seq"] == 3
+    assert store.resolve("assets", versions[1]["manifest"][:10])["seq"] == 2
+    assert store.resolve("assets", at=versions[2]["created"])["seq"] == 3
+    with pytest.raises(ValueError):
+        store.resolve("assets", at=0)
+    with pytest.raises(ValueError):
+        store.resolve("other")
+
+
+def test_gc_keeps_referenced_objects_only(store):
+    v = store.commit(collection(region_features(10, seed=70)), "assets")
+    store.put_many({"0" * 64: b"orphan"})
+    store.db.commit()
+    assert store.gc()[0] == 1
+    assert store.gc() == (0, 0)
+    assert store.load(v)["features"] == store.load(store.resolve("assets"))["features"]
+
+
+def test_empty_collection(store, tmp_path):
+    v = store.commit(collection([], name="empty"), "empty")
+    assert v["features"] == 0
+    store.checkout(v, tmp_path / "e.geojson")
+    assert json.loads((tmp_path / "e.geojson").read_text()) == collection([], name="empty")
+    with pytest.raises(ValueError):
+        store.commit({"type": "Feature"}, "bad")
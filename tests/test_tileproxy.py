@@ -0,0 +1,168 @@
+import asyncio
+import math
+
+import pytest
+
+from geotools import tileproxy
+from geotools.serve import StaticServer
+from geotools.tileproxy import CacheStore, CachingProxy, UpstreamPool, cache_key, freshness, tile_range, tile_urls
+
+URL = "https://api.tomtom.com/style/2/style.json?theme=main&key=SECRET"
+
+
+class Upstream:
+    """Stand-in for UpstreamPool: answers from `respond(url, cond)` and records the calls."""
+
+    def __init__(self, respond):
+        self.respond, self.calls = respond, []
+
+    async def fetch(self, url, cond):
+        self.calls.append((url, dict(cond)))
+        await asyncio.sleep(0.01)
+        return self.respond(url, cond)
+
+    def close(self):
+        pass
+
+
+def ok(body=b"{}", **headers):
+    return lambda url, cond: (200, dict({"content-type": "application/json", "cache-control": "max-age=60"},
+                                        **headers), body)
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = CacheStore(tmp_path / "cache")
+    yield s
+    s.db.close()
+
+
+def test_cache_key_drops_api_keys_and_sorts_the_query():
+    assert cache_key("https://API.tomtom.com/a?z=1&key=K&b=2&access_token=T") == "https://api.tomtom.com/a?b=2&z=1"
+    assert cache_key(URL) == cache_key(URL.replace("SECRET", "OTHER"))
+
+
+def test_freshness_rules():
+    now = 1_000_000.0
+    assert freshness({"cache-control": "public, max-age=120"}, now) == (True, now + 120)
+    assert freshness({"cache-control": "s-maxage=5, max-age=120"}, now) == (True, now + 5)
+    assert freshness({"cache-control": "no-store"}, now)[0] is False
+    assert freshness({"cache-control": "private, max-age=60"}, now)[0] is False
+    assert freshness({"cache-control": "no-cache, max-age=60"}, now) == (True, now)
+    date = "Sun, 06 Nov 1994 08:49:37 GMT"
+    assert freshness({"date": date, "expires": "Sun, 06 Nov 1994 08:59:37 GMT"}, now) == (True, now + 600)
+    assert freshness({"date": date, "last-modified": "Sun, 06 Nov 1994 07:49:37 GMT"}, now) == (True, now + 360)
+
+
+def test_miss_then_hit_and_the_key_never_reaches_disk(store):
+    up = Upstream(ok(b'{"a":1}'))
+    proxy = CachingProxy(store, pool=up)
+    assert asyncio.run(proxy.lookup(URL))[3] == "MISS"
+    status, _, body, state = asyncio.run(proxy.lookup(URL.replace("SECRET", "OTHER")))
+    assert (status, body, state) == (200, b'{"a":1}', "HIT")
+    assert len(up.calls) == 1
+    assert store.get(cache_key(URL))["url"] == cache_key(URL)
+    assert "SECRET" not in (store.root / "index.db").read_bytes().decode("latin-1")
+
+
+def test_concurrent_misses_share_one_fetch(store):
+    up = Upstream(ok())
+    proxy = CachingProxy(store, pool=up)
+
+    async def burst():
+        return await asyncio.gather(*(proxy.lookup(URL) for _ in range(8)))
+
+    assert [r[0] for r in asyncio.run(burst())] == [200] * 8
+    assert len(up.calls) == 1
+
+
+def test_stale_entries_revalidate_and_survive_upstream_errors(store):
+    store.put(cache_key(URL), cache_key(URL), 200, {"etag": '"v1"', "content-type": "application/json"},
+              b"old", expires=0.0)
+    up = Upstream(lambda url, cond: (304, {"cache-control": "max-age=60"}, b""))
+    proxy = CachingProxy(store, pool=up)
+    status, headers, body, state = asyncio.run(proxy.lookup(URL))
+    assert (status, body, state) == (200, b"old", "REVALIDATED")
+    assert up.calls[0][1] == {"If-None-Match": '"v1"'}
+    assert asyncio.run(proxy.lookup(URL))[3] == "HIT"
+
+    def down(url, cond):
+        raise OSError("unreachable")
+
+    store.refresh(cache_key(URL), headers, 0.0)
+    proxy = CachingProxy(store, pool=Upstream(down))
+    assert asyncio.run(proxy.lookup(URL))[2:] == (b"old", "STALE")
+    assert asyncio.run(proxy.lookup(URL + "&other=1"))[0] == 502
+
+
+def test_offline_serves_any_age_and_misses_are_504(store):
+    store.put(cache_key(URL), cache_key(URL), 200, {}, b"x", expires=0.0)
+    up = Upstream(ok())
+    proxy = CachingProxy(store, offline=True, pool=up)
+    assert asyncio.run(proxy.lookup(URL))[3] == "HIT"
+    assert asyncio.run(proxy.lookup(URL + "&z=2"))[0] == 504
+    assert up.calls == []
+
+
+def test_lru_eviction_and_shared_blobs(store, monkeypatch):
+    clock = iter(range(1, 1000))
+    monkeypatch.setattr(tileproxy.time, "time", lambda: float(next(clock)))
+    store.max_bytes = 250
+    for name in "ab":
+        store.put(name, name, 200, {}, name.encode() * 100, expires=1e12)
+    assert store.get("a") is not None                 # a is now more recent than b
+    store.put("c", "c", 200, {}, b"c" * 100, expires=1e12)
+    assert [k for k in "abc" if store.get(k) is not None] == ["a", "c"]
+    store.put("d", "d", 200, {}, b"c" * 100, expires=1e12)       # same body as c
+    assert store.stats()["blobs"] == 2 and store.total_bytes() == 200
+
+
+def test_rewrite_points_allowed_hosts_at_the_proxy(store):
+    proxy = CachingProxy(store, pool=Upstream(ok()))
+    body = (b'{"sprite":"https://api.tomtom.com/sprite","tiles":["https://b.api.tomtom.com/t/{z}"],'
+            b'"glyphs":"https://example.com/g"}')
+    out = proxy.rewrite(body, "http://127.0.0.1:8787")
+    assert out == (b'{"sprite":"http://127.0.0.1:8787/api.tomtom.com/sprite",'
+                   b'"tiles":["http://127.0.0.1:8787/b.api.tomtom.com/t/{z}"],"glyphs":"https://example.com/g"}')
+    assert proxy.upstream("/api.tomtom.com/a/b?x=1") == "https://api.tomtom.com/a/b?x=1"
+    assert proxy.upstream("/evil.example/a") is None
+
+
+def slippy(lon, lat, z):
+    n = 1 << z
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+@pytest.mark.parametrize("z", [0, 1, 5, 9])
+def test_tile_range_matches_slippy_map_tiles(z):
+    bbox = (-125.0, 24.0, -66.0, 50.0)
+    (xa, xb), (ya, yb) = tile_range(bbox, z)
+    (sxa, sya), (sxb, syb) = slippy(bbox[0], bbox[3], z), slippy(bbox[2], bbox[1], z)
+    assert (xa, xb, ya, yb) == (sxa, sxb, sya, syb)
+    urls = tile_urls("https://t/{z}/{x}/{y}.png", bbox, [z])
+    assert len(urls) == (xb - xa + 1) * (yb - ya + 1)
+    assert tile_range((-180, -85.06, 180, 85.06), z) == ((0, (1 << z) - 1), (0, (1 << z) - 1))
+
+
+def test_real_pool_against_a_local_static_server(store, tmp_path):
+    (tmp_path / "www").mkdir()
+    (tmp_path / "www" / "style.json").write_text('{"version":8}')
+
+    async def run():
+        server = await asyncio.start_server(StaticServer(tmp_path / "www").handle, "127.0.0.1", 0)
+        url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/style.json?key=K"
+        proxy = CachingProxy(store, pool=UpstreamPool())
+        try:
+            # the static server says no-cache: stored, then revalidated with its ETag
+            first = await proxy.lookup(url)
+            second = await proxy.lookup(url)
+        finally:
+            proxy.pool.close()
+            server.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert (first[0], first[2], first[3]) == (200, b'{"version":8}', "MISS")
+    assert (second[0], second[2], second[3]) == (200, b'{"version":8}', "REVALIDATED")